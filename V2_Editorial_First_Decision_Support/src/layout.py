@@ -0,0 +1,195 @@
+from typing import List, Tuple
+import numpy as np
+from span_store import SpanTable
+
+# PyMuPDF span flag bits
+FLAG_ITALIC = 2
+FLAG_BOLD = 16
+
+_BOLD_FONT_WORDS = ("bold", "black", "heavy", "semibold", "demi")
+# A heading is a short line: at most this many words and at least two letters
+_MAX_HEADING_WORDS = 12
+# A font size larger than the body is a heading size only if it carries
+# less than this share of the document's characters
+_MAX_HEADING_SHARE = 0.2
+# Bold body-size lines are headings only if bold text is this rare
+_MAX_BOLD_SHARE = 0.3
+# Interior part of the text width searched for column gutters, and the
+# coverage (relative to the busiest x position) below which x is a gutter
+_GUTTER_SEARCH = (0.2, 0.8)
+_GUTTER_COVERAGE = 0.05
+_COVERAGE_BINS = 200
+# Spans wider than this share of the text width are never part of a column
+_MAX_COLUMN_WIDTH = 0.6
+
+class Layout:
+    """
+    Reading order and heading levels of the spans in a SpanTable.
+
+    All statistics are computed over NumPy views of the table's columns:
+    the body font size is the text-weighted mode of the font-size
+    histogram, heading sizes are the rarer sizes above it (largest first),
+    columns are found as empty vertical gutters in each page's x-coverage
+    histogram, and the reading order is one lexsort over
+    (page, band, column, y, x), where bands are separated by spans that
+    cross a gutter such as titles and full-width figures.
+    """
+
+    def __init__(self, table: SpanTable):
+        """
+        Analyze the layout of a span table.
+
+        Args:
+            table (SpanTable): Spans in extraction order
+        """
+        count = len(table)
+        self.count = count
+        if count == 0:
+            self.order = np.zeros(0, dtype=np.int64)
+            self.heading_level = np.zeros(0, dtype=np.int8)
+            self.column = np.zeros(0, dtype=np.int16)
+            self.body_size = 0.0
+            return
+
+        offsets = np.frombuffer(table.offsets, dtype=np.uint32).astype(np.int64)
+        page = np.frombuffer(table.page, dtype=np.uint32).astype(np.int64)
+        size = np.round(np.frombuffer(table.font_size, dtype=np.float32) * 2) / 2
+        flags = np.frombuffer(table.flags, dtype=np.uint32)
+        font_index = np.frombuffer(table.font_index, dtype=np.uint32)
+        bbox = np.frombuffer(table.bbox, dtype=np.float32).reshape(count, 4)
+        text = np.frombuffer(table.text, dtype=np.uint8)
+
+        lengths = np.diff(offsets)
+        words = _count_in_spans(text == ord(" "), offsets) + 1
+        letters = _count_in_spans(((text | 0x20) >= ord("a")) & ((text | 0x20) <= ord("z")) | (text >= 0x80), offsets)
+
+        bold_font = np.array([any(word in font.lower() for word in _BOLD_FONT_WORDS) for font in table.fonts] or [False])
+        bold = ((flags & FLAG_BOLD) != 0) | bold_font[font_index]
+
+        self.body_size = _body_size(size, lengths)
+        self.column, band = self._columns(page, bbox)
+        self.heading_level = self._heading_levels(page, size, bold, bbox, lengths, words, letters)
+        self.order = np.lexsort((bbox[:, 0], np.round(bbox[:, 1]), self.column, band, page))
+
+    def _heading_levels(self, page: np.ndarray, size: np.ndarray, bold: np.ndarray, bbox: np.ndarray,
+                        lengths: np.ndarray, words: np.ndarray, letters: np.ndarray) -> np.ndarray:
+        """
+        Assign a heading level to every span (0 for body text).
+
+        Args:
+            page, size, bold, bbox, lengths, words, letters (np.ndarray): Per-span columns
+
+        Returns:
+            np.ndarray: int8 heading level of each span, 1 being the top level
+        """
+        total = lengths.sum()
+        short = letters >= 2
+
+        # Whole lines are judged, so a heading split into spans ("2." + "Methods") stays together
+        line_key = (page * 100 + self.column) * 100000 + np.round(bbox[:, 3]).astype(np.int64)
+        _, line = np.unique(line_key, return_inverse=True)
+        line_words = np.bincount(line, weights=words)
+        short &= line_words[line] <= _MAX_HEADING_WORDS
+
+        sizes, size_class = np.unique(size, return_inverse=True)
+        size_chars = np.bincount(size_class, weights=lengths)
+        heading_sizes = sizes[(sizes > self.body_size + 0.5) & (size_chars < _MAX_HEADING_SHARE * total)]
+        # Largest size is level 1
+        heading_sizes = heading_sizes[::-1]
+
+        level = np.zeros(len(size), dtype=np.int8)
+        if len(heading_sizes):
+            rank = np.searchsorted(-heading_sizes, -size)
+            is_heading_size = np.isin(size, heading_sizes)
+            level[is_heading_size & short] = rank[is_heading_size & short] + 1
+
+        if lengths[bold].sum() < _MAX_BOLD_SHARE * total:
+            # Bold lines at body size with no regular text on them are the lowest heading level
+            regular_on_line = np.bincount(line, weights=~bold)
+            bold_heading = bold & short & (size >= self.body_size) & (regular_on_line[line] == 0) & (level == 0)
+            level[bold_heading] = len(heading_sizes) + 1
+
+        return level
+
+    def _columns(self, page: np.ndarray, bbox: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find each page's text columns and the bands between full-width spans.
+
+        Args:
+            page, bbox (np.ndarray): Per-span columns
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Column index and band index of each span
+        """
+        column = np.zeros(len(page), dtype=np.int16)
+        full_width = np.zeros(len(page), dtype=bool)
+        self.page_columns = {}
+
+        # Group span indices by page
+        order = np.argsort(page, kind="stable")
+        pages, starts = np.unique(page[order], return_index=True)
+        for number, members in zip(pages, np.split(order, starts[1:])):
+            gutters = _find_gutters(bbox[members])
+            self.page_columns[int(number)] = len(gutters) + 1
+            if not gutters:
+                continue
+            left = np.searchsorted(gutters, bbox[members, 0])
+            right = np.searchsorted(gutters, bbox[members, 2])
+            column[members] = left
+            full_width[members] = right > left
+
+        # A band starts at every full-width span; within a band columns are read one after another
+        full_key = np.sort(page[full_width] * 1e6 + bbox[full_width, 1])
+        band = np.searchsorted(full_key, page * 1e6 + bbox[:, 1], side="right")
+        column[full_width] = 0
+        return column, band
+
+def _count_in_spans(mask: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """Count the True bytes of a text-wide mask within each span."""
+    cumulative = np.concatenate(([0], np.cumsum(mask, dtype=np.int64)))
+    return cumulative[offsets[1:]] - cumulative[offsets[:-1]]
+
+def _body_size(size: np.ndarray, lengths: np.ndarray) -> float:
+    """The font size carrying the most characters."""
+    sizes, size_class = np.unique(size, return_inverse=True)
+    return float(sizes[np.argmax(np.bincount(size_class, weights=lengths))])
+
+def _find_gutters(boxes: np.ndarray) -> List[float]:
+    """
+    Find the x positions of the empty vertical strips between text columns on one page.
+
+    Args:
+        boxes (np.ndarray): Bounding boxes of the page's spans, shape (n, 4)
+
+    Returns:
+        List[float]: Gutter centers from left to right
+    """
+    left, right = boxes[:, 0].min(), boxes[:, 2].max()
+    width = right - left
+    if width <= 0:
+        return []
+
+    # Titles and captions that run across the page would hide the gutter
+    boxes = boxes[boxes[:, 2] - boxes[:, 0] < _MAX_COLUMN_WIDTH * width]
+    if len(boxes) < 4:
+        return []
+
+    # Coverage histogram: how many spans cover each x bin
+    start = np.clip(((boxes[:, 0] - left) / width * _COVERAGE_BINS).astype(np.int64), 0, _COVERAGE_BINS - 1)
+    end = np.clip(((boxes[:, 2] - left) / width * _COVERAGE_BINS).astype(np.int64), 0, _COVERAGE_BINS - 1)
+    delta = np.zeros(_COVERAGE_BINS + 1, dtype=np.int64)
+    np.add.at(delta, start, 1)
+    np.add.at(delta, end + 1, -1)
+    coverage = np.cumsum(delta[:-1])
+
+    low, high = (int(_COVERAGE_BINS * bound) for bound in _GUTTER_SEARCH)
+    empty = np.zeros(_COVERAGE_BINS, dtype=bool)
+    empty[low:high] = coverage[low:high] <= _GUTTER_COVERAGE * coverage.max()
+    if not empty.any():
+        return []
+
+    # Centers of the runs of empty bins
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], empty.astype(np.int8), [0]))))
+    run_starts, run_ends = edges[::2], edges[1::2]
+    centers = (run_starts + run_ends) / 2 / _COVERAGE_BINS * width + left
+    return [float(center) for center in centers]
@@ -1,8 +1,25 @@
 import argparse
 import json
 import os
-from typing import List
+import sys
+import threading
+import time
+from functools import partial
+from typing import Any, Callable, Dict, List, Tuple
+
+# Pipeline, cache, telemetry and API infrastructure shared with the V3 tool
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "common"))
+
+from batch import Pipeline, run_pipeline, serve_cached, watch_manuscripts
+from batch_api import create_backend, load_job, save_job, wait_for_batch, write_batch_input
+from job_service import JobService, serve_jobs
 from requirements_checker import RequirementsChecker
+from rate_limiter import RateLimiter
+from result_cache import ResultCache
+from run_budget import BudgetScheduler, admit_manuscript, order_manuscripts, settle_manuscript
+from run_manifest import PARSED, SUBMITTED, RunManifest
+from telemetry import Telemetry, span
+from watcher import FolderWatcher
 
 def read_requirements(requirements_path: str) -> List[str]:
     """
@@ -33,23 +50,20 @@ def get_pdf_files(directory: str) -> List[str]:
             pdf_files.append(os.path.join(directory, file))
     return pdf_files
 
-def analyze_manuscript(checker: RequirementsChecker, pdf_path: str, requirements: List[str], output_dir: str) -> None:
+def save_results(checker: RequirementsChecker, pdf_path: str, results: Dict[str, Any], output_dir: str) -> None:
     """
-    Analyze a single manuscript and save results to a file.
+    Format analysis results and save them next to the other outputs.
     
     Args:
         checker (RequirementsChecker): The requirements checker instance
         pdf_path (str): Path to the PDF file
-        requirements (List[str]): List of requirements to check
+        results (Dict[str, Any]): Analysis results
         output_dir (str): Directory to save the results
     """
-    try:
-        # Get the base filename without extension
-        base_name = os.path.splitext(os.path.basename(pdf_path))[0]
-        
-        # Analyze manuscript
-        results = checker.check_manuscript(pdf_path, requirements)
-        
+    # Get the base filename without extension
+    base_name = os.path.splitext(os.path.basename(pdf_path))[0]
+    
+    with span("write"):
         # Format results
         formatted_results = checker.format_results(results)
         
@@ -57,46 +71,639 @@ def analyze_manuscript(checker: RequirementsChecker, pdf_path: str, requirements
         output_file = os.path.join(output_dir, f"{base_name}_analysis.txt")
         with open(output_file, 'w') as f:
             f.write(formatted_results)
+        
+    print(f"Analysis completed for {base_name}")
+    print(f"Results saved to: {output_file}\n")
+
+def stream_writer(checker: RequirementsChecker, pdf_path: str, output_dir: str) -> Callable[[Dict[str, Any]], None]:
+    """
+    Build a progress callback that writes each requirement to the analysis file as soon as it is checked.
+    
+    The complete analysis overwrites the file once the manuscript is finished.
+    
+    Args:
+        checker (RequirementsChecker): The requirements checker instance
+        pdf_path (str): Path to the PDF file
+        output_dir (str): Directory to save the results
+        
+    Returns:
+        Callable[[Dict[str, Any]], None]: Callback for check_manuscript/check_prepared
+    """
+    base_name = os.path.splitext(os.path.basename(pdf_path))[0]
+    output_file = os.path.join(output_dir, f"{base_name}_analysis.txt")
+    lock = threading.Lock()
+    started = []
+    
+    def on_result(req_analysis: Dict[str, Any]) -> None:
+        # Fan-out batches report from several threads
+        with lock:
+            with open(output_file, 'a' if started else 'w') as f:
+                if not started:
+                    f.write("=== Manuscript Requirements Analysis ===\n\n")
+                    started.append(True)
+                f.write(checker.format_requirement(req_analysis) + "\n\n")
+            print(f"{base_name}: {'✓' if req_analysis.get('is_met') else '✗'} {req_analysis.get('requirement')}")
+    
+    return on_result
+
+def analyze_manuscript(checker: RequirementsChecker, pdf_path: str, requirements: List[str], output_dir: str,
+                       telemetry: Telemetry, structured_text: str = None, stream: bool = False) -> Dict[str, Any]:
+    """
+    Analyze a single manuscript and save results to a file.
+    
+    Args:
+        checker (RequirementsChecker): The requirements checker instance
+        pdf_path (str): Path to the PDF file
+        requirements (List[str]): List of requirements to check
+        output_dir (str): Directory to save the results
+        telemetry (Telemetry): Records the manuscript's stage timings and token usage
+        structured_text (str, optional): Pre-parsed manuscript text; the PDF is parsed if omitted
+        stream (bool): Write each requirement to the output file as soon as it is checked
+        
+    Returns:
+        Dict[str, Any]: The manuscript's telemetry record
+    """
+    status, error = "ok", None
+    with telemetry.manuscript(pdf_path) as trace:
+        try:
+            # Analyze manuscript
+            on_result = stream_writer(checker, pdf_path, output_dir) if stream else None
+            if structured_text is None:
+                results = checker.check_manuscript(pdf_path, requirements, on_result)
+            else:
+                results = checker.check_prepared(structured_text, requirements, pdf_path, on_result)
+            if trace.counters["cache_hits"]:
+                status = "cached"
             
-        print(f"Analysis completed for {base_name}")
-        print(f"Results saved to: {output_file}\n")
+            save_results(checker, pdf_path, results, output_dir)
+            
+        except Exception as e:
+            status, error = "error", str(e)
+            print(f"Error processing {pdf_path}: {error}\n")
+    return telemetry.finish(pdf_path, status, error)
+
+def job_requirements(fields: Dict[str, Any], default: List[str]) -> List[str]:
+    """
+    Read the requirements of a job submitted to the service.
+    
+    Args:
+        fields (Dict[str, Any]): JSON body of the job request
+        default (List[str]): Requirements for jobs that do not send their own, if any
         
-    except Exception as e:
-        print(f"Error processing {pdf_path}: {str(e)}\n")
+    Returns:
+        List[str]: Requirements to check
+        
+    Raises:
+        ValueError: If the requirements are missing or malformed
+    """
+    requirements = fields.get("requirements", default)
+    if not requirements or not isinstance(requirements, list) or \
+            not all(isinstance(requirement, str) and requirement.strip() for requirement in requirements):
+        raise ValueError('"requirements" must be a list of requirement texts')
+    return requirements
 
-def main():
+def submit_batch(checker: RequirementsChecker, pdf_files: List[str], requirements: List[str], output_dir: str,
+                 batch_dir: str, backend_name: str, telemetry: Telemetry) -> str:
+    """
+    Parse manuscripts and submit their analysis requests as one batch job.
+    
+    Manuscripts with a cached analysis are saved right away and left out
+    of the job.
+    
+    Args:
+        checker (RequirementsChecker): The requirements checker instance
+        pdf_files (List[str]): PDF files to analyze
+        requirements (List[str]): List of requirements to check
+        output_dir (str): Directory to save the results
+        batch_dir (str): Directory in which the job directory is created
+        backend_name (str): "openai" or "local"
+        telemetry (Telemetry): Records the parse and prompt-building stages of each manuscript
+        
+    Returns:
+        str: Job directory to pass to --batch-collect, or None if nothing was submitted
+    """
+    job_dir = os.path.join(batch_dir, time.strftime("job_%Y%m%d_%H%M%S"))
+    os.makedirs(job_dir)
+    local_dir = os.path.join(batch_dir, "local")
+    
+    requests = []
+    manuscripts = []
+    for pdf_path in pdf_files:
+        with telemetry.manuscript(pdf_path):
+            cached = checker.get_cached(pdf_path, requirements)
+            if cached is not None:
+                save_results(checker, pdf_path, cached, output_dir)
+                telemetry.finish(pdf_path, "cached")
+                continue
+            try:
+                structured_text = checker.prepare_manuscript(pdf_path, checker.parse_cache_dir,
+                                                             checker.max_pages, checker.page_workers)
+                manuscript_requests, plan = checker.batch_requests(structured_text, requirements)
+            except Exception as e:
+                print(f"Error processing {pdf_path}: {str(e)}\n")
+                telemetry.finish(pdf_path, "error", str(e))
+                continue
+        telemetry.finish(pdf_path, "submitted")
+        custom_ids = [f"{len(manuscripts)}-{i}" for i in range(len(manuscript_requests))]
+        requests.extend(zip(custom_ids, manuscript_requests))
+        manuscripts.append({"pdf_path": pdf_path, "custom_ids": custom_ids, "plan": plan})
+    
+    if not manuscripts:
+        os.rmdir(job_dir)
+        print("Nothing to submit")
+        return None
+    
+    job = {
+        "backend": backend_name,
+        "local_dir": local_dir,
+        "batch_id": None,
+        "requirements": requirements,
+        "options": {"evidence_k": checker.evidence_k, "use_rules": checker.use_rules, "max_pages": checker.max_pages},
+        "manuscripts": manuscripts
+    }
+    if requests:
+        input_path = os.path.join(job_dir, "requests.jsonl")
+        write_batch_input(input_path, requests)
+        job["batch_id"] = create_backend(backend_name, checker.openai_client, local_dir).submit(input_path)
+        print(f"Submitted batch {job['batch_id']} with {len(requests)} requests for {len(manuscripts)} manuscripts")
+    save_job(job_dir, job)
+    
+    return job_dir
+
+def collect_batch(checker: RequirementsChecker, job_dir: str, output_dir: str, poll_interval: float,
+                  telemetry: Telemetry) -> int:
+    """
+    Wait for a batch job to finish and save the analysis of each manuscript.
+    
+    Args:
+        checker (RequirementsChecker): The requirements checker instance, created with the job's options
+        job_dir (str): Job directory written by submit_batch
+        output_dir (str): Directory to save the results
+        poll_interval (float): Seconds between batch status checks
+        telemetry (Telemetry): Records the parse and write stages of each manuscript
+        
+    Returns:
+        int: Exit code
+    """
+    job = load_job(job_dir)
+    
+    contents = {}
+    if job["batch_id"]:
+        backend = create_backend(job["backend"], checker.openai_client, job["local_dir"])
+        status = wait_for_batch(backend, job["batch_id"], poll_interval)
+        if status not in ("completed", "expired"):
+            print(f"Batch {job['batch_id']} ended with status {status}")
+            return 1
+        contents = backend.results(job["batch_id"])
+    
+    for manuscript in job["manuscripts"]:
+        pdf_path = manuscript["pdf_path"]
+        responses = [contents.get(custom_id) for custom_id in manuscript["custom_ids"]]
+        if any(response is None for response in responses):
+            print(f"Error processing {pdf_path}: batch request failed or did not complete\n")
+            telemetry.finish(pdf_path, "error", "batch request failed or did not complete")
+            continue
+        status, error = "ok", None
+        with telemetry.manuscript(pdf_path):
+            try:
+                results = checker.finish_batch(manuscript["plan"], responses, job["requirements"], pdf_path)
+                save_results(checker, pdf_path, results, output_dir)
+            except Exception as e:
+                status, error = "error", str(e)
+                print(f"Error processing {pdf_path}: {error}\n")
+        telemetry.finish(pdf_path, status, error)
+    
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the command-line parser.
+    
+    Returns:
+        argparse.ArgumentParser: The parser
+    """
     parser = argparse.ArgumentParser(description='Manuscript Requirements Checker')
     parser.add_argument('--manuscripts-dir', default='manuscripts', 
                       help='Directory containing PDF manuscripts (default: manuscripts)')
-    parser.add_argument('--requirements', required=True, help='Path to the requirements text file')
+    parser.add_argument('--requirements', help='Path to the requirements text file (required unless collecting a batch)')
     parser.add_argument('--output-dir', default='analysis_results',
                       help='Directory to save analysis results (default: analysis_results)')
     parser.add_argument('--api-key', help='OpenAI API key (optional if set in environment)')
+    parser.add_argument('--workers', type=int, default=1,
+                      help='Number of processes used to parse PDFs (default: 1)')
+    parser.add_argument('--max-inflight', type=int, default=1,
+                      help='Maximum number of concurrent OpenAI requests (default: 1)')
+    parser.add_argument('--rpm', type=int, metavar='N',
+                      help='Stay under N OpenAI requests per minute across all concurrent requests (default: no limit)')
+    parser.add_argument('--tpm', type=int, metavar='N',
+                      help='Stay under N OpenAI tokens per minute across all concurrent requests (default: no limit)')
+    parser.add_argument('--max-pages', type=int,
+                      help='Only parse this many leading pages of each PDF (default: all pages)')
+    parser.add_argument('--page-workers', type=int, default=1,
+                      help='Number of processes that parse page ranges of one PDF in parallel (default: 1)')
+    parser.add_argument('--fan-out', type=int, metavar='BATCH_SIZE',
+                      help='Check requirements in concurrent batches of this size, each sent only its relevant sections')
+    parser.add_argument('--evidence-k', type=int, metavar='K',
+                      help='Send only the K most relevant passages per requirement instead of the full text')
+    parser.add_argument('--stream', action='store_true',
+                      help='Stream completions and write each result to the output file as soon as it is ready')
+    parser.add_argument('--no-rules', action='store_true',
+                      help='Send every requirement to the model instead of checking measurable ones locally')
+    parser.add_argument('--cache', default=os.path.join('analysis_cache', 'results.sqlite3'),
+                      help='Path to the result cache database; the cache is on by default and written to '
+                           'analysis_cache/results.sqlite3 (turn it off with --no-cache)')
+    parser.add_argument('--no-cache', action='store_true', help='Disable the result and parsed-document caches')
+    parser.add_argument('--parse-cache-dir', default=os.path.join('analysis_cache', 'spans'),
+                      help='Directory for parsed-document span tables (default: analysis_cache/spans)')
+    parser.add_argument('--cache-max-mb', type=float,
+                      help='Evict least recently used cache entries beyond this size in MB')
+    parser.add_argument('--cache-max-age-days', type=float,
+                      help='Evict cache entries older than this many days')
+    parser.add_argument('--batch-submit', action='store_true',
+                      help='Submit all manuscripts as one Batch API job instead of calling the API directly')
+    parser.add_argument('--batch-collect', metavar='JOB_DIR',
+                      help='Wait for a submitted batch job and save its results')
+    parser.add_argument('--batch-dir', default='batch_jobs',
+                      help='Directory for batch job files (default: batch_jobs)')
+    parser.add_argument('--batch-backend', choices=['openai', 'local'], default='openai',
+                      help='Submit to the OpenAI Batch API or to a local file-based stand-in (default: openai)')
+    parser.add_argument('--poll-interval', type=float, default=60,
+                      help='Seconds between batch status checks when collecting (default: 60)')
+    parser.add_argument('--telemetry', metavar='FILE',
+                      help='Append per-manuscript stage timings, token usage, retries and cache hits as JSON lines')
+    parser.add_argument('--metrics-file', metavar='FILE',
+                      help='Write run-wide metrics in the Prometheus text format, updated after each manuscript')
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                      help='Serve the Prometheus metrics at http://127.0.0.1:PORT/metrics while running')
+    parser.add_argument('--max-run-tokens', type=int, metavar='N',
+                      help='Stop admitting manuscripts once their estimated prompt and completion tokens would exceed N')
+    parser.add_argument('--max-run-cost', type=float, metavar='USD',
+                      help='Stop admitting manuscripts once their estimated cost at list prices would exceed USD')
+    parser.add_argument('--downgrade-model', metavar='MODEL',
+                      help='Analyze manuscripts that no longer fit the run budget with this cheaper model (e.g. gpt-4o-mini) instead of deferring them')
+    parser.add_argument('--priority-manifest', metavar='FILE',
+                      help='JSON file with a record per PDF file name; manuscripts are analyzed in the order of --priority-field')
+    parser.add_argument('--priority-field', default='priority',
+                      help='Manifest field to order manuscripts by (default: priority); unlisted manuscripts come last, oldest first')
+    parser.add_argument('--priority-desc', action='store_true',
+                      help='Analyze manuscripts with the largest --priority-field value first')
+    parser.add_argument('--watch', action='store_true',
+                      help='Keep running and analyze PDFs as they are added to or changed in the manuscripts directory')
+    parser.add_argument('--watch-interval', type=float, default=2,
+                      help='Seconds between directory scans where inotify is not available (default: 2)')
+    parser.add_argument('--watch-settle', type=float, default=2,
+                      help='Seconds a PDF must stay unmodified before it is picked up (default: 2)')
+    parser.add_argument('--serve', type=int, metavar='PORT',
+                      help='Run an HTTP job service on PORT instead of analyzing the manuscripts directory')
+    parser.add_argument('--host', default='127.0.0.1',
+                      help='Interface the job service binds to (default: 127.0.0.1)')
+    parser.add_argument('--max-queued', type=int, default=100,
+                      help='Jobs the service queues before refusing new ones with 503 (default: 100)')
+    parser.add_argument('--tenant-concurrency', type=int, default=2,
+                      help='Jobs of one tenant (X-Tenant header) that run at the same time (default: 2)')
+    parser.add_argument('--tenant-queued', type=int, default=20,
+                      help='Jobs of one tenant the service queues before refusing more with 429 (default: 20)')
+    parser.add_argument('--resume', action='store_true',
+                      help='Continue the run recorded in the run manifest (--manifest, default: run_manifest.jsonl '
+                           'in the output directory): skip manuscripts that are done and unchanged or submitted, '
+                           'and retry the failed and unfinished ones')
+    parser.add_argument('--manifest', metavar='FILE',
+                      help='Record the state of each manuscript in this run manifest, so an interrupted run can be '
+                           'continued with --resume (not written by default)')
+    parser.add_argument('--max-attempts', type=int, default=3,
+                      help='With --resume, stop retrying manuscripts that failed this many times (default: 3)')
+    return parser
+
+def create_checker(args: argparse.Namespace, cache: ResultCache, rate_limiter: RateLimiter,
+                   model: str = None) -> RequirementsChecker:
+    """
+    Create a requirements checker configured from the command line.
+    
+    Args:
+        args (argparse.Namespace): Command-line arguments
+        cache (ResultCache): Result cache, if any
+        rate_limiter (RateLimiter): Requests/tokens-per-minute budget of the run, if any
+        model (str, optional): Model to use instead of the checker's default
+        
+    Returns:
+        RequirementsChecker: The checker
+    """
+    checker = RequirementsChecker(
+        api_key=args.api_key,
+        cache=cache,
+        parse_cache_dir=None if args.no_cache else args.parse_cache_dir,
+        fan_out_batch_size=args.fan_out,
+        evidence_k=args.evidence_k,
+        use_rules=not args.no_rules,
+        max_pages=args.max_pages,
+        page_workers=args.page_workers,
+        rate_limiter=rate_limiter
+    )
+    if model:
+        checker.openai_client.model = model
+    return checker
+
+def run_batch(args: argparse.Namespace, checker: RequirementsChecker, pdf_files: List[str], requirements: List[str],
+              manifest: RunManifest, telemetry: Telemetry) -> int:
+    """
+    Submit the manuscripts as a batch job, or collect a submitted one.
+    
+    Args:
+        args (argparse.Namespace): Command-line arguments
+        checker (RequirementsChecker): The requirements checker instance
+        pdf_files (List[str]): PDF files to submit
+        requirements (List[str]): List of requirements to check
+        manifest (RunManifest): Run manifest to mark submitted manuscripts in, if any
+        telemetry (Telemetry): Records each manuscript
+        
+    Returns:
+        int: Exit code
+    """
+    if args.batch_collect:
+        return collect_batch(checker, args.batch_collect, args.output_dir, args.poll_interval, telemetry)
+    
+    job_dir = submit_batch(checker, pdf_files, requirements, args.output_dir, args.batch_dir, args.batch_backend,
+                           telemetry)
+    if job_dir is not None:
+        if manifest is not None:
+            job = load_job(job_dir)
+            job["manifest"] = os.path.abspath(manifest.path)
+            save_job(job_dir, job)
+            for manuscript in job["manuscripts"]:
+                manifest.mark(manuscript["pdf_path"], SUBMITTED, job=job_dir)
+        print(f"Collect the results with: --batch-collect {job_dir}")
+    return 0
+
+def run_serve(args: argparse.Namespace, checker: RequirementsChecker, requirements: List[str],
+              telemetry: Telemetry) -> int:
+    """
+    Run the HTTP job service until it is stopped.
+    
+    Args:
+        args (argparse.Namespace): Command-line arguments
+        checker (RequirementsChecker): The requirements checker instance
+        requirements (List[str]): Requirements for jobs that do not send their own, if any
+        telemetry (Telemetry): Records each job
+        
+    Returns:
+        int: Exit code
+    """
+    service = JobService(
+        partial(RequirementsChecker.prepare_manuscript, parse_cache_dir=checker.parse_cache_dir,
+                max_pages=checker.max_pages, page_workers=checker.page_workers),
+        lambda pdf_path, structured_text, requirements, on_item: checker.check_prepared(
+            structured_text, requirements, pdf_path, on_item),
+        telemetry,
+        lookup=checker.get_cached,
+        workers=args.workers,
+        max_inflight=args.max_inflight,
+        max_queued=args.max_queued,
+        tenant_concurrency=args.tenant_concurrency,
+        tenant_queued=args.tenant_queued
+    )
+    serve_jobs(service, lambda fields: job_requirements(fields, requirements), args.serve, args.host)
+    return 0
+
+def pipeline_stages(args: argparse.Namespace, checker: RequirementsChecker,
+                    checkers: Dict[str, RequirementsChecker], scheduler: BudgetScheduler, requirements: List[str],
+                    manifest: RunManifest, telemetry: Telemetry) -> Tuple[Callable, Callable, Callable]:
+    """
+    Build the parse, analyze and admit stages of an analysis pipeline.
+    
+    Args:
+        args (argparse.Namespace): Command-line arguments
+        checker (RequirementsChecker): The requirements checker instance
+        checkers (Dict[str, RequirementsChecker]): Checker for each model the scheduler may choose
+        scheduler (BudgetScheduler): The run budget, if any
+        requirements (List[str]): List of requirements to check
+        manifest (RunManifest): Run manifest to mark parsed manuscripts in, if any
+        telemetry (Telemetry): Records each manuscript
+        
+    Returns:
+        Tuple[Callable, Callable, Callable]: prepare, analyze and admit
+    """
+    prepare = partial(RequirementsChecker.prepare_manuscript, parse_cache_dir=checker.parse_cache_dir,
+                      max_pages=checker.max_pages, page_workers=checker.page_workers)
+    
+    def analyze(pdf_path: str, structured_text: str) -> None:
+        if manifest is not None:
+            manifest.mark(pdf_path, PARSED)
+        if scheduler is None:
+            analyze_manuscript(checker, pdf_path, requirements, args.output_dir, telemetry, structured_text,
+                               args.stream)
+            return
+        record = analyze_manuscript(checkers[scheduler.model_for(pdf_path)], pdf_path, requirements,
+                                    args.output_dir, telemetry, structured_text, args.stream)
+        settle_manuscript(scheduler, pdf_path, record)
+    
+    def admit(pdf_path: str, structured_text: str) -> bool:
+        return admit_manuscript(scheduler, checkers, pdf_path, structured_text, requirements, telemetry)
     
+    return prepare, analyze, admit
+
+def run_watch(args: argparse.Namespace, checker: RequirementsChecker, checkers: Dict[str, RequirementsChecker],
+              scheduler: BudgetScheduler, requirements: List[str], telemetry: Telemetry) -> int:
+    """
+    Analyze manuscripts as they appear in the manuscripts directory until stopped.
+    
+    Args:
+        args (argparse.Namespace): Command-line arguments
+        checker (RequirementsChecker): The requirements checker instance
+        checkers (Dict[str, RequirementsChecker]): Checker for each model the scheduler may choose
+        scheduler (BudgetScheduler): The run budget, if any
+        requirements (List[str]): List of requirements to check
+        telemetry (Telemetry): Records each manuscript
+        
+    Returns:
+        int: Exit code
+    """
+    prepare, analyze, admit = pipeline_stages(args, checker, checkers, scheduler, requirements, None, telemetry)
+    
+    # Manuscripts are admitted to the budget in the order they arrive
+    def analyze_admitted(pdf_path: str, structured_text: str) -> None:
+        if scheduler is None or admit(pdf_path, structured_text):
+            analyze(pdf_path, structured_text)
+    
+    watch_manuscripts(
+        FolderWatcher(args.manuscripts_dir, poll_interval=args.watch_interval, settle_seconds=args.watch_settle),
+        Pipeline(prepare, analyze_admitted, workers=args.workers, max_inflight=args.max_inflight,
+                 telemetry=telemetry),
+        lambda pdf_path: serve_cached(pdf_path, requirements, checker.get_cached,
+                                      partial(save_results, checker, output_dir=args.output_dir), telemetry)
+    )
+    return 0
+
+def run_once(args: argparse.Namespace, checker: RequirementsChecker, checkers: Dict[str, RequirementsChecker],
+             scheduler: BudgetScheduler, pdf_files: List[str], requirements: List[str], manifest: RunManifest,
+             telemetry: Telemetry) -> int:
+    """
+    Analyze the manuscripts found at startup.
+    
+    With several workers, concurrent requests or a run budget the
+    manuscripts go through a pipeline; otherwise they are analyzed one
+    after the other.
+    
+    Args:
+        args (argparse.Namespace): Command-line arguments
+        checker (RequirementsChecker): The requirements checker instance
+        checkers (Dict[str, RequirementsChecker]): Checker for each model the scheduler may choose
+        scheduler (BudgetScheduler): The run budget, if any
+        pdf_files (List[str]): PDF files to analyze, most urgent first
+        requirements (List[str]): List of requirements to check
+        manifest (RunManifest): Run manifest to mark parsed manuscripts in, if any
+        telemetry (Telemetry): Records each manuscript
+        
+    Returns:
+        int: Exit code
+    """
+    if args.workers == 1 and args.max_inflight == 1 and scheduler is None:
+        for pdf_path in pdf_files:
+            analyze_manuscript(checker, pdf_path, requirements, args.output_dir, telemetry, stream=args.stream)
+        return 0
+    
+    prepare, analyze, admit = pipeline_stages(args, checker, checkers, scheduler, requirements, manifest, telemetry)
+    
+    # Serve unchanged manuscripts from the cache without parsing them
+    pending = [pdf_path for pdf_path in pdf_files
+               if not serve_cached(pdf_path, requirements, checker.get_cached,
+                                   partial(save_results, checker, output_dir=args.output_dir), telemetry)]
+    
+    # Parse in worker processes and overlap the API calls
+    run_pipeline(
+        pending,
+        prepare,
+        analyze,
+        workers=args.workers,
+        max_inflight=args.max_inflight,
+        telemetry=telemetry,
+        admit=None if scheduler is None else admit
+    )
+    return 0
+
+def main():
+    parser = build_parser()
     args = parser.parse_args()
+    if not args.requirements and not args.batch_collect and args.serve is None:
+        parser.error('--requirements is required unless --batch-collect or --serve is given')
+    if args.watch and (args.batch_submit or args.batch_collect):
+        parser.error('--watch cannot be combined with --batch-submit or --batch-collect')
+    if args.serve is not None and (args.watch or args.batch_submit or args.batch_collect):
+        parser.error('--serve cannot be combined with --watch, --batch-submit or --batch-collect')
+    if args.resume and (args.watch or args.serve is not None or args.batch_collect):
+        parser.error('--resume cannot be combined with --watch, --serve or --batch-collect')
     
     try:
         # Create output directory if it doesn't exist
         os.makedirs(args.output_dir, exist_ok=True)
         
-        # Read requirements
-        requirements = read_requirements(args.requirements)
+        if args.batch_collect:
+            # The job fixes the requirements and the options its requests were built with
+            job = load_job(args.batch_collect)
+            requirements = job["requirements"]
+            args.evidence_k = job["options"]["evidence_k"]
+            args.no_rules = not job["options"]["use_rules"]
+            args.max_pages = job["options"]["max_pages"]
+            pdf_files = [manuscript["pdf_path"] for manuscript in job["manuscripts"]]
+        elif args.serve is not None:
+            # Jobs bring their PDF and may bring their own requirements
+            requirements = read_requirements(args.requirements) if args.requirements else None
+            pdf_files = []
+        else:
+            # Read requirements
+            requirements = read_requirements(args.requirements)
+            
+            # Get PDF files, most urgent first
+            pdf_files = order_manuscripts(get_pdf_files(args.manuscripts_dir), args.priority_manifest,
+                                          args.priority_field, args.priority_desc)
         
-        # Get PDF files
-        pdf_files = get_pdf_files(args.manuscripts_dir)
+        if args.batch_collect or args.batch_submit:
+            if args.fan_out:
+                print("Note: --fan-out is not used in batch mode")
+            args.fan_out = None
         
-        if not pdf_files:
+        if not pdf_files and not args.batch_collect and not args.watch and args.serve is None:
             print(f"No PDF files found in {args.manuscripts_dir}")
             return 1
             
-        print(f"Found {len(pdf_files)} PDF files to analyze")
+        if args.serve is None:
+            print(f"Found {len(pdf_files)} PDF files to analyze")
+        
+        # Checkpoint each manuscript's state so an interrupted run can be resumed, if asked to
+        manifest_path = args.manifest
+        if args.batch_collect:
+            # A job submitted with a manifest keeps updating it
+            manifest_path = manifest_path or job.get("manifest")
+        elif args.resume and not manifest_path:
+            manifest_path = os.path.join(args.output_dir, 'run_manifest.jsonl')
+        manifest = None
+        if manifest_path and not args.watch and args.serve is None:
+            manifest = RunManifest(manifest_path, resume=args.resume or bool(args.batch_collect))
+            if args.resume:
+                remaining = manifest.remaining(pdf_files, args.max_attempts)
+                print(f"Resuming: {len(pdf_files) - len(remaining)} already done or submitted, {len(remaining)} to go")
+                pdf_files = remaining
+            if not args.batch_collect:
+                manifest.start(pdf_files)
+        
+        # Open the result cache
+        cache = None
+        if not args.no_cache:
+            cache = ResultCache(
+                args.cache,
+                max_bytes=int(args.cache_max_mb * 1024 * 1024) if args.cache_max_mb else None,
+                max_age_days=args.cache_max_age_days
+            )
+        
+        # One request/token budget for every API call of the run
+        rate_limiter = RateLimiter(args.rpm, args.tpm) if args.rpm or args.tpm else None
         
         # Initialize checker
-        checker = RequirementsChecker(api_key=args.api_key)
+        checker = create_checker(args, cache, rate_limiter)
         
-        # Process each PDF
-        for pdf_path in pdf_files:
-            analyze_manuscript(checker, pdf_path, requirements, args.output_dir)
+        # Admit manuscripts against the run budget, in priority order
+        scheduler = None
+        checkers = {checker.openai_client.model: checker}
+        if args.max_run_tokens is not None or args.max_run_cost is not None:
+            if args.batch_submit or args.batch_collect or args.serve is not None:
+                print("Note: --max-run-tokens and --max-run-cost are not used in batch or service mode")
+            else:
+                scheduler = BudgetScheduler(checker.openai_client.model, args.max_run_tokens, args.max_run_cost,
+                                            args.downgrade_model)
+                if args.downgrade_model:
+                    checkers[args.downgrade_model] = create_checker(args, cache, rate_limiter, args.downgrade_model)
+        
+        # Collect stage timings and token usage
+        telemetry = Telemetry("editorial", args.telemetry, args.metrics_file,
+                              on_finish=manifest.record if manifest is not None else None)
+        if args.metrics_port:
+            telemetry.serve(args.metrics_port)
+        
+        if args.batch_submit or args.batch_collect:
+            status = run_batch(args, checker, pdf_files, requirements, manifest, telemetry)
+        elif args.serve is not None:
+            status = run_serve(args, checker, requirements, telemetry)
+        elif args.watch:
+            status = run_watch(args, checker, checkers, scheduler, requirements, telemetry)
+        else:
+            status = run_once(args, checker, checkers, scheduler, pdf_files, requirements, manifest, telemetry)
+        if status:
+            return status
+        
+        if scheduler is not None:
+            budget = scheduler.summary()
+            print(f"Run budget: {budget['admitted']} admitted, {budget['downgraded']} downgraded, "
+                  f"{budget['deferred']} deferred; {budget['used_tokens']} tokens, ${budget['used_cost']:.4f} used")
+            for pdf_path in budget['deferred_manuscripts']:
+                print(f"  deferred: {pdf_path}")
+        if cache is not None:
+            stats = cache.stats()
+            print(f"Cache: {stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evictions")
+        telemetry.close()
+        if manifest is not None:
+            states = manifest.summary()
+            print("Run manifest: " + ", ".join(f"{count} {state}" for state, count in sorted(states.items())) +
+                  f" ({manifest.path})")
+            manifest.close()
             
         print("Analysis complete!")
         
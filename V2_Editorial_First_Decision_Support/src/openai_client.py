@@ -1,85 +1,186 @@
-import os
-import json
-from typing import List, Dict, Any
-from openai import OpenAI
-from dotenv import load_dotenv
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+from api_client import AsyncChatClient, ChatClient
+from prompt_layout import layout_messages, replace_instructions
+from structured_output import (fill_requirements, requirements_schema, response_format, supports_json_schema,
+                               validate_requirements)
+from telemetry import count, in_context, span
+from token_budget import chunk_text, context_budget, estimate_tokens, label_chunks
 
-class OpenAIClient:
+class OpenAIClient(ChatClient):
     """A class to handle interactions with the OpenAI API."""
     
-    def __init__(self, api_key: str = None):
+    model = "gpt-3.5-turbo"  # Using standard model instead of 16k for cost efficiency
+    temperature = 0.3
+    max_tokens = 1000  # Limit response length
+    # Maximum number of manuscript chunks analyzed at the same time
+    max_chunk_workers = 4
+    # Bump whenever the prompt text changes so cached results are not reused
+    prompt_version = "3"
+    # Response member whose entries are reported while a completion streams in
+    stream_key = "requirements_analysis"
+    
+    def _build_request(self, manuscript_text: str, requirements: List[str]) -> Dict[str, Any]:
         """
-        Initialize the OpenAI client.
+        Build the chat completion request for a requirements check.
+        
+        Models that support structured outputs are held to the schema of
+        the analysis; others rely on the format described in the prompt.
         
         Args:
-            api_key (str, optional): OpenAI API key. If not provided, will try to load from environment.
+            manuscript_text (str): The manuscript text, or one chunk of it
+            requirements (List[str]): List of editorial requirements to check
+            
+        Returns:
+            Dict[str, Any]: Keyword arguments for chat.completions.create
         """
-        # Try to load .env from the current directory
-        load_dotenv()
+        request = {
+            "model": self.model,
+            "messages": layout_messages(manuscript_text, self._create_analysis_prompt(requirements)),
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens
+        }
+        if supports_json_schema(self.model):
+            request["response_format"] = response_format("requirements_analysis", requirements_schema(requirements))
+        return request
         
-        # If API key is not found, try to load from parent directory
-        if not os.getenv("OPENAI_API_KEY"):
-            # Get the path to the parent directory (two levels up from this file)
-            parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
-            env_path = os.path.join(parent_dir, ".env")
-            if os.path.exists(env_path):
-                load_dotenv(env_path)
+    def _build_requests(self, manuscript_text: str, requirements: List[str]) -> List[Dict[str, Any]]:
+        """
+        Split the manuscript into chunks that fit the model's context and build one request per chunk.
         
-        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
-            raise ValueError("OpenAI API key is required")
-        self.client = OpenAI(api_key=self.api_key)
+        Args:
+            manuscript_text (str): The full text of the manuscript
+            requirements (List[str]): List of editorial requirements to check
+            
+        Returns:
+            List[Dict[str, Any]]: Requests in document order; a single one if the manuscript fits
+        """
+        with span("prompt_build") as fields:
+            empty_request = self._build_request("", requirements)
+            prompt_overhead = sum(estimate_tokens(message["content"]) for message in empty_request["messages"])
+            budget = context_budget(self.model, self.max_tokens, prompt_overhead)
+        
+            chunks = label_chunks(chunk_text(manuscript_text, budget))
+            requests = [self._build_request(chunk, requirements) for chunk in chunks]
+            fields["requests"] = len(requests)
+        return requests
         
-    def check_requirements(self, manuscript_text: str, requirements: List[str]) -> Dict[str, Any]:
+    def check_requirements(self, manuscript_text: str, requirements: List[str],
+                           on_item: Callable[[Any, Any], None] = None) -> Dict[str, Any]:
         """
         Check if the manuscript meets the given requirements using GPT-3.5-turbo.
         
+        Manuscripts that do not fit the context window are split into
+        section-aligned chunks that are analyzed concurrently and merged.
+        
         Args:
             manuscript_text (str): The full text of the manuscript
             requirements (List[str]): List of editorial requirements to check
+            on_item (Callable[[Any, Any], None], optional): Called with (index, analysis) for each
+                requirement as soon as it is final. A single request is streamed so entries arrive
+                while the model is still writing; chunked manuscripts, and requirements that needed
+                a follow-up request, report after merging.
             
         Returns:
             Dict[str, Any]: Analysis results including requirement status and evidence
         """
-        # Truncate manuscript text to first 4000 words to reduce token usage
-        words = manuscript_text.split()
-        truncated_text = ' '.join(words[:4000]) if len(words) > 4000 else manuscript_text
-        
-        prompt = self._create_analysis_prompt(truncated_text, requirements)
+        requests = self._build_requests(manuscript_text, requirements)
         
+        streamed = set()
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",  # Using standard model instead of 16k for cost efficiency
-                messages=[
-                    {"role": "system", "content": "You are an expert manuscript reviewer. Analyze manuscripts against requirements. Be strict and thorough. Only mark requirements as met with clear evidence. Provide specific quotes and exact numbers when applicable. Always respond with valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=1000  # Limit response length
-            )
+            if len(requests) == 1:
+                if on_item is not None:
+                    def report(i: Any, analysis: Any) -> None:
+                        if not isinstance(i, int) or i >= len(requirements) or validate_requirements(
+                                {"requirements_analysis": [analysis]}, [requirements[i]])[1]:
+                            return  # Invalid entries are asked for again and reported after merging
+                        streamed.add(i)
+                        on_item(i, analysis)
+                    responses = [self._send_stream(requests[0], report)]
+                else:
+                    responses = [self._send(requests[0])]
+            else:
+                with ThreadPoolExecutor(max_workers=min(len(requests), self.max_chunk_workers)) as pool:
+                    responses = list(pool.map(in_context(self._send), requests))
             
-            response_content = response.choices[0].message.content
-            print(f"OpenAI Response: {response_content}")  # Debug print
-            
-            return self._parse_response(response_content)
+            results = [self._complete_analysis(request, response_content, requirements)
+                       for request, response_content in zip(requests, responses)]
             
         except Exception as e:
             raise Exception(f"Failed to analyze manuscript: {str(e)}")
+            
+        merged = self._merge_results(results, requirements)
+        if on_item is not None:
+            for i, analysis in enumerate(merged["requirements_analysis"]):
+                if i not in streamed:
+                    on_item(i, analysis)
+        return merged
     
-    def _create_analysis_prompt(self, manuscript_text: str, requirements: List[str]) -> str:
+    def _merge_results(self, results: List[Dict[str, Any]], requirements: List[str]) -> Dict[str, Any]:
         """
-        Create a prompt for the requirements analysis.
+        Merge the analyses of manuscript chunks into one result.
+        
+        Each chunk only sees its part of the manuscript, so a requirement
+        counts as met if any chunk found evidence for it, and the evidence
+        and explanations of the deciding chunks are combined. The rejection
+        recommendation follows from the merged verdicts: the chunks' own
+        recommendations only judged their part.
+        
+        Args:
+            results (List[Dict[str, Any]]): Parsed analysis of each chunk, in order
+            requirements (List[str]): List of requirements that were checked
+            
+        Returns:
+            Dict[str, Any]: Analysis results in the single-request format
+        """
+        if len(results) == 1:
+            return results[0]
+        
+        requirements_analysis = []
+        for i, requirement in enumerate(requirements):
+            entries = [result["requirements_analysis"][i] for result in results
+                       if i < len(result.get("requirements_analysis", []))]
+            met_entries = [entry for entry in entries if entry.get("is_met")]
+            deciding = met_entries or entries
+            requirements_analysis.append({
+                "requirement": requirement,
+                "is_met": bool(met_entries),
+                "evidence": " | ".join(dict.fromkeys(e["evidence"] for e in deciding if e.get("evidence"))),
+                "explanation": " | ".join(dict.fromkeys(e["explanation"] for e in deciding if e.get("explanation")))
+            })
+        
+        unmet = [analysis["requirement"] for analysis in requirements_analysis if not analysis["is_met"]]
+        if unmet:
+            justification = "Requirements not met in any part of the manuscript: " + "; ".join(unmet)
+        else:
+            justification = "Every requirement is met in at least one part of the manuscript."
+        
+        return {
+            "requirements_analysis": requirements_analysis,
+            "desk_rejection_recommendation": {
+                "should_reject": bool(unmet),
+                "justification": justification
+            }
+        }
+    
+    def _create_analysis_prompt(self, requirements: List[str]) -> str:
+        """
+        Create the instructions for the requirements analysis.
+        
+        They follow the manuscript text in the request (see prompt_layout).
         
         Args:
-            manuscript_text (str): The manuscript text
             requirements (List[str]): List of requirements to check
             
         Returns:
-            str: Formatted prompt for the OpenAI API
+            str: Formatted instructions for the OpenAI API
         """
         requirements_section = "\n".join([f"{i+1}. {req}" for i, req in enumerate(requirements)])
         
-        return f"""Please analyze the following manuscript against these requirements:
+        return f"""Act as a strict and thorough editor. Only mark requirements as met with clear evidence, and provide specific quotes and exact numbers when applicable.
+
+Please analyze the manuscript above against these requirements:
 
 {requirements_section}
 
@@ -88,9 +189,6 @@ For each requirement:
 2. Provide evidence from the text
 3. Give a brief explanation
 
-Manuscript text:
-{manuscript_text}
-
 Please format your response as a JSON object with the following structure:
 {{
     "requirements_analysis": [
@@ -107,28 +205,117 @@ Please format your response as a JSON object with the following structure:
     }}
 }}"""
 
-    def _parse_response(self, response: str) -> Dict[str, Any]:
+    def _follow_up_request(self, request: Dict[str, Any], requirements: List[str], missing: List[int]) -> Dict[str, Any]:
+        """
+        Build a follow-up to a request that asks only for the requirements its answer lacked.
+        
+        Only the instructions change, so the follow-up reuses the cached
+        system message and manuscript text of the original request.
+        
+        Args:
+            request (Dict[str, Any]): The original request
+            requirements (List[str]): List of requirements that were checked
+            missing (List[int]): Indices of the requirements the answer lacked
+            
+        Returns:
+            Dict[str, Any]: Keyword arguments for chat.completions.create
+        """
+        subset = [requirements[i] for i in missing]
+        follow_up = dict(request, messages=replace_instructions(request["messages"], self._create_analysis_prompt(subset)))
+        if "response_format" in request:
+            follow_up["response_format"] = response_format("requirements_analysis", requirements_schema(subset))
+        return follow_up
+        
+    def _finish_analysis(self, result: Dict[str, Any], requirements: List[str], missing: List[int],
+                         follow_up: Any = None) -> Dict[str, Any]:
+        """
+        Complete a validated analysis, failing only if no requirement was assessed.
+        
+        Args:
+            result (Dict[str, Any]): First result of validate_requirements
+            requirements (List[str]): List of requirements that were checked
+            missing (List[int]): Indices of the requirements the first answer lacked
+            follow_up (Any, optional): Parsed answer to the follow-up request
+            
+        Returns:
+            Dict[str, Any]: Analysis with an entry for every requirement
+        """
+        analysis, still_missing = fill_requirements(result, requirements, missing, follow_up)
+        if still_missing and len(still_missing) == len(requirements):
+            raise Exception("Failed to parse OpenAI response as JSON")
+        if still_missing:
+            print(f"Warning: no valid answer for {len(still_missing)} requirement(s)")
+        return analysis
+        
+    def _complete_analysis(self, request: Dict[str, Any], response: str, requirements: List[str]) -> Dict[str, Any]:
+        """
+        Validate an analysis and ask again for just the requirements it lacks.
+        
+        Args:
+            request (Dict[str, Any]): The request that was answered
+            response (str): Its completion content
+            requirements (List[str]): List of requirements that were checked
+            
+        Returns:
+            Dict[str, Any]: Analysis with an entry for every requirement
+        """
+        with span("parse"):
+            result, missing = validate_requirements(self._parse_partial(response), requirements)
+        follow_up = None
+        if missing:
+            count("follow_up_requests")
+            try:
+                follow_up = self._parse_response(self._send(self._follow_up_request(request, requirements, missing)))
+            except Exception as e:
+                print(f"Warning: follow-up request for {len(missing)} requirement(s) failed: {str(e)}")
+        return self._finish_analysis(result, requirements, missing, follow_up)
+
+class AsyncOpenAIClient(AsyncChatClient, OpenAIClient):
+    """An asyncio variant of OpenAIClient with client-side rate limiting, see AsyncChatClient."""
+    
+    async def _complete_analysis(self, request: Dict[str, Any], response: str,
+                                 requirements: List[str]) -> Dict[str, Any]:
         """
-        Parse the OpenAI API response into a structured format.
+        Validate an analysis and ask again for just the requirements it lacks.
         
         Args:
-            response (str): Raw response from the API
+            request (Dict[str, Any]): The request that was answered
+            response (str): Its completion content
+            requirements (List[str]): List of requirements that were checked
             
         Returns:
-            Dict[str, Any]: Parsed response
+            Dict[str, Any]: Analysis with an entry for every requirement
+        """
+        with span("parse"):
+            result, missing = validate_requirements(self._parse_partial(response), requirements)
+        follow_up = None
+        if missing:
+            count("follow_up_requests")
+            try:
+                follow_up = self._parse_response(
+                    await self._complete(self._follow_up_request(request, requirements, missing)))
+            except Exception as e:
+                print(f"Warning: follow-up request for {len(missing)} requirement(s) failed: {str(e)}")
+        return self._finish_analysis(result, requirements, missing, follow_up)
+        
+    async def check_requirements(self, manuscript_text: str, requirements: List[str]) -> Dict[str, Any]:
         """
+        Check if the manuscript meets the given requirements using GPT-3.5-turbo.
+        
+        Args:
+            manuscript_text (str): The full text of the manuscript
+            requirements (List[str]): List of editorial requirements to check
+            
+        Returns:
+            Dict[str, Any]: Analysis results including requirement status and evidence
+        """
+        requests = self._build_requests(manuscript_text, requirements)
+        
         try:
-            # Remove code block markers if present
-            cleaned_response = response.strip()
-            if cleaned_response.startswith("```"):
-                cleaned_response = cleaned_response.split("\n", 1)[1]  # Remove first line
-            if cleaned_response.endswith("```"):
-                cleaned_response = cleaned_response.rsplit("\n", 1)[0]  # Remove last line
-            if cleaned_response.startswith("json"):
-                cleaned_response = cleaned_response.split("\n", 1)[1]  # Remove "json" line
+            responses = await asyncio.gather(*(self._complete(request) for request in requests))
+            results = await asyncio.gather(*(self._complete_analysis(request, response_content, requirements)
+                                             for request, response_content in zip(requests, responses)))
+        except Exception as e:
+            raise Exception(f"Failed to analyze manuscript: {str(e)}")
             
-            return json.loads(cleaned_response)
-        except json.JSONDecodeError as e:
-            print(f"Failed to parse JSON: {str(e)}")  # Debug print
-            print(f"Response content: {response}")  # Debug print
-            raise Exception("Failed to parse OpenAI response as JSON") 
\ No newline at end of file
+        return self._merge_results(results, requirements)
@@ -1,32 +1,38 @@
 import fitz  # PyMuPDF
 import re
-from typing import List, Dict, Optional, Tuple
-from dataclasses import dataclass
-
-@dataclass
-class TextBlock:
-    """Represents a block of text with its properties."""
-    text: str
-    page: int
-    font_size: float
-    font_name: str
-    is_bold: bool
-    is_italic: bool
-    bbox: Tuple[float, float, float, float]
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, Iterator, List, Tuple
+from layout import Layout
+from result_cache import file_sha256
+from span_store import SpanCache, SpanTable, SpanTableBuilder
+from telemetry import count, span
 
 class PDFParser:
     """A class to parse PDF manuscripts with advanced text extraction capabilities."""
     
-    def __init__(self, pdf_path: str):
+    # Documents are only split across processes in ranges of at least this many pages
+    min_pages_per_worker = 8
+    # Sections longer than this many characters are streamed in chunks
+    section_buffer_chars = 100000
+    
+    def __init__(self, pdf_path: str, cache_dir: str = None, max_pages: int = None, workers: int = 1):
         """
         Initialize the PDF parser.
         
         Args:
             pdf_path (str): Path to the PDF file
+            cache_dir (str, optional): Directory for stored span tables; PyMuPDF is skipped on a hit
+            max_pages (int, optional): Only extract this many leading pages; all pages if omitted
+            workers (int): Number of processes that extract page ranges in parallel
         """
         self.pdf_path = pdf_path
+        self.cache_dir = cache_dir
+        self.max_pages = max_pages
+        self.workers = workers
         self.doc = None
-        self.text_blocks = []
+        self.table = None
+        self.layout = None
         
     def extract_text(self) -> str:
         """
@@ -35,80 +41,208 @@ class PDFParser:
         Returns:
             str: Extracted and structured text
         """
+        self._load_layout()
+        
+        # Combine spans into structured text
+        return self._combine_blocks()
+    
+    def _load_layout(self) -> None:
+        """Extract (or load) the span table and analyze its layout, once."""
+        if self.layout is not None:
+            return
         try:
-            self.doc = fitz.open(self.pdf_path)
-            self.text_blocks = []
-            
-            # Process first 10 pages or less
-            max_pages = min(10, len(self.doc))
+            span_cache = SpanCache(self.cache_dir) if self.cache_dir else None
+            content_hash = file_sha256(self.pdf_path) if span_cache else None
             
-            for page_num in range(max_pages):
-                page = self.doc[page_num]
-                blocks = self._extract_page_blocks(page, page_num)
-                self.text_blocks.extend(blocks)
+            # A page budget changes the extracted spans, the worker count does not
+            variant = f"pages{self.max_pages}" if self.max_pages else ""
             
-            # Sort blocks by position and process
-            self.text_blocks.sort(key=lambda b: (b.page, b.bbox[1], b.bbox[0]))
+            table = span_cache.get(content_hash, variant) if span_cache else None
+            if span_cache:
+                count("parse_cache_hits" if table is not None else "parse_cache_misses")
+            if table is None:
+                table = self._extract_table()
+                if span_cache:
+                    span_cache.put(content_hash, table, variant)
             
-            # Combine blocks into structured text
-            structured_text = self._combine_blocks()
-            
-            return structured_text
+            # Infer reading order and headings from the span columns
+            self.table = table
+            self.layout = Layout(table)
             
         except Exception as e:
             raise Exception(f"Failed to extract text from PDF: {str(e)}")
+    
+    def page_count(self) -> int:
+        """
+        Count the pages of the whole PDF, regardless of max_pages.
+        
+        Returns:
+            int: Number of pages
+        """
+        with fitz.open(self.pdf_path) as doc:
+            return len(doc)
+    
+    def _extract_table(self) -> SpanTable:
+        """
+        Extract the text spans of the PDF with PyMuPDF.
+        
+        Long documents are split into contiguous page ranges that worker
+        processes extract from their own copy of the document; the ranges
+        are merged back in page order.
+        
+        Returns:
+            SpanTable: Spans with formatting, in extraction order
+        """
+        try:
+            with span("open"):
+                self.doc = fitz.open(self.pdf_path)
+            page_count = len(self.doc)
+            if self.max_pages:
+                page_count = min(self.max_pages, page_count)
+            
+            ranges = _page_ranges(page_count, self.workers, self.min_pages_per_worker)
+            if len(ranges) <= 1:
+                builder = SpanTableBuilder()
+                for page_num in range(page_count):
+                    self._extract_page_spans(self.doc[page_num], page_num, builder)
+                return builder.build()
         finally:
             if self.doc:
                 self.doc.close()
+        
+        starts, stops = zip(*ranges)
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(ranges))) as pool:
+            tables = list(pool.map(_extract_page_range, repeat(self.pdf_path), starts, stops))
+        
+        builder = SpanTableBuilder()
+        for table in tables:
+            builder.extend(table)
+        return builder.build()
     
-    def _extract_page_blocks(self, page: fitz.Page, page_num: int) -> List[TextBlock]:
+    @staticmethod
+    def _extract_page_spans(page: fitz.Page, page_num: int, builder: SpanTableBuilder) -> None:
         """
-        Extract text blocks from a page with formatting information.
+        Extract the text spans of a page with formatting information.
         
         Args:
             page (fitz.Page): PDF page
             page_num (int): Page number
-            
-        Returns:
-            List[TextBlock]: List of text blocks with formatting
+            builder (SpanTableBuilder): Table the spans are appended to
         """
-        blocks = []
-        
         # Get text with formatting information
         text_dict = page.get_text("dict")
         
         for block in text_dict.get("blocks", []):
             for line in block.get("lines", []):
                 for span in line.get("spans", []):
-                    # Extract text and formatting
                     text = span.get("text", "").strip()
                     if not text:
                         continue
-                        
-                    font = span.get("font", "")
-                    size = span.get("size", 0)
-                    bbox = span.get("bbox", [0, 0, 0, 0])
-                    
-                    # Check for bold/italic
-                    flags = span.get("flags", 0)
-                    is_bold = bool(flags & 2**1)  # Check bold flag
-                    is_italic = bool(flags & 2**0)  # Check italic flag
                     
-                    blocks.append(TextBlock(
-                        text=text,
-                        page=page_num + 1,
-                        font_size=size,
-                        font_name=font,
-                        is_bold=is_bold,
-                        is_italic=is_italic,
-                        bbox=tuple(bbox)
-                    ))
-        
-        return blocks
+                    builder.add(
+                        text,
+                        page_num + 1,
+                        span.get("size", 0),
+                        span.get("flags", 0),
+                        span.get("font", ""),
+                        span.get("bbox", (0, 0, 0, 0))
+                    )
+    
+    def _reading_order(self) -> Iterator[Tuple[int, str]]:
+        """
+        Walk the spans in reading order.
+        
+        Consecutive spans of the same heading level, such as a heading
+        that wraps onto a second line, are joined into one.
+        
+        Returns:
+            Iterator[Tuple[int, str]]: (heading level, text) pairs; level 0 is body text
+        """
+        if self.layout is None:
+            return
+        
+        pending_level = 0
+        pending = []
+        for i in self.layout.order:
+            level = int(self.layout.heading_level[i])
+            text = self.table.span_text(i)
+            if level and level == pending_level:
+                pending.append(text)
+                continue
+            if pending:
+                yield pending_level, " ".join(pending)
+                pending = []
+            if level:
+                pending_level = level
+                pending = [text]
+            else:
+                yield 0, text
+        if pending:
+            yield pending_level, " ".join(pending)
+    
+    def iter_pages(self) -> Iterator[Tuple[int, str]]:
+        """
+        Stream the text of the PDF one page at a time, in reading order.
+        
+        Only the compact span table is held in memory; each page's text is
+        decoded when it is reached and dropped once it has been consumed.
+        
+        Returns:
+            Iterator[Tuple[int, str]]: (page number, page text) pairs, 1-based
+        """
+        self._load_layout()
+        page_number = None
+        page_spans = []
+        for i in self.layout.order:
+            number = self.table.page[i]
+            if number != page_number:
+                if page_spans:
+                    yield page_number, " ".join(page_spans)
+                page_number = number
+                page_spans = []
+            page_spans.append(self.table.span_text(i))
+        if page_spans:
+            yield page_number, " ".join(page_spans)
+    
+    def iter_sections(self, max_chars: int = None) -> Iterator[Tuple[str, List[str]]]:
+        """
+        Stream the sections of the document in reading order.
+        
+        Args:
+            max_chars (int, optional): Yield long sections in chunks of about this many characters
+            
+        Returns:
+            Iterator[Tuple[str, List[str]]]: (section name, content spans) chunks; consecutive
+                chunks with the same name belong to one section
+        """
+        self._load_layout()
+        current_section = "Introduction"
+        current_content = []
+        chars = 0
+        
+        for level, text in self._reading_order():
+            # Detect section headers
+            if level:
+                if current_content:
+                    yield current_section, current_content
+                current_section = text
+                current_content = []
+                chars = 0
+            else:
+                current_content.append(text)
+                chars += len(text)
+                if max_chars and chars >= max_chars:
+                    yield current_section, current_content
+                    current_content = []
+                    chars = 0
+        
+        # Add the last section
+        if current_content:
+            yield current_section, current_content
     
     def _combine_blocks(self) -> str:
         """
-        Combine text blocks into structured text.
+        Combine text spans into structured text.
         
         Returns:
             str: Structured text
@@ -116,11 +250,9 @@ class PDFParser:
         structured_text = []
         current_section = None
         
-        for block in self.text_blocks:
-            text = block.text
-            
-            # Detect headers based on font size and style
-            if block.font_size > 12 and block.is_bold:
+        for level, text in self._reading_order():
+            # Headings were found by the layout analysis
+            if level:
                 if current_section:
                     structured_text.append("\n")
                 current_section = text
@@ -155,21 +287,53 @@ class PDFParser:
             Dict[str, List[str]]: Dictionary of sections and their content
         """
         sections = {}
-        current_section = "Introduction"
-        current_content = []
+        previous = None
         
-        for block in self.text_blocks:
-            # Detect section headers
-            if block.font_size > 12 and block.is_bold:
-                if current_content:
-                    sections[current_section] = current_content
-                current_section = block.text
-                current_content = []
+        for section, content in self.iter_sections():
+            # A repeated heading replaces the earlier section
+            if section == previous:
+                sections[section].extend(content)
             else:
-                current_content.append(block.text)
+                sections[section] = content
+            previous = section
         
-        # Add the last section
-        if current_content:
-            sections[current_section] = current_content
+        return sections
+
+def _page_ranges(page_count: int, workers: int, min_pages: int) -> List[Tuple[int, int]]:
+    """
+    Split a document into contiguous page ranges for the worker processes.
+    
+    Two ranges per worker are made so that a slow range does not leave the
+    other workers idle, but no range is shorter than min_pages.
+    
+    Args:
+        page_count (int): Number of pages to extract
+        workers (int): Number of worker processes
+        min_pages (int): Minimum pages per range
+        
+    Returns:
+        List[Tuple[int, int]]: (start, stop) page indices in order
+    """
+    if workers <= 1 or page_count < 2 * min_pages:
+        return [(0, page_count)]
+    count = max(1, min(2 * workers, page_count // min_pages))
+    bounds = [round(i * page_count / count) for i in range(count + 1)]
+    return list(zip(bounds, bounds[1:]))
+
+def _extract_page_range(pdf_path: str, start: int, stop: int) -> SpanTable:
+    """
+    Extract the spans of pages [start, stop) in a worker process with its own document.
+    
+    Args:
+        pdf_path (str): Path to the PDF file
+        start (int): First page index
+        stop (int): Page index after the last page
         
-        return sections 
\ No newline at end of file
+    Returns:
+        SpanTable: Spans of the range in extraction order
+    """
+    builder = SpanTableBuilder()
+    with fitz.open(pdf_path) as doc:
+        for page_num in range(start, stop):
+            PDFParser._extract_page_spans(doc[page_num], page_num, builder)
+    return builder.build()
@@ -0,0 +1,109 @@
+import re
+from typing import List, Optional, Tuple
+from token_budget import split_sections
+
+# Requirement keywords mapped to the section headings that can satisfy them.
+# An empty list means the document metadata (word count) is enough; the
+# first matching route wins, and requirements matching no route see the
+# whole manuscript.
+ROUTES = [
+    (r"\bwords?\b|\bword count\b|\blength\b", []),
+    (r"\babstract\b", ["abstract", "summary"]),
+    (r"\babbreviation", None),
+    (r"\bfigure|\btable", ["figure", "table", "result"]),
+    (r"statistic|p-value|\bmethods?\b|methodolog", ["method", "material", "statistic", "analysis", "result"]),
+    (r"\bresults?\b", ["result", "finding"]),
+    (r"\breferences?\b|citation|\bAPA\b|bibliograph", ["reference", "bibliograph", "literature cited"]),
+    (r"conflicts? of interest|competing interest", ["conflict", "competing", "declaration", "disclosure"]),
+    (r"\bethic", ["ethic", "method", "declaration"]),
+    (r"data availability", ["availability", "data", "declaration"]),
+    (r"\bfunding\b", ["funding", "acknowledg", "declaration"]),
+    (r"author contribution", ["contribution", "author", "declaration"]),
+    (r"\blimitation", ["limitation", "discussion"]),
+    (r"\bfuture\b", ["future", "discussion", "conclusion"]),
+    (r"\bconclusion", ["conclusion", "summary", "discussion"])
+]
+_ROUTES = [(re.compile(pattern, re.IGNORECASE), sections) for pattern, sections in ROUTES]
+
+def route_requirement(requirement: str) -> Optional[Tuple[str, ...]]:
+    """
+    Find the section headings relevant to a requirement.
+
+    Args:
+        requirement (str): Requirement text
+
+    Returns:
+        Optional[Tuple[str, ...]]: Lower-case heading keywords, or None if the whole manuscript is needed
+    """
+    for pattern, sections in _ROUTES:
+        if pattern.search(requirement):
+            return None if sections is None else tuple(sections)
+    return None
+
+def _merge_routes(a: Optional[Tuple[str, ...]], b: Optional[Tuple[str, ...]]) -> Optional[Tuple[str, ...]]:
+    """Union of two routes; None (whole manuscript) absorbs everything."""
+    if a is None or b is None:
+        return None
+    return tuple(dict.fromkeys(a + b))
+
+def plan_batches(requirements: List[str], batch_size: int) -> List[Tuple[List[int], Optional[Tuple[str, ...]]]]:
+    """
+    Group requirements into small batches that need as few sections as possible.
+
+    Requirements with the same route are kept together, and requirements
+    that need the whole manuscript are batched last so they do not widen
+    the context of narrowly routed ones.
+
+    Args:
+        requirements (List[str]): Requirements in their original order
+        batch_size (int): Maximum number of requirements per batch
+
+    Returns:
+        List[Tuple[List[int], Optional[Tuple[str, ...]]]]: Requirement indices and section keywords of each batch
+    """
+    batch_size = max(1, batch_size)
+    groups = {}
+    for i, requirement in enumerate(requirements):
+        groups.setdefault(route_requirement(requirement), []).append(i)
+    ordered = sorted(groups.items(), key=lambda item: item[0] is None)
+
+    batches = []
+    indices, sections = [], ()
+    for route, group in ordered:
+        for i in group:
+            if len(indices) == batch_size:
+                batches.append((indices, sections))
+                indices, sections = [], ()
+            indices.append(i)
+            sections = _merge_routes(sections, route)
+    if indices:
+        batches.append((indices, sections))
+    return batches
+
+def select_sections(structured_text: str, sections: Optional[Tuple[str, ...]]) -> str:
+    """
+    Cut the structured manuscript text down to the sections a batch needs.
+
+    The document metadata preamble is always kept. If none of the
+    manuscript's headings match, the whole text is returned so that a
+    requirement is never judged without its evidence.
+
+    Args:
+        structured_text (str): Structured text built by prepare_manuscript
+        sections (Optional[Tuple[str, ...]]): Heading keywords from route_requirement
+
+    Returns:
+        str: Structured text restricted to the matching sections
+    """
+    if sections is None:
+        return structured_text
+
+    preamble, blocks = split_sections(structured_text)
+    if not sections:
+        return preamble or structured_text
+
+    selected = [block for block in blocks
+                if any(keyword in block.split("\n", 1)[0].lower() for keyword in sections)]
+    if not selected:
+        return structured_text
+    return preamble + "".join(selected)
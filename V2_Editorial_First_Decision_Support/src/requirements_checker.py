@@ -1,56 +1,433 @@
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
 from pdf_parser import PDFParser
 from openai_client import OpenAIClient
+from passage_index import build_evidence_text
+from rate_limiter import RateLimiter
+from requirement_router import plan_batches, select_sections
+from result_cache import ResultCache, file_sha256, make_cache_key
+from rule_engine import RULES_VERSION, evaluate_rules, strip_annotation
+from span_store import PARSER_VERSION
+from structured_output import validate_requirements
+from telemetry import count, in_context, span
 
 class RequirementsChecker:
     """A class to check manuscript requirements using OpenAI's GPT model."""
     
-    def __init__(self, api_key: str = None):
+    # Maximum number of requirement batches checked at the same time in fan-out mode
+    max_batch_workers = 4
+    
+    def __init__(self, api_key: str = None, cache: ResultCache = None, parse_cache_dir: str = None,
+                 fan_out_batch_size: int = None, evidence_k: int = None, use_rules: bool = True,
+                 max_pages: int = None, page_workers: int = 1, rate_limiter: RateLimiter = None):
         """
         Initialize the requirements checker.
         
         Args:
             api_key (str, optional): OpenAI API key
+            cache (ResultCache, optional): Persistent cache of previous analyses
+            parse_cache_dir (str, optional): Directory for stored span tables of parsed PDFs
+            fan_out_batch_size (int, optional): If set, check requirements in batches of this size,
+                each sent only the sections it needs
+            evidence_k (int, optional): If set, send only the top-k retrieved passages per requirement
+                instead of the full manuscript text
+            use_rules (bool): Decide measurable requirements (word limits, abstract structure,
+                required statements) locally instead of asking the model
+            max_pages (int, optional): Only parse this many leading pages; all pages if omitted
+            page_workers (int): Number of processes that parse page ranges of one PDF in parallel
+            rate_limiter (RateLimiter, optional): Requests/tokens-per-minute budget shared by the run's API calls
         """
-        self.openai_client = OpenAIClient(api_key)
+        self.openai_client = OpenAIClient(api_key, rate_limiter=rate_limiter)
+        self.cache = cache
+        self.parse_cache_dir = parse_cache_dir
+        self.fan_out_batch_size = fan_out_batch_size
+        self.evidence_k = evidence_k
+        self.use_rules = use_rules
+        self.max_pages = max_pages
+        self.page_workers = page_workers
     
-    def check_manuscript(self, pdf_path: str, requirements: List[str]) -> Dict[str, Any]:
+    def cache_key(self, pdf_path: str, requirements: List[str]) -> str:
         """
-        Check if a manuscript meets the given requirements.
+        Build the cache key for checking a manuscript against requirements.
         
         Args:
             pdf_path (str): Path to the PDF manuscript
             requirements (List[str]): List of requirements to check
             
         Returns:
-            Dict[str, Any]: Analysis results
+            str: Key covering the PDF bytes, requirements, model, temperature, prompt version,
+                parser and rule versions and response length limit
+        """
+        # max_tokens also sets how the manuscript is chunked
+        mode = f"parser:{PARSER_VERSION}\nmax_tokens:{self.openai_client.max_tokens}\n"
+        if self.fan_out_batch_size:
+            mode += f"fan-out:{self.fan_out_batch_size}\n"
+        if self.evidence_k:
+            mode += f"evidence:{self.evidence_k}\n"
+        if self.use_rules:
+            mode += f"rules:{RULES_VERSION}\n"
+        if self.max_pages:
+            mode += f"pages:{self.max_pages}\n"
+        return make_cache_key(
+            file_sha256(pdf_path),
+            mode + "\n".join(requirements),
+            self.openai_client.model,
+            self.openai_client.temperature,
+            self.openai_client.prompt_version
+        )
+    
+    def get_cached(self, pdf_path: str, requirements: List[str]) -> Dict[str, Any]:
+        """
+        Return a cached analysis for this manuscript and requirements, if any.
+        
+        Args:
+            pdf_path (str): Path to the PDF manuscript
+            requirements (List[str]): List of requirements to check
+            
+        Returns:
+            Dict[str, Any]: Cached analysis results, or None
+        """
+        if self.cache is None:
+            return None
+        cached = self.cache.get(self.cache_key(pdf_path, requirements))
+        count("cache_hits" if cached is not None else "cache_misses")
+        return cached
+    
+    @staticmethod
+    def prepare_manuscript(pdf_path: str, parse_cache_dir: str = None, max_pages: int = None,
+                           page_workers: int = 1) -> str:
+        """
+        Parse a manuscript into the structured text sent to the model.
+        
+        This step needs no API client, so batch runs can call it from
+        worker processes.
+        
+        Args:
+            pdf_path (str): Path to the PDF manuscript
+            parse_cache_dir (str, optional): Directory for stored span tables of parsed PDFs
+            max_pages (int, optional): Only parse this many leading pages; all pages if omitted
+            page_workers (int): Number of processes that parse page ranges in parallel
+            
+        Returns:
+            str: Structured manuscript text with metadata and sections
         """
         # Parse PDF with structure preservation
-        pdf_parser = PDFParser(pdf_path)
-        manuscript_text = pdf_parser.extract_text()
+        pdf_parser = PDFParser(pdf_path, parse_cache_dir, max_pages, page_workers)
         
-        # Get sections for better context
-        sections = pdf_parser.detect_sections()
+        # Calculate word count page by page, headings included; the first pass
+        # opens the PDF and extracts (or loads) its spans
+        with span("extract"):
+            word_count = sum(len(page_text.split()) for _, page_text in pdf_parser.iter_pages())
+            word_count_note = ""
+            if max_pages:
+                page_count = pdf_parser.page_count()
+                if page_count > max_pages:
+                    # The word-limit rules leave a partial count to the model
+                    word_count_note = f" (first {max_pages} of {page_count} pages only)"
         
-        # Calculate word count
-        word_count = len(manuscript_text.split())
+        # Get sections for better context; long sections arrive in chunks that are
+        # joined right away, so no per-span strings outlive their chunk
+        with span("sections"):
+            sections = {}
+            previous = None
+            for section, content in pdf_parser.iter_sections(PDFParser.section_buffer_chars):
+                section_text = ' '.join(content)
+                if section != previous:
+                    # A repeated heading replaces the earlier section
+                    sections[section] = [0, []]
+                    previous = section
+                sections[section][0] += len(section_text.split())
+                sections[section][1].append(section_text)
         
         # Add metadata and section information to the text
-        structured_text = f"""Document Metadata:
-Word Count: {word_count} words
+        structured_text = [f"""Document Metadata:
+Word Count: {word_count} words{word_count_note}
 
 Document Structure:
-"""
-        for section, content in sections.items():
-            section_text = ' '.join(content)
-            section_word_count = len(section_text.split())
-            structured_text += f"\n{section} ({section_word_count} words):\n{section_text}\n"
+"""]
+        for section, (section_word_count, chunks) in sections.items():
+            structured_text.append(f"\n{section} ({section_word_count} words):\n{' '.join(chunks)}\n")
         
-        # Check requirements using OpenAI
-        analysis = self.openai_client.check_requirements(structured_text, requirements)
+        return ''.join(structured_text)
+    
+    def check_prepared(self, structured_text: str, requirements: List[str], pdf_path: str = None,
+                       on_result: Callable[[Dict[str, Any]], None] = None) -> Dict[str, Any]:
+        """
+        Check an already parsed manuscript against the given requirements.
+        
+        Args:
+            structured_text (str): Output of prepare_manuscript
+            requirements (List[str]): List of requirements to check
+            pdf_path (str, optional): Source PDF; when given, the result is stored in the cache
+            on_result (Callable[[Dict[str, Any]], None], optional): Called with each requirement's
+                analysis as soon as it is available; the model's answer is streamed to feed it
+            
+        Returns:
+            Dict[str, Any]: Analysis results
+        """
+        rule_results, model_requirements = self._apply_rules(structured_text, requirements)
+        
+        on_item = None
+        if on_result is not None:
+            for i in sorted(rule_results):
+                on_result(rule_results[i])
+            on_item = lambda _, analysis: on_result(analysis)
+        
+        if not model_requirements:
+            analysis = self._empty_analysis()
+        elif self.fan_out_batch_size:
+            analysis = self._check_fan_out(structured_text, model_requirements, on_item)
+        else:
+            analysis = self.openai_client.check_requirements(
+                self._manuscript_context(structured_text, model_requirements), model_requirements, on_item)
+        
+        return self._finish(requirements, rule_results, analysis, pdf_path)
+    
+    def batch_requests(self, structured_text: str, requirements: List[str]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Build the chat completion requests for checking a manuscript in a batch job.
+        
+        Fan-out is not used here: the manuscript is sent whole, or in
+        context-sized chunks, with every requirement no rule could decide.
+        
+        Args:
+            structured_text (str): Output of prepare_manuscript
+            requirements (List[str]): List of requirements to check
+            
+        Returns:
+            Tuple[List[Dict[str, Any]], Dict[str, Any]]: Requests (none if rules decided everything),
+                and the JSON-serializable plan that finish_batch needs to assemble the result
+        """
+        rule_results, model_requirements = self._apply_rules(structured_text, requirements)
+        requests = []
+        if model_requirements:
+            requests = self.openai_client._build_requests(
+                self._manuscript_context(structured_text, model_requirements), model_requirements)
+        plan = {
+            "rule_results": {str(i): result for i, result in rule_results.items()},
+            "model_requirements": model_requirements
+        }
+        return requests, plan
+    
+    def finish_batch(self, plan: Dict[str, Any], responses: List[str], requirements: List[str],
+                     pdf_path: str = None) -> Dict[str, Any]:
+        """
+        Assemble the analysis of a manuscript from its batch job completions.
+        
+        Args:
+            plan (Dict[str, Any]): Plan returned by batch_requests
+            responses (List[str]): Completion content of each request, in request order
+            requirements (List[str]): List of requirements that were checked
+            pdf_path (str, optional): Source PDF; when given, the result is stored in the cache
+            
+        Returns:
+            Dict[str, Any]: Analysis results
+        """
+        if responses:
+            client = self.openai_client
+            model_requirements = plan["model_requirements"]
+            with span("parse"):
+                # The job is over, so gaps are marked as not assessed instead of asked for again
+                results = []
+                for response in responses:
+                    result, missing = validate_requirements(client._parse_partial(response), model_requirements)
+                    results.append(client._finish_analysis(result, model_requirements, missing))
+            analysis = client._merge_results(results, model_requirements)
+        else:
+            analysis = self._empty_analysis()
+        rule_results = {int(i): result for i, result in plan["rule_results"].items()}
+        return self._finish(requirements, rule_results, analysis, pdf_path)
+    
+    def _apply_rules(self, structured_text: str, requirements: List[str]) -> Tuple[Dict[int, Dict[str, Any]], List[str]]:
+        """
+        Decide the requirements that local rules can check.
+        
+        Args:
+            structured_text (str): Output of prepare_manuscript
+            requirements (List[str]): List of requirements to check
+            
+        Returns:
+            Tuple[Dict[int, Dict[str, Any]], List[str]]: Rule-based entries by requirement index,
+                and the remaining requirements for the model
+        """
+        with span("rules"):
+            rule_results = evaluate_rules(requirements, structured_text) if self.use_rules else {}
+        model_requirements = [strip_annotation(req) for i, req in enumerate(requirements) if i not in rule_results]
+        return rule_results, model_requirements
+    
+    def _empty_analysis(self) -> Dict[str, Any]:
+        """Analysis of no requirements, used when rules decided all of them."""
+        return {
+            "requirements_analysis": [],
+            "desk_rejection_recommendation": {"should_reject": False, "justification": ""}
+        }
+    
+    def _finish(self, requirements: List[str], rule_results: Dict[int, Dict[str, Any]], analysis: Dict[str, Any],
+                pdf_path: str = None) -> Dict[str, Any]:
+        """
+        Merge rule-based verdicts into the model's analysis and cache the result.
+        
+        Args:
+            requirements (List[str]): List of requirements that were checked
+            rule_results (Dict[int, Dict[str, Any]]): Rule-based entries by requirement index
+            analysis (Dict[str, Any]): Model analysis of the remaining requirements
+            pdf_path (str, optional): Source PDF; when given, the result is stored in the cache
+            
+        Returns:
+            Dict[str, Any]: Analysis results
+        """
+        if rule_results:
+            analysis = self._merge_rule_results(requirements, rule_results, analysis)
+        
+        if self.cache is not None and pdf_path is not None:
+            self.cache.put(self.cache_key(pdf_path, requirements), analysis)
         
         return analysis
     
+    def _merge_rule_results(self, requirements: List[str], rule_results: Dict[int, Dict[str, Any]],
+                            analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Combine rule-based verdicts with the model's analysis of the remaining requirements.
+        
+        Unmet rule-based checks are listed in the justification, but the
+        desk rejection decision stays the model's: a missed word limit
+        alone does not reject a manuscript.
+        
+        Args:
+            requirements (List[str]): All requirements in their original order
+            rule_results (Dict[int, Dict[str, Any]]): Rule-based entries by requirement index
+            analysis (Dict[str, Any]): Model analysis of the requirements without a rule result
+            
+        Returns:
+            Dict[str, Any]: Analysis results covering every requirement in the original order
+        """
+        model_analyses = iter(analysis.get("requirements_analysis", []))
+        merged = []
+        for i in range(len(requirements)):
+            if i in rule_results:
+                merged.append(rule_results[i])
+            else:
+                entry = next(model_analyses, None)
+                if entry is not None:
+                    merged.append(entry)
+        
+        recommendation = analysis["desk_rejection_recommendation"]
+        justification = recommendation.get("justification", "")
+        unmet = [result["requirement"] for result in rule_results.values() if not result["is_met"]]
+        if unmet:
+            justification = f"{justification} Rule-based checks not met: {'; '.join(unmet)}.".strip()
+        elif not justification:
+            justification = "All requirements were decided by rule-based checks and are met."
+        
+        return {
+            "requirements_analysis": merged,
+            "desk_rejection_recommendation": {
+                "should_reject": bool(recommendation.get("should_reject")),
+                "justification": justification
+            }
+        }
+    
+    def _manuscript_context(self, structured_text: str, requirements: List[str]) -> str:
+        """
+        Choose the manuscript text sent along with a set of requirements.
+        
+        Args:
+            structured_text (str): Structured manuscript text
+            requirements (List[str]): Requirements the text is sent with
+            
+        Returns:
+            str: Retrieved evidence passages if evidence_k is set, otherwise the text unchanged
+        """
+        if not self.evidence_k:
+            return structured_text
+        with span("evidence"):
+            return build_evidence_text(structured_text, {req: req for req in requirements}, self.evidence_k)
+    
+    def _check_fan_out(self, structured_text: str, requirements: List[str],
+                       on_item: Callable[[Any, Any], None] = None) -> Dict[str, Any]:
+        """
+        Check requirements in small concurrent batches, each given only its relevant sections.
+        
+        Args:
+            structured_text (str): Output of prepare_manuscript
+            requirements (List[str]): List of requirements to check
+            on_item (Callable[[Any, Any], None], optional): Passed to every batch's streamed request
+            
+        Returns:
+            Dict[str, Any]: Analysis results in the single-request format
+        """
+        batches = plan_batches(requirements, self.fan_out_batch_size)
+        
+        def check_batch(batch):
+            indices, sections = batch
+            batch_requirements = [requirements[i] for i in indices]
+            return self.openai_client.check_requirements(
+                self._manuscript_context(select_sections(structured_text, sections), batch_requirements),
+                batch_requirements,
+                on_item
+            )
+        
+        with ThreadPoolExecutor(max_workers=min(len(batches), self.max_batch_workers)) as pool:
+            batch_results = list(pool.map(in_context(check_batch), batches))
+        
+        # Put the per-batch answers back into the original requirement order
+        by_index = {}
+        for (indices, _), result in zip(batches, batch_results):
+            for i, analysis in zip(indices, result.get("requirements_analysis", [])):
+                by_index[i] = dict(analysis, requirement=requirements[i])
+        
+        recommendations = [result["desk_rejection_recommendation"] for result in batch_results]
+        return {
+            "requirements_analysis": [by_index[i] for i in sorted(by_index)],
+            "desk_rejection_recommendation": {
+                "should_reject": any(r.get("should_reject") for r in recommendations),
+                "justification": " ".join(r["justification"] for r in recommendations if r.get("justification"))
+            }
+        }
+    
+    def check_manuscript(self, pdf_path: str, requirements: List[str],
+                         on_result: Callable[[Dict[str, Any]], None] = None) -> Dict[str, Any]:
+        """
+        Check if a manuscript meets the given requirements.
+        
+        Args:
+            pdf_path (str): Path to the PDF manuscript
+            requirements (List[str]): List of requirements to check
+            on_result (Callable[[Dict[str, Any]], None], optional): Called with each requirement's
+                analysis as soon as it is available; not called for cached results
+            
+        Returns:
+            Dict[str, Any]: Analysis results
+        """
+        cached = self.get_cached(pdf_path, requirements)
+        if cached is not None:
+            return cached
+        
+        structured_text = self.prepare_manuscript(pdf_path, self.parse_cache_dir, self.max_pages, self.page_workers)
+        
+        # Check requirements using OpenAI
+        return self.check_prepared(structured_text, requirements, pdf_path, on_result)
+    
+    def format_requirement(self, req_analysis: Dict[str, Any]) -> str:
+        """
+        Format the analysis of a single requirement.
+        
+        Args:
+            req_analysis (Dict[str, Any]): One entry of requirements_analysis
+            
+        Returns:
+            str: Formatted requirement block
+        """
+        status = '✓ Met' if req_analysis['is_met'] else '✗ Not Met'
+        if req_analysis.get('rule_based'):
+            status += ' (rule-based)'
+        return "\n".join([
+            f"Requirement: {req_analysis['requirement']}",
+            f"Status: {status}",
+            f"Evidence: {req_analysis['evidence']}",
+            f"Explanation: {req_analysis['explanation']}"
+        ])
+    
     def format_results(self, results: Dict[str, Any]) -> str:
         """
         Format the analysis results into a readable string.
@@ -66,10 +443,7 @@ Document Structure:
         
         # Format requirements analysis
         for req_analysis in results["requirements_analysis"]:
-            output.append(f"Requirement: {req_analysis['requirement']}")
-            output.append(f"Status: {'✓ Met' if req_analysis['is_met'] else '✗ Not Met'}")
-            output.append(f"Evidence: {req_analysis['evidence']}")
-            output.append(f"Explanation: {req_analysis['explanation']}\n")
+            output.append(self.format_requirement(req_analysis) + "\n")
             
         # Format desk rejection recommendation
         rejection = results["desk_rejection_recommendation"]
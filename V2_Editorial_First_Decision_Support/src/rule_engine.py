@@ -0,0 +1,241 @@
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from token_budget import split_sections
+
+# Bump whenever a rule's matching or verdicts change so cached results are redone
+RULES_VERSION = "3"
+
+# Explicit annotation on a requirement line, e.g. "... [rule: max_words=5000]"
+_ANNOTATION = re.compile(r"\s*\[rule:\s*(\w+)\s*(?:=\s*([^\]]*))?\]\s*$", re.IGNORECASE)
+# "Word Count: 1200 words", marked "(first 10 of 40 pages only)" when max_pages cut the document short
+_WORD_COUNT = re.compile(r"^Word Count: (\d+) words( \(first \d+ of \d+ pages only\))?$", re.MULTILINE)
+_SECTION_TITLE = re.compile(r"^(.+?) \(\d+ words\):$")
+# Words that narrow a requirement in ways no rule models ("excluding references"); such requirements go to the model
+_QUALIFIER = re.compile(r"\b(?:excluding|including|except|unless|if|when|other than|not counting|apart from|besides)\b",
+                        re.IGNORECASE)
+
+class DocumentFacts:
+    """Measurable facts about a manuscript, read from the checker's structured text."""
+
+    def __init__(self, structured_text: str):
+        """
+        Initialize the facts.
+
+        Args:
+            structured_text (str): Structured text built by prepare_manuscript
+        """
+        self.text = structured_text
+        match = _WORD_COUNT.search(structured_text)
+        self.word_count = int(match.group(1)) if match else len(structured_text.split())
+        # Only the leading pages were counted, so the count says nothing about the whole manuscript
+        self.word_count_partial = bool(match and match.group(2))
+
+        self.sections = {}
+        _, blocks = split_sections(structured_text)
+        for block in blocks:
+            header, _, body = block.partition("\n")
+            title = _SECTION_TITLE.match(header)
+            if title:
+                self.sections[title.group(1)] = body.strip()
+
+    def find_section(self, keyword: str) -> Optional[Tuple[str, str]]:
+        """
+        Find the first section whose heading contains a keyword.
+
+        Args:
+            keyword (str): Case-insensitive heading keyword
+
+        Returns:
+            Optional[Tuple[str, str]]: (heading, text) of the section, or None
+        """
+        for heading, body in self.sections.items():
+            if keyword.lower() in heading.lower():
+                return heading, body
+        return None
+
+# A rule takes the argument (from the pattern or annotation) and the facts and
+# returns a verdict dict, or None when it cannot decide and the model should
+RuleFunction = Callable[[str, DocumentFacts], Optional[Dict[str, Any]]]
+_RULES: Dict[str, RuleFunction] = {}
+_PATTERNS: List[Tuple[re.Pattern, str]] = []
+
+def register_rule(name: str, pattern: str = None) -> Callable[[RuleFunction], RuleFunction]:
+    """
+    Register a rule under a name, optionally recognized by a requirement pattern.
+
+    The pattern must match the whole requirement, so requirements with
+    anything more ("... and include a cover letter") are left to the
+    model. The first capture group that matched, if any, is passed to
+    the rule as its argument; an annotation "[rule: name=argument]" does
+    the same explicitly.
+
+    Args:
+        name (str): Rule name used in annotations
+        pattern (str, optional): Case-insensitive regex matched against the whole requirement text
+
+    Returns:
+        Callable: Decorator registering the rule function
+    """
+    def decorator(function: RuleFunction) -> RuleFunction:
+        _RULES[name] = function
+        if pattern:
+            _PATTERNS.append((re.compile(pattern, re.IGNORECASE), name))
+        return function
+    return decorator
+
+def _word_limit(qualifiers: str) -> str:
+    """Pattern of a whole word-limit requirement, e.g. 'The manuscript must be under 5,000 words.'"""
+    return (r"(?:the\s+)?(?:manuscript|main text|paper|article|submission)?\s*(?:word count\s+)?"
+            rf"(?:must|should|shall)\s+(?:be\s+)?(?:{qualifiers})\s+([\d,]+)\s+words(?:\s+long|\s+in length)?\.?")
+
+def _number(argument: str) -> int:
+    return int(argument.replace(",", "").strip())
+
+def _verdict(is_met: bool, evidence: str, explanation: str) -> Dict[str, Any]:
+    return {"is_met": is_met, "evidence": evidence, "explanation": explanation}
+
+def _word_count_verdict(facts: DocumentFacts, is_met: bool, explanation: str) -> Optional[Dict[str, Any]]:
+    """Verdict of a word-limit rule, or None for the model to judge when only the leading pages were counted."""
+    if facts.word_count_partial:
+        return None
+    return _verdict(is_met, f"Word count: {facts.word_count} words", explanation)
+
+@register_rule("max_words", _word_limit(r"under|less than|fewer than|below"))
+def max_words(argument: str, facts: DocumentFacts) -> Optional[Dict[str, Any]]:
+    limit = _number(argument)
+    return _word_count_verdict(facts, facts.word_count < limit,
+                               f"The manuscript has {facts.word_count} words; the limit is under {limit}.")
+
+@register_rule("max_words_inclusive", _word_limit(r"no more than|not more than|not exceed|at most|(?:a\s+)?maximum of|up to"))
+def max_words_inclusive(argument: str, facts: DocumentFacts) -> Optional[Dict[str, Any]]:
+    limit = _number(argument)
+    return _word_count_verdict(facts, facts.word_count <= limit,
+                               f"The manuscript has {facts.word_count} words; the limit is {limit}.")
+
+@register_rule("min_words", _word_limit(r"at least|no (?:less|fewer) than|(?:a\s+)?minimum of"))
+def min_words(argument: str, facts: DocumentFacts) -> Optional[Dict[str, Any]]:
+    minimum = _number(argument)
+    return _word_count_verdict(facts, facts.word_count >= minimum,
+                               f"The manuscript has {facts.word_count} words; the minimum is {minimum}.")
+
+@register_rule("min_words_exclusive", _word_limit(r"more than|over|above"))
+def min_words_exclusive(argument: str, facts: DocumentFacts) -> Optional[Dict[str, Any]]:
+    minimum = _number(argument)
+    return _word_count_verdict(facts, facts.word_count > minimum,
+                               f"The manuscript has {facts.word_count} words; it must have more than {minimum}.")
+
+# A list of capitalized headings, e.g. "Background, Methods, Results, and Conclusions"
+_HEADING = r"(?-i:[A-Z][\w/-]*)(?: (?-i:[A-Z][\w/-]*))*"
+_HEADINGS = rf"({_HEADING}(?:(?:\s*,\s*(?:and\s+)?|\s+and\s+){_HEADING})*)"
+
+@register_rule("structured_abstract",
+               rf"(?:the\s+)?abstract (?:must|should) be structured (?:with|into) (?:the\s+)?{_HEADINGS}"
+               rf"(?: (?:sub)?sections?| headings?)?\.?"
+               rf"|(?:the\s+)?abstract (?:must|should) be structured \({_HEADINGS}\)\.?")
+def structured_abstract(argument: str, facts: DocumentFacts) -> Optional[Dict[str, Any]]:
+    abstract = facts.find_section("abstract")
+    if abstract is None:
+        # The parser did not isolate the abstract; let the model decide
+        return None
+    headings = [h.strip() for h in re.split(r",|\band\b", argument) if h.strip()]
+    missing = [h for h in headings if not _has_heading(abstract[1], h)]
+    if missing:
+        return _verdict(False, f"Abstract ({len(abstract[1].split())} words) has no {', '.join(missing)} part",
+                        f"Required abstract subsections missing: {', '.join(missing)}.")
+    return _verdict(True, f"Abstract contains {', '.join(headings)}",
+                    "All required abstract subsections are present.")
+
+def _has_heading(text: str, heading: str) -> bool:
+    """
+    Check whether a subsection heading starts a line or sentence of a section.
+
+    The structured text joins a section's lines with spaces, so a
+    heading is recognized at the start of a line or after the end of a
+    sentence, followed by a colon, a period, the end of the line or a
+    capitalized word ("Methods: We ...", "Results. The ..."). A plural
+    heading counts for a singular one ("Conclusions" for "Conclusion").
+    """
+    # Only the heading itself is matched ignoring case; the word after it must be capitalized
+    pattern = rf"(?:^|(?<=[.!?])\s)\s*(?i:{re.escape(heading)}s?)\s*(?:[:.]|$|\s+(?=[A-Z]))"
+    return re.search(pattern, text, re.MULTILINE) is not None
+
+_STATEMENT_SYNONYMS = {
+    "conflict of interest": ["conflict of interest", "conflicts of interest", "competing interest"],
+    "data availability": ["data availability", "availability of data", "data are available", "data is available"]
+}
+
+@register_rule("statement_present", r"(?:an?\s+|the\s+)?(.+?) statements? (?:must|should) be (?:included|provided)\.?")
+def statement_present(argument: str, facts: DocumentFacts) -> Optional[Dict[str, Any]]:
+    phrase = argument.strip().lower()
+    for synonym in _STATEMENT_SYNONYMS.get(phrase, [phrase]):
+        match = re.search(re.escape(synonym), facts.text, re.IGNORECASE)
+        if match:
+            snippet = facts.text[max(0, match.start() - 40):match.end() + 80].replace("\n", " ").strip()
+            return _verdict(True, f"...{snippet}...", f"A {phrase} statement is present.")
+    # Absence may be a parsing gap or a differently worded statement; let the model decide
+    return None
+
+def strip_annotation(requirement: str) -> str:
+    """
+    Remove a "[rule: ...]" annotation from a requirement line.
+
+    Args:
+        requirement (str): Requirement text
+
+    Returns:
+        str: Requirement text without the annotation
+    """
+    return _ANNOTATION.sub("", requirement)
+
+def find_rule(requirement: str) -> Optional[Tuple[str, str]]:
+    """
+    Find the rule that can check a requirement.
+
+    Requirements with qualifiers such as "excluding references" go to the
+    model unless an annotation names a rule.
+
+    Args:
+        requirement (str): Requirement text, possibly annotated
+
+    Returns:
+        Optional[Tuple[str, str]]: (rule name, argument), or None if no rule applies
+    """
+    annotation = _ANNOTATION.search(requirement)
+    if annotation and annotation.group(1) in _RULES:
+        return annotation.group(1), annotation.group(2) or ""
+    text = strip_annotation(requirement).strip()
+    if _QUALIFIER.search(text):
+        return None
+    for pattern, name in _PATTERNS:
+        match = pattern.fullmatch(text)
+        if match:
+            return name, next((group for group in match.groups() if group is not None), "")
+    return None
+
+def evaluate_rules(requirements: List[str], structured_text: str) -> Dict[int, Dict[str, Any]]:
+    """
+    Check every requirement that a local rule can decide.
+
+    Args:
+        requirements (List[str]): Requirements, possibly annotated
+        structured_text (str): Structured text built by prepare_manuscript
+
+    Returns:
+        Dict[int, Dict[str, Any]]: Requirement index mapped to its rule-based analysis entry
+    """
+    facts = None
+    verdicts = {}
+    for i, requirement in enumerate(requirements):
+        found = find_rule(requirement)
+        if found is None:
+            continue
+        if facts is None:
+            facts = DocumentFacts(structured_text)
+        name, argument = found
+        try:
+            verdict = _RULES[name](argument, facts)
+        except ValueError:
+            verdict = None
+        if verdict is not None:
+            verdicts[i] = dict(requirement=strip_annotation(requirement), rule_based=True, **verdict)
+    return verdicts
@@ -0,0 +1,249 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import List, Optional
+
+# Bump whenever span extraction changes so stale stores are rebuilt
+PARSER_VERSION = "2"
+
+_MAGIC = b"SPAN"
+_PREAMBLE = struct.Struct("<4sI")
+
+class SpanTable:
+    """
+    Columnar storage for the text spans of one PDF.
+
+    All span texts live in one UTF-8 buffer addressed by an offsets array,
+    and the remaining attributes are kept in parallel numeric arrays. A
+    table loaded from disk is backed by a memory map, so its columns are
+    zero-copy views into the file.
+    """
+
+    def __init__(self, text, offsets, page, font_size, flags, font_index, bbox, fonts: List[str]):
+        """
+        Initialize the span table from its columns.
+
+        Args:
+            text: UTF-8 bytes of all span texts concatenated
+            offsets: uint32 byte offsets into text, one per span plus an end offset
+            page: uint32 page number of each span (1-based)
+            font_size: float32 font size of each span
+            flags: uint32 PyMuPDF style flags of each span (bit 4 bold, bit 1 italic)
+            font_index: uint32 index of each span's font into fonts
+            bbox: float32 bounding boxes, four values per span
+            fonts (List[str]): Distinct font names
+        """
+        self.text = text
+        self.offsets = offsets
+        self.page = page
+        self.font_size = font_size
+        self.flags = flags
+        self.font_index = font_index
+        self.bbox = bbox
+        self.fonts = fonts
+        self._mmap = None
+
+    def __len__(self) -> int:
+        return len(self.page)
+
+    def span_text(self, i: int) -> str:
+        """
+        Decode the text of one span.
+
+        Args:
+            i (int): Span index
+
+        Returns:
+            str: Span text
+        """
+        return bytes(self.text[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def save(self, path: str) -> None:
+        """
+        Write the table to disk atomically.
+
+        Args:
+            path (str): Destination file
+        """
+        header = json.dumps({
+            "count": len(self),
+            "fonts": self.fonts,
+            "byteorder": sys.byteorder,
+            "parser_version": PARSER_VERSION
+        }).encode("utf-8")
+        # Pad the header so every numeric column starts 4-byte aligned
+        header += b" " * (-(len(header) + _PREAMBLE.size) % 4)
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_PREAMBLE.pack(_MAGIC, len(header)))
+            f.write(header)
+            for column in (self.offsets, self.page, self.font_size, self.flags, self.font_index, self.bbox):
+                column.tofile(f)
+            f.write(self.text)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["SpanTable"]:
+        """
+        Memory-map a table written by save().
+
+        Args:
+            path (str): Stored table file
+
+        Returns:
+            Optional[SpanTable]: The table, or None if the file is from another parser version or platform
+        """
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, header_size = _PREAMBLE.unpack_from(mapped, 0)
+        header = json.loads(bytes(mapped[_PREAMBLE.size:_PREAMBLE.size + header_size]))
+        if magic != _MAGIC or header["parser_version"] != PARSER_VERSION or header["byteorder"] != sys.byteorder:
+            mapped.close()
+            return None
+
+        count = header["count"]
+        view = memoryview(mapped)
+        position = _PREAMBLE.size + header_size
+
+        def column(fmt: str, length: int):
+            nonlocal position
+            size = 4 * length
+            data = view[position:position + size].cast(fmt)
+            position += size
+            return data
+
+        offsets = column("I", count + 1)
+        page = column("I", count)
+        font_size = column("f", count)
+        flags = column("I", count)
+        font_index = column("I", count)
+        bbox = column("f", 4 * count)
+        text = view[position:position + offsets[count]]
+
+        table = cls(text, offsets, page, font_size, flags, font_index, bbox, header["fonts"])
+        table._mmap = mapped
+        return table
+
+class SpanTableBuilder:
+    """Appends spans straight into the columns of a SpanTable, without a Python object per span."""
+
+    def __init__(self):
+        self.text = bytearray()
+        self.offsets = array("I", [0])
+        self.page = array("I")
+        self.font_size = array("f")
+        self.flags = array("I")
+        self.font_index = array("I")
+        self.bbox = array("f")
+        self.fonts = {}
+
+    def add(self, text: str, page: int, font_size: float, flags: int, font: str, bbox) -> None:
+        """
+        Append one span.
+
+        Args:
+            text (str): Span text
+            page (int): Page number (1-based)
+            font_size (float): Font size
+            flags (int): PyMuPDF style flags
+            font (str): Font name
+            bbox: (x0, y0, x1, y1) bounding box
+        """
+        self.text += text.encode("utf-8")
+        self.offsets.append(len(self.text))
+        self.page.append(page)
+        self.font_size.append(font_size)
+        self.flags.append(flags)
+        self.font_index.append(self.fonts.setdefault(font, len(self.fonts)))
+        self.bbox.extend(bbox)
+
+    def extend(self, table: SpanTable) -> None:
+        """
+        Append all spans of another table, e.g. one extracted by a worker process.
+
+        Args:
+            table (SpanTable): Table whose spans follow the ones added so far
+        """
+        base = len(self.text)
+        font_map = [self.fonts.setdefault(font, len(self.fonts)) for font in table.fonts]
+        self.text += table.text
+        self.offsets.extend(base + offset for offset in table.offsets[1:])
+        self.page.extend(table.page)
+        self.font_size.extend(table.font_size)
+        self.flags.extend(table.flags)
+        self.font_index.extend(font_map[i] for i in table.font_index)
+        self.bbox.extend(table.bbox)
+
+    def build(self) -> SpanTable:
+        """
+        Finish the table.
+
+        Returns:
+            SpanTable: Table of all added spans in the order they were added
+        """
+        return SpanTable(bytes(self.text), self.offsets, self.page, self.font_size, self.flags,
+                         self.font_index, self.bbox, list(self.fonts))
+
+class SpanCache:
+    """A directory of SpanTable files keyed by PDF content hash and parser version."""
+
+    def __init__(self, directory: str):
+        """
+        Initialize the span cache.
+
+        Args:
+            directory (str): Directory holding the stored tables
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+
+    def path_for(self, content_hash: str, variant: str = "") -> str:
+        """
+        Path of the stored table for a PDF.
+
+        Args:
+            content_hash (str): SHA-256 of the PDF bytes
+            variant (str): Extra parser settings that change the extracted spans
+
+        Returns:
+            str: File path inside the cache directory
+        """
+        suffix = f"-{variant}" if variant else ""
+        return os.path.join(self.directory, content_hash[:2], f"{content_hash}-v{PARSER_VERSION}{suffix}.spans")
+
+    def get(self, content_hash: str, variant: str = "") -> Optional[SpanTable]:
+        """
+        Load the stored table for a PDF, if present.
+
+        Args:
+            content_hash (str): SHA-256 of the PDF bytes
+            variant (str): Extra parser settings that change the extracted spans
+
+        Returns:
+            Optional[SpanTable]: Memory-mapped table, or None on a miss
+        """
+        path = self.path_for(content_hash, variant)
+        if not os.path.exists(path):
+            return None
+        try:
+            return SpanTable.load(path)
+        except (OSError, ValueError, struct.error):
+            return None
+
+    def put(self, content_hash: str, table: SpanTable, variant: str = "") -> None:
+        """
+        Store the table for a PDF.
+
+        Args:
+            content_hash (str): SHA-256 of the PDF bytes
+            table (SpanTable): Extracted spans
+            variant (str): Extra parser settings that change the extracted spans
+        """
+        path = self.path_for(content_hash, variant)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        table.save(path)
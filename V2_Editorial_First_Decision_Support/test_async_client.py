@@ -0,0 +1,131 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "common"))
+
+from openai_client import AsyncOpenAIClient, OpenAIClient
+from rate_limiter import RateLimiter, parse_retry_after
+
+ANALYSIS = {
+    "requirements_analysis": [
+        {"requirement": "Manuscript must be under 5000 words", "is_met": True,
+         "evidence": "Word Count: 1200 words", "explanation": "Below the limit"}
+    ],
+    "desk_rejection_recommendation": {"should_reject": False, "justification": "All requirements met"}
+}
+
+class FakeCompletionsHandler(BaseHTTPRequestHandler):
+    """Answers /chat/completions with a scripted sequence of status codes."""
+
+    statuses = []
+    calls = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        status = self.statuses[min(type(self).calls, len(self.statuses) - 1)]
+        type(self).calls += 1
+
+        if status == 200:
+            body = {
+                "id": "chatcmpl-test",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "gpt-3.5-turbo",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": json.dumps(ANALYSIS)}}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 20, "total_tokens": 30}
+            }
+        else:
+            body = {"error": {"message": "try again", "type": "rate_limit", "code": None}}
+
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        if status == 429:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+def run_fake_server(statuses):
+    FakeCompletionsHandler.statuses = statuses
+    FakeCompletionsHandler.calls = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeCompletionsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def test_retries_429_and_500_then_succeeds():
+    server = run_fake_server([429, 500, 200])
+    try:
+        client = AsyncOpenAIClient(api_key="test", base_url=f"http://127.0.0.1:{server.server_port}/v1",
+                                   requests_per_minute=600, tokens_per_minute=100000, max_retries=3)
+        result = asyncio.run(client.check_requirements("Short manuscript", ["Manuscript must be under 5000 words"]))
+    finally:
+        server.shutdown()
+
+    assert FakeCompletionsHandler.calls == 3
+    assert result == ANALYSIS
+
+def test_gives_up_after_max_retries():
+    server = run_fake_server([503])
+    try:
+        client = AsyncOpenAIClient(api_key="test", base_url=f"http://127.0.0.1:{server.server_port}/v1",
+                                   max_retries=1)
+        try:
+            asyncio.run(client.check_requirements("Short manuscript", ["Any requirement"]))
+            assert False, "expected the request to fail"
+        except Exception as e:
+            assert "Failed to analyze manuscript" in str(e)
+    finally:
+        server.shutdown()
+
+    assert FakeCompletionsHandler.calls == 2
+
+def test_blocking_client_retries_429_and_500_then_succeeds():
+    server = run_fake_server([429, 500, 200])
+    try:
+        client = OpenAIClient(api_key="test", base_url=f"http://127.0.0.1:{server.server_port}/v1")
+        result = client.check_requirements("Short manuscript", ["Manuscript must be under 5000 words"])
+    finally:
+        server.shutdown()
+
+    assert FakeCompletionsHandler.calls == 3
+    assert result == ANALYSIS
+
+def test_blocking_client_does_not_retry_client_errors():
+    server = run_fake_server([400])
+    try:
+        client = OpenAIClient(api_key="test", base_url=f"http://127.0.0.1:{server.server_port}/v1")
+        try:
+            client.check_requirements("Short manuscript", ["Any requirement"])
+            assert False, "expected the request to fail"
+        except Exception as e:
+            assert "Failed to analyze manuscript" in str(e)
+    finally:
+        server.shutdown()
+
+    assert FakeCompletionsHandler.calls == 1
+
+def test_rate_limiter_waits_for_token_budget():
+    limiter = RateLimiter(requests_per_minute=6000, tokens_per_minute=600)
+
+    async def acquire_twice():
+        await limiter.acquire(600)
+        return await limiter.acquire(5)
+
+    # 5 tokens refill at 10 tokens/second, so the second call waits ~0.5s
+    waited = asyncio.run(acquire_twice())
+    assert 0.3 < waited < 1.0
+
+def test_parse_retry_after():
+    assert parse_retry_after({"retry-after": "2"}) == 2.0
+    assert parse_retry_after({"retry-after-ms": "250"}) == 0.25
+    assert parse_retry_after({}) is None
@@ -0,0 +1,62 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "common"))
+
+from openai_client import OpenAIClient
+
+REQUIREMENTS = ["Funding statement must be included", "Abstract must be structured"]
+
+def chunk(met, should_reject=False, justification="Chunk verdict."):
+    return {
+        "requirements_analysis": [
+            {"requirement": requirement, "is_met": is_met, "evidence": f"{requirement}: {is_met}",
+             "explanation": f"Chunk says {is_met}"}
+            for requirement, is_met in zip(REQUIREMENTS, met)
+        ],
+        "desk_rejection_recommendation": {"should_reject": should_reject, "justification": justification}
+    }
+
+def test_single_chunk_is_returned_unchanged():
+    client = OpenAIClient(api_key="test")
+    result = chunk([True, False], True)
+    assert client._merge_results([result], REQUIREMENTS) is result
+
+def test_requirement_shown_by_one_chunk_is_met():
+    client = OpenAIClient(api_key="test")
+    # A typical split: the statements sit in one part, and the other parts do not show them
+    merged = client._merge_results([chunk([False, True], True), chunk([False, False], True),
+                                    chunk([True, False], True), chunk([False, False], True)], REQUIREMENTS)
+
+    first, second = merged["requirements_analysis"]
+    assert first["is_met"] is True
+    # Only the chunk that found the evidence explains the verdict
+    assert first["evidence"] == f"{REQUIREMENTS[0]}: True"
+    assert first["explanation"] == "Chunk says True"
+    assert second["is_met"] is True
+    assert merged["desk_rejection_recommendation"]["should_reject"] is False
+
+def test_requirement_no_chunk_shows_is_unmet_and_rejects():
+    client = OpenAIClient(api_key="test")
+    merged = client._merge_results([chunk([True, False]), chunk([False, False])], REQUIREMENTS)
+
+    second = merged["requirements_analysis"][1]
+    assert second["is_met"] is False
+    assert second["explanation"] == "Chunk says False"
+    recommendation = merged["desk_rejection_recommendation"]
+    assert recommendation["should_reject"] is True
+    assert REQUIREMENTS[1] in recommendation["justification"]
+
+def test_chunk_recommendations_do_not_decide_the_rejection():
+    client = OpenAIClient(api_key="test")
+    merged = client._merge_results([chunk([True, False], True, "Part lacks the abstract."),
+                                    chunk([False, True], True, "Part lacks the funding statement.")], REQUIREMENTS)
+    assert merged["desk_rejection_recommendation"]["should_reject"] is False
+
+def test_missing_recommendation_does_not_break_the_merge():
+    client = OpenAIClient(api_key="test")
+    partial = chunk([True, True])
+    del partial["desk_rejection_recommendation"]
+    merged = client._merge_results([partial, chunk([False, False])], REQUIREMENTS)
+    assert merged["desk_rejection_recommendation"]["should_reject"] is False
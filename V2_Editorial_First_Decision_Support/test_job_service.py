@@ -0,0 +1,63 @@
+import json
+import os
+import sys
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "common"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+import fitz
+from job_service import JobService, start_server
+from mock_openai_server import MockOpenAIServer
+from requirements_checker import RequirementsChecker
+from telemetry import Telemetry
+
+REQUIREMENTS = ["Manuscript must be under 5000 words", "Abstract must be structured"]
+
+def post_pdf(base_url, pdf, tenant):
+    request = urllib.request.Request(f"{base_url}/jobs", data=pdf, method="POST",
+                                     headers={"Content-Type": "application/pdf", "X-Tenant": tenant})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+def get_json(url):
+    with urllib.request.urlopen(url) as response:
+        return json.load(response)
+
+def test_jobs_are_limited_and_shared_fairly_between_tenants(tmp_path, monkeypatch):
+    document = fitz.open()
+    document.new_page().insert_text((72, 72), "Abstract\nA short manuscript.\nIntroduction\nSome text.")
+    pdf = document.tobytes()
+
+    mock = MockOpenAIServer(latency="fixed:0.5")
+    monkeypatch.setenv("OPENAI_BASE_URL", mock.start())
+    checker = RequirementsChecker(api_key="mock", use_rules=False)
+    service = JobService(
+        RequirementsChecker.prepare_manuscript,
+        lambda pdf_path, text, requirements, on_item: checker.check_prepared(text, requirements, pdf_path, on_item),
+        Telemetry("editorial"), max_inflight=1, tenant_concurrency=1, tenant_queued=1)
+    server = start_server(service, lambda fields: fields.get("requirements", REQUIREMENTS), 0)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        statuses = [post_pdf(base_url, pdf, "a") for _ in range(3)]
+        status_b, job_b = post_pdf(base_url, pdf, "b")
+        assert [status for status, _ in statuses] == [202, 202, 429]
+        assert status_b == 202
+
+        first = get_json(f"{base_url}/jobs/{statuses[0][1]['id']}?wait=30")
+        second = get_json(f"{base_url}/jobs/{statuses[1][1]['id']}?wait=30")
+        other = get_json(f"{base_url}/jobs/{job_b['id']}?wait=30")
+    finally:
+        service.close()
+        server.shutdown()
+        mock.shutdown()
+
+    assert first["status"] == "done"
+    assert [entry["requirement"] for entry in first["result"]["requirements_analysis"]] == REQUIREMENTS
+    # Tenant b's job was queued after both of a's but starts before a's second one
+    assert other["started"] <= second["started"]
@@ -0,0 +1,83 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "common"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+import pytest
+from corpus import SECTIONS, generate_corpus
+from layout import FLAG_BOLD, Layout
+from pdf_parser import PDFParser
+from requirements_checker import RequirementsChecker
+from span_store import SpanTableBuilder
+
+LEFT, RIGHT = (56, 290), (322, 556)
+
+def two_column_page():
+    """A title across both columns, a heading and ten body lines in each column."""
+    builder = SpanTableBuilder()
+    builder.add("A Study of Things", 1, 16, FLAG_BOLD, "tibo", (56, 40, 556, 60))
+    # Extraction order deliberately interleaves the columns
+    for line in range(10):
+        y = 100 + 13 * line
+        builder.add(f"right {line}", 1, 10, 0, "tiro", (RIGHT[0], y, RIGHT[1], y + 10))
+        builder.add(f"left {line}", 1, 10, 0, "tiro", (LEFT[0], y, LEFT[1], y + 10))
+    builder.add("1. Introduction", 1, 12, FLAG_BOLD, "tibo", (LEFT[0], 80, 160, 92))
+    return builder.build()
+
+def test_columns_are_read_top_to_bottom_one_after_the_other():
+    table = two_column_page()
+    layout = Layout(table)
+
+    order = [table.span_text(i) for i in layout.order]
+
+    assert order == (["A Study of Things", "1. Introduction"] + [f"left {line}" for line in range(10)] +
+                     [f"right {line}" for line in range(10)])
+
+def test_larger_rare_sizes_are_heading_levels_largest_first():
+    table = two_column_page()
+    layout = Layout(table)
+
+    levels = {table.span_text(i): int(layout.heading_level[i]) for i in range(len(table))}
+
+    assert layout.body_size == 10
+    assert levels["A Study of Things"] == 1
+    assert levels["1. Introduction"] == 2
+    assert levels["left 0"] == 0
+
+def test_empty_table_has_no_order():
+    layout = Layout(SpanTableBuilder().build())
+    assert len(layout.order) == 0
+
+@pytest.fixture(scope="module")
+def manuscripts(tmp_path_factory):
+    return generate_corpus(str(tmp_path_factory.mktemp("corpus")),
+                           [{"pages": 4, "columns": 2, "references": 8}, {"pages": 20, "references": 8}])
+
+def test_sections_of_a_two_column_manuscript(manuscripts):
+    sections = PDFParser(manuscripts[0]).detect_sections()
+    expected = [name if i == 0 else f"{i}. {name}" for i, name in enumerate(SECTIONS)] + ["References"]
+    assert list(sections) == expected
+    assert sections["References"][0].startswith("[1]")
+
+def test_pages_are_streamed_in_order(manuscripts):
+    pages = list(PDFParser(manuscripts[1], max_pages=5).iter_pages())
+    assert [number for number, _ in pages] == [1, 2, 3, 4, 5]
+    assert all(text for _, text in pages)
+
+def test_word_count_of_truncated_manuscripts_is_marked_partial(manuscripts):
+    assert "Word Count: " in RequirementsChecker.prepare_manuscript(manuscripts[1])
+    truncated = RequirementsChecker.prepare_manuscript(manuscripts[1], max_pages=5)
+    assert " words (first 5 of 20 pages only)\n" in truncated
+    assert "pages only" not in RequirementsChecker.prepare_manuscript(manuscripts[0], max_pages=5)
+
+def test_worker_processes_extract_the_same_text(manuscripts):
+    parser = PDFParser(manuscripts[1], workers=2)
+    parser.min_pages_per_worker = 4
+    assert parser.extract_text() == PDFParser(manuscripts[1]).extract_text()
+
+def test_span_cache_returns_the_same_text(manuscripts, tmp_path):
+    first = PDFParser(manuscripts[0], cache_dir=str(tmp_path)).extract_text()
+    assert any(files for _, _, files in os.walk(tmp_path))
+    assert PDFParser(manuscripts[0], cache_dir=str(tmp_path)).extract_text() == first
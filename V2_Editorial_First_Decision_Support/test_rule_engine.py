@@ -0,0 +1,159 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "common"))
+
+import pytest
+from requirements_checker import RequirementsChecker
+from rule_engine import evaluate_rules, find_rule
+
+def structured_text(word_count, abstract="Background: Why. Methods: How. Results: What. Conclusions: So.",
+                    extra=""):
+    return f"""Document Metadata:
+Word Count: {word_count} words
+
+Document Structure:
+
+Abstract ({len(abstract.split())} words):
+{abstract}
+
+Introduction (4 words):
+Some introductory text here. {extra}
+"""
+
+def verdict(requirement, text):
+    return evaluate_rules([requirement], text).get(0)
+
+@pytest.mark.parametrize("requirement, rule", [
+    ("Manuscript must be under 5000 words", ("max_words", "5000")),
+    ("The manuscript should be less than 5,000 words.", ("max_words", "5,000")),
+    ("Manuscript must be no more than 3000 words", ("max_words_inclusive", "3000")),
+    ("The main text should not exceed 4000 words", ("max_words_inclusive", "4000")),
+    ("Manuscript must be at least 2000 words long", ("min_words", "2000")),
+    ("Manuscript must be more than 2000 words", ("min_words_exclusive", "2000")),
+    ("Abstract must be structured with Background, Methods, Results, and Conclusion sections",
+     ("structured_abstract", "Background, Methods, Results, and Conclusion")),
+    ("Abstract must be structured (Background, Methods)", ("structured_abstract", "Background, Methods")),
+    ("Data availability statement must be included", ("statement_present", "Data availability")),
+    ("Main text must stay short [rule: max_words=4000]", ("max_words", "4000")),
+])
+def test_whole_requirements_find_their_rule(requirement, rule):
+    assert find_rule(requirement) == rule
+
+@pytest.mark.parametrize("requirement", [
+    "Manuscript must be under 5000 words excluding references",
+    "Manuscript must be under 5000 words and include a cover letter",
+    "Word limits apply: the manuscript must be under 5000 words",
+    "Abstract must be structured",
+    "Abstract must be structured with Background and Methods and be concise",
+    "Data availability statement must be included if data were generated",
+    "Data availability statement is optional",
+])
+def test_qualified_or_partial_requirements_go_to_the_model(requirement):
+    assert find_rule(requirement) is None
+
+@pytest.mark.parametrize("word_count, is_met", [(4999, True), (5000, False), (5001, False)])
+def test_under_limit_is_strict(word_count, is_met):
+    assert verdict("Manuscript must be under 5000 words", structured_text(word_count))["is_met"] is is_met
+
+@pytest.mark.parametrize("word_count, is_met", [(2999, True), (3000, True), (3001, False)])
+def test_no_more_than_limit_is_inclusive(word_count, is_met):
+    assert verdict("Manuscript must be no more than 3,000 words", structured_text(word_count))["is_met"] is is_met
+
+@pytest.mark.parametrize("word_count, is_met", [(1999, False), (2000, True), (2001, True)])
+def test_at_least_minimum_is_inclusive(word_count, is_met):
+    assert verdict("Manuscript must be at least 2000 words", structured_text(word_count))["is_met"] is is_met
+
+@pytest.mark.parametrize("word_count, is_met", [(1999, False), (2000, False), (2001, True)])
+def test_more_than_minimum_is_strict(word_count, is_met):
+    assert verdict("Manuscript must be more than 2000 words", structured_text(word_count))["is_met"] is is_met
+
+def test_structured_abstract_with_all_headings_is_met():
+    result = verdict("Abstract must be structured with Background, Methods, Results, and Conclusions sections",
+                     structured_text(3000))
+    assert result["is_met"] is True
+    assert result["rule_based"] is True
+
+def test_structured_abstract_accepts_plural_headings():
+    assert verdict("Abstract must be structured with Background, Methods, Results, and Conclusion sections",
+                   structured_text(3000))["is_met"] is True
+
+def test_structured_abstract_heading_must_start_a_line_or_sentence():
+    # "results" and "methods" only appear inside sentences
+    abstract = "Background: Why it matters. We describe our methods and the results we obtained."
+    result = verdict("Abstract must be structured with Background, Methods, and Results",
+                     structured_text(3000, abstract))
+    assert result["is_met"] is False
+    assert "Methods, Results" in result["explanation"]
+
+@pytest.mark.parametrize("requirement", ["Manuscript must be under 5000 words",
+                                         "Manuscript must be at least 2000 words long"])
+def test_partial_word_count_goes_to_the_model(requirement):
+    text = structured_text(3000).replace("3000 words\n", "3000 words (first 10 of 40 pages only)\n", 1)
+    assert verdict(requirement, text) is None
+
+def test_structured_abstract_heading_at_line_start_counts():
+    abstract = "Background\nWhy it matters.\nMethods\nHow we did it."
+    assert verdict("Abstract must be structured with Background and Methods",
+                   structured_text(3000, abstract))["is_met"] is True
+
+def test_structured_abstract_without_abstract_section_goes_to_the_model():
+    text = "Document Metadata:\nWord Count: 10 words\n\nDocument Structure:\n\nIntroduction (2 words):\nSome text.\n"
+    assert verdict("Abstract must be structured with Background and Methods", text) is None
+
+def test_statement_present_uses_synonyms():
+    text = structured_text(3000, extra="The data are available from the authors on request.")
+    result = verdict("Data availability statement must be included", text)
+    assert result["is_met"] is True
+    assert "data are available" in result["evidence"]
+
+def test_missing_statement_goes_to_the_model():
+    assert verdict("Conflict of interest statement must be included", structured_text(3000)) is None
+
+def test_failed_rule_is_reported_but_does_not_reject():
+    checker = RequirementsChecker(api_key="test")
+    requirements = ["Manuscript must be under 5000 words", "References must follow APA format"]
+    rule_results = evaluate_rules(requirements, structured_text(6000))
+    analysis = {
+        "requirements_analysis": [{"requirement": requirements[1], "is_met": True, "evidence": "", "explanation": ""}],
+        "desk_rejection_recommendation": {"should_reject": False, "justification": "Minor issues only."}
+    }
+
+    merged = checker._merge_rule_results(requirements, rule_results, analysis)
+
+    assert [entry["requirement"] for entry in merged["requirements_analysis"]] == requirements
+    assert merged["requirements_analysis"][0]["rule_based"] is True
+    assert merged["requirements_analysis"][0]["is_met"] is False
+    assert merged["desk_rejection_recommendation"]["should_reject"] is False
+    assert "Rule-based checks not met: " + requirements[0] in merged["desk_rejection_recommendation"]["justification"]
+
+def test_model_rejection_is_kept_when_rules_pass():
+    checker = RequirementsChecker(api_key="test")
+    requirements = ["Manuscript must be under 5000 words", "References must follow APA format"]
+    analysis = {
+        "requirements_analysis": [{"requirement": requirements[1], "is_met": False, "evidence": "", "explanation": ""}],
+        "desk_rejection_recommendation": {"should_reject": True, "justification": "References are unusable."}
+    }
+
+    merged = checker._merge_rule_results(requirements, evaluate_rules(requirements, structured_text(3000)), analysis)
+
+    assert merged["desk_rejection_recommendation"] == {"should_reject": True,
+                                                       "justification": "References are unusable."}
+
+def test_cache_key_covers_rules_and_response_limit(tmp_path, monkeypatch):
+    import rule_engine
+    import requirements_checker
+
+    pdf_path = tmp_path / "manuscript.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4 test")
+    requirements = ["Manuscript must be under 5000 words"]
+    checker = RequirementsChecker(api_key="test")
+    key = checker.cache_key(str(pdf_path), requirements)
+
+    checker.openai_client.max_tokens += 500
+    assert checker.cache_key(str(pdf_path), requirements) != key
+    checker.openai_client.max_tokens -= 500
+
+    monkeypatch.setattr(requirements_checker, "RULES_VERSION", rule_engine.RULES_VERSION + "-next")
+    assert checker.cache_key(str(pdf_path), requirements) != key
@@ -0,0 +1,44 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "common"))
+
+from run_manifest import RunManifest
+
+def test_resume_skips_done_manuscripts_and_retries_failures(tmp_path):
+    pdf_files = []
+    for name in ("a.pdf", "b.pdf", "c.pdf", "d.pdf"):
+        path = tmp_path / name
+        path.write_bytes(b"%PDF " + name.encode())
+        pdf_files.append(str(path))
+    a, b, c, d = pdf_files
+    manifest_path = str(tmp_path / "run_manifest.jsonl")
+
+    manifest = RunManifest(manifest_path)
+    manifest.start(pdf_files)
+    manifest.mark(a, "parsed")
+    manifest.record({"manuscript": a, "status": "ok"})
+    manifest.record({"manuscript": b, "status": "error", "error": "timeout"})
+    manifest.record({"manuscript": c, "status": "ok"})
+    manifest.close()
+    # The run is killed while writing a line
+    with open(manifest_path, "a") as f:
+        f.write('{"pdf_path": "')
+
+    # c changed after it was done; d was never started
+    (tmp_path / "c.pdf").write_bytes(b"%PDF changed")
+    resumed = RunManifest(manifest_path, resume=True)
+    assert resumed.remaining(pdf_files, max_attempts=3) == [b, c, d]
+    assert resumed.entries[a]["attempts"] == 1
+    assert resumed.entries[b]["error"] == "timeout"
+    assert resumed.remaining(pdf_files, max_attempts=1) == [c, d]
+
+    resumed.start([b])
+    resumed.record({"manuscript": b, "status": "error", "error": "timeout"})
+    resumed.close()
+    with open(manifest_path) as f:
+        lines = f.readlines()
+    assert json.loads(lines[-2])["state"] == "pending"
+    assert json.loads(lines[-1])["state"] == "failed" and json.loads(lines[-1])["attempts"] == 2
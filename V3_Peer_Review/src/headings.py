@@ -0,0 +1,71 @@
+import re
+from typing import Optional
+
+# A line holding only a section heading, optionally numbered ("2. Methods",
+# "IV. Results") and optionally followed by ":" or "." and text
+HEADING_LINE = re.compile(
+    r'^[ \t]*(?:(?:\d+(?:\.\d+)*|[IVX]+)\.?[ \t]+)?'
+    r'(abstract|introduction|materials and methods|methodology|methods|results|discussion|'
+    r'conclusions?|references|bibliography|acknowledge?ments?|funding|appendix|supplementary material|'
+    r'author contributions|conflicts? of interest|competing interests|data availability)'
+    r'[ \t]*(?:[:.][ \t]*(.*))?$',
+    re.IGNORECASE | re.MULTILINE
+)
+# Heading words mapped to section names; others end the current section without starting a tracked one
+_HEADING_NAMES = {
+    'abstract': 'Abstract',
+    'introduction': 'Introduction',
+    'materials and methods': 'Methods',
+    'methodology': 'Methods',
+    'methods': 'Methods',
+    'results': 'Results',
+    'discussion': 'Discussion',
+    'conclusion': 'Conclusion',
+    'conclusions': 'Conclusion',
+    'references': 'References',
+    'bibliography': 'References'
+}
+
+def section_name(heading: re.Match) -> Optional[str]:
+    """
+    Name of the section a HEADING_LINE match starts.
+
+    Args:
+        heading (re.Match): Match of HEADING_LINE
+
+    Returns:
+        Optional[str]: Tracked section name, or None for headings such as Acknowledgements
+    """
+    return _HEADING_NAMES.get(heading.group(1).lower())
+
+def starts_section(heading: re.Match, current: Optional[str]) -> bool:
+    """
+    Whether a HEADING_LINE match starts a new section.
+
+    Structured abstracts label their parts "Methods: ...", "Results: ...",
+    so inside the Abstract a heading followed by ":" or "." is part of the
+    abstract. Bare heading lines ("Introduction", "1. Introduction") end
+    it as usual.
+
+    Args:
+        heading (re.Match): Match of HEADING_LINE
+        current (Optional[str]): Name of the section the heading occurs in
+
+    Returns:
+        bool: False for an inline label inside the Abstract, True otherwise
+    """
+    return current != 'Abstract' or heading.group(2) is None
+
+def content_start(heading: re.Match) -> int:
+    """
+    Offset where the content of a heading's section begins.
+
+    Text after "Heading:" on the same line belongs to the section.
+
+    Args:
+        heading (re.Match): Match of HEADING_LINE
+
+    Returns:
+        int: Offset into the matched string
+    """
+    return heading.start(2) if heading.group(2) else heading.end()
@@ -1,8 +1,25 @@
 import argparse
 import json
 import os
-from typing import Dict, List
+import sys
+import threading
+import time
+from functools import partial
+from typing import Any, Callable, Dict, List, Tuple
+
+# Pipeline, cache, telemetry and API infrastructure shared with the V2 tool
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "common"))
+
+from batch import Pipeline, run_pipeline, serve_cached, watch_manuscripts
+from batch_api import create_backend, load_job, save_job, wait_for_batch, write_batch_input
+from job_service import JobService, serve_jobs
 from peer_review_checker import PeerReviewChecker
+from rate_limiter import RateLimiter
+from result_cache import ResultCache
+from run_budget import BudgetScheduler, admit_manuscript, order_manuscripts, settle_manuscript
+from run_manifest import PARSED, SUBMITTED, RunManifest
+from telemetry import Telemetry, span
+from watcher import FolderWatcher
 
 def read_review_criteria(criteria_path: str) -> Dict[str, str]:
     """
@@ -17,6 +34,19 @@ def read_review_criteria(criteria_path: str) -> Dict[str, str]:
     with open(criteria_path, 'r') as f:
         return json.load(f)
 
+def read_requirements(requirements_path: str) -> List[str]:
+    """
+    Read editorial requirements from a text file, one per line.
+    
+    Args:
+        requirements_path (str): Path to the requirements file
+        
+    Returns:
+        List[str]: List of requirements
+    """
+    with open(requirements_path, 'r') as f:
+        return [line.strip() for line in f if line.strip()]
+
 def get_pdf_files(directory: str) -> List[str]:
     """
     Get all PDF files from a directory.
@@ -33,23 +63,20 @@ def get_pdf_files(directory: str) -> List[str]:
             pdf_files.append(os.path.join(directory, file))
     return pdf_files
 
-def review_manuscript(checker: PeerReviewChecker, pdf_path: str, criteria: Dict[str, str], output_dir: str) -> None:
+def save_results(checker: PeerReviewChecker, pdf_path: str, results: Dict[str, Any], output_dir: str) -> None:
     """
-    Review a single manuscript and save results to a file.
+    Format review results and save them next to the other outputs.
     
     Args:
         checker (PeerReviewChecker): The peer review checker instance
         pdf_path (str): Path to the PDF file
-        criteria (Dict[str, str]): Review criteria
+        results (Dict[str, Any]): Review results
         output_dir (str): Directory to save the results
     """
-    try:
-        # Get the base filename without extension
-        base_name = os.path.splitext(os.path.basename(pdf_path))[0]
-        
-        # Review manuscript
-        results = checker.review_manuscript(pdf_path, criteria)
-        
+    # Get the base filename without extension
+    base_name = os.path.splitext(os.path.basename(pdf_path))[0]
+    
+    with span("write"):
         # Format results
         formatted_results = checker.format_results(results)
         
@@ -57,46 +84,638 @@ def review_manuscript(checker: PeerReviewChecker, pdf_path: str, criteria: Dict[
         output_file = os.path.join(output_dir, f"{base_name}_review.txt")
         with open(output_file, 'w') as f:
             f.write(formatted_results)
+        
+    print(f"Review completed for {base_name}")
+    print(f"Results saved to: {output_file}\n")
+
+def stream_writer(checker: PeerReviewChecker, pdf_path: str, output_dir: str) -> Callable[[str, Dict[str, Any]], None]:
+    """
+    Build a progress callback that writes each criterion to the review file as soon as it is assessed.
+    
+    The complete review overwrites the file once the manuscript is finished.
+    
+    Args:
+        checker (PeerReviewChecker): The peer review checker instance
+        pdf_path (str): Path to the PDF file
+        output_dir (str): Directory to save the results
+        
+    Returns:
+        Callable[[str, Dict[str, Any]], None]: Callback for review_manuscript/review_prepared
+    """
+    base_name = os.path.splitext(os.path.basename(pdf_path))[0]
+    output_file = os.path.join(output_dir, f"{base_name}_review.txt")
+    lock = threading.Lock()
+    started = []
+    
+    def on_result(criterion: str, assessment: Dict[str, Any]) -> None:
+        with lock:
+            with open(output_file, 'a' if started else 'w') as f:
+                if not started:
+                    f.write("=== Detailed Assessment ===\n")
+                    started.append(True)
+                f.write(checker.format_criterion(criterion, assessment) + "\n")
+            if assessment.get('score') is None:
+                print(f"{base_name}: {criterion} not assessed")
+            else:
+                print(f"{base_name}: {criterion} scored {assessment['score']}/5")
+    
+    return on_result
+
+def review_manuscript(checker: PeerReviewChecker, pdf_path: str, criteria: Dict[str, str], output_dir: str,
+                      telemetry: Telemetry, prepared: Dict[str, Any] = None, stream: bool = False) -> Dict[str, Any]:
+    """
+    Review a single manuscript and save results to a file.
+    
+    Args:
+        checker (PeerReviewChecker): The peer review checker instance
+        pdf_path (str): Path to the PDF file
+        criteria (Dict[str, str]): Review criteria
+        output_dir (str): Directory to save the results
+        telemetry (Telemetry): Records the manuscript's stage timings and token usage
+        prepared (Dict[str, Any], optional): Pre-parsed manuscript; the PDF is parsed if omitted
+        stream (bool): Write each criterion to the output file as soon as it is assessed
+        
+    Returns:
+        Dict[str, Any]: The manuscript's telemetry record
+    """
+    status, error = "ok", None
+    with telemetry.manuscript(pdf_path) as trace:
+        try:
+            # Review manuscript
+            on_result = stream_writer(checker, pdf_path, output_dir) if stream else None
+            if prepared is None:
+                results = checker.review_manuscript(pdf_path, criteria, on_result)
+            else:
+                results = checker.review_prepared(prepared, criteria, pdf_path, on_result)
+            if trace.counters["cache_hits"]:
+                status = "cached"
             
-        print(f"Review completed for {base_name}")
-        print(f"Results saved to: {output_file}\n")
+            save_results(checker, pdf_path, results, output_dir)
+            
+        except Exception as e:
+            status, error = "error", str(e)
+            print(f"Error processing {pdf_path}: {error}\n")
+    return telemetry.finish(pdf_path, status, error)
+
+def job_criteria(fields: Dict[str, Any], default: Dict[str, str]) -> Dict[str, str]:
+    """
+    Read the review criteria of a job submitted to the service.
+    
+    Args:
+        fields (Dict[str, Any]): JSON body of the job request
+        default (Dict[str, str]): Criteria for jobs that do not send their own, if any
         
-    except Exception as e:
-        print(f"Error processing {pdf_path}: {str(e)}\n")
+    Returns:
+        Dict[str, str]: Review criteria
+        
+    Raises:
+        ValueError: If the criteria are missing or malformed
+    """
+    criteria = fields.get("criteria", default)
+    if not criteria or not isinstance(criteria, dict) or \
+            not all(isinstance(name, str) and isinstance(text, str) for name, text in criteria.items()):
+        raise ValueError('"criteria" must be an object mapping criterion names to descriptions')
+    return criteria
 
-def main():
+def submit_batch(checker: PeerReviewChecker, pdf_files: List[str], criteria: Dict[str, str], output_dir: str,
+                 batch_dir: str, backend_name: str, telemetry: Telemetry) -> str:
+    """
+    Parse manuscripts and submit their review requests as one batch job.
+    
+    Manuscripts with a cached review are saved right away and left out
+    of the job. A batch holds requests for one model only, so with a
+    combined editorial check the job submits one batch per model.
+    
+    Args:
+        checker (PeerReviewChecker): The peer review checker instance
+        pdf_files (List[str]): PDF files to review
+        criteria (Dict[str, str]): Review criteria
+        output_dir (str): Directory to save the results
+        batch_dir (str): Directory in which the job directory is created
+        backend_name (str): "openai" or "local"
+        telemetry (Telemetry): Records the parse and prompt-building stages of each manuscript
+        
+    Returns:
+        str: Job directory to pass to --batch-collect, or None if nothing was submitted
+    """
+    job_dir = os.path.join(batch_dir, time.strftime("job_%Y%m%d_%H%M%S"))
+    os.makedirs(job_dir)
+    local_dir = os.path.join(batch_dir, "local")
+    
+    requests = []
+    manuscripts = []
+    for pdf_path in pdf_files:
+        with telemetry.manuscript(pdf_path):
+            cached = checker.get_cached(pdf_path, criteria)
+            if cached is not None:
+                save_results(checker, pdf_path, cached, output_dir)
+                telemetry.finish(pdf_path, "cached")
+                continue
+            try:
+                manuscript_requests, plan = checker.batch_requests(
+                    checker.prepare_manuscript(pdf_path, checker.stream_buffer_chars, bool(checker.requirements)),
+                    criteria)
+            except Exception as e:
+                print(f"Error processing {pdf_path}: {str(e)}\n")
+                telemetry.finish(pdf_path, "error", str(e))
+                continue
+        telemetry.finish(pdf_path, "submitted")
+        custom_ids = [f"{len(manuscripts)}-{i}" for i in range(len(manuscript_requests))]
+        requests.extend(zip(custom_ids, manuscript_requests))
+        manuscripts.append({"pdf_path": pdf_path, "custom_ids": custom_ids, "plan": plan})
+    
+    if not manuscripts:
+        os.rmdir(job_dir)
+        print("Nothing to submit")
+        return None
+    
+    by_model = {}
+    for custom_id, request in requests:
+        by_model.setdefault(request["model"], []).append((custom_id, request))
+    backend = create_backend(backend_name, checker.openai_client, local_dir)
+    batch_ids = []
+    for n, model_requests in enumerate(by_model.values()):
+        input_path = os.path.join(job_dir, "requests.jsonl" if n == 0 else f"requests_{n}.jsonl")
+        write_batch_input(input_path, model_requests)
+        batch_ids.append(backend.submit(input_path))
+    print(f"Submitted batch {', '.join(batch_ids)} with {len(requests)} requests for {len(manuscripts)} manuscripts")
+    
+    save_job(job_dir, {
+        "backend": backend_name,
+        "local_dir": local_dir,
+        "batch_id": batch_ids[0],
+        "batch_ids": batch_ids,
+        "criteria": criteria,
+        "options": {"evidence_k": checker.evidence_k, "stream_buffer_chars": checker.stream_buffer_chars,
+                    "requirements": checker.requirements},
+        "manuscripts": manuscripts
+    })
+    
+    return job_dir
+
+def collect_batch(checker: PeerReviewChecker, job_dir: str, output_dir: str, poll_interval: float,
+                  telemetry: Telemetry) -> int:
+    """
+    Wait for a batch job to finish and save the review of each manuscript.
+    
+    Args:
+        checker (PeerReviewChecker): The peer review checker instance, created with the job's options
+        job_dir (str): Job directory written by submit_batch
+        output_dir (str): Directory to save the results
+        poll_interval (float): Seconds between batch status checks
+        telemetry (Telemetry): Records the parse and write stages of each manuscript
+        
+    Returns:
+        int: Exit code
+    """
+    job = load_job(job_dir)
+    
+    backend = create_backend(job["backend"], checker.openai_client, job["local_dir"])
+    # Jobs submitted before batches were split by model have a single batch_id
+    contents = {}
+    for batch_id in job.get("batch_ids", [job["batch_id"]]):
+        status = wait_for_batch(backend, batch_id, poll_interval)
+        if status not in ("completed", "expired"):
+            print(f"Batch {batch_id} ended with status {status}")
+            return 1
+        contents.update(backend.results(batch_id))
+    
+    for manuscript in job["manuscripts"]:
+        pdf_path = manuscript["pdf_path"]
+        responses = [contents.get(custom_id) for custom_id in manuscript["custom_ids"]]
+        if any(response is None for response in responses):
+            print(f"Error processing {pdf_path}: batch request failed or did not complete\n")
+            telemetry.finish(pdf_path, "error", "batch request failed or did not complete")
+            continue
+        status, error = "ok", None
+        with telemetry.manuscript(pdf_path):
+            try:
+                results = checker.finish_batch(manuscript["plan"], responses, job["criteria"], pdf_path)
+                save_results(checker, pdf_path, results, output_dir)
+            except Exception as e:
+                status, error = "error", str(e)
+                print(f"Error processing {pdf_path}: {error}\n")
+        telemetry.finish(pdf_path, status, error)
+    
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the command-line parser.
+    
+    Returns:
+        argparse.ArgumentParser: The parser
+    """
     parser = argparse.ArgumentParser(description='Academic Manuscript Peer Review Tool')
     parser.add_argument('--manuscripts-dir', default='manuscripts', 
                       help='Directory containing PDF manuscripts (default: manuscripts)')
-    parser.add_argument('--criteria', required=True, help='Path to the review criteria JSON file')
+    parser.add_argument('--criteria', help='Path to the review criteria JSON file (required unless collecting a batch)')
     parser.add_argument('--output-dir', default='analysis_results',
                       help='Directory to save review results (default: analysis_results)')
     parser.add_argument('--api-key', help='OpenAI API key (optional if set in environment)')
+    parser.add_argument('--workers', type=int, default=1,
+                      help='Number of processes used to parse PDFs (default: 1)')
+    parser.add_argument('--max-inflight', type=int, default=1,
+                      help='Maximum number of concurrent OpenAI requests (default: 1)')
+    parser.add_argument('--rpm', type=int, metavar='N',
+                      help='Stay under N OpenAI requests per minute across all concurrent requests (default: no limit)')
+    parser.add_argument('--tpm', type=int, metavar='N',
+                      help='Stay under N OpenAI tokens per minute across all concurrent requests (default: no limit)')
+    parser.add_argument('--evidence-k', type=int, metavar='K',
+                      help='Send only the K most relevant passages per criterion instead of the full text')
+    parser.add_argument('--stream-buffer-chars', type=int, metavar='N',
+                      help='Read PDFs as a page stream, buffering at most about N characters of a section '
+                           '(bounds memory on very long documents)')
+    parser.add_argument('--requirements', metavar='FILE',
+                      help='Also check each manuscript against the editorial requirements in FILE (one per line) '
+                           'in the same pass, with the V2 requirements checker')
+    parser.add_argument('--stream', action='store_true',
+                      help='Stream completions and write each result to the output file as soon as it is ready')
+    parser.add_argument('--cache', default=os.path.join('analysis_cache', 'results.sqlite3'),
+                      help='Path to the result cache database; the cache is on by default and written to '
+                           'analysis_cache/results.sqlite3 (turn it off with --no-cache)')
+    parser.add_argument('--no-cache', action='store_true', help='Disable the result cache')
+    parser.add_argument('--cache-max-mb', type=float,
+                      help='Evict least recently used cache entries beyond this size in MB')
+    parser.add_argument('--cache-max-age-days', type=float,
+                      help='Evict cache entries older than this many days')
+    parser.add_argument('--batch-submit', action='store_true',
+                      help='Submit all manuscripts as one Batch API job instead of calling the API directly')
+    parser.add_argument('--batch-collect', metavar='JOB_DIR',
+                      help='Wait for a submitted batch job and save its results')
+    parser.add_argument('--batch-dir', default='batch_jobs',
+                      help='Directory for batch job files (default: batch_jobs)')
+    parser.add_argument('--batch-backend', choices=['openai', 'local'], default='openai',
+                      help='Submit to the OpenAI Batch API or to a local file-based stand-in (default: openai)')
+    parser.add_argument('--poll-interval', type=float, default=60,
+                      help='Seconds between batch status checks when collecting (default: 60)')
+    parser.add_argument('--telemetry', metavar='FILE',
+                      help='Append per-manuscript stage timings, token usage, retries and cache hits as JSON lines')
+    parser.add_argument('--metrics-file', metavar='FILE',
+                      help='Write run-wide metrics in the Prometheus text format, updated after each manuscript')
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                      help='Serve the Prometheus metrics at http://127.0.0.1:PORT/metrics while running')
+    parser.add_argument('--max-run-tokens', type=int, metavar='N',
+                      help='Stop admitting manuscripts once their estimated prompt and completion tokens would exceed N')
+    parser.add_argument('--max-run-cost', type=float, metavar='USD',
+                      help='Stop admitting manuscripts once their estimated cost at list prices would exceed USD')
+    parser.add_argument('--downgrade-model', metavar='MODEL',
+                      help='Review manuscripts that no longer fit the run budget with this cheaper model (e.g. gpt-4o-mini) instead of deferring them')
+    parser.add_argument('--priority-manifest', metavar='FILE',
+                      help='JSON file with a record per PDF file name; manuscripts are reviewed in the order of --priority-field')
+    parser.add_argument('--priority-field', default='priority',
+                      help='Manifest field to order manuscripts by (default: priority); unlisted manuscripts come last, oldest first')
+    parser.add_argument('--priority-desc', action='store_true',
+                      help='Review manuscripts with the largest --priority-field value first')
+    parser.add_argument('--watch', action='store_true',
+                      help='Keep running and review PDFs as they are added to or changed in the manuscripts directory')
+    parser.add_argument('--watch-interval', type=float, default=2,
+                      help='Seconds between directory scans where inotify is not available (default: 2)')
+    parser.add_argument('--watch-settle', type=float, default=2,
+                      help='Seconds a PDF must stay unmodified before it is picked up (default: 2)')
+    parser.add_argument('--serve', type=int, metavar='PORT',
+                      help='Run an HTTP job service on PORT instead of reviewing the manuscripts directory')
+    parser.add_argument('--host', default='127.0.0.1',
+                      help='Interface the job service binds to (default: 127.0.0.1)')
+    parser.add_argument('--max-queued', type=int, default=100,
+                      help='Jobs the service queues before refusing new ones with 503 (default: 100)')
+    parser.add_argument('--tenant-concurrency', type=int, default=2,
+                      help='Jobs of one tenant (X-Tenant header) that run at the same time (default: 2)')
+    parser.add_argument('--tenant-queued', type=int, default=20,
+                      help='Jobs of one tenant the service queues before refusing more with 429 (default: 20)')
+    parser.add_argument('--resume', action='store_true',
+                      help='Continue the run recorded in the run manifest (--manifest, default: run_manifest.jsonl '
+                           'in the output directory): skip manuscripts that are done and unchanged or submitted, '
+                           'and retry the failed and unfinished ones')
+    parser.add_argument('--manifest', metavar='FILE',
+                      help='Record the state of each manuscript in this run manifest, so an interrupted run can be '
+                           'continued with --resume (not written by default)')
+    parser.add_argument('--max-attempts', type=int, default=3,
+                      help='With --resume, stop retrying manuscripts that failed this many times (default: 3)')
+    
+    return parser
+
+def create_checker(args: argparse.Namespace, cache: ResultCache, requirements: List[str], rate_limiter: RateLimiter,
+                   model: str = None) -> PeerReviewChecker:
+    """
+    Create a peer review checker configured from the command line.
+    
+    Args:
+        args (argparse.Namespace): Command-line arguments
+        cache (ResultCache): Result cache, if any
+        requirements (List[str]): Editorial requirements to check in the same pass, if any
+        rate_limiter (RateLimiter): Requests/tokens-per-minute budget of the run, if any
+        model (str, optional): Model to use instead of the checker's default
+        
+    Returns:
+        PeerReviewChecker: The checker
+    """
+    checker = PeerReviewChecker(api_key=args.api_key, cache=cache, evidence_k=args.evidence_k,
+                                stream_buffer_chars=args.stream_buffer_chars, requirements=requirements,
+                                rate_limiter=rate_limiter)
+    if model:
+        checker.openai_client.model = model
+    return checker
+
+def run_batch(args: argparse.Namespace, checker: PeerReviewChecker, pdf_files: List[str], criteria: Dict[str, str],
+              manifest: RunManifest, telemetry: Telemetry) -> int:
+    """
+    Submit the manuscripts as a batch job, or collect a submitted one.
+    
+    Args:
+        args (argparse.Namespace): Command-line arguments
+        checker (PeerReviewChecker): The peer review checker instance
+        pdf_files (List[str]): PDF files to submit
+        criteria (Dict[str, str]): Review criteria
+        manifest (RunManifest): Run manifest to mark submitted manuscripts in, if any
+        telemetry (Telemetry): Records each manuscript
+        
+    Returns:
+        int: Exit code
+    """
+    if args.batch_collect:
+        return collect_batch(checker, args.batch_collect, args.output_dir, args.poll_interval, telemetry)
+    
+    job_dir = submit_batch(checker, pdf_files, criteria, args.output_dir, args.batch_dir, args.batch_backend,
+                           telemetry)
+    if job_dir is not None:
+        if manifest is not None:
+            job = load_job(job_dir)
+            job["manifest"] = os.path.abspath(manifest.path)
+            save_job(job_dir, job)
+            for manuscript in job["manuscripts"]:
+                manifest.mark(manuscript["pdf_path"], SUBMITTED, job=job_dir)
+        print(f"Collect the results with: --batch-collect {job_dir}")
+    return 0
+
+def run_serve(args: argparse.Namespace, checker: PeerReviewChecker, criteria: Dict[str, str],
+              telemetry: Telemetry) -> int:
+    """
+    Run the HTTP job service until it is stopped.
+    
+    Args:
+        args (argparse.Namespace): Command-line arguments
+        checker (PeerReviewChecker): The peer review checker instance
+        criteria (Dict[str, str]): Criteria for jobs that do not send their own, if any
+        telemetry (Telemetry): Records each job
+        
+    Returns:
+        int: Exit code
+    """
+    service = JobService(
+        partial(PeerReviewChecker.prepare_manuscript, stream_buffer_chars=checker.stream_buffer_chars,
+                editorial=bool(checker.requirements)),
+        lambda pdf_path, prepared, criteria, on_item: checker.review_prepared(
+            prepared, criteria, pdf_path,
+            lambda criterion, assessment: on_item({"criterion": criterion, "assessment": assessment})),
+        telemetry,
+        lookup=checker.get_cached,
+        workers=args.workers,
+        max_inflight=args.max_inflight,
+        max_queued=args.max_queued,
+        tenant_concurrency=args.tenant_concurrency,
+        tenant_queued=args.tenant_queued
+    )
+    serve_jobs(service, lambda fields: job_criteria(fields, criteria), args.serve, args.host)
+    return 0
+
+def pipeline_stages(args: argparse.Namespace, checker: PeerReviewChecker, checkers: Dict[str, PeerReviewChecker],
+                    scheduler: BudgetScheduler, criteria: Dict[str, str], manifest: RunManifest,
+                    telemetry: Telemetry) -> Tuple[Callable, Callable, Callable]:
+    """
+    Build the parse, review and admit stages of a review pipeline.
+    
+    Args:
+        args (argparse.Namespace): Command-line arguments
+        checker (PeerReviewChecker): The peer review checker instance
+        checkers (Dict[str, PeerReviewChecker]): Checker for each model the scheduler may choose
+        scheduler (BudgetScheduler): The run budget, if any
+        criteria (Dict[str, str]): Review criteria
+        manifest (RunManifest): Run manifest to mark parsed manuscripts in, if any
+        telemetry (Telemetry): Records each manuscript
+        
+    Returns:
+        Tuple[Callable, Callable, Callable]: prepare, review and admit
+    """
+    prepare = partial(PeerReviewChecker.prepare_manuscript, stream_buffer_chars=checker.stream_buffer_chars,
+                      editorial=bool(checker.requirements))
     
+    def review(pdf_path: str, prepared: Dict[str, Any]) -> None:
+        if manifest is not None:
+            manifest.mark(pdf_path, PARSED)
+        if scheduler is None:
+            review_manuscript(checker, pdf_path, criteria, args.output_dir, telemetry, prepared, args.stream)
+            return
+        record = review_manuscript(checkers[scheduler.model_for(pdf_path)], pdf_path, criteria,
+                                   args.output_dir, telemetry, prepared, args.stream)
+        settle_manuscript(scheduler, pdf_path, record)
+    
+    def admit(pdf_path: str, prepared: Dict[str, Any]) -> bool:
+        return admit_manuscript(scheduler, checkers, pdf_path, prepared, criteria, telemetry)
+    
+    return prepare, review, admit
+
+def run_watch(args: argparse.Namespace, checker: PeerReviewChecker, checkers: Dict[str, PeerReviewChecker],
+              scheduler: BudgetScheduler, criteria: Dict[str, str], telemetry: Telemetry) -> int:
+    """
+    Review manuscripts as they appear in the manuscripts directory until stopped.
+    
+    Args:
+        args (argparse.Namespace): Command-line arguments
+        checker (PeerReviewChecker): The peer review checker instance
+        checkers (Dict[str, PeerReviewChecker]): Checker for each model the scheduler may choose
+        scheduler (BudgetScheduler): The run budget, if any
+        criteria (Dict[str, str]): Review criteria
+        telemetry (Telemetry): Records each manuscript
+        
+    Returns:
+        int: Exit code
+    """
+    prepare, review, admit = pipeline_stages(args, checker, checkers, scheduler, criteria, None, telemetry)
+    
+    # Manuscripts are admitted to the budget in the order they arrive
+    def review_admitted(pdf_path: str, prepared: Dict[str, Any]) -> None:
+        if scheduler is None or admit(pdf_path, prepared):
+            review(pdf_path, prepared)
+    
+    watch_manuscripts(
+        FolderWatcher(args.manuscripts_dir, poll_interval=args.watch_interval, settle_seconds=args.watch_settle),
+        Pipeline(prepare, review_admitted, workers=args.workers, max_inflight=args.max_inflight,
+                 telemetry=telemetry),
+        lambda pdf_path: serve_cached(pdf_path, criteria, checker.get_cached,
+                                      partial(save_results, checker, output_dir=args.output_dir), telemetry)
+    )
+    return 0
+
+def run_once(args: argparse.Namespace, checker: PeerReviewChecker, checkers: Dict[str, PeerReviewChecker],
+             scheduler: BudgetScheduler, pdf_files: List[str], criteria: Dict[str, str], manifest: RunManifest,
+             telemetry: Telemetry) -> int:
+    """
+    Review the manuscripts found at startup.
+    
+    With several workers, concurrent requests or a run budget the
+    manuscripts go through a pipeline; otherwise they are reviewed one
+    after the other.
+    
+    Args:
+        args (argparse.Namespace): Command-line arguments
+        checker (PeerReviewChecker): The peer review checker instance
+        checkers (Dict[str, PeerReviewChecker]): Checker for each model the scheduler may choose
+        scheduler (BudgetScheduler): The run budget, if any
+        pdf_files (List[str]): PDF files to review, most urgent first
+        criteria (Dict[str, str]): Review criteria
+        manifest (RunManifest): Run manifest to mark parsed manuscripts in, if any
+        telemetry (Telemetry): Records each manuscript
+        
+    Returns:
+        int: Exit code
+    """
+    if args.workers == 1 and args.max_inflight == 1 and scheduler is None:
+        for pdf_path in pdf_files:
+            review_manuscript(checker, pdf_path, criteria, args.output_dir, telemetry, stream=args.stream)
+        return 0
+    
+    prepare, review, admit = pipeline_stages(args, checker, checkers, scheduler, criteria, manifest, telemetry)
+    
+    # Serve unchanged manuscripts from the cache without parsing them
+    pending = [pdf_path for pdf_path in pdf_files
+               if not serve_cached(pdf_path, criteria, checker.get_cached,
+                                   partial(save_results, checker, output_dir=args.output_dir), telemetry)]
+    
+    # Parse in worker processes and overlap the API calls
+    run_pipeline(
+        pending,
+        prepare,
+        review,
+        workers=args.workers,
+        max_inflight=args.max_inflight,
+        telemetry=telemetry,
+        admit=None if scheduler is None else admit
+    )
+    return 0
+
+def main():
+    parser = build_parser()
     args = parser.parse_args()
+    if not args.criteria and not args.batch_collect and args.serve is None:
+        parser.error('--criteria is required unless --batch-collect or --serve is given')
+    if args.watch and (args.batch_submit or args.batch_collect):
+        parser.error('--watch cannot be combined with --batch-submit or --batch-collect')
+    if args.serve is not None and (args.watch or args.batch_submit or args.batch_collect):
+        parser.error('--serve cannot be combined with --watch, --batch-submit or --batch-collect')
+    if args.resume and (args.watch or args.serve is not None or args.batch_collect):
+        parser.error('--resume cannot be combined with --watch, --serve or --batch-collect')
     
     try:
         # Create output directory if it doesn't exist
         os.makedirs(args.output_dir, exist_ok=True)
         
-        # Read review criteria
-        criteria = read_review_criteria(args.criteria)
-        
-        # Get PDF files
-        pdf_files = get_pdf_files(args.manuscripts_dir)
+        if args.batch_collect:
+            # The job fixes the criteria and the options its requests were built with
+            job = load_job(args.batch_collect)
+            criteria = job["criteria"]
+            args.evidence_k = job["options"]["evidence_k"]
+            args.stream_buffer_chars = job["options"]["stream_buffer_chars"]
+            requirements = job["options"].get("requirements")
+            pdf_files = [manuscript["pdf_path"] for manuscript in job["manuscripts"]]
+        elif args.serve is not None:
+            # Jobs bring their PDF and may bring their own criteria
+            criteria = read_review_criteria(args.criteria) if args.criteria else None
+            requirements = read_requirements(args.requirements) if args.requirements else None
+            pdf_files = []
+        else:
+            # Read review criteria
+            criteria = read_review_criteria(args.criteria)
+            requirements = read_requirements(args.requirements) if args.requirements else None
+            
+            # Get PDF files, most urgent first
+            pdf_files = order_manuscripts(get_pdf_files(args.manuscripts_dir), args.priority_manifest,
+                                          args.priority_field, args.priority_desc)
         
-        if not pdf_files:
+        if not pdf_files and not args.batch_collect and not args.watch and args.serve is None:
             print(f"No PDF files found in {args.manuscripts_dir}")
             return 1
             
-        print(f"Found {len(pdf_files)} PDF files to review")
+        if args.serve is None:
+            print(f"Found {len(pdf_files)} PDF files to review")
+        
+        # Checkpoint each manuscript's state so an interrupted run can be resumed, if asked to
+        manifest_path = args.manifest
+        if args.batch_collect:
+            # A job submitted with a manifest keeps updating it
+            manifest_path = manifest_path or job.get("manifest")
+        elif args.resume and not manifest_path:
+            manifest_path = os.path.join(args.output_dir, 'run_manifest.jsonl')
+        manifest = None
+        if manifest_path and not args.watch and args.serve is None:
+            manifest = RunManifest(manifest_path, resume=args.resume or bool(args.batch_collect))
+            if args.resume:
+                remaining = manifest.remaining(pdf_files, args.max_attempts)
+                print(f"Resuming: {len(pdf_files) - len(remaining)} already done or submitted, {len(remaining)} to go")
+                pdf_files = remaining
+            if not args.batch_collect:
+                manifest.start(pdf_files)
+        
+        # Open the result cache
+        cache = None
+        if not args.no_cache:
+            cache = ResultCache(
+                args.cache,
+                max_bytes=int(args.cache_max_mb * 1024 * 1024) if args.cache_max_mb else None,
+                max_age_days=args.cache_max_age_days
+            )
+        
+        # One request/token budget for every API call of the run
+        rate_limiter = RateLimiter(args.rpm, args.tpm) if args.rpm or args.tpm else None
         
         # Initialize checker
-        checker = PeerReviewChecker(api_key=args.api_key)
+        checker = create_checker(args, cache, requirements, rate_limiter)
         
-        # Process each PDF
-        for pdf_path in pdf_files:
-            review_manuscript(checker, pdf_path, criteria, args.output_dir)
+        # Admit manuscripts against the run budget, in priority order
+        scheduler = None
+        checkers = {checker.openai_client.model: checker}
+        if args.max_run_tokens is not None or args.max_run_cost is not None:
+            if args.batch_submit or args.batch_collect or args.serve is not None:
+                print("Note: --max-run-tokens and --max-run-cost are not used in batch or service mode")
+            else:
+                scheduler = BudgetScheduler(checker.openai_client.model, args.max_run_tokens, args.max_run_cost,
+                                            args.downgrade_model)
+                if args.downgrade_model:
+                    checkers[args.downgrade_model] = create_checker(args, cache, requirements, rate_limiter,
+                                                                    args.downgrade_model)
+        
+        # Collect stage timings and token usage
+        telemetry = Telemetry("peer_review", args.telemetry, args.metrics_file,
+                              on_finish=manifest.record if manifest is not None else None)
+        if args.metrics_port:
+            telemetry.serve(args.metrics_port)
+        
+        if args.batch_submit or args.batch_collect:
+            status = run_batch(args, checker, pdf_files, criteria, manifest, telemetry)
+        elif args.serve is not None:
+            status = run_serve(args, checker, criteria, telemetry)
+        elif args.watch:
+            status = run_watch(args, checker, checkers, scheduler, criteria, telemetry)
+        else:
+            status = run_once(args, checker, checkers, scheduler, pdf_files, criteria, manifest, telemetry)
+        if status:
+            return status
+        
+        if scheduler is not None:
+            budget = scheduler.summary()
+            print(f"Run budget: {budget['admitted']} admitted, {budget['downgraded']} downgraded, "
+                  f"{budget['deferred']} deferred; {budget['used_tokens']} tokens, ${budget['used_cost']:.4f} used")
+            for pdf_path in budget['deferred_manuscripts']:
+                print(f"  deferred: {pdf_path}")
+        if cache is not None:
+            stats = cache.stats()
+            print(f"Cache: {stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evictions")
+        telemetry.close()
+        if manifest is not None:
+            states = manifest.summary()
+            print("Run manifest: " + ", ".join(f"{count} {state}" for state, count in sorted(states.items())) +
+                  f" ({manifest.path})")
+            manifest.close()
             
         print("Review process complete!")
         
@@ -1,83 +1,234 @@
-import os
-import json
-from typing import List, Dict, Any
-from openai import OpenAI
-from dotenv import load_dotenv
+import asyncio
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from api_client import AsyncChatClient, ChatClient
+from prompt_layout import layout_messages, replace_instructions
+from structured_output import fill_review, response_format, review_schema, supports_json_schema, validate_review
+from telemetry import count, in_context, span
+from token_budget import chunk_text, context_budget, estimate_tokens, label_chunks
 
-class OpenAIClient:
+class OpenAIClient(ChatClient):
     """A class to handle interactions with the OpenAI API for peer review."""
     
-    def __init__(self, api_key: str = None):
+    model = "gpt-4"  # Using GPT-4 for more sophisticated analysis
+    temperature = 0.3
+    max_tokens = 2000  # Increased token limit for detailed feedback
+    # Maximum number of manuscript chunks analyzed at the same time
+    max_chunk_workers = 4
+    # Bump whenever the prompt text changes so cached results are not reused
+    prompt_version = "3"
+    # Response member whose entries are reported while a completion streams in
+    stream_key = "criteria_assessments"
+    
+    def _build_request(self, manuscript_text: str, instructions: str, schema_name: str = None,
+                       schema: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Build the chat completion request for one task on a manuscript.
+        
+        Args:
+            manuscript_text (str): The manuscript text, or one chunk of it
+            instructions (str): Task instructions, from _create_review_prompt
+            schema_name (str, optional): Name of the response schema
+            schema (Dict[str, Any], optional): JSON schema the response must follow; enforced with
+                structured outputs if the model supports them
+            
+        Returns:
+            Dict[str, Any]: Keyword arguments for chat.completions.create
+        """
+        request = {
+            "model": self.model,
+            "messages": layout_messages(manuscript_text, instructions),
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens
+        }
+        if schema is not None and supports_json_schema(self.model):
+            request["response_format"] = response_format(schema_name, schema)
+        return request
+        
+    def prompt_overhead(self, instructions: str) -> int:
+        """
+        Estimate the prompt tokens of a request besides the manuscript text.
+        
+        Args:
+            instructions (str): Task instructions
+            
+        Returns:
+            int: Estimated tokens of the system message, labels and instructions
+        """
+        return sum(estimate_tokens(message["content"]) for message in layout_messages("", instructions))
+        
+    def _chunk_requests(self, manuscript_text: str, instructions: str, schema_name: str = None,
+                        schema: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """
+        Split the manuscript into chunks that fit the model's context and build one request per chunk.
+        
+        Args:
+            manuscript_text (str): The full text of the manuscript
+            instructions (str): Task instructions
+            schema_name (str, optional): Name of the response schema
+            schema (Dict[str, Any], optional): JSON schema of the response
+            
+        Returns:
+            List[Dict[str, Any]]: Requests in document order; a single one if the manuscript fits
+        """
+        with span("prompt_build") as fields:
+            budget = context_budget(self.model, self.max_tokens, self.prompt_overhead(instructions))
+        
+            chunks = label_chunks(chunk_text(manuscript_text, budget))
+            requests = [self._build_request(chunk, instructions, schema_name, schema) for chunk in chunks]
+            fields["requests"] = len(requests)
+        return requests
+        
+    def _build_requests(self, manuscript_text: str, review_criteria: Dict[str, str]) -> List[Dict[str, Any]]:
         """
-        Initialize the OpenAI client.
+        Build the peer review requests for a manuscript, one per chunk.
         
         Args:
-            api_key (str, optional): OpenAI API key. If not provided, will try to load from environment.
+            manuscript_text (str): The full text of the manuscript
+            review_criteria (Dict[str, str]): Dictionary of review criteria and their descriptions
+            
+        Returns:
+            List[Dict[str, Any]]: Requests in document order; a single one if the manuscript fits
         """
-        # Try to load .env from the current directory
-        load_dotenv()
+        return self._chunk_requests(manuscript_text, self._create_review_prompt(review_criteria), "peer_review",
+                                    review_schema(review_criteria))
         
-        # If API key is not found, try to load from parent directory
-        if not os.getenv("OPENAI_API_KEY"):
-            # Get the path to the parent directory (two levels up from this file)
-            parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
-            env_path = os.path.join(parent_dir, ".env")
-            if os.path.exists(env_path):
-                load_dotenv(env_path)
+    def _send_all(self, requests: List[Dict[str, Any]]) -> List[str]:
+        """
+        Send the requests for the chunks of a manuscript concurrently.
         
-        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
-            raise ValueError("OpenAI API key is required")
-        self.client = OpenAI(api_key=self.api_key)
+        Args:
+            requests (List[Dict[str, Any]]): Keyword arguments for chat.completions.create
+            
+        Returns:
+            List[str]: Completion content of each request, in request order
+        """
+        if len(requests) == 1:
+            return [self._send(requests[0])]
+        with ThreadPoolExecutor(max_workers=min(len(requests), self.max_chunk_workers)) as pool:
+            return list(pool.map(in_context(self._send), requests))
         
-    def analyze_manuscript(self, manuscript_text: str, review_criteria: Dict[str, str]) -> Dict[str, Any]:
+    def analyze_manuscript(self, manuscript_text: str, review_criteria: Dict[str, str],
+                           on_item: Callable[[Any, Any], None] = None) -> Dict[str, Any]:
         """
         Analyze a manuscript using GPT-4 for comprehensive peer review.
         
+        Manuscripts that do not fit the context window are split into
+        section-aligned chunks that are reviewed concurrently and merged.
+        
         Args:
             manuscript_text (str): The full text of the manuscript
             review_criteria (Dict[str, str]): Dictionary of review criteria and their descriptions
+            on_item (Callable[[Any, Any], None], optional): Called with (criterion, assessment) for
+                each criterion as soon as it is final. A single request is streamed so assessments
+                arrive while the model is still writing; chunked manuscripts, and criteria that
+                needed a follow-up request, report after merging.
             
         Returns:
             Dict[str, Any]: Analysis results including scores and detailed feedback
         """
-        # Truncate manuscript text to first 4000 words to reduce token usage
-        words = manuscript_text.split()
-        truncated_text = ' '.join(words[:4000]) if len(words) > 4000 else manuscript_text
-        
-        prompt = self._create_review_prompt(truncated_text, review_criteria)
+        requests = self._build_requests(manuscript_text, review_criteria)
         
+        streamed = set()
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",  # Using GPT-4 for more sophisticated analysis
-                messages=[
-                    {"role": "system", "content": "You are an expert peer reviewer with extensive experience in academic publishing. Analyze manuscripts thoroughly and provide detailed, constructive feedback. Be objective and evidence-based in your assessment."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=2000  # Increased token limit for detailed feedback
-            )
-            
-            return self._parse_response(response.choices[0].message.content)
+            if len(requests) == 1 and on_item is not None:
+                def report(criterion: Any, assessment: Any) -> None:
+                    if validate_review({"criteria_assessments": {criterion: assessment}}, {criterion: ""})[1]:
+                        return  # Invalid assessments are asked for again and reported after merging
+                    streamed.add(str(criterion).strip().lower())
+                    on_item(criterion, assessment)
+                responses = [self._send_stream(requests[0], report)]
+            else:
+                responses = self._send_all(requests)
+            
+            results = [self._complete_review(request, response_content, review_criteria)
+                       for request, response_content in zip(requests, responses)]
             
         except Exception as e:
             raise Exception(f"Failed to analyze manuscript: {str(e)}")
             
-    def _create_review_prompt(self, manuscript_text: str, review_criteria: Dict[str, str]) -> str:
+        merged = self._merge_results(results)
+        if on_item is not None:
+            for criterion, assessment in merged.get("criteria_assessments", {}).items():
+                if criterion.strip().lower() not in streamed:
+                    on_item(criterion, assessment)
+        return merged
+        
+    def _merge_results(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
-        Create a prompt for the peer review analysis.
+        Merge the reviews of manuscript chunks into one result.
+        
+        Scores and confidence are averaged, feedback, examples and
+        suggestions are concatenated without duplicates, and the most
+        frequent recommendation wins (ties go to "revise").
+        
+        Chunks that left a criterion not assessed (score None) are left out
+        of its average and feedback. If no chunk assessed it, its score
+        stays None, as for a single request; format_criterion reports it as
+        not assessed.
+        
+        Args:
+            results (List[Dict[str, Any]]): Parsed review of each chunk, in order
+            
+        Returns:
+            Dict[str, Any]: Review results in the single-request format
+        """
+        if len(results) == 1:
+            return results[0]
+        
+        def mean_score(entries: List[Dict[str, Any]]) -> Optional[float]:
+            scores = [float(entry["score"]) for entry in entries if entry.get("score") is not None]
+            return round(sum(scores) / len(scores), 1) if scores else None
+        
+        criteria_assessments = {}
+        criteria = dict.fromkeys(name for result in results for name in result.get("criteria_assessments", {}))
+        for criterion in criteria:
+            entries = [result["criteria_assessments"][criterion] for result in results
+                       if criterion in result.get("criteria_assessments", {})]
+            entries = [entry for entry in entries if entry.get("score") is not None] or entries
+            criteria_assessments[criterion] = {
+                "score": mean_score(entries),
+                "feedback": " ".join(dict.fromkeys(e["feedback"] for e in entries if e.get("feedback"))),
+                "examples": list(dict.fromkeys(x for e in entries for x in e.get("examples", []))),
+                "suggestions": list(dict.fromkeys(x for e in entries for x in e.get("suggestions", [])))
+            }
+        
+        overall = [result["overall_assessment"] for result in results if result.get("overall_assessment")]
+        votes = Counter(str(result.get("recommendation", "")).lower() for result in results)
+        top = max(votes.values())
+        tied = [recommendation for recommendation, count in votes.items() if count == top]
+        recommendation = "revise" if len(tied) > 1 else tied[0]
+        confidences = [float(result["confidence"]) for result in results if result.get("confidence") is not None]
+        
+        return {
+            "overall_assessment": {
+                "score": mean_score(overall),
+                "summary": " ".join(dict.fromkeys(o["summary"] for o in overall if o.get("summary")))
+            },
+            "criteria_assessments": criteria_assessments,
+            "recommendation": recommendation,
+            "confidence": sum(confidences) / len(confidences) if confidences else 0
+        }
+        
+    def _create_review_prompt(self, review_criteria: Dict[str, str]) -> str:
+        """
+        Create the instructions for the peer review analysis.
+        
+        They follow the manuscript text in the request (see prompt_layout).
         
         Args:
-            manuscript_text (str): The manuscript text
             review_criteria (Dict[str, str]): Review criteria and descriptions
             
         Returns:
-            str: Formatted prompt for the OpenAI API
+            str: Formatted instructions for the OpenAI API
         """
         criteria_section = "\n".join([f"- {criterion}: {description}" 
                                     for criterion, description in review_criteria.items()])
         
-        return f"""Please analyze the following manuscript according to these criteria:
+        return f"""Act as a peer reviewer with extensive experience in academic publishing, and give detailed, constructive feedback.
+
+Please analyze the manuscript above according to these criteria:
 
 {criteria_section}
 
@@ -87,9 +238,6 @@ For each criterion:
 3. Support your assessment with specific examples from the text
 4. Suggest specific improvements where applicable
 
-Manuscript text:
-{manuscript_text}
-
 Please format your response as a JSON object with the following structure:
 {{
     "overall_assessment": {{
@@ -108,17 +256,125 @@ Please format your response as a JSON object with the following structure:
     "confidence": <0-1>
 }}"""
     
-    def _parse_response(self, response: str) -> Dict[str, Any]:
+    def _follow_up(self, request: Dict[str, Any], instructions: str, schema_name: str,
+                   schema: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build a follow-up to a request that asks only for what its answer lacked.
+        
+        Only the instructions change, so the follow-up reuses the cached
+        system message and manuscript text of the original request.
+        
+        Args:
+            request (Dict[str, Any]): The original request
+            instructions (str): Instructions for the missing entries
+            schema_name (str): Name of the response schema
+            schema (Dict[str, Any]): JSON schema of the answer
+            
+        Returns:
+            Dict[str, Any]: Keyword arguments for chat.completions.create
+        """
+        follow_up = dict(request, messages=replace_instructions(request["messages"], instructions))
+        if "response_format" in request:
+            follow_up["response_format"] = response_format(schema_name, schema)
+        return follow_up
+        
+    def _review_follow_up(self, request: Dict[str, Any], review_criteria: Dict[str, str],
+                          missing: List[str]) -> Dict[str, Any]:
+        """Build the follow-up request for the criteria a review lacked."""
+        subset = {criterion: review_criteria[criterion] for criterion in missing}
+        return self._follow_up(request, self._create_review_prompt(subset), "peer_review", review_schema(subset))
+        
+    def _finish_review(self, result: Dict[str, Any], review_criteria: Dict[str, str], missing: List[str],
+                       follow_up: Any = None) -> Dict[str, Any]:
+        """
+        Complete a validated review, failing only if no criterion was assessed.
+        
+        Args:
+            result (Dict[str, Any]): First result of validate_review
+            review_criteria (Dict[str, str]): Dictionary of review criteria and their descriptions
+            missing (List[str]): Criteria the first answer lacked
+            follow_up (Any, optional): Parsed answer to the follow-up request
+            
+        Returns:
+            Dict[str, Any]: Review with an assessment of every criterion
+        """
+        review, still_missing = fill_review(result, review_criteria, missing, follow_up)
+        if still_missing and len(still_missing) == len(review_criteria):
+            raise Exception("Failed to parse OpenAI response as JSON")
+        if still_missing:
+            print(f"Warning: no valid assessment of {', '.join(still_missing)}")
+        return review
+        
+    def _complete_review(self, request: Dict[str, Any], response: str,
+                         review_criteria: Dict[str, str]) -> Dict[str, Any]:
         """
-        Parse the OpenAI API response into a structured format.
+        Validate a review and ask again for just the criteria it lacks.
         
         Args:
-            response (str): Raw response from the API
+            request (Dict[str, Any]): The request that was answered
+            response (str): Its completion content
+            review_criteria (Dict[str, str]): Dictionary of review criteria and their descriptions
             
         Returns:
-            Dict[str, Any]: Parsed response
+            Dict[str, Any]: Review with an assessment of every criterion
         """
+        with span("parse"):
+            result, missing = validate_review(self._parse_partial(response), review_criteria)
+        follow_up = None
+        if missing:
+            count("follow_up_requests")
+            try:
+                follow_up = self._parse_response(self._send(self._review_follow_up(request, review_criteria, missing)))
+            except Exception as e:
+                print(f"Warning: follow-up request for {len(missing)} criteria failed: {str(e)}")
+        return self._finish_review(result, review_criteria, missing, follow_up)
+
+class AsyncOpenAIClient(AsyncChatClient, OpenAIClient):
+    """An asyncio variant of OpenAIClient with client-side rate limiting, see AsyncChatClient."""
+    
+    async def _complete_review(self, request: Dict[str, Any], response: str,
+                               review_criteria: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Validate a review and ask again for just the criteria it lacks.
+        
+        Args:
+            request (Dict[str, Any]): The request that was answered
+            response (str): Its completion content
+            review_criteria (Dict[str, str]): Dictionary of review criteria and their descriptions
+            
+        Returns:
+            Dict[str, Any]: Review with an assessment of every criterion
+        """
+        with span("parse"):
+            result, missing = validate_review(self._parse_partial(response), review_criteria)
+        follow_up = None
+        if missing:
+            count("follow_up_requests")
+            try:
+                follow_up = self._parse_response(
+                    await self._complete(self._review_follow_up(request, review_criteria, missing)))
+            except Exception as e:
+                print(f"Warning: follow-up request for {len(missing)} criteria failed: {str(e)}")
+        return self._finish_review(result, review_criteria, missing, follow_up)
+        
+    async def analyze_manuscript(self, manuscript_text: str, review_criteria: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Analyze a manuscript using GPT-4 for comprehensive peer review.
+        
+        Args:
+            manuscript_text (str): The full text of the manuscript
+            review_criteria (Dict[str, str]): Dictionary of review criteria and their descriptions
+            
+        Returns:
+            Dict[str, Any]: Analysis results including scores and detailed feedback
+        """
+        requests = self._build_requests(manuscript_text, review_criteria)
+        
         try:
-            return json.loads(response)
-        except json.JSONDecodeError:
-            raise Exception("Failed to parse OpenAI response as JSON") 
\ No newline at end of file
+            responses = await asyncio.gather(*(self._complete(request) for request in requests))
+            results = await asyncio.gather(*(self._complete_review(request, response_content, review_criteria)
+                                             for request, response_content in zip(requests, responses)))
+        except Exception as e:
+            raise Exception(f"Failed to analyze manuscript: {str(e)}")
+            
+        return self._merge_results(results)
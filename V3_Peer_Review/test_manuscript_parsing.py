@@ -0,0 +1,130 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+import pytest
+from corpus import generate_corpus
+from test_review_merge import import_src
+
+headings = import_src("headings")
+pdf_parser = import_src("pdf_parser")
+StructureIndex = import_src("structure_index").StructureIndex
+
+@pytest.mark.parametrize("line, name", [
+    ("Abstract", "Abstract"),
+    ("2. Methods", "Methods"),
+    ("IV. RESULTS", "Results"),
+    ("3.1 Materials and Methods", "Methods"),
+    ("Conclusions:", "Conclusion"),
+    ("Bibliography", "References"),
+    ("Acknowledgements", None),
+])
+def test_heading_lines_name_their_section(line, name):
+    heading = headings.HEADING_LINE.match(line)
+    assert heading is not None
+    assert headings.section_name(heading) == name
+
+@pytest.mark.parametrize("line", ["Results were mixed", "The methods we used", "Introduction to the topic"])
+def test_sentences_are_not_headings(line):
+    assert headings.HEADING_LINE.match(line) is None
+
+def test_content_after_an_inline_heading_belongs_to_the_section():
+    text = "Abstract: We studied things."
+    assert text[headings.content_start(headings.HEADING_LINE.match(text)):] == "We studied things."
+
+def test_section_scanner_follows_sections_across_pages():
+    scanner = pdf_parser.SectionScanner()
+    completed = scanner.feed("Title page\nAbstract\nShort summary.\nIntroduction\nFirst line")
+    completed += scanner.feed("second line\nAcknowledgements\nThanks to all.\nReferences\n[1] A. Paper. 2020.")
+    completed += scanner.close()
+
+    assert completed == [
+        ("Abstract", ["Short summary."]),
+        ("Introduction", ["First line", "second line"]),
+        ("References", ["[1] A. Paper. 2020."]),
+    ]
+
+def test_section_scanner_chunks_long_sections():
+    scanner = pdf_parser.SectionScanner(max_chars=10)
+    completed = scanner.feed("Methods\n" + "\n".join(["12345"] * 5)) + scanner.close()
+    assert completed == [("Methods", ["12345", "12345"]), ("Methods", ["12345", "12345"]), ("Methods", ["12345"])]
+
+STRUCTURED_ABSTRACT = (
+    "A Study of Things\nAbstract\nBackground: Little is known.\nMethods: We surveyed 20 sites.\n"
+    "Results. Figure 1 shows gains [1].\nConclusions:\nIt works.\n1. Introduction\nPrior work [1].\n"
+    "2. Methods\nWe did it.\nReferences\n[1] Jones, A. A paper. 2018."
+)
+
+def test_structured_abstract_labels_stay_in_the_abstract():
+    abstract = ["Background: Little is known.", "Methods: We surveyed 20 sites.", "Results. Figure 1 shows gains [1].",
+                "Conclusions:", "It works."]
+    sections = pdf_parser._detect_sections(STRUCTURED_ABSTRACT, pdf_parser._scan_sections(STRUCTURED_ABSTRACT))
+    assert sections["Abstract"] == abstract
+    assert sections["Methods"] == ["We did it."]
+    assert "Results" not in sections and "Conclusion" not in sections
+
+    scanner = pdf_parser.SectionScanner()
+    streamed = scanner.feed(STRUCTURED_ABSTRACT) + scanner.close()
+    assert streamed[0] == ("Abstract", abstract)
+    assert [name for name, _ in streamed] == ["Abstract", "Introduction", "Methods", "References"]
+
+def test_inline_headings_outside_the_abstract_start_sections():
+    text = "Introduction\nSome text.\nMethods: We did it.\nResults\nIt worked."
+    sections = pdf_parser._detect_sections(text, pdf_parser._scan_sections(text))
+    assert sections["Methods"] == ["We did it."]
+
+def structure(*pages):
+    index = StructureIndex()
+    offset = 0
+    for number, text in enumerate(pages, 1):
+        index.add_page(number, offset, text)
+        offset += len(text) + 1
+    return index
+
+def test_structure_index_links_captions_mentions_and_citations():
+    index = structure(
+        "Introduction\nAs shown in Figure 1 and Tables 2, prior work [1, 3-4] agrees (Smith et al., 2020).\n"
+        "Figure 1. Study design.\nTable 2: Baseline.\nFigure 3. Never discussed.",
+        "References\n[1] Jones, A. First paper. 2018.\n[2] Lee, B. Second paper.\ncontinued on a new line. 2019.\n"
+        "[3] Park, C. Third paper. 2020.\n[4] Smith, D. Fourth paper. 2020.\n[5] Kim, E. Fifth paper. 2021."
+    )
+
+    assert [caption["text"] for caption in index.captions_for("figure", 1)] == ["Figure 1. Study design."]
+    assert [mention["page"] for mention in index.mentions_of("table", 2)] == [1]
+    assert index.unmentioned("figure") == [3]
+    assert index.reference(2)["text"] == "Lee, B. Second paper. continued on a new line. 2019."
+    assert [entry["number"] for entry in index.uncited_references()] == [2, 5]
+    statistics = index.statistics()
+    assert statistics["total_references"] == 5
+    assert statistics["total_citations"] == 4
+
+def test_structure_index_reads_past_a_structured_abstract():
+    index = structure(STRUCTURED_ABSTRACT)
+    assert [mention["page"] for mention in index.mentions_of("figure", 1)] == [1]
+    assert index.reference(1)["text"] == "Jones, A. A paper. 2018."
+    assert index.uncited_references() == []
+
+def test_uncited_references_are_not_reported_when_no_citation_matched():
+    index = structure("Introduction\nNo citations here.\nReferences\n[1] Jones, A. A paper. 2018.")
+    assert index.uncited_references() == []
+
+@pytest.fixture(scope="module")
+def manuscript(tmp_path_factory):
+    return generate_corpus(str(tmp_path_factory.mktemp("corpus")), [{"pages": 20, "references": 8}])[0]
+
+def test_manuscript_sections_and_structure(manuscript):
+    parser = pdf_parser.PDFParser(manuscript)
+
+    assert list(parser.detect_sections()) == ["Abstract", "Introduction", "Methods", "Results", "Discussion",
+                                              "Conclusion", "References"]
+    statistics = parser.get_structure_index().statistics()
+    assert (statistics["total_figures"], statistics["total_tables"], statistics["total_references"]) == (4, 2, 8)
+    assert parser.get_metadata()["page_count"] == str(len(list(parser.iter_pages())))
+
+def test_streamed_sections_match_the_whole_document(manuscript):
+    parser = pdf_parser.PDFParser(manuscript)
+    streamed = {}
+    for name, lines in parser.iter_sections(max_chars=2000):
+        streamed.setdefault(name, []).extend(lines)
+    assert streamed == parser.detect_sections()
@@ -0,0 +1,116 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from test_review_merge import import_src
+
+openai_client = import_src("openai_client")
+RateLimiter = import_src("rate_limiter").RateLimiter
+
+CRITERIA = {"clarity": "Is the writing clear?", "novelty": "Is the work new?"}
+REVIEW = {
+    "overall_assessment": {"score": 4, "summary": "Solid work"},
+    "criteria_assessments": {
+        criterion: {"score": 4, "feedback": f"{criterion} is fine", "examples": ["p. 2"], "suggestions": []}
+        for criterion in CRITERIA
+    },
+    "recommendation": "accept",
+    "confidence": 0.9
+}
+
+class FakeReviewHandler(BaseHTTPRequestHandler):
+    """Answers /chat/completions with a scripted sequence of status codes."""
+
+    statuses = []
+    calls = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        status = self.statuses[min(type(self).calls, len(self.statuses) - 1)]
+        type(self).calls += 1
+
+        if status == 200:
+            body = {
+                "id": "chatcmpl-test",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "gpt-4",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": json.dumps(REVIEW)}}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 20, "total_tokens": 30}
+            }
+        else:
+            body = {"error": {"message": "try again", "type": "rate_limit", "code": None}}
+
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        if status == 429:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+class RecordingLimiter(RateLimiter):
+    """A rate limiter that remembers the requests it admitted and the pauses it was asked for."""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.admitted = 0
+        self.pauses = []
+
+    def wait(self, tokens=0):
+        self.admitted += 1
+        return super().wait(tokens)
+
+    def pause_for(self, seconds):
+        self.pauses.append(seconds)
+        super().pause_for(seconds)
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeReviewHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/v1"
+    server.shutdown()
+
+def script(statuses):
+    FakeReviewHandler.statuses = statuses
+    FakeReviewHandler.calls = 0
+
+def test_async_client_retries_429_and_500_then_succeeds(server_url):
+    script([429, 500, 200])
+    client = openai_client.AsyncOpenAIClient(api_key="test", base_url=server_url, requests_per_minute=600,
+                                             tokens_per_minute=100000, max_retries=3)
+
+    result = asyncio.run(client.analyze_manuscript("Short manuscript", CRITERIA))
+
+    assert FakeReviewHandler.calls == 3
+    assert result["criteria_assessments"]["novelty"]["score"] == 4.0
+    assert result["recommendation"] == "accept"
+
+def test_async_client_gives_up_after_max_retries(server_url):
+    script([503])
+    client = openai_client.AsyncOpenAIClient(api_key="test", base_url=server_url, max_retries=1)
+
+    with pytest.raises(Exception, match="Failed to analyze manuscript"):
+        asyncio.run(client.analyze_manuscript("Short manuscript", CRITERIA))
+    assert FakeReviewHandler.calls == 2
+
+def test_blocking_clients_share_the_rate_limiter(server_url):
+    script([429, 200])
+    limiter = RecordingLimiter(600, 100000)
+    first = openai_client.OpenAIClient(api_key="test", base_url=server_url, rate_limiter=limiter)
+    second = openai_client.OpenAIClient(api_key="test", base_url=server_url, rate_limiter=limiter)
+
+    first.analyze_manuscript("Short manuscript", CRITERIA)
+    second.analyze_manuscript("Short manuscript", CRITERIA)
+
+    # The 429's Retry-After paused the limiter both clients draw from, and every attempt took a request
+    assert limiter.pauses == [0.0]
+    assert FakeReviewHandler.calls == limiter.admitted == 3
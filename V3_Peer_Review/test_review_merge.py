@@ -0,0 +1,96 @@
+import importlib
+import os
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "common"))
+
+def import_src(name):
+    """
+    Import a module from this tool's src directory.
+
+    V2 has modules with the same names (openai_client, pdf_parser, ...),
+    and its tests may run in the same process. Those are set aside while
+    the V3 modules are imported and put back afterwards; the V3 modules
+    keep working through their own references.
+    """
+    local = {file[:-3] for file in os.listdir(SRC) if file.endswith(".py")}
+    saved = {module: sys.modules.pop(module) for module in local if module in sys.modules}
+    sys.path.insert(0, SRC)
+    try:
+        return importlib.import_module(name)
+    finally:
+        sys.path.remove(SRC)
+        for module in local:
+            sys.modules.pop(module, None)
+        sys.modules.update(saved)
+
+OpenAIClient = import_src("openai_client").OpenAIClient
+
+def review(scores, recommendation="revise", confidence=0.8, overall=3.0):
+    return {
+        "overall_assessment": {"score": overall, "summary": f"Overall {overall}"},
+        "criteria_assessments": {
+            criterion: {
+                "score": score,
+                "feedback": f"{criterion} scored {score}" if score is not None else "Not assessed: no answer.",
+                "examples": [f"{criterion} example"],
+                "suggestions": [] if score is None else [f"Improve {criterion}"]
+            }
+            for criterion, score in scores.items()
+        },
+        "recommendation": recommendation,
+        "confidence": confidence
+    }
+
+def test_single_chunk_is_returned_unchanged():
+    client = OpenAIClient(api_key="test")
+    result = review({"clarity": 4})
+    assert client._merge_results([result]) is result
+
+def test_scores_are_averaged_and_feedback_deduplicated():
+    client = OpenAIClient(api_key="test")
+    merged = client._merge_results([
+        review({"clarity": 4, "novelty": 2}, "accept", 0.6, overall=4.0),
+        review({"clarity": 5, "novelty": 2}, "accept", 1.0, overall=3.0),
+        review({"clarity": 3, "novelty": 2}, "reject", 0.8, overall=2.0),
+    ])
+
+    assert merged["criteria_assessments"]["clarity"]["score"] == 4.0
+    assert merged["criteria_assessments"]["novelty"]["feedback"] == "novelty scored 2"
+    assert merged["criteria_assessments"]["novelty"]["examples"] == ["novelty example"]
+    assert merged["overall_assessment"]["score"] == 3.0
+    assert merged["recommendation"] == "accept"
+    assert abs(merged["confidence"] - 0.8) < 1e-9
+
+def test_recommendation_tie_goes_to_revise():
+    client = OpenAIClient(api_key="test")
+    merged = client._merge_results([review({"clarity": 4}, "accept"), review({"clarity": 2}, "reject")])
+    assert merged["recommendation"] == "revise"
+
+def test_unassessed_chunks_are_left_out_of_the_average():
+    client = OpenAIClient(api_key="test")
+    merged = client._merge_results([review({"clarity": None}), review({"clarity": 2})])
+
+    assessment = merged["criteria_assessments"]["clarity"]
+    assert assessment["score"] == 2.0
+    assert assessment["feedback"] == "clarity scored 2"
+
+def test_criterion_no_chunk_assessed_keeps_a_none_score():
+    client = OpenAIClient(api_key="test")
+    merged = client._merge_results([review({"clarity": None, "novelty": 3}), review({"clarity": None, "novelty": 5})])
+
+    assessment = merged["criteria_assessments"]["clarity"]
+    assert assessment["score"] is None
+    assert assessment["feedback"] == "Not assessed: no answer."
+    assert merged["criteria_assessments"]["novelty"]["score"] == 4.0
+
+def test_overall_score_no_chunk_produced_is_printed_as_not_assessed():
+    client = OpenAIClient(api_key="test")
+    merged = client._merge_results([review({"clarity": None}, overall=None), review({"clarity": None}, overall=None)])
+    assert merged["overall_assessment"]["score"] is None
+
+    checker = import_src("peer_review_checker").PeerReviewChecker(api_key="test")
+    output = checker.format_results(dict(merged, metadata={}, statistics={}))
+    assert "None/5" not in output
+    assert "\n=== Overall Assessment ===\nScore: not assessed\n" in output
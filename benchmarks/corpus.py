@@ -0,0 +1,226 @@
+"""
+Synthetic manuscript PDFs for benchmarks.
+
+Each manuscript has a title block, numbered section headings, body text
+that mentions its figures, tables and references, figure boxes and table
+grids with captions, and a numbered reference list. Length, column
+count, font scheme and figure/table counts are configurable, and a seed
+makes every document reproducible.
+
+Usage:
+    python benchmarks/corpus.py OUTPUT_DIR [--pages 20] [--columns 2] [--fonts serif]
+"""
+import argparse
+import os
+import random
+from typing import Dict, List, Tuple
+import fitz  # PyMuPDF
+
+# Font schemes: (body font, bold font) by PyMuPDF built-in font name
+FONT_SCHEMES = {
+    "serif": ("tiro", "tibo"),
+    "sans": ("helv", "hebo"),
+    "mono": ("cour", "cobo")
+}
+SECTIONS = ["Abstract", "Introduction", "Methods", "Results", "Discussion", "Conclusion"]
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+MARGIN = 56
+GUTTER = 18
+BODY_SIZE = 10
+LINE_HEIGHT = 13
+WORDS = ("analysis cohort effect model sample treatment outcome measure baseline follow-up variance "
+         "estimate significant trial protocol data participants response control method result "
+         "interval regression observed group difference rate study evidence").split()
+
+class _Writer:
+    """Flows lines of text through the columns of successive pages."""
+
+    def __init__(self, document: fitz.Document, columns: int, fonts: Tuple[str, str]):
+        self.document = document
+        self.columns = columns
+        self.body_font, self.bold_font = fonts
+        self.column_width = (PAGE_WIDTH - 2 * MARGIN - (columns - 1) * GUTTER) / columns
+        self.page = None
+        self.column = columns
+        self.y = PAGE_HEIGHT
+
+    def _advance(self, height: float) -> None:
+        """Move to the next column or page if height does not fit."""
+        if self.page is not None and self.y + height <= PAGE_HEIGHT - MARGIN:
+            return
+        self.column += 1
+        if self.column >= self.columns:
+            self.page = self.document.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+            self.column = 0
+        self.y = MARGIN
+
+    @property
+    def x(self) -> float:
+        return MARGIN + self.column * (self.column_width + GUTTER)
+
+    def paragraph(self, text: str, size: float = BODY_SIZE, bold: bool = False) -> None:
+        """Write text wrapped to the column width."""
+        font = self.bold_font if bold else self.body_font
+        line = []
+        for word in text.split():
+            candidate = " ".join(line + [word])
+            if line and fitz.get_text_length(candidate, fontname=font, fontsize=size) > self.column_width:
+                self._line(" ".join(line), font, size)
+                line = [word]
+            else:
+                line.append(word)
+        if line:
+            self._line(" ".join(line), font, size)
+        self.y += LINE_HEIGHT / 2
+
+    def _line(self, text: str, font: str, size: float) -> None:
+        height = max(LINE_HEIGHT, size * 1.3)
+        self._advance(height)
+        self.y += height
+        self.page.insert_text((self.x, self.y), text, fontname=font, fontsize=size)
+
+    def heading(self, text: str, size: float) -> None:
+        """Write a bold heading, kept together with at least three following lines."""
+        self._advance(size * 1.3 + 3 * LINE_HEIGHT)
+        self.y += LINE_HEIGHT / 2
+        self._line(text, self.bold_font, size)
+
+    def figure(self, number: int, rng: random.Random) -> None:
+        """Draw a figure box with its caption."""
+        height = self.column_width * rng.uniform(0.4, 0.7)
+        self._advance(height + 3 * LINE_HEIGHT)
+        rect = fitz.Rect(self.x, self.y + 4, self.x + self.column_width, self.y + 4 + height)
+        self.page.draw_rect(rect, color=(0, 0, 0), fill=(0.9, 0.9, 0.9))
+        self.y = rect.y1 + 4
+        self.paragraph(f"Figure {number}: {_sentence(rng, 8, 16)}")
+
+    def table(self, number: int, rng: random.Random, rows: int = 5, cols: int = 4) -> None:
+        """Write a table caption followed by a grid of cells."""
+        self._advance((rows + 3) * LINE_HEIGHT)
+        self.paragraph(f"Table {number}. {_sentence(rng, 6, 12)}")
+        cell = self.column_width / cols
+        for row in range(rows):
+            self._advance(LINE_HEIGHT)
+            self.y += LINE_HEIGHT
+            for col in range(cols):
+                value = rng.choice(WORDS) if row == 0 else f"{rng.uniform(0, 100):.2f}"
+                self.page.insert_text((self.x + col * cell, self.y), value, fontname=self.body_font, fontsize=BODY_SIZE - 1)
+        self.y += LINE_HEIGHT / 2
+
+def _sentence(rng: random.Random, low: int, high: int) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(low, high))]
+    return " ".join(words).capitalize() + "."
+
+def generate_manuscript(path: str, pages: int = 12, columns: int = 1, font_scheme: str = "serif",
+                        figures: int = 4, tables: int = 2, references: int = 30, seed: int = 0) -> Dict[str, int]:
+    """
+    Write one synthetic manuscript PDF.
+
+    Body text is added until the document reaches the requested number of
+    pages (it may run a page over where a section or the reference list
+    ends).
+
+    Args:
+        path (str): Output PDF path
+        pages (int): Approximate page count
+        columns (int): Text columns per page
+        font_scheme (str): Key of FONT_SCHEMES
+        figures (int): Number of figures
+        tables (int): Number of tables
+        references (int): Number of reference entries
+        seed (int): Random seed
+
+    Returns:
+        Dict[str, int]: Actual page count and the requested figure, table and reference counts
+    """
+    rng = random.Random(seed)
+    document = fitz.open()
+    writer = _Writer(document, columns, FONT_SCHEMES[font_scheme])
+
+    writer.heading(_sentence(rng, 6, 10).rstrip("."), 16)
+    writer.paragraph("A. Author, B. Author and C. Author", BODY_SIZE + 1)
+
+    # Spread the figures, tables and pages evenly over the body sections
+    floats = [("figure", n) for n in range(1, figures + 1)] + [("table", n) for n in range(1, tables + 1)]
+    rng.shuffle(floats)
+    body_sections = SECTIONS[1:]
+    pages_per_section = max(1, pages - 1) / len(body_sections)
+
+    for i, name in enumerate(SECTIONS):
+        writer.heading(name if i == 0 else f"{i}. {name}", 12)
+        if i == 0:
+            for _ in range(3):
+                writer.paragraph(" ".join(_sentence(rng, 10, 20) for _ in range(4)))
+            continue
+        section_floats = floats[(i - 1) * len(floats) // len(body_sections):i * len(floats) // len(body_sections)]
+        target = min(pages, 1 + round(i * pages_per_section))
+        while len(document) < target or section_floats:
+            sentences = [_sentence(rng, 10, 22) for _ in range(5)]
+            sentences[rng.randrange(5)] += f" [{rng.randint(1, references)}]"
+            if section_floats:
+                kind, number = section_floats.pop()
+                sentences.append(f"See {'Figure' if kind == 'figure' else 'Table'} {number} for details.")
+                writer.paragraph(" ".join(sentences))
+                if kind == "figure":
+                    writer.figure(number, rng)
+                else:
+                    writer.table(number, rng)
+            else:
+                writer.paragraph(" ".join(sentences))
+            if len(document) >= pages and not section_floats:
+                break
+
+    writer.heading("References", 12)
+    for n in range(1, references + 1):
+        writer.paragraph(f"[{n}] {rng.choice(WORDS).capitalize()}, {chr(65 + n % 26)}. {_sentence(rng, 6, 12)} "
+                         f"Journal of {rng.choice(WORDS).capitalize()}. {rng.randint(1990, 2024)}.", BODY_SIZE - 1)
+
+    document.set_metadata({"title": "Synthetic manuscript", "author": "Benchmark corpus"})
+    document.save(path, garbage=3, deflate=True)
+    page_count = len(document)
+    document.close()
+    return {"pages": page_count, "figures": figures, "tables": tables, "references": references}
+
+_DEFAULTS = {"pages": 12, "columns": 1, "font_scheme": "serif", "figures": 4, "tables": 2, "references": 30, "seed": 0}
+
+def generate_corpus(directory: str, specs: List[Dict[str, object]]) -> List[str]:
+    """
+    Write one manuscript per spec, reusing files generated earlier with the same spec.
+
+    Args:
+        directory (str): Output directory
+        specs (List[Dict[str, object]]): Keyword arguments for generate_manuscript
+
+    Returns:
+        List[str]: PDF paths in spec order
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for spec in specs:
+        options = dict(_DEFAULTS, **spec)
+        name = "p{pages}-c{columns}-{font_scheme}-f{figures}-t{tables}-r{references}-s{seed}.pdf".format(**options)
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            generate_manuscript(path, **spec)
+        paths.append(path)
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic manuscript PDF')
+    parser.add_argument('output_dir', help='Directory for the generated PDF')
+    parser.add_argument('--pages', type=int, default=12, help='Approximate page count (default: 12)')
+    parser.add_argument('--columns', type=int, default=1, help='Text columns per page (default: 1)')
+    parser.add_argument('--fonts', choices=sorted(FONT_SCHEMES), default='serif', help='Font scheme (default: serif)')
+    parser.add_argument('--figures', type=int, default=4, help='Number of figures (default: 4)')
+    parser.add_argument('--tables', type=int, default=2, help='Number of tables (default: 2)')
+    parser.add_argument('--references', type=int, default=30, help='Number of references (default: 30)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    args = parser.parse_args()
+
+    spec = {"pages": args.pages, "columns": args.columns, "font_scheme": args.fonts, "figures": args.figures,
+            "tables": args.tables, "references": args.references, "seed": args.seed}
+    path, = generate_corpus(args.output_dir, [spec])
+    print(path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Offline end-to-end load test against the mock OpenAI server.
+
+Starts benchmarks/mock_openai_server.py in-process with the given latency
+distribution and error rates, then runs a tool's command line
+(src/main.py) over a synthetic corpus twice: once with an empty result
+cache and once warm. Reports wall time, throughput and the server's
+counters (requests, injected errors and the retries they caused, peak
+concurrency), so concurrency, retry and caching changes can be compared
+without an API key.
+
+Usage:
+    python benchmarks/load_test.py --tool v3 --manuscripts 8 --workers 4 --max-inflight 4 \
+        --latency lognormal:0.5,0.4 --errors 429=0.1,500=0.02
+    python benchmarks/load_test.py --tool v2 -- --fan-out 5 --stream
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+from corpus import generate_corpus
+from mock_openai_server import MockOpenAIServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS = {
+    "v2": {
+        "dir": os.path.join(ROOT, "V2_Editorial_First_Decision_Support"),
+        "task": ["--requirements", "requirements_1.txt"]
+    },
+    "v3": {
+        "dir": os.path.join(ROOT, "V3_Peer_Review"),
+        "task": ["--criteria", "review_criteria.json"]
+    }
+}
+
+def run_tool(tool: str, server: MockOpenAIServer, manuscripts_dir: str, work_dir: str,
+             workers: int, max_inflight: int, extra_args: List[str]) -> Dict[str, Any]:
+    """
+    Run a tool's command line once against the mock server.
+
+    Args:
+        tool (str): Key of TOOLS
+        server (MockOpenAIServer): Running mock server; its counters are reset first
+        manuscripts_dir (str): Directory of the PDFs to process
+        work_dir (str): Directory for the results and the result cache
+        workers (int): Value of --workers
+        max_inflight (int): Value of --max-inflight
+        extra_args (List[str]): Further command-line arguments for the tool
+
+    Returns:
+        Dict[str, Any]: Wall time, exit code, number of result files and the server's counters
+    """
+    output_dir = os.path.join(work_dir, "results")
+    shutil.rmtree(output_dir, ignore_errors=True)
+    command = [
+        sys.executable, "src/main.py", *TOOLS[tool]["task"],
+        "--manuscripts-dir", manuscripts_dir,
+        "--output-dir", output_dir,
+        "--cache", os.path.join(work_dir, "cache", "results.sqlite3"),
+        "--workers", str(workers),
+        "--max-inflight", str(max_inflight),
+        *extra_args
+    ]
+    env = dict(os.environ, OPENAI_BASE_URL=server.base_url, OPENAI_API_KEY="mock")
+    server.reset_stats()
+    start = time.perf_counter()
+    completed = subprocess.run(command, cwd=TOOLS[tool]["dir"], env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    results = len(os.listdir(output_dir)) if os.path.isdir(output_dir) else 0
+    if completed.returncode != 0:
+        print(completed.stdout[-2000:])
+        print(completed.stderr[-2000:])
+    return {"seconds": elapsed, "returncode": completed.returncode, "result_files": results, "server": server.stats()}
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test a tool against the mock OpenAI server')
+    parser.add_argument('--tool', choices=sorted(TOOLS), default='v3', help='Tool to run (default: v3)')
+    parser.add_argument('--manuscripts', type=int, default=8, help='Number of synthetic manuscripts (default: 8)')
+    parser.add_argument('--pages', type=int, default=8, help='Pages per manuscript (default: 8)')
+    parser.add_argument('--workers', type=int, default=4, help='--workers passed to the tool (default: 4)')
+    parser.add_argument('--max-inflight', type=int, default=4, help='--max-inflight passed to the tool (default: 4)')
+    parser.add_argument('--latency', default='lognormal:0.3,0.5', help='Server latency distribution (default: lognormal:0.3,0.5)')
+    parser.add_argument('--errors', default='', help='Injected error rates, e.g. 429=0.1,500=0.02')
+    parser.add_argument('--retry-after', type=float, default=0.5, help='Retry-After sent with 429s (default: 0.5)')
+    parser.add_argument('--chunk-delay', type=float, default=0.0, help='Seconds between streamed chunks (default: 0)')
+    parser.add_argument('--seed', type=int, default=0, help='Server random seed (default: 0)')
+    parser.add_argument('--corpus-dir', default=os.path.join(ROOT, 'benchmarks', 'corpus'),
+                        help='Directory for the generated PDFs (default: benchmarks/corpus)')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    parser.add_argument('extra', nargs='*', help='Arguments after -- are passed to the tool')
+    args = parser.parse_args()
+
+    specs = [{"pages": args.pages, "columns": 1 + seed % 2, "font_scheme": ("serif", "sans", "mono")[seed % 3],
+              "figures": 3, "tables": 2, "references": 20, "seed": seed} for seed in range(args.manuscripts)]
+    paths = generate_corpus(args.corpus_dir, specs)
+
+    server = MockOpenAIServer(latency=args.latency, errors=args.errors, retry_after=args.retry_after,
+                              chunk_delay=args.chunk_delay, seed=args.seed)
+    server.start()
+    work_dir = tempfile.mkdtemp(prefix="load_test_")
+    try:
+        manuscripts_dir = os.path.join(work_dir, "manuscripts")
+        os.makedirs(manuscripts_dir)
+        for path in paths:
+            shutil.copy(path, manuscripts_dir)
+        report = {}
+        for run in ("cold", "warm"):
+            report[run] = run_tool(args.tool, server, manuscripts_dir, work_dir, args.workers,
+                                   args.max_inflight, args.extra)
+    finally:
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{args.tool}: {len(paths)} manuscripts, workers={args.workers}, max-inflight={args.max_inflight}, "
+              f"latency={args.latency}, errors={args.errors or 'none'}")
+        print(f"{'run':<5} {'exit':>4} {'files':>5} {'seconds':>8} {'docs/s':>7} {'requests':>8} "
+              f"{'errors':>6} {'peak':>4}  statuses")
+        for run, result in report.items():
+            stats = result["server"]
+            print(f"{run:<5} {result['returncode']:>4} {result['result_files']:>5} {result['seconds']:>8.2f} "
+                  f"{len(paths) / result['seconds']:>7.2f} {stats.get('requests', 0):>8} "
+                  f"{stats.get('injected_errors', 0):>6} {stats['max_in_flight']:>4}  {stats['statuses']}")
+    return 0 if all(result["returncode"] == 0 for result in report.values()) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
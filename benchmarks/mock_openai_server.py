@@ -0,0 +1,593 @@
+"""
+Local OpenAI-compatible server for offline end-to-end and load tests.
+
+Answers POST /v1/chat/completions like the real API, including streamed
+(server-sent event) responses, so both tools run unchanged against it
+by pointing OPENAI_BASE_URL at the server. Three modes choose where the
+completion comes from:
+
+- canned: a JSON answer in the shape the prompt asks for, built from the
+  requirements (V2) or review criteria (V3) listed in the prompt. The
+  content is a deterministic function of the prompt and the seed.
+- record: the request is forwarded to a real endpoint and the answer is
+  appended to a cassette file (JSONL) keyed by a hash of the request.
+- replay: answers come from a cassette; unknown requests get a 404, or a
+  canned answer with --fallback-canned.
+
+Latency is drawn from a configurable distribution and 429/500 errors can
+be injected at given rates, so concurrency, retry and caching behavior
+can be exercised without an API key. With --truncate, a share of the
+canned answers is cut off as if max_tokens had been reached, to exercise
+the tools' JSON repair and follow-up requests. Provider-side prompt caching is
+simulated: the longest prefix a prompt shares with a recent one is
+reported as usage.prompt_tokens_details.cached_tokens, following the
+API's rules (prompts of 1024+ tokens, in 128-token steps). GET /stats
+returns request counters and the peak number of requests in flight.
+
+Usage:
+    python benchmarks/mock_openai_server.py --port 8011 --latency lognormal:0.8,0.5 --errors 429=0.05,500=0.01
+    python benchmarks/mock_openai_server.py --mode record --cassette cassette.jsonl
+    python benchmarks/mock_openai_server.py --mode replay --cassette cassette.jsonl
+    OPENAI_BASE_URL=http://127.0.0.1:8011/v1 OPENAI_API_KEY=mock python V3_Peer_Review/src/main.py ...
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Request members that change the answer; "stream" and its options do not
+_KEY_FIELDS = ("model", "messages", "temperature", "max_tokens", "response_format", "tools", "tool_choice")
+# Prompt lists the canned answers are built from
+_REQUIREMENTS = re.compile(r'against these requirements:\n\n(.*?)\n\nFor each requirement', re.DOTALL)
+_REQUIREMENT_LINE = re.compile(r'^\d+\.\s+(.*)$', re.MULTILINE)
+_CRITERIA = re.compile(r'according to these criteria:\n\n(.*?)\n\nFor each criterion', re.DOTALL)
+_CRITERION_LINE = re.compile(r'^- ([^:\n]+):', re.MULTILINE)
+# Prompt caching: minimum cached prefix, cache granularity (tokens) and prompts remembered
+_CACHE_MIN_TOKENS = 1024
+_CACHE_STEP_TOKENS = 128
+_CACHE_PROMPTS = 256
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Parse a latency distribution.
+
+    Args:
+        spec (str): "fixed:S", "uniform:LOW,HIGH", "normal:MEAN,SD" or
+            "lognormal:MEDIAN,SIGMA", all in seconds
+
+    Returns:
+        Callable[[random.Random], float]: Draws one non-negative delay
+    """
+    name, _, values = spec.partition(":")
+    try:
+        params = [float(value) for value in values.split(",")] if values else []
+    except ValueError:
+        raise Exception(f"Invalid latency parameters: {spec}")
+    shapes = {
+        "fixed": (1, lambda rng, s: s),
+        "uniform": (2, lambda rng, low, high: rng.uniform(low, high)),
+        "normal": (2, lambda rng, mean, sd: rng.gauss(mean, sd)),
+        "lognormal": (2, lambda rng, median, sigma: median * rng.lognormvariate(0, sigma))
+    }
+    if name not in shapes or len(params) != shapes[name][0]:
+        raise Exception(f"Invalid latency distribution: {spec}")
+    draw = shapes[name][1]
+    return lambda rng: max(0.0, draw(rng, *params))
+
+def parse_errors(spec: str) -> List[Tuple[int, float]]:
+    """
+    Parse injected error rates.
+
+    Args:
+        spec (str): Comma-separated STATUS=RATE pairs, e.g. "429=0.05,500=0.01"
+
+    Returns:
+        List[Tuple[int, float]]: (status, probability) pairs
+    """
+    errors = []
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        status, _, rate = item.partition("=")
+        try:
+            errors.append((int(status), float(rate)))
+        except ValueError:
+            raise Exception(f"Invalid error rate: {item}")
+    if sum(rate for _, rate in errors) > 1:
+        raise Exception("Injected error rates add up to more than 1")
+    return errors
+
+def request_key(request: Dict[str, Any]) -> str:
+    """
+    Cassette key of a chat completion request.
+
+    Args:
+        request (Dict[str, Any]): Request body
+
+    Returns:
+        str: SHA-256 of the members that determine the answer
+    """
+    relevant = {field: request[field] for field in _KEY_FIELDS if field in request}
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True).encode()).hexdigest()
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+def canned_content(request: Dict[str, Any], seed: int = 0) -> str:
+    """
+    Build a completion in the JSON shape the prompt asks for.
+
+    Args:
+        request (Dict[str, Any]): Request body
+        seed (int): Varies the answers between runs while keeping each run deterministic
+
+    Returns:
+        str: JSON content for the V2 requirements analysis or the V3 review;
+            an empty object for prompts of neither kind
+    """
+    prompt = "\n".join(str(message.get("content", "")) for message in request.get("messages", []))
+    rng = random.Random(f"{seed}:{hashlib.sha256(prompt.encode()).hexdigest()}")
+
+    requirements = _REQUIREMENTS.search(prompt)
+    if requirements:
+        analysis = []
+        for requirement in _REQUIREMENT_LINE.findall(requirements.group(1)):
+            is_met = rng.random() < 0.7
+            analysis.append({
+                "requirement": requirement.strip(),
+                "is_met": is_met,
+                "evidence": "Mock evidence quoted from the manuscript." if is_met else "No evidence found.",
+                "explanation": f"Mock assessment of: {requirement.strip()}"
+            })
+        unmet = [entry["requirement"] for entry in analysis if not entry["is_met"]]
+        return json.dumps({
+            "requirements_analysis": analysis,
+            "desk_rejection_recommendation": {
+                "should_reject": bool(unmet),
+                "justification": ("Not met: " + "; ".join(unmet)) if unmet else "All requirements are met."
+            }
+        }, indent=2)
+
+    criteria = _CRITERIA.search(prompt)
+    if criteria:
+        assessments = {}
+        for criterion in _CRITERION_LINE.findall(criteria.group(1)):
+            assessments[criterion.strip()] = {
+                "score": rng.randint(2, 5),
+                "feedback": f"Mock feedback on {criterion.strip().lower()}.",
+                "examples": [f"Mock example {n} for {criterion.strip()}" for n in (1, 2)],
+                "suggestions": [f"Mock suggestion {n} for {criterion.strip()}" for n in (1, 2)]
+            }
+        return json.dumps({
+            "overall_assessment": {"score": rng.randint(2, 5), "summary": "Mock overall assessment."},
+            "criteria_assessments": assessments,
+            "recommendation": rng.choice(["accept", "revise", "reject"]),
+            "confidence": round(rng.uniform(0.5, 0.95), 2)
+        }, indent=2)
+
+    return "{}"
+
+def _common_prefix(a: str, b: str) -> int:
+    """Length of the common prefix of two strings (binary search, so slices compare in C)."""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+def completion_body(request: Dict[str, Any], content: str, cached_tokens: int = 0,
+                    finish_reason: str = "stop") -> Dict[str, Any]:
+    """
+    Wrap completion content in a chat.completion response.
+
+    Args:
+        request (Dict[str, Any]): Request body
+        content (str): Assistant message content
+        cached_tokens (int): Prompt tokens to report as served from the prompt cache
+        finish_reason (str): "stop", or "length" for content cut off at max_tokens
+
+    Returns:
+        Dict[str, Any]: Response body with estimated token usage
+    """
+    prompt_tokens = sum(_estimate_tokens(str(m.get("content", ""))) for m in request.get("messages", []))
+    completion_tokens = _estimate_tokens(content)
+    return {
+        "id": "chatcmpl-mock-" + request_key(request)[:24],
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model", "mock"),
+        "choices": [{"index": 0, "finish_reason": finish_reason, "message": {"role": "assistant", "content": content}}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": min(cached_tokens, prompt_tokens)}
+        }
+    }
+
+class Cassette:
+    """Recorded responses in a JSONL file, one {"key", "model", "response"} record per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.responses = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self.responses[record["key"]] = record["response"]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.responses.get(key)
+
+    def add(self, key: str, model: str, response: Dict[str, Any]) -> None:
+        """Store a response, appending it to the file unless the key is already recorded."""
+        with self._lock:
+            if key in self.responses:
+                return
+            self.responses[key] = response
+            with open(self.path, "a") as f:
+                f.write(json.dumps({"key": key, "model": model, "response": response}) + "\n")
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server holding the mock's configuration and counters.
+
+    Can be run from the command line or started in-process by tests and
+    load tests with start() and shutdown().
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, mode: str = "canned", latency: str = "fixed:0",
+                 errors: str = None, retry_after: float = 1.0, chunk_chars: int = 16, chunk_delay: float = 0.0,
+                 cassette: str = None, upstream: str = "https://api.openai.com/v1", fallback_canned: bool = False,
+                 seed: int = 0, verbose: bool = False, truncate: float = 0.0):
+        """
+        Initialize the server.
+
+        Args:
+            host (str): Interface to bind
+            port (int): Port to bind; 0 picks a free one
+            mode (str): "canned", "record" or "replay"
+            latency (str): Latency distribution for canned and replayed answers, see parse_latency
+            errors (str, optional): Injected error rates, see parse_errors
+            retry_after (float): Retry-After seconds sent with injected 429s
+            chunk_chars (int): Characters of content per streamed chunk
+            chunk_delay (float): Seconds between streamed chunks
+            cassette (str, optional): Cassette file, required for record and replay
+            upstream (str): Base URL that record mode forwards to
+            fallback_canned (bool): Answer unrecorded requests with canned content in replay mode
+            seed (int): Seed of the latency, error and canned-content randomness
+            verbose (bool): Log every request
+            truncate (float): Share of canned answers cut off at 50-90% of their length
+        """
+        if mode not in ("canned", "record", "replay"):
+            raise Exception(f"Unknown mode: {mode}")
+        if mode != "canned" and not cassette:
+            raise Exception(f"Mode {mode} needs a cassette file")
+        super().__init__((host, port), _Handler)
+        self.mode = mode
+        self.latency = parse_latency(latency)
+        self.errors = parse_errors(errors)
+        self.retry_after = retry_after
+        self.chunk_chars = max(1, chunk_chars)
+        self.chunk_delay = chunk_delay
+        self.cassette = Cassette(cassette) if cassette else None
+        self.upstream = upstream.rstrip("/")
+        self.fallback_canned = fallback_canned
+        self.seed = seed
+        self.verbose = verbose
+        self.truncate = truncate
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+        # Recent (model, prompt) pairs for the prompt cache simulation
+        self._prompts = deque(maxlen=_CACHE_PROMPTS)
+        self.reset_stats()
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to pass to the OpenAI client."""
+        return f"http://{self.server_address[0]}:{self.server_address[1]}/v1"
+
+    def start(self) -> str:
+        """
+        Serve in a background thread.
+
+        Returns:
+            str: Base URL of the server
+        """
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def shutdown(self) -> None:
+        super().shutdown()
+        self.server_close()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats = Counter()
+            self._statuses = Counter()
+            self._in_flight = 0
+            self._max_in_flight = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Request counters since start or the last reset.
+
+        Returns:
+            Dict[str, Any]: Counts of requests, streamed requests, replay hits/misses, prompt cache hits,
+                truncated answers, recordings and responses by status, and the peak number of requests in flight
+        """
+        with self._lock:
+            return dict(self._stats, statuses={str(k): v for k, v in self._statuses.items()},
+                        max_in_flight=self._max_in_flight)
+
+    def count(self, name: str, status: int = None) -> None:
+        with self._lock:
+            if name:
+                self._stats[name] += 1
+            if status is not None:
+                self._statuses[status] += 1
+
+    def enter(self) -> None:
+        with self._lock:
+            self._in_flight += 1
+            self._max_in_flight = max(self._max_in_flight, self._in_flight)
+
+    def leave(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def cached_tokens(self, request: Dict[str, Any]) -> int:
+        """
+        Simulate the provider's prompt prefix cache for one request.
+
+        Args:
+            request (Dict[str, Any]): Request body
+
+        Returns:
+            int: Estimated tokens of the longest prefix shared with a recent prompt to the
+                same model, in 128-token steps, or 0 if it is shorter than 1024 tokens
+        """
+        model = request.get("model", "")
+        prompt = "".join(f"{m.get('role')}\n{m.get('content', '')}\n" for m in request.get("messages", []))
+        with self._lock:
+            recent = [earlier for earlier_model, earlier in self._prompts if earlier_model == model]
+            self._prompts.append((model, prompt))
+        shared = max((_common_prefix(prompt, earlier) for earlier in recent), default=0)
+        tokens = _estimate_tokens(prompt[:shared]) // _CACHE_STEP_TOKENS * _CACHE_STEP_TOKENS
+        if tokens < _CACHE_MIN_TOKENS:
+            return 0
+        self.count("prompt_cache_hits")
+        return tokens
+
+    def draw_cut(self, content: str) -> Optional[int]:
+        """Draw the length a canned answer is cut off at, or None to send it whole."""
+        with self._lock:
+            if self.rng.random() >= self.truncate:
+                return None
+            return int(len(content) * self.rng.uniform(0.5, 0.9))
+
+    def draw(self) -> Tuple[float, Optional[int]]:
+        """Draw a latency and an injected error status (None for success) for one request."""
+        with self._lock:
+            delay = self.latency(self.rng)
+            roll = self.rng.random()
+        for status, rate in self.errors:
+            if roll < rate:
+                return delay, status
+            roll -= rate
+        return delay, None
+
+    def forward(self, request: Dict[str, Any], authorization: str) -> Tuple[int, Dict[str, Any]]:
+        """
+        Send a request to the upstream endpoint without streaming.
+
+        Args:
+            request (Dict[str, Any]): Request body
+            authorization (str): Authorization header of the incoming request
+
+        Returns:
+            Tuple[int, Dict[str, Any]]: Upstream status and response body
+        """
+        body = {key: value for key, value in request.items() if key not in ("stream", "stream_options")}
+        headers = {"Content-Type": "application/json"}
+        if authorization and authorization != "Bearer mock":
+            headers["Authorization"] = authorization
+        elif os.getenv("OPENAI_API_KEY"):
+            headers["Authorization"] = f"Bearer {os.getenv('OPENAI_API_KEY')}"
+        upstream_request = urllib.request.Request(self.upstream + "/chat/completions",
+                                                  data=json.dumps(body).encode(), headers=headers)
+        try:
+            with urllib.request.urlopen(upstream_request, timeout=600) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                return e.code, json.loads(e.read())
+            except ValueError:
+                return e.code, _error_body(f"Upstream returned {e.code}", "upstream_error")
+        except urllib.error.URLError as e:
+            return 502, _error_body(f"Upstream unreachable: {e.reason}", "upstream_error")
+
+def _error_body(message: str, error_type: str) -> Dict[str, Any]:
+    return {"error": {"message": message, "type": error_type, "param": None, "code": None}}
+
+class _Handler(BaseHTTPRequestHandler):
+    """Routes requests to the chat completions endpoint and the stats page."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        path = self.path.rstrip("/")
+        if path == "/stats":
+            self._send_json(200, self.server.stats())
+        elif path in ("/v1/models", "/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "mock", "object": "model", "owned_by": "mock"}]})
+        else:
+            self._send_json(404, _error_body(f"Unknown path {self.path}", "invalid_request_error"))
+
+    def do_DELETE(self):
+        if self.path.rstrip("/") == "/stats":
+            self.server.reset_stats()
+            self._send_json(200, {})
+        else:
+            self._send_json(404, _error_body(f"Unknown path {self.path}", "invalid_request_error"))
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length)
+        if self.path.rstrip("/") not in ("/v1/chat/completions", "/chat/completions"):
+            self._send_json(404, _error_body(f"Unknown path {self.path}", "invalid_request_error"))
+            return
+        try:
+            request = json.loads(raw)
+        except ValueError:
+            self._send_json(400, _error_body("Request body is not valid JSON", "invalid_request_error"))
+            return
+
+        server = self.server
+        server.enter()
+        try:
+            server.count("requests")
+            if request.get("stream"):
+                server.count("streamed")
+            status, body = self._complete(request)
+            if status != 200:
+                self._send_json(status, body, retry_after=server.retry_after if status == 429 else None)
+            elif request.get("stream"):
+                self._send_stream(request, body)
+            else:
+                self._send_json(200, body)
+            server.count(None, status)
+        finally:
+            server.leave()
+
+    def _complete(self, request: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """Produce the status and response body for a completion request."""
+        server = self.server
+        if server.mode == "record":
+            key = request_key(request)
+            status, body = server.forward(request, self.headers.get("Authorization"))
+            if status == 200:
+                server.cassette.add(key, request.get("model", ""), body)
+                server.count("recorded")
+            return status, body
+
+        delay, error = server.draw()
+        time.sleep(delay)
+        if error is not None:
+            server.count("injected_errors")
+            return error, _error_body(f"Injected {error} error", "rate_limit_error" if error == 429 else "server_error")
+
+        if server.mode == "replay":
+            body = server.cassette.get(request_key(request))
+            if body is not None:
+                server.count("replay_hits")
+                return 200, body
+            server.count("replay_misses")
+            if not server.fallback_canned:
+                return 404, _error_body("Request not found in cassette", "invalid_request_error")
+        content = canned_content(request, server.seed)
+        cut = server.draw_cut(content)
+        if cut is not None:
+            server.count("truncated")
+            return 200, completion_body(request, content[:cut], server.cached_tokens(request), "length")
+        return 200, completion_body(request, content, server.cached_tokens(request))
+
+    def _send_json(self, status: int, body: Dict[str, Any], retry_after: float = None) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        if retry_after is not None:
+            self.send_header("Retry-After", f"{retry_after:g}")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_stream(self, request: Dict[str, Any], body: Dict[str, Any]) -> None:
+        """Send a completion body as chat.completion.chunk server-sent events."""
+        server = self.server
+        content = body["choices"][0]["message"]["content"] or ""
+        base = {"id": body["id"], "object": "chat.completion.chunk", "created": body["created"], "model": body["model"]}
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def event(delta: Dict[str, Any], finish_reason: str = None) -> None:
+            chunk = dict(base, choices=[{"index": 0, "delta": delta, "finish_reason": finish_reason}])
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+
+        event({"role": "assistant", "content": ""})
+        for start in range(0, len(content), server.chunk_chars):
+            if server.chunk_delay:
+                time.sleep(server.chunk_delay)
+            event({"content": content[start:start + server.chunk_chars]})
+        event({}, body["choices"][0]["finish_reason"])
+        if (request.get("stream_options") or {}).get("include_usage"):
+            self.wfile.write(f"data: {json.dumps(dict(base, choices=[], usage=body.get('usage')))}\n\n".encode())
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+def main():
+    parser = argparse.ArgumentParser(description='Local OpenAI-compatible chat completions server')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8011, help='Port to bind (default: 8011)')
+    parser.add_argument('--mode', choices=['canned', 'record', 'replay'], default='canned',
+                        help='Where answers come from (default: canned)')
+    parser.add_argument('--latency', default='fixed:0',
+                        help='fixed:S, uniform:LOW,HIGH, normal:MEAN,SD or lognormal:MEDIAN,SIGMA in seconds (default: fixed:0)')
+    parser.add_argument('--errors', help='Injected error rates, e.g. 429=0.05,500=0.01')
+    parser.add_argument('--retry-after', type=float, default=1.0, help='Retry-After seconds sent with 429s (default: 1)')
+    parser.add_argument('--chunk-chars', type=int, default=16, help='Characters per streamed chunk (default: 16)')
+    parser.add_argument('--chunk-delay', type=float, default=0.0, help='Seconds between streamed chunks (default: 0)')
+    parser.add_argument('--cassette', help='JSONL file of recorded responses (record and replay modes)')
+    parser.add_argument('--upstream', default='https://api.openai.com/v1',
+                        help='Endpoint that record mode forwards to (default: https://api.openai.com/v1)')
+    parser.add_argument('--fallback-canned', action='store_true',
+                        help='In replay mode, answer unrecorded requests with canned content instead of a 404')
+    parser.add_argument('--truncate', type=float, default=0.0,
+                        help='Share of canned answers cut off as if max_tokens was reached (default: 0)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args()
+
+    server = MockOpenAIServer(args.host, args.port, mode=args.mode, latency=args.latency, errors=args.errors,
+                              retry_after=args.retry_after, chunk_chars=args.chunk_chars,
+                              chunk_delay=args.chunk_delay, cassette=args.cassette, upstream=args.upstream,
+                              fallback_canned=args.fallback_canned, seed=args.seed, verbose=args.verbose,
+                              truncate=args.truncate)
+    print(f"Mock OpenAI server ({args.mode}) listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(server.stats()))
+
+if __name__ == "__main__":
+    main()
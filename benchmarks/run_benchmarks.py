@@ -0,0 +1,274 @@
+"""
+Benchmark suite for parsing and prompt building in both tools.
+
+Generates (or reuses) a synthetic corpus, times PDF extraction, section
+detection, structure indexing, manuscript preparation, prompt building
+and result formatting for the V2 and V3 code, and appends the timings to
+a JSONL history keyed by git commit. Comparing against an earlier record
+flags regressions, and --max-regression turns them into a failing exit
+code for CI.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--suite quick|default|large] [--repeat 5]
+    python benchmarks/run_benchmarks.py --compare --max-regression 25
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from corpus import generate_corpus
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TREES = {
+    "v2": os.path.join(ROOT, "V2_Editorial_First_Decision_Support", "src"),
+    "v3": os.path.join(ROOT, "V3_Peer_Review", "src")
+}
+# Modules both trees import (telemetry, token_budget, ...)
+sys.path.insert(0, os.path.join(ROOT, "common"))
+SUITES = {
+    "quick": [
+        {"pages": 6, "columns": 1, "font_scheme": "serif", "figures": 2, "tables": 1, "references": 15}
+    ],
+    "default": [
+        {"pages": 12, "columns": 1, "font_scheme": "serif", "figures": 4, "tables": 2, "references": 30},
+        {"pages": 16, "columns": 2, "font_scheme": "sans", "figures": 6, "tables": 4, "references": 40},
+        {"pages": 60, "columns": 1, "font_scheme": "mono", "figures": 12, "tables": 8, "references": 80}
+    ],
+    "large": [
+        {"pages": 16, "columns": 2, "font_scheme": "sans", "figures": 6, "tables": 4, "references": 40},
+        {"pages": 120, "columns": 2, "font_scheme": "serif", "figures": 30, "tables": 20, "references": 150},
+        {"pages": 300, "columns": 1, "font_scheme": "serif", "figures": 40, "tables": 30, "references": 250}
+    ]
+}
+
+def import_tree(tree: str, names: List[str]) -> Dict[str, Any]:
+    """
+    Import modules from one tool's src directory.
+
+    Both trees have modules with the same names (pdf_parser,
+    openai_client, ...), so the other tree's modules are dropped from the
+    module cache first; modules imported earlier keep working through
+    their own references.
+
+    Args:
+        tree (str): Key of TREES
+        names (List[str]): Module names
+
+    Returns:
+        Dict[str, Any]: Module name mapped to the imported module
+    """
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, "__file__", None) or ""
+        if any(os.path.dirname(os.path.abspath(path)) == src for src in TREES.values()):
+            del sys.modules[name]
+    sys.path.insert(0, TREES[tree])
+    try:
+        return {name: importlib.import_module(name) for name in names}
+    finally:
+        sys.path.remove(TREES[tree])
+
+def measure(function: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """
+    Time a function several times.
+
+    Args:
+        function (Callable[[], Any]): Work to time
+        repeat (int): Number of runs
+
+    Returns:
+        Dict[str, float]: Best and median wall-clock time in seconds
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return {"min": min(times), "median": statistics.median(times)}
+
+def v2_benchmarks(pdf_path: str, requirements: List[str]) -> Dict[str, Callable[[], Any]]:
+    """Benchmarks of the editorial checker for one manuscript."""
+    modules = import_tree("v2", ["pdf_parser", "requirements_checker"])
+    PDFParser = modules["pdf_parser"].PDFParser
+    RequirementsChecker = modules["requirements_checker"].RequirementsChecker
+
+    checker = RequirementsChecker(api_key="benchmark")
+    parser = PDFParser(pdf_path)
+    parser.extract_text()
+    structured_text = RequirementsChecker.prepare_manuscript(pdf_path)
+    results = {
+        "requirements_analysis": [
+            {"requirement": requirement, "is_met": i % 3 != 0, "evidence": "Evidence " * 20,
+             "explanation": "Explanation " * 30}
+            for i, requirement in enumerate(requirements)
+        ],
+        "desk_rejection_recommendation": {"should_reject": True, "justification": "Justification " * 40}
+    }
+    return {
+        "v2.extract": lambda: PDFParser(pdf_path).extract_text(),
+        "v2.sections": parser.detect_sections,
+        "v2.prepare": lambda: RequirementsChecker.prepare_manuscript(pdf_path),
+        "v2.prompt": lambda: checker.batch_requests(structured_text, requirements),
+        "v2.format": lambda: checker.format_results(results)
+    }
+
+def v3_benchmarks(pdf_path: str, criteria: Dict[str, str]) -> Dict[str, Callable[[], Any]]:
+    """Benchmarks of the peer review checker for one manuscript."""
+    modules = import_tree("v3", ["pdf_parser", "peer_review_checker", "structure_index"])
+    pdf_parser = modules["pdf_parser"]
+    PeerReviewChecker = modules["peer_review_checker"].PeerReviewChecker
+    StructureIndex = modules["structure_index"].StructureIndex
+
+    checker = PeerReviewChecker(api_key="benchmark")
+    parser = pdf_parser.PDFParser(pdf_path)
+    text = parser.extract_text()
+    pages = [page_text for _, page_text in parser.iter_pages()]
+    prepared = PeerReviewChecker.prepare_manuscript(pdf_path)
+    results = {
+        "metadata": prepared["metadata"],
+        "statistics": prepared["statistics"],
+        "overall_assessment": {"score": 3, "summary": "Summary " * 40},
+        "recommendation": "Major Revision",
+        "confidence": 0.8,
+        "criteria_assessments": {
+            criterion: {"score": 3, "feedback": "Feedback " * 30, "examples": ["Example " * 10] * 3,
+                        "suggestions": ["Suggestion " * 10] * 3}
+            for criterion in criteria
+        }
+    }
+
+    def index_structure():
+        structure = StructureIndex()
+        offset = 0
+        for page_number, page_text in enumerate(pages, 1):
+            structure.add_page(page_number, offset, page_text)
+            offset += len(page_text) + 1
+        return structure.statistics()
+
+    return {
+        "v3.extract": lambda: pdf_parser.PDFParser(pdf_path).extract_text(),
+        "v3.sections": lambda: pdf_parser._detect_sections(text, pdf_parser._scan_sections(text)),
+        "v3.structure": index_structure,
+        "v3.prepare": lambda: PeerReviewChecker.prepare_manuscript(pdf_path),
+        "v3.prompt": lambda: checker.batch_requests(prepared, criteria),
+        "v3.format": lambda: checker.format_results(results)
+    }
+
+def current_commit() -> str:
+    """Short hash of HEAD, marked "+dirty" when the tree has uncommitted changes."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ("+dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def load_history(path: str) -> List[Dict[str, Any]]:
+    """Read earlier benchmark records, oldest first."""
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def find_baseline(history: List[Dict[str, Any]], suite: str, commit: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Pick the record to compare against.
+
+    Args:
+        history (List[Dict[str, Any]]): Earlier records
+        suite (str): Suite of the current run
+        commit (str, optional): Commit hash prefix; the latest record of the suite if omitted
+
+    Returns:
+        Optional[Dict[str, Any]]: Baseline record, or None
+    """
+    for record in reversed(history):
+        if record["suite"] == suite and (commit is None or record["commit"].startswith(commit)):
+            return record
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark parsing and prompt building')
+    parser.add_argument('--suite', choices=sorted(SUITES), default='default', help='Corpus to run (default: default)')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per benchmark (default: 5)')
+    parser.add_argument('--corpus-dir', default=os.path.join(ROOT, 'benchmarks', 'corpus'),
+                        help='Directory for the generated PDFs (default: benchmarks/corpus)')
+    parser.add_argument('--history', default=os.path.join(ROOT, 'benchmarks', 'results.jsonl'),
+                        help='JSONL file the results are appended to (default: benchmarks/results.jsonl)')
+    parser.add_argument('--no-record', action='store_true', help='Do not append this run to the history')
+    parser.add_argument('--compare', nargs='?', const='', metavar='COMMIT',
+                        help='Compare with the latest recorded run of the suite, or with a given commit')
+    parser.add_argument('--max-regression', type=float, metavar='PCT',
+                        help='Exit with status 1 if any benchmark is more than PCT%% slower than the baseline')
+    parser.add_argument('--only', help='Run only benchmarks whose name starts with this prefix, e.g. v3.')
+    args = parser.parse_args()
+
+    paths = generate_corpus(args.corpus_dir, SUITES[args.suite])
+    with open(os.path.join(ROOT, "V2_Editorial_First_Decision_Support", "requirements_1.txt")) as f:
+        requirements = [line.strip() for line in f if line.strip()]
+    with open(os.path.join(ROOT, "V3_Peer_Review", "review_criteria.json")) as f:
+        criteria = json.load(f)
+
+    results = {}
+    for pdf_path in paths:
+        document = os.path.splitext(os.path.basename(pdf_path))[0]
+        benchmarks = {}
+        benchmarks.update(v2_benchmarks(pdf_path, requirements))
+        benchmarks.update(v3_benchmarks(pdf_path, criteria))
+        for name, function in benchmarks.items():
+            if args.only and not name.startswith(args.only):
+                continue
+            results[f"{document}/{name}"] = measure(function, args.repeat)
+
+    history = load_history(args.history)
+    baseline = None
+    if args.compare is not None or args.max_regression is not None:
+        baseline = find_baseline(history, args.suite, args.compare or None)
+        if baseline is None:
+            print("No earlier run of this suite to compare with")
+        else:
+            print(f"Baseline: {baseline['commit']} ({baseline['timestamp']})")
+
+    regressions = []
+    width = max(len(key) for key in results)
+    print(f"{'benchmark':<{width}} {'min ms':>9} {'median ms':>10} {'base ms':>9} {'change':>8}")
+    for key, timing in results.items():
+        row = f"{key:<{width}} {timing['min'] * 1e3:>9.2f} {timing['median'] * 1e3:>10.2f}"
+        base = baseline["results"].get(key) if baseline else None
+        if base:
+            change = (timing["min"] / base["min"] - 1) * 100 if base["min"] else 0.0
+            row += f" {base['min'] * 1e3:>9.2f} {change:>+7.1f}%"
+            if args.max_regression is not None and change > args.max_regression:
+                regressions.append(key)
+        print(row)
+
+    if not args.no_record:
+        record = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": current_commit(),
+            "suite": args.suite,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results
+        }
+        with open(args.history, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.max_regression:g}%:")
+        for key in regressions:
+            print(f"  {key}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Benchmark V3 section detection against document length.
+
+Builds synthetic manuscript texts of doubling size and times the
+single-pass offset scanner next to the seven lazy regexes it replaced.
+A linear scanner keeps a roughly constant time per megabyte as the text
+grows.
+
+Usage:
+    python benchmarks/section_scan.py [--max-pages 1600] [--repeat 3]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "V3_Peer_Review", "src"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from pdf_parser import _detect_sections, _scan_sections  # noqa: E402
+
+_SECTIONS = ["Abstract", "1. Introduction", "2. Methods", "3. Results", "4. Discussion", "5. Conclusion", "References"]
+_LINE = "The observed effect of the treatment was consistent across all cohorts and sites in the study."
+
+def make_text(pages: int, lines_per_page: int = 45) -> str:
+    """
+    Build a synthetic manuscript text with the given number of pages.
+
+    Args:
+        pages (int): Number of pages
+        lines_per_page (int): Text lines per page
+
+    Returns:
+        str: Manuscript text in the shape PyPDF2 extracts it
+    """
+    lines = ["A Synthetic Manuscript", "A. Author"]
+    per_section = max(1, pages * lines_per_page // len(_SECTIONS))
+    for heading in _SECTIONS:
+        lines.append(heading)
+        lines.extend(f"{_LINE} Figure {i % 9 + 1} shows it." if i % 40 == 0 else _LINE for i in range(per_section))
+    return "\n".join(lines)
+
+def legacy_detect_sections(text: str) -> Dict[str, List[str]]:
+    """The previous implementation: one lazy DOTALL-style regex per section name."""
+    section_patterns = {
+        'Abstract': r'Abstract[\s\S]*?(?=\n\n|\n[A-Z][a-z]+:)',
+        'Introduction': r'Introduction[\s\S]*?(?=\n\n|\n[A-Z][a-z]+:)',
+        'Methods': r'(Methods|Methodology|Materials and Methods)[\s\S]*?(?=\n\n|\n[A-Z][a-z]+:)',
+        'Results': r'Results[\s\S]*?(?=\n\n|\n[A-Z][a-z]+:)',
+        'Discussion': r'Discussion[\s\S]*?(?=\n\n|\n[A-Z][a-z]+:)',
+        'Conclusion': r'(Conclusion|Conclusions)[\s\S]*?(?=\n\n|\n[A-Z][a-z]+:)',
+        'References': r'(References|Bibliography)[\s\S]*?(?=\n\n|\n[A-Z][a-z]+:|$)'
+    }
+    sections = {}
+    for section_name, pattern in section_patterns.items():
+        for match in re.finditer(pattern, text, re.IGNORECASE):
+            section_text = re.sub(r'^\w+\s*', '', match.group(0).strip())
+            sections[section_name] = section_text.split('\n')
+    return sections
+
+def scanner_detect_sections(text: str) -> Dict[str, List[str]]:
+    """The current implementation: one scan for offsets, then slices."""
+    return _detect_sections(text, _scan_sections(text))
+
+def best_time(function: Callable[[str], object], text: str, repeat: int) -> float:
+    """Best wall-clock time of several runs, in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(text)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark V3 section detection')
+    parser.add_argument('--min-pages', type=int, default=25, help='Smallest document in pages (default: 25)')
+    parser.add_argument('--max-pages', type=int, default=1600, help='Largest document in pages (default: 1600)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (default: 3)')
+    parser.add_argument('--no-legacy', action='store_true', help='Only time the scanner')
+    args = parser.parse_args()
+
+    print(f"{'pages':>6} {'MB':>7} {'scanner s':>10} {'ms/MB':>8} {'legacy s':>10} {'ms/MB':>8}")
+    pages = args.min_pages
+    while pages <= args.max_pages:
+        text = make_text(pages)
+        megabytes = len(text) / 1e6
+        scanner = best_time(scanner_detect_sections, text, args.repeat)
+        row = f"{pages:>6} {megabytes:>7.2f} {scanner:>10.4f} {scanner * 1e3 / megabytes:>8.1f}"
+        if not args.no_legacy:
+            legacy = best_time(legacy_detect_sections, text, args.repeat)
+            row += f" {legacy:>10.4f} {legacy * 1e3 / megabytes:>8.1f}"
+        print(row)
+        pages *= 2
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "V2_Editorial_First_Decision_Support", "src"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "common"))
+
+from mock_openai_server import MockOpenAIServer
+from openai_client import OpenAIClient
+from telemetry import Telemetry
+
+REQUIREMENTS = ["Manuscript must be under 5000 words", "Abstract must be structured"]
+
+def test_canned_answers_match_the_requirements_schema():
+    server = MockOpenAIServer(errors="429=0.5", retry_after=0, seed=1)
+    try:
+        client = OpenAIClient(api_key="mock", base_url=server.start())
+        streamed = []
+        result = client.check_requirements("Short manuscript", REQUIREMENTS, lambda i, entry: streamed.append(i))
+        stats = server.stats()
+    finally:
+        server.shutdown()
+
+    assert [entry["requirement"] for entry in result["requirements_analysis"]] == REQUIREMENTS
+    assert "should_reject" in result["desk_rejection_recommendation"]
+    assert streamed == [0, 1]
+    # Injected 429s are retried by the SDK until one request succeeds
+    assert stats["statuses"]["200"] == 1
+    assert stats["requests"] == 1 + stats.get("injected_errors", 0)
+
+def test_replays_recorded_answers(tmp_path):
+    cassette = str(tmp_path / "cassette.jsonl")
+    upstream = MockOpenAIServer(seed=7)
+    recorder = MockOpenAIServer(mode="record", cassette=cassette, upstream=upstream.start())
+    try:
+        recorded = OpenAIClient(api_key="mock", base_url=recorder.start()).check_requirements("Text", REQUIREMENTS)
+    finally:
+        recorder.shutdown()
+        upstream.shutdown()
+
+    replayer = MockOpenAIServer(mode="replay", cassette=cassette)
+    try:
+        client = OpenAIClient(api_key="mock", base_url=replayer.start())
+        replayed = client.check_requirements("Text", REQUIREMENTS)
+        try:
+            client.check_requirements("Other text", REQUIREMENTS)
+            assert False, "expected an unrecorded request to fail"
+        except Exception as e:
+            assert "Failed to analyze manuscript" in str(e)
+        stats = replayer.stats()
+    finally:
+        replayer.shutdown()
+
+    assert replayed == recorded
+    assert stats["replay_hits"] == 1 and stats["replay_misses"] >= 1
+
+def test_telemetry_records_api_usage(tmp_path):
+    server = MockOpenAIServer(errors="429=0.5", retry_after=0, seed=1)
+    telemetry = Telemetry("editorial", str(tmp_path / "telemetry.jsonl"))
+    try:
+        client = OpenAIClient(api_key="mock", base_url=server.start())
+        with telemetry.manuscript("paper.pdf"):
+            client.check_requirements("Short manuscript", REQUIREMENTS, lambda i, entry: None)
+        record = telemetry.finish("paper.pdf")
+        stats = server.stats()
+    finally:
+        server.shutdown()
+
+    assert set(record["stages"]) == {"prompt_build", "api_call", "parse"}
+    assert record["api_calls"] == 1
+    assert record["prompt_tokens"] > 0 and record["completion_tokens"] > 0
+    assert record["retries"] == stats.get("injected_errors", 0)
+    assert 'rigorous_api_calls_total{tool="editorial"} 1' in telemetry.prometheus()
+
+def test_requests_on_the_same_manuscript_share_the_cached_prefix(tmp_path):
+    server = MockOpenAIServer()
+    telemetry = Telemetry("editorial", str(tmp_path / "telemetry.jsonl"))
+    manuscript = "Results of the experiment. " * 200
+    try:
+        client = OpenAIClient(api_key="mock", base_url=server.start())
+        with telemetry.manuscript("paper.pdf"):
+            client.check_requirements(manuscript, REQUIREMENTS[:1])
+            client.check_requirements(manuscript, REQUIREMENTS[1:])
+        record = telemetry.finish("paper.pdf")
+    finally:
+        server.shutdown()
+
+    # Only the instructions after the manuscript differ, so the second call hits the cache
+    assert record["api_calls"] == 2
+    assert record["cached_tokens"] >= 1024
+    assert 'rigorous_tokens_total{tool="editorial",kind="cached"}' in telemetry.prometheus()
+
+def test_truncated_answers_are_repaired_and_completed_by_a_follow_up(tmp_path):
+    server = MockOpenAIServer(truncate=1.0)
+    telemetry = Telemetry("editorial", str(tmp_path / "telemetry.jsonl"))
+    requirements = REQUIREMENTS + ["References must follow APA style", "Figures must have captions"]
+    try:
+        client = OpenAIClient(api_key="mock", base_url=server.start())
+        with telemetry.manuscript("paper.pdf"):
+            result = client.check_requirements("Short manuscript", requirements)
+        record = telemetry.finish("paper.pdf")
+        stats = server.stats()
+    finally:
+        server.shutdown()
+
+    # The cut-off answer keeps its complete entries; one follow-up asks for the rest
+    assert [entry["requirement"] for entry in result["requirements_analysis"]] == requirements
+    assert stats["truncated"] == stats["requests"] == 2
+    assert record["follow_up_requests"] == 1
@@ -0,0 +1,294 @@
+import asyncio
+import os
+import time
+from typing import Any, Callable, Dict
+from openai import OpenAI, AsyncOpenAI, APIConnectionError, APIStatusError, RateLimitError
+from dotenv import load_dotenv
+from json_stream import JSONStreamParser
+from rate_limiter import RateLimiter, backoff_delay, parse_retry_after
+from structured_output import parse_model_json
+from telemetry import span, usage_fields
+from token_budget import estimate_tokens
+
+class ChatClient:
+    """
+    Chat completion plumbing shared by the tools' OpenAI clients.
+
+    Subclasses set the model and its settings and build the prompts and
+    parse the answers of their task; this class loads the API key, sends
+    requests (optionally streamed), retries transient failures and parses
+    the JSON answers. Given a
+    RateLimiter, requests wait for its budget, and a 429 with Retry-After
+    pauses every client sharing the limiter.
+    """
+
+    # Retries of a request after the first attempt (429s, timeouts and transient 5xx errors)
+    max_retries = 5
+    # Response member whose entries are reported while a completion streams in
+    stream_key = None
+    # Characters of an unparseable response shown in the warning
+    log_response_chars = 200
+
+    def __init__(self, api_key: str = None, base_url: str = None, rate_limiter: RateLimiter = None):
+        """
+        Initialize the OpenAI client.
+
+        Args:
+            api_key (str, optional): OpenAI API key. If not provided, will try to load from environment.
+            base_url (str, optional): API base URL, e.g. a local OpenAI-compatible endpoint.
+                Falls back to OPENAI_BASE_URL, then the public API.
+            rate_limiter (RateLimiter, optional): Requests/tokens-per-minute budget, shared by every
+                client of the run; requests are not throttled if omitted
+        """
+        # Try to load .env from the current directory
+        load_dotenv()
+
+        # If API key is not found, try to load from the repository root
+        if not os.getenv("OPENAI_API_KEY"):
+            env_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".env"))
+            if os.path.exists(env_path):
+                load_dotenv(env_path)
+
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        if not self.api_key:
+            raise ValueError("OpenAI API key is required")
+        self.base_url = base_url or os.getenv("OPENAI_BASE_URL")
+        self.rate_limiter = rate_limiter
+        self.client = self._create_client()
+
+    def _create_client(self):
+        """
+        Create the underlying OpenAI SDK client.
+
+        Returns:
+            OpenAI: Synchronous SDK client with its own retries disabled; _create retries instead
+        """
+        return OpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+
+    def _create(self, fields: Dict[str, Any], estimated: int, **request) -> Any:
+        """
+        Call chat.completions.create within the rate limits, retrying transient failures.
+
+        429s, timeouts and transient 5xx errors are retried with jittered
+        exponential backoff that honors Retry-After.
+
+        Args:
+            fields (Dict[str, Any]): Fields of the api_call span; the number of retries and the time
+                spent waiting for the rate limiter are recorded there
+            estimated (int): Tokens the request is expected to use, reserved from the rate limiter
+            **request: Keyword arguments for chat.completions.create
+
+        Returns:
+            Any: The completion, or the stream of its chunks
+        """
+        if self.rate_limiter:
+            fields["queue_wait"] = 0.0
+        for attempt in range(self.max_retries + 1):
+            fields["retries"] = attempt
+            if self.rate_limiter:
+                fields["queue_wait"] += self.rate_limiter.wait(estimated)
+            try:
+                return self.client.chat.completions.create(**request)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                time.sleep(self._retry_delay(e, attempt))
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """
+        Compute the delay before retrying a failed request.
+
+        A 429 with Retry-After means the whole account is throttled, so
+        every client sharing the rate limiter is held back as well.
+
+        Args:
+            error (Exception): Exception raised by the SDK
+            attempt (int): Zero-based retry attempt
+
+        Returns:
+            float: Seconds to wait before retrying
+        """
+        response_headers = getattr(getattr(error, "response", None), "headers", None)
+        retry_after = parse_retry_after(response_headers)
+        if self.rate_limiter and retry_after is not None and isinstance(error, RateLimitError):
+            self.rate_limiter.pause_for(retry_after)
+        return backoff_delay(attempt, retry_after=retry_after)
+
+    def _record_usage(self, fields: Dict[str, Any], estimated: int, usage: Any) -> None:
+        """
+        Record the token usage of a completed request.
+
+        Args:
+            fields (Dict[str, Any]): Fields of the api_call span
+            estimated (int): Tokens reserved for the request
+            usage (Any): Usage reported by the API
+        """
+        if self.rate_limiter:
+            self.rate_limiter.record_usage(estimated, usage.total_tokens)
+        fields.update(usage_fields(usage))
+
+    def _send(self, request: Dict[str, Any]) -> str:
+        """
+        Send one chat completion request.
+
+        Args:
+            request (Dict[str, Any]): Keyword arguments for chat.completions.create
+
+        Returns:
+            str: Content of the first completion choice
+        """
+        estimated = request_tokens(request)
+        with span("api_call") as fields:
+            response = self._create(fields, estimated, **request)
+            if response.usage:
+                self._record_usage(fields, estimated, response.usage)
+        return response.choices[0].message.content
+
+    def _send_stream(self, request: Dict[str, Any], on_item: Callable[[Any, Any], None]) -> str:
+        """
+        Send one chat completion request as a stream, reporting entries as they complete.
+
+        Args:
+            request (Dict[str, Any]): Keyword arguments for chat.completions.create
+            on_item (Callable[[Any, Any], None]): Called with (index or name, entry) for each
+                entry of the stream_key member as soon as it has fully arrived
+
+        Returns:
+            str: Full content of the completion
+        """
+        parser = JSONStreamParser(self.stream_key)
+        estimated = request_tokens(request)
+        with span("api_call", streamed=True) as fields:
+            # The final chunk of a stream carries the token usage when asked for
+            stream = self._create(fields, estimated, **request, stream=True, stream_options={"include_usage": True})
+            for chunk in stream:
+                if chunk.usage:
+                    self._record_usage(fields, estimated, chunk.usage)
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                for key, entry in parser.feed(chunk.choices[0].delta.content):
+                    on_item(key, entry)
+        return parser.text
+
+    def _parse_response(self, response: str) -> Dict[str, Any]:
+        """
+        Parse the OpenAI API response into a structured format.
+
+        Code fences, trailing commas and output cut off at max_tokens are
+        repaired, see repair_json.
+
+        Args:
+            response (str): Raw response from the API
+
+        Returns:
+            Dict[str, Any]: Parsed response
+
+        Raises:
+            ValueError: If the response is not JSON even after repair
+        """
+        return parse_model_json(response, self.log_response_chars)
+
+    def _parse_partial(self, response: str) -> Any:
+        """
+        Parse a response for validation, treating an unparseable one as empty.
+
+        Args:
+            response (str): Raw response from the API
+
+        Returns:
+            Any: Parsed response, or None
+        """
+        try:
+            return self._parse_response(response)
+        except ValueError:
+            return None
+
+class AsyncChatClient(ChatClient):
+    """
+    An asyncio variant of ChatClient with client-side rate limiting.
+
+    Requests are admitted through a requests-per-minute/tokens-per-minute
+    token bucket, and 429s, timeouts and transient 5xx errors are retried
+    with jittered exponential backoff that honors Retry-After. Mix it in
+    ahead of a tool's client to get an async variant of that client.
+    """
+
+    def __init__(self, api_key: str = None, base_url: str = None, requests_per_minute: int = None,
+                 tokens_per_minute: int = None, max_retries: int = 5):
+        """
+        Initialize the async OpenAI client.
+
+        Args:
+            api_key (str, optional): OpenAI API key. If not provided, will try to load from environment.
+            base_url (str, optional): API base URL, e.g. a local OpenAI-compatible endpoint
+            requests_per_minute (int, optional): Account RPM limit to stay under
+            tokens_per_minute (int, optional): Account TPM limit to stay under
+            max_retries (int): Maximum retries per request after the first attempt
+        """
+        self.max_retries = max_retries
+        super().__init__(api_key, base_url, RateLimiter(requests_per_minute, tokens_per_minute))
+
+    def _create_client(self):
+        """
+        Create the underlying OpenAI SDK client.
+
+        Returns:
+            AsyncOpenAI: Async SDK client with its own retries disabled
+        """
+        return AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+
+    async def _complete(self, request: Dict[str, Any]) -> str:
+        """
+        Send a chat completion request within the rate limits, retrying transient failures.
+
+        Args:
+            request (Dict[str, Any]): Keyword arguments for chat.completions.create
+
+        Returns:
+            str: Content of the first completion choice
+        """
+        estimated = request_tokens(request)
+        with span("api_call") as fields:
+            fields["queue_wait"] = 0.0
+            for attempt in range(self.max_retries + 1):
+                fields["retries"] = attempt
+                fields["queue_wait"] += await self.rate_limiter.acquire(estimated)
+                try:
+                    response = await self.client.chat.completions.create(**request)
+                except Exception as e:
+                    if attempt >= self.max_retries or not is_retryable(e):
+                        raise
+                    await asyncio.sleep(self._retry_delay(e, attempt))
+                    continue
+
+                if response.usage:
+                    self._record_usage(fields, estimated, response.usage)
+                return response.choices[0].message.content
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Decide whether a failed API call is worth retrying.
+
+    Args:
+        error (Exception): Exception raised by the SDK
+
+    Returns:
+        bool: True for connection errors, timeouts, 408/409/429 and 5xx responses
+    """
+    if isinstance(error, APIConnectionError):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return False
+
+def request_tokens(request: Dict[str, Any]) -> int:
+    """
+    Estimate the tokens a chat completion request will use.
+
+    Args:
+        request (Dict[str, Any]): Keyword arguments for chat.completions.create
+
+    Returns:
+        int: Estimated prompt tokens plus the completion limit
+    """
+    return sum(estimate_tokens(message["content"]) for message in request["messages"]) + request.get("max_tokens", 0)
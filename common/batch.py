@@ -0,0 +1,256 @@
+import signal
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List
+from telemetry import Telemetry, call_traced
+from watcher import FolderWatcher
+
+def run_pipeline(pdf_files: List[str],
+                 prepare: Callable[[str], Any],
+                 analyze: Callable[[str, Any], None],
+                 workers: int = 1,
+                 max_inflight: int = 1,
+                 telemetry: Telemetry = None,
+                 admit: Callable[[str, Any], bool] = None) -> None:
+    """
+    Run manuscripts through a two-stage parse/analyze pipeline.
+
+    PDF parsing runs in a process pool so it does not hold the GIL, while
+    the analysis stage (API call plus writing the result file) runs in a
+    thread pool whose size bounds the number of requests in flight. Each
+    manuscript moves to the analysis stage as soon as its own parse
+    finishes, so results are written in completion order. With an
+    admission check, parsed manuscripts are instead admitted in the order
+    of pdf_files, so a budget is spent on the earlier (higher priority)
+    ones first.
+
+    Args:
+        pdf_files (List[str]): PDF file paths to process
+        prepare (Callable[[str], Any]): Picklable module-level callable that parses a PDF
+        analyze (Callable[[str, Any], None]): Callable that analyzes a prepared manuscript and saves it
+        workers (int): Number of parser processes
+        max_inflight (int): Maximum number of concurrent analysis calls
+        telemetry (Telemetry, optional): Receives the parse spans recorded in the worker processes
+            and the time each manuscript waits for an analysis slot; analyze runs with the
+            manuscript's trace current and is expected to finish it
+        admit (Callable[[str, Any], bool], optional): Called with each parsed manuscript, in input
+            order, before it is analyzed; manuscripts it returns False for are skipped
+    """
+    def analyze_traced(pdf_path: str, prepared: Any, queued: float) -> None:
+        with telemetry.manuscript(pdf_path) as trace:
+            trace.add("queue_wait", time.time() - queued, at=queued)
+            analyze(pdf_path, prepared)
+
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as parse_pool, \
+            ThreadPoolExecutor(max_workers=max(1, max_inflight)) as analyze_pool:
+        if telemetry is None:
+            parse_futures = {parse_pool.submit(prepare, pdf_path): pdf_path for pdf_path in pdf_files}
+        else:
+            parse_futures = {parse_pool.submit(call_traced, prepare, pdf_path): pdf_path for pdf_path in pdf_files}
+        analyze_futures = []
+        # Parsed manuscripts waiting for all earlier ones before admission, by input position
+        parsed: Dict[int, Any] = {}
+        positions = {pdf_path: i for i, pdf_path in enumerate(pdf_files)}
+        next_position = 0
+
+        def dispatch(pdf_path: str, prepared: Any) -> None:
+            if admit is not None and not admit(pdf_path, prepared):
+                return
+            if telemetry is None:
+                analyze_futures.append(analyze_pool.submit(analyze, pdf_path, prepared))
+            else:
+                analyze_futures.append(analyze_pool.submit(analyze_traced, pdf_path, prepared, time.time()))
+
+        for future in as_completed(parse_futures):
+            pdf_path = parse_futures[future]
+            try:
+                prepared = future.result()
+            except Exception as e:
+                print(f"Error processing {pdf_path}: {str(e)}\n")
+                if telemetry is not None:
+                    telemetry.finish(pdf_path, "error", str(e))
+                prepared = None
+            else:
+                if telemetry is not None:
+                    prepared, spans, counters = prepared
+                    telemetry.trace(pdf_path).merge(spans, counters)
+                if admit is None:
+                    dispatch(pdf_path, prepared)
+                    continue
+
+            if admit is not None:
+                parsed[positions[pdf_path]] = (pdf_path, prepared)
+                while next_position in parsed:
+                    ready_path, ready = parsed.pop(next_position)
+                    next_position += 1
+                    if ready is not None:
+                        dispatch(ready_path, ready)
+
+        for future in as_completed(analyze_futures):
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Error: {str(e)}\n")
+
+def _ignore_signals() -> None:
+    # Parser processes leave SIGINT/SIGTERM to the parent, which drains the pipeline
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+class Pipeline:
+    """
+    Long-lived parse/analyze pipeline for manuscripts that arrive over time.
+
+    Same two stages as run_pipeline, but the pools stay up between
+    manuscripts, so parser processes keep their imports and the analysis
+    threads share the caller's API client and its open connections. A
+    manuscript submitted again while it is still being processed runs once
+    more when the current pass finishes.
+    """
+
+    def __init__(self, prepare: Callable[[str], Any], analyze: Callable[[str, Any], None],
+                 workers: int = 1, max_inflight: int = 1, telemetry: Telemetry = None):
+        """
+        Start the pools.
+
+        Args:
+            prepare (Callable[[str], Any]): Picklable module-level callable that parses a PDF
+            analyze (Callable[[str, Any], None]): Callable that analyzes a prepared manuscript and saves it
+            workers (int): Number of parser processes
+            max_inflight (int): Maximum number of concurrent analysis calls
+            telemetry (Telemetry, optional): As for run_pipeline
+        """
+        self.prepare = prepare
+        self.analyze = analyze
+        self.telemetry = telemetry
+        self._parse_pool = ProcessPoolExecutor(max_workers=max(1, workers), initializer=_ignore_signals)
+        self._analyze_pool = ThreadPoolExecutor(max_workers=max(1, max_inflight))
+        self._active = set()
+        self._rerun = set()
+        self._idle = threading.Condition()
+
+    def submit(self, pdf_path: str) -> None:
+        """
+        Queue a manuscript for parsing and analysis.
+
+        Args:
+            pdf_path (str): Path to the PDF file
+        """
+        with self._idle:
+            if pdf_path in self._active:
+                self._rerun.add(pdf_path)
+                return
+            self._active.add(pdf_path)
+        self._parse(pdf_path)
+
+    def _parse(self, pdf_path: str) -> None:
+        if self.telemetry is None:
+            future = self._parse_pool.submit(self.prepare, pdf_path)
+        else:
+            future = self._parse_pool.submit(call_traced, self.prepare, pdf_path)
+        future.add_done_callback(lambda future: self._parsed(pdf_path, future))
+
+    def _parsed(self, pdf_path: str, future: Future) -> None:
+        try:
+            prepared = future.result()
+        except Exception as e:
+            print(f"Error processing {pdf_path}: {str(e)}\n")
+            if self.telemetry is not None:
+                self.telemetry.finish(pdf_path, "error", str(e))
+            self._done(pdf_path)
+            return
+        if self.telemetry is not None:
+            prepared, spans, counters = prepared
+            self.telemetry.trace(pdf_path).merge(spans, counters)
+        self._analyze_pool.submit(self._analyze, pdf_path, prepared, time.time())
+
+    def _analyze(self, pdf_path: str, prepared: Any, queued: float) -> None:
+        try:
+            if self.telemetry is None:
+                self.analyze(pdf_path, prepared)
+            else:
+                with self.telemetry.manuscript(pdf_path) as trace:
+                    trace.add("queue_wait", time.time() - queued, at=queued)
+                    self.analyze(pdf_path, prepared)
+        except Exception as e:
+            print(f"Error: {str(e)}\n")
+        finally:
+            self._done(pdf_path)
+
+    def _done(self, pdf_path: str) -> None:
+        with self._idle:
+            if pdf_path not in self._rerun:
+                self._active.discard(pdf_path)
+                self._idle.notify_all()
+                return
+            self._rerun.discard(pdf_path)
+        self._parse(pdf_path)
+
+    def pending(self) -> int:
+        """Number of manuscripts being parsed or analyzed."""
+        with self._idle:
+            return len(self._active)
+
+    def close(self) -> None:
+        """Wait for every submitted manuscript to finish, then stop the pools."""
+        with self._idle:
+            while self._active:
+                self._idle.wait()
+        self._parse_pool.shutdown()
+        self._analyze_pool.shutdown()
+
+def serve_cached(pdf_path: str, task: Any, lookup: Callable[[str, Any], Any], save: Callable[[str, Any], None],
+                 telemetry: Telemetry) -> bool:
+    """
+    Save a manuscript's cached result without parsing it.
+
+    Args:
+        pdf_path (str): Path to the PDF file
+        task (Any): What the manuscript is checked against (requirements or review criteria)
+        lookup (Callable[[str, Any], Any]): Returns the cached result for (pdf_path, task), or None
+        save (Callable[[str, Any], None]): Writes (pdf_path, result) to the output directory
+        telemetry (Telemetry): Records the cache lookup
+
+    Returns:
+        bool: Whether a cached result was found
+    """
+    with telemetry.manuscript(pdf_path):
+        cached = lookup(pdf_path, task)
+        if cached is not None:
+            save(pdf_path, cached)
+    if cached is None:
+        return False
+    telemetry.finish(pdf_path, "cached")
+    return True
+
+def watch_manuscripts(watcher: FolderWatcher, pipeline: Pipeline, is_cached: Callable[[str], bool]) -> None:
+    """
+    Process new and changed manuscripts as they appear until SIGTERM or SIGINT.
+
+    On either signal no further manuscripts are picked up, and the ones
+    already queued are finished before returning.
+
+    Args:
+        watcher (FolderWatcher): Watcher of the manuscripts directory
+        pipeline (Pipeline): Long-lived parse/analysis pipeline; closed on return
+        is_cached (Callable[[str], bool]): Saves a manuscript's cached result, if any, and reports
+            whether there was one
+    """
+    stop = threading.Event()
+    previous = {signum: signal.signal(signum, lambda signum, frame: stop.set())
+                for signum in (signal.SIGTERM, signal.SIGINT)}
+    print(f"Watching {watcher.directory} for new or changed PDFs ({watcher.backend}); stop with SIGTERM or Ctrl-C")
+    try:
+        while not stop.is_set():
+            for pdf_path in watcher.changes(timeout=1.0):
+                if not is_cached(pdf_path):
+                    print(f"Queued {pdf_path}")
+                    pipeline.submit(pdf_path)
+        if pipeline.pending():
+            print(f"Stopping: finishing {pipeline.pending()} manuscripts in progress")
+        pipeline.close()
+    finally:
+        watcher.close()
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
@@ -0,0 +1,270 @@
+import json
+import os
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+# Batch statuses after which nothing changes any more
+FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+def write_batch_input(path: str, requests: List[Tuple[str, Dict[str, Any]]]) -> None:
+    """
+    Write chat completion requests as a Batch API input file.
+
+    Args:
+        path (str): Path of the JSONL file to write
+        requests (List[Tuple[str, Dict[str, Any]]]): (custom_id, chat.completions.create kwargs) pairs
+    """
+    with open(path, "w") as f:
+        for custom_id, body in requests:
+            f.write(json.dumps({"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body}) + "\n")
+
+def read_batch_output(text: str) -> Dict[str, Optional[str]]:
+    """
+    Read the completions out of a Batch API output (or error) file.
+
+    Args:
+        text (str): JSONL content of the file
+
+    Returns:
+        Dict[str, Optional[str]]: custom_id mapped to the completion content, or None if the request failed
+    """
+    contents = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        response = record.get("response") or {}
+        body = response.get("body") or {}
+        if record.get("error") or response.get("status_code", 200) != 200 or not body.get("choices"):
+            contents[record["custom_id"]] = None
+        else:
+            contents[record["custom_id"]] = body["choices"][0]["message"]["content"]
+    return contents
+
+class OpenAIBatchBackend:
+    """Submits batch input files to the OpenAI Batch API."""
+
+    name = "openai"
+
+    def __init__(self, client):
+        """
+        Initialize the backend.
+
+        Args:
+            client (OpenAI): Synchronous SDK client
+        """
+        self.client = client
+
+    def submit(self, input_path: str) -> str:
+        """
+        Upload an input file and start a batch.
+
+        Args:
+            input_path (str): Batch input JSONL file
+
+        Returns:
+            str: Batch id
+        """
+        with open(input_path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h"
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        """
+        Get the status of a batch.
+
+        Args:
+            batch_id (str): Batch id returned by submit
+
+        Returns:
+            str: Batch status, e.g. "in_progress" or "completed"
+        """
+        return self.client.batches.retrieve(batch_id).status
+
+    def results(self, batch_id: str) -> Dict[str, Optional[str]]:
+        """
+        Download the completions of a finished batch.
+
+        Args:
+            batch_id (str): Batch id returned by submit
+
+        Returns:
+            Dict[str, Optional[str]]: custom_id mapped to the completion content, or None if it failed
+        """
+        batch = self.client.batches.retrieve(batch_id)
+        contents = {}
+        for file_id in (batch.error_file_id, batch.output_file_id):
+            if file_id:
+                contents.update(read_batch_output(self.client.files.content(file_id).text))
+        return contents
+
+class LocalBatchBackend:
+    """
+    A file-based stand-in for the Batch API.
+
+    Submitted input files are copied into a directory per batch. The
+    batch completes the first time its status is checked with a send
+    function available, which runs every request through it (e.g. the
+    regular client pointed at a local endpoint) and writes an output file
+    in the Batch API format. Without one, the batch stays in progress
+    until an output.jsonl is placed next to the input by other means.
+    """
+
+    name = "local"
+
+    def __init__(self, directory: str, send: Callable[[Dict[str, Any]], str] = None):
+        """
+        Initialize the backend.
+
+        Args:
+            directory (str): Directory holding one subdirectory per batch
+            send (Callable[[Dict[str, Any]], str], optional): Sends one request and returns the content
+        """
+        self.directory = directory
+        self.send = send
+
+    def _path(self, batch_id: str, name: str) -> str:
+        return os.path.join(self.directory, batch_id, name)
+
+    def submit(self, input_path: str) -> str:
+        """
+        Store an input file as a new batch.
+
+        Args:
+            input_path (str): Batch input JSONL file
+
+        Returns:
+            str: Batch id
+        """
+        batch_id = f"local_batch_{uuid.uuid4().hex[:12]}"
+        os.makedirs(os.path.join(self.directory, batch_id))
+        with open(input_path) as source, open(self._path(batch_id, "input.jsonl"), "w") as target:
+            target.write(source.read())
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        """
+        Get the status of a batch, running it first if a send function is available.
+
+        Args:
+            batch_id (str): Batch id returned by submit
+
+        Returns:
+            str: "completed" once the output file exists, otherwise "in_progress"
+        """
+        if not os.path.exists(self._path(batch_id, "input.jsonl")):
+            return "failed"
+        if not os.path.exists(self._path(batch_id, "output.jsonl")) and self.send is not None:
+            self._run(batch_id)
+        return "completed" if os.path.exists(self._path(batch_id, "output.jsonl")) else "in_progress"
+
+    def _run(self, batch_id: str) -> None:
+        """Send every request of a batch and write the output file."""
+        lines = []
+        with open(self._path(batch_id, "input.jsonl")) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                record = {"id": f"{batch_id}_{len(lines)}", "custom_id": request["custom_id"], "response": None, "error": None}
+                try:
+                    content = self.send(request["body"])
+                    record["response"] = {
+                        "status_code": 200,
+                        "body": {"choices": [{"index": 0, "message": {"role": "assistant", "content": content}}]}
+                    }
+                except Exception as e:
+                    record["error"] = {"code": "request_failed", "message": str(e)}
+                lines.append(json.dumps(record) + "\n")
+
+        temporary_path = self._path(batch_id, "output.jsonl.tmp")
+        with open(temporary_path, "w") as f:
+            f.writelines(lines)
+        os.replace(temporary_path, self._path(batch_id, "output.jsonl"))
+
+    def results(self, batch_id: str) -> Dict[str, Optional[str]]:
+        """
+        Read the completions of a finished batch.
+
+        Args:
+            batch_id (str): Batch id returned by submit
+
+        Returns:
+            Dict[str, Optional[str]]: custom_id mapped to the completion content, or None if it failed
+        """
+        with open(self._path(batch_id, "output.jsonl")) as f:
+            return read_batch_output(f.read())
+
+def create_backend(name: str, openai_client, local_dir: str):
+    """
+    Create the batch backend a job was submitted to.
+
+    Args:
+        name (str): "openai" or "local"
+        openai_client (OpenAIClient): Client whose SDK client (or, for "local", whose _send) is used
+        local_dir (str): Directory of the local backend
+
+    Returns:
+        OpenAIBatchBackend or LocalBatchBackend: The backend
+    """
+    if name == LocalBatchBackend.name:
+        return LocalBatchBackend(local_dir, openai_client._send)
+    if name == OpenAIBatchBackend.name:
+        return OpenAIBatchBackend(openai_client.client)
+    raise ValueError(f"Unknown batch backend: {name}")
+
+def wait_for_batch(backend, batch_id: str, poll_interval: float = 60.0, timeout: float = None) -> str:
+    """
+    Poll a batch until it reaches a final status.
+
+    Args:
+        backend (OpenAIBatchBackend or LocalBatchBackend): Backend the batch was submitted to
+        batch_id (str): Batch id returned by submit
+        poll_interval (float): Seconds between status checks
+        timeout (float, optional): Give up after this many seconds and return the last status
+
+    Returns:
+        str: Final (or last seen) batch status
+    """
+    start = time.monotonic()
+    while True:
+        status = backend.status(batch_id)
+        if status in FINAL_STATUSES:
+            return status
+        if timeout is not None and time.monotonic() - start >= timeout:
+            return status
+        print(f"Batch {batch_id} is {status}; checking again in {poll_interval:.0f}s")
+        time.sleep(poll_interval)
+
+def save_job(job_dir: str, job: Dict[str, Any]) -> None:
+    """
+    Write a batch job manifest.
+
+    Args:
+        job_dir (str): Job directory
+        job (Dict[str, Any]): Manifest contents
+    """
+    temporary_path = os.path.join(job_dir, "job.json.tmp")
+    with open(temporary_path, "w") as f:
+        json.dump(job, f, indent=2)
+    os.replace(temporary_path, os.path.join(job_dir, "job.json"))
+
+def load_job(job_dir: str) -> Dict[str, Any]:
+    """
+    Read a batch job manifest.
+
+    Args:
+        job_dir (str): Job directory
+
+    Returns:
+        Dict[str, Any]: Manifest contents
+    """
+    with open(os.path.join(job_dir, "job.json")) as f:
+        return json.load(f)
@@ -0,0 +1,89 @@
+import importlib
+import os
+import sys
+import threading
+from types import ModuleType
+
+# Source directory of the editorial requirements checker (V2)
+EDITORIAL_SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             "V2_Editorial_First_Decision_Support", "src")
+# Prefix under which the editorial tool's modules are registered in sys.modules
+_PREFIX = "editorial."
+
+_lock = threading.Lock()
+_modules = {}
+
+def _import_isolated(src_dir: str, name: str) -> ModuleType:
+    """
+    Import a module from another tool's src directory without clashing with the caller's modules.
+
+    Both tools have modules with the same names (pdf_parser,
+    openai_client, ...), so the caller's copies are set aside while the
+    other tool's modules are imported, and put back afterwards. The
+    imported modules keep working through their own references and are
+    registered under _PREFIX. Modules that are not in src_dir, such as
+    those in common/, are shared.
+
+    Args:
+        src_dir (str): The other tool's src directory
+        name (str): Module to import
+
+    Returns:
+        ModuleType: The imported module
+    """
+    local = {file[:-3] for file in os.listdir(src_dir) if file.endswith(".py")}
+    saved = {module: sys.modules.pop(module) for module in local if module in sys.modules}
+    sys.path.insert(0, src_dir)
+    try:
+        return importlib.import_module(name)
+    finally:
+        sys.path.remove(src_dir)
+        for module in local:
+            if module in sys.modules:
+                sys.modules[_PREFIX + module] = sys.modules.pop(module)
+        sys.modules.update(saved)
+
+def load_editorial_module(name: str) -> ModuleType:
+    """
+    Load a module of the editorial requirements checker.
+
+    Args:
+        name (str): Module name in the editorial tool's src directory, e.g. "requirements_checker"
+
+    Returns:
+        ModuleType: The module, imported once per process
+    """
+    with _lock:
+        if name not in _modules:
+            _modules[name] = _import_isolated(EDITORIAL_SRC, name)
+        return _modules[name]
+
+def requirements_checker(**options):
+    """
+    Create the editorial tool's RequirementsChecker.
+
+    Other tools check editorial requirements through it, so a manuscript
+    gets the same verdicts (same parser, rules, routing and model) no
+    matter which tool runs the check.
+
+    Args:
+        **options: Keyword arguments for RequirementsChecker, e.g. api_key
+
+    Returns:
+        RequirementsChecker: The checker
+    """
+    return load_editorial_module("requirements_checker").RequirementsChecker(**options)
+
+def prepare_editorial_text(pdf_path: str) -> str:
+    """
+    Parse a manuscript the way the editorial tool does.
+
+    Safe to call from worker processes; the result is a plain string.
+
+    Args:
+        pdf_path (str): Path to the PDF manuscript
+
+    Returns:
+        str: Structured text for RequirementsChecker.check_prepared
+    """
+    return load_editorial_module("requirements_checker").RequirementsChecker.prepare_manuscript(pdf_path)
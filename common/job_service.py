@@ -0,0 +1,504 @@
+import base64
+import json
+import math
+import os
+import shutil
+import signal
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, List, Tuple
+from urllib.parse import parse_qs, urlparse
+from batch import _ignore_signals
+from telemetry import Telemetry, call_traced
+
+# Job states; the last three are final
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINAL_STATES = (DONE, FAILED, CANCELLED)
+
+class AdmissionError(Exception):
+    """A job was refused because a queue is full or the service is shutting down."""
+
+    def __init__(self, message: str, status: int, retry_after: int = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+class Job:
+    """A manuscript submitted to the service and its progress."""
+
+    def __init__(self, tenant: str, filename: str, options: Any, upload_dir: str):
+        self.id = uuid.uuid4().hex
+        self.tenant = tenant
+        self.filename = filename
+        self.options = options
+        self.pdf_path = os.path.join(upload_dir, f"{self.id}.pdf")
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        # (event, data) pairs in the order they happened, replayed to every event stream
+        self.events: List[Tuple[str, Any]] = [("status", {"status": QUEUED})]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Describe the job as JSON.
+
+        Returns:
+            Dict[str, Any]: Job id, tenant, status, timestamps, and the result or error once final
+        """
+        job = {
+            "id": self.id,
+            "tenant": self.tenant,
+            "filename": self.filename,
+            "status": self.status,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished
+        }
+        if self.status == DONE:
+            job["result"] = self.result
+        if self.error is not None:
+            job["error"] = self.error
+        return job
+
+class JobService:
+    """
+    In-process job queue for analyzing uploaded manuscripts.
+
+    Jobs wait in one queue per tenant, and the next job to start comes
+    from the tenant that was served least recently, so a burst from one
+    submitter does not delay the others. At most max_inflight jobs run at
+    a time, and at most tenant_concurrency of them for one tenant.
+    Submissions beyond max_queued waiting jobs overall or tenant_queued
+    for one tenant are refused with a retry hint instead of growing the
+    queue, which keeps waiting times bounded. PDFs are parsed in a process
+    pool; the API calls run in the job threads.
+    """
+
+    def __init__(self, prepare: Callable[[str], Any],
+                 run: Callable[[str, Any, Any, Callable[[Any], None]], Dict[str, Any]],
+                 telemetry: Telemetry, lookup: Callable[[str, Any], Dict[str, Any]] = None,
+                 workers: int = 1, max_inflight: int = 4, max_queued: int = 100,
+                 tenant_concurrency: int = 2, tenant_queued: int = 20, job_ttl: float = 3600):
+        """
+        Start the worker pools.
+
+        Args:
+            prepare (Callable[[str], Any]): Picklable module-level callable that parses a PDF
+            run (Callable[[str, Any, Any, Callable[[Any], None]], Dict[str, Any]]): Analyzes a parsed
+                manuscript; called with the PDF path, the parsed manuscript, the job options and a
+                callback for each partial result, and returns the result
+            telemetry (Telemetry): Records each job's stage timings and token usage
+            lookup (Callable[[str, Any], Dict[str, Any]], optional): Returns a cached result for a PDF
+                and job options, or None; checked before parsing
+            workers (int): Number of parser processes
+            max_inflight (int): Maximum number of jobs running at a time
+            max_queued (int): Maximum number of jobs waiting to start
+            tenant_concurrency (int): Maximum number of running jobs per tenant
+            tenant_queued (int): Maximum number of waiting jobs per tenant
+            job_ttl (float): Seconds finished jobs are kept for polling
+        """
+        self.prepare = prepare
+        self.run = run
+        self.telemetry = telemetry
+        self.lookup = lookup
+        self.max_inflight = max(1, max_inflight)
+        self.max_queued = max_queued
+        self.tenant_concurrency = max(1, tenant_concurrency)
+        self.tenant_queued = tenant_queued
+        self.job_ttl = job_ttl
+        self.upload_dir = tempfile.mkdtemp(prefix="rigorous_jobs_")
+        self._parse_pool = ProcessPoolExecutor(max_workers=max(1, workers), initializer=_ignore_signals)
+        self._job_pool = ThreadPoolExecutor(max_workers=self.max_inflight)
+        self._jobs: Dict[str, Job] = {}
+        self._queues: Dict[str, Deque[Job]] = {}
+        self._running: Dict[str, int] = {}
+        # Dispatch sequence number of each active tenant's latest job
+        self._served: Dict[str, int] = {}
+        self._dispatched = 0
+        self._closing = False
+        # Smoothed job run time, for Retry-After hints
+        self._job_seconds = None
+        self._changed = threading.Condition()
+
+    def _queued(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _retry_after(self) -> int:
+        # Time until the queue has moved on by about one job per slot
+        per_job = self._job_seconds or 10.0
+        return max(1, math.ceil(per_job * (self._queued() + 1) / self.max_inflight))
+
+    def submit(self, pdf: bytes, options: Any, tenant: str = "default", filename: str = None) -> Job:
+        """
+        Queue a manuscript for analysis.
+
+        Args:
+            pdf (bytes): Content of the PDF file
+            options (Any): Job options passed to run, e.g. the requirements to check
+            tenant (str): Submitter the per-tenant limits apply to
+            filename (str, optional): Original file name, reported back with the job
+
+        Returns:
+            Job: The queued job
+
+        Raises:
+            AdmissionError: If the service is shutting down or a queue limit is reached
+        """
+        with self._changed:
+            self._expire()
+            if self._closing:
+                raise AdmissionError("Service is shutting down", 503)
+            if self._queued() >= self.max_queued:
+                raise AdmissionError("Job queue is full", 503, self._retry_after())
+            if len(self._queues.get(tenant, ())) >= self.tenant_queued:
+                raise AdmissionError(f"Too many queued jobs for tenant {tenant}", 429, self._retry_after())
+            job = Job(tenant, filename or "manuscript.pdf", options, self.upload_dir)
+            with open(job.pdf_path, 'wb') as f:
+                f.write(pdf)
+            self._jobs[job.id] = job
+            self._queues.setdefault(tenant, deque()).append(job)
+            self._dispatch()
+            return job
+
+    def _dispatch(self) -> None:
+        """Start queued jobs, least recently served tenant first, while slots are free. Holds the lock."""
+        while sum(self._running.values()) < self.max_inflight:
+            tenants = [tenant for tenant in self._queues if self._running.get(tenant, 0) < self.tenant_concurrency]
+            if not tenants:
+                return
+            tenant = min(tenants, key=lambda tenant: self._served.get(tenant, -1))
+            self._dispatched += 1
+            self._served[tenant] = self._dispatched
+            job = self._queues[tenant].popleft()
+            if not self._queues[tenant]:
+                del self._queues[tenant]
+            self._running[tenant] = self._running.get(tenant, 0) + 1
+            job.status = RUNNING
+            job.started = time.time()
+            job.events.append(("status", {"status": RUNNING}))
+            self._changed.notify_all()
+            self._job_pool.submit(self._run, job)
+
+    def _emit(self, job: Job, event: str, data: Any) -> None:
+        with self._changed:
+            job.events.append((event, data))
+            self._changed.notify_all()
+
+    def _run(self, job: Job) -> None:
+        status, result, error = DONE, None, None
+        with self.telemetry.manuscript(job.pdf_path) as trace:
+            trace.add("queue_wait", job.started - job.created, at=job.created)
+            try:
+                if self.lookup is not None:
+                    result = self.lookup(job.pdf_path, job.options)
+                if result is None:
+                    prepared, spans, counters = self._parse_pool.submit(
+                        call_traced, self.prepare, job.pdf_path).result()
+                    trace.merge(spans, counters)
+                    result = self.run(job.pdf_path, prepared, job.options,
+                                      lambda item: self._emit(job, "item", item))
+            except Exception as e:
+                status, error = FAILED, str(e)
+                print(f"Error processing job {job.id} ({job.filename}): {error}\n")
+            cached = trace.counters["cache_hits"] > 0
+        self.telemetry.finish(job.pdf_path, "error" if status == FAILED else "cached" if cached else "ok", error)
+        os.remove(job.pdf_path)
+
+        with self._changed:
+            job.status, job.result, job.error = status, result, error
+            job.finished = time.time()
+            seconds = job.finished - job.started
+            self._job_seconds = seconds if self._job_seconds is None else 0.8 * self._job_seconds + 0.2 * seconds
+            job.events.append(("result", job.to_dict()))
+            self._running[job.tenant] -= 1
+            if not self._running[job.tenant]:
+                del self._running[job.tenant]
+                if job.tenant not in self._queues:
+                    del self._served[job.tenant]
+            self._dispatch()
+            self._changed.notify_all()
+
+    def get(self, job_id: str) -> Job:
+        """
+        Look up a job.
+
+        Args:
+            job_id (str): Job id
+
+        Returns:
+            Job: The job, or None if it is unknown or has expired
+        """
+        with self._changed:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a job that has not started yet.
+
+        Args:
+            job_id (str): Job id
+
+        Returns:
+            bool: Whether the job was cancelled
+        """
+        with self._changed:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                return False
+            queue = self._queues[job.tenant]
+            queue.remove(job)
+            if not queue:
+                del self._queues[job.tenant]
+            os.remove(job.pdf_path)
+            job.status = CANCELLED
+            job.finished = time.time()
+            job.events.append(("result", job.to_dict()))
+            self._changed.notify_all()
+            return True
+
+    def wait(self, job: Job, seen: int, timeout: float) -> List[Tuple[str, Any]]:
+        """
+        Wait for events of a job.
+
+        Args:
+            job (Job): The job
+            seen (int): Number of events already received
+            timeout (float): Maximum seconds to wait
+
+        Returns:
+            List[Tuple[str, Any]]: Events after the first seen ones, empty if none arrived in time
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: len(job.events) > seen, timeout)
+            return job.events[seen:]
+
+    def _expire(self) -> None:
+        """Forget finished jobs older than job_ttl. Holds the lock."""
+        expired = time.time() - self.job_ttl
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.status in FINAL_STATES and job.finished < expired]:
+            del self._jobs[job_id]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Current load of the service.
+
+        Returns:
+            Dict[str, Any]: Queued and running jobs overall and per tenant, and the limits
+        """
+        with self._changed:
+            tenants = set(self._queues) | set(self._running)
+            return {
+                "queued": self._queued(),
+                "running": sum(self._running.values()),
+                "tenants": {tenant: {"queued": len(self._queues.get(tenant, ())),
+                                     "running": self._running.get(tenant, 0)} for tenant in sorted(tenants)},
+                "max_inflight": self.max_inflight,
+                "max_queued": self.max_queued,
+                "tenant_concurrency": self.tenant_concurrency,
+                "tenant_queued": self.tenant_queued,
+                "mean_job_seconds": self._job_seconds
+            }
+
+    def close(self) -> None:
+        """Refuse new jobs, finish the queued and running ones, then stop the pools."""
+        with self._changed:
+            self._closing = True
+            self._changed.wait_for(lambda: not self._queues and not self._running)
+        self._job_pool.shutdown()
+        self._parse_pool.shutdown()
+        shutil.rmtree(self.upload_dir, ignore_errors=True)
+
+def _handler(service: JobService, parse_options: Callable[[Dict[str, Any]], Any], max_upload_bytes: int):
+    """Build the request handler class for a service."""
+
+    class JobHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status: int, body: Any, headers: Dict[str, str] = None) -> None:
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _job(self, job_id: str) -> Job:
+            job = service.get(job_id)
+            if job is None:
+                self._send_json(404, {"error": f"Unknown job {job_id}"})
+            return job
+
+        def do_POST(self):
+            if urlparse(self.path).path.rstrip("/") != "/jobs":
+                self._send_json(404, {"error": "Not found"})
+                return
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > max_upload_bytes:
+                self._send_json(413, {"error": f"Upload exceeds {max_upload_bytes} bytes"})
+                return
+            body = self.rfile.read(length)
+            tenant = self.headers.get("X-Tenant", "default")
+            try:
+                if self.headers.get("Content-Type", "").startswith("application/pdf"):
+                    pdf, fields = body, {}
+                    filename = self.headers.get("X-Filename")
+                else:
+                    fields = json.loads(body)
+                    pdf = base64.b64decode(fields.get("pdf", ""), validate=True)
+                    filename = fields.get("filename")
+                    tenant = fields.get("tenant", tenant)
+                if not pdf.startswith(b"%PDF"):
+                    raise ValueError("Request does not contain a PDF")
+                options = parse_options(fields)
+            except ValueError as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            try:
+                job = service.submit(pdf, options, tenant, filename)
+            except AdmissionError as e:
+                headers = {"Retry-After": str(e.retry_after)} if e.retry_after else None
+                self._send_json(e.status, {"error": str(e)}, headers)
+                return
+            self._send_json(202, job.to_dict(), {"Location": f"/jobs/{job.id}"})
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            parts = url.path.strip("/").split("/")
+            if parts == ["health"]:
+                self._send_json(200, {"status": "ok"})
+            elif parts == ["stats"]:
+                self._send_json(200, service.stats())
+            elif parts == ["metrics"]:
+                payload = service.telemetry.prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+            elif len(parts) == 2 and parts[0] == "jobs":
+                job = self._job(parts[1])
+                if job is None:
+                    return
+                # ?wait=SECONDS long-polls until the job is final
+                try:
+                    wait = min(float(parse_qs(url.query).get("wait", ["0"])[0]), 300.0)
+                except ValueError:
+                    self._send_json(400, {"error": "wait must be a number of seconds"})
+                    return
+                deadline = time.monotonic() + wait
+                seen = 0
+                while job.status not in FINAL_STATES and time.monotonic() < deadline:
+                    seen += len(service.wait(job, seen, deadline - time.monotonic()))
+                self._send_json(200, job.to_dict())
+            elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "events":
+                job = self._job(parts[1])
+                if job is not None:
+                    self._stream(job)
+            else:
+                self._send_json(404, {"error": "Not found"})
+
+        def _stream(self, job: Job) -> None:
+            """Send the job's events as server-sent events until it is final."""
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            seen = 0
+            try:
+                while True:
+                    events = service.wait(job, seen, 15.0)
+                    if not events:
+                        self.wfile.write(b": keep-alive\n\n")
+                    for event, data in events:
+                        self.wfile.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode())
+                    self.wfile.flush()
+                    seen += len(events)
+                    if events and events[-1][0] == "result":
+                        return
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def do_DELETE(self):
+            parts = urlparse(self.path).path.strip("/").split("/")
+            if len(parts) != 2 or parts[0] != "jobs":
+                self._send_json(404, {"error": "Not found"})
+                return
+            job = self._job(parts[1])
+            if job is None:
+                return
+            if not service.cancel(job.id):
+                self._send_json(409, {"error": f"Job is {job.status}"})
+                return
+            self._send_json(200, job.to_dict())
+
+        def log_message(self, *args):
+            pass
+
+    return JobHandler
+
+def start_server(service: JobService, parse_options: Callable[[Dict[str, Any]], Any], port: int,
+                 host: str = "127.0.0.1", max_upload_mb: float = 50) -> ThreadingHTTPServer:
+    """
+    Serve the job API in a background thread.
+
+    POST /jobs takes a JSON body with the base64-encoded PDF ("pdf"), an
+    optional "filename" and the job options, or a raw application/pdf body
+    that uses the default options. GET /jobs/ID returns the job (with
+    ?wait=SECONDS to long-poll), GET /jobs/ID/events streams its progress
+    as server-sent events and DELETE /jobs/ID cancels it while queued. The
+    tenant comes from the X-Tenant header.
+
+    Args:
+        service (JobService): The job queue
+        parse_options (Callable[[Dict[str, Any]], Any]): Turns the JSON body into job options;
+            raises ValueError for invalid ones
+        port (int): Port to listen on, 0 for any free port
+        host (str): Interface to bind
+        max_upload_mb (float): Largest accepted request body
+
+    Returns:
+        ThreadingHTTPServer: The running server
+    """
+    server = ThreadingHTTPServer((host, port), _handler(service, parse_options, int(max_upload_mb * 1024 * 1024)))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def serve_jobs(service: JobService, parse_options: Callable[[Dict[str, Any]], Any], port: int,
+               host: str = "127.0.0.1") -> None:
+    """
+    Run the job API until SIGTERM or SIGINT, then finish the accepted jobs.
+
+    Args:
+        service (JobService): The job queue
+        parse_options (Callable[[Dict[str, Any]], Any]): As for start_server
+        port (int): Port to listen on
+        host (str): Interface to bind
+    """
+    stop = threading.Event()
+    previous = {signum: signal.signal(signum, lambda signum, frame: stop.set())
+                for signum in (signal.SIGTERM, signal.SIGINT)}
+    server = start_server(service, parse_options, port, host)
+    print(f"Serving jobs at http://{host}:{server.server_address[1]}/jobs; stop with SIGTERM or Ctrl-C")
+    try:
+        while not stop.wait(1.0):
+            pass
+        stats = service.stats()
+        if stats["queued"] or stats["running"]:
+            print(f"Stopping: finishing {stats['queued'] + stats['running']} accepted jobs")
+        # Keep answering polls while draining; new jobs get a 503
+        service.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
@@ -0,0 +1,119 @@
+import json
+from typing import Any, List, Tuple, Union
+
+class JSONStreamParser:
+    """
+    An incremental parser for a JSON object that arrives in pieces.
+
+    It watches one top-level member, e.g. "requirements_analysis", and
+    returns each entry of that array or object as soon as the entry's
+    closing bracket (or the following comma) has arrived, without waiting
+    for the rest of the document. Text before the first "{" (such as a
+    Markdown code fence) is ignored.
+    """
+
+    def __init__(self, key: str):
+        """
+        Initialize the parser.
+
+        Args:
+            key (str): Name of the top-level member whose entries are reported
+        """
+        self.key = key
+        self.text = ""
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._last_string = None
+        self._top_key = None
+        self._in_target = False
+        self._target_is_object = False
+        self._member_key = None
+        self._value_start = None
+        self._index = 0
+
+    def feed(self, piece: str) -> List[Tuple[Union[int, str], Any]]:
+        """
+        Consume the next piece of the response.
+
+        Args:
+            piece (str): Newly received text
+
+        Returns:
+            List[Tuple[Union[int, str], Any]]: Completed entries as (index, value) for an
+                array or (member name, value) for an object, in order
+        """
+        self.text += piece
+        completed = []
+        text = self.text
+
+        for i in range(self._position, len(text)):
+            c = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._string_start is not None:
+                        self._last_string = json.loads(text[self._string_start:i + 1])
+                continue
+
+            entry_level = self._in_target and self._depth == 2
+            if c == '"':
+                self._in_string = True
+                self._string_start = i if self._depth == 1 or entry_level else None
+                self._start_value(i, entry_level)
+            elif c in "{[":
+                self._start_value(i, entry_level)
+                self._depth += 1
+                if self._depth == 2 and self._top_key == self.key and not self._in_target:
+                    self._in_target = True
+                    self._target_is_object = c == "{"
+            elif c in "}]":
+                if entry_level:
+                    # The watched container itself closes
+                    self._finish_value(i, completed)
+                    self._in_target = False
+                self._depth -= 1
+                if self._in_target and self._depth == 2:
+                    self._finish_value(i + 1, completed)
+            elif c == ":":
+                if self._depth == 1:
+                    self._top_key = self._last_string
+                elif entry_level:
+                    self._member_key = self._last_string
+            elif c == ",":
+                if entry_level:
+                    self._finish_value(i, completed)
+            elif not c.isspace():
+                self._start_value(i, entry_level)
+
+        self._position = len(text)
+        return completed
+
+    def _start_value(self, i: int, entry_level: bool) -> None:
+        """Remember where an entry of the watched container begins."""
+        if not entry_level or self._value_start is not None:
+            return
+        if self._target_is_object and self._member_key is None:
+            # A member name, not a value
+            return
+        self._value_start = i
+
+    def _finish_value(self, end: int, completed: List[Tuple[Union[int, str], Any]]) -> None:
+        """Decode the entry that ends at end, if one is pending."""
+        if self._value_start is None:
+            return
+        raw = self.text[self._value_start:end].strip()
+        self._value_start = None
+        try:
+            completed.append((self._member_key if self._target_is_object else self._index, json.loads(raw)))
+        except json.JSONDecodeError:
+            # Malformed entry; the final parse of the whole response reports it
+            pass
+        self._member_key = None
+        self._index += 1
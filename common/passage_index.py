@@ -0,0 +1,204 @@
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+from token_budget import split_sections
+
+_WORD = re.compile(r"[a-z0-9]+")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+_SECTION_TITLE = re.compile(r"^(.+?) \(\d+ words\)(?: \(continued\))?:$")
+_SUFFIXES = ("ations", "ation", "ings", "ing", "edly", "ed", "es", "ly", "s")
+_STOPWORDS = frozenset("""
+a about above after again all also an and any are as at be because been before being below between both but by
+can could did do does doing during each few for from further had has have having here how if in into is it its
+itself just more most no nor not of off on once only or other our out over own same should so some such than
+that the their them then there these they this those through to too under until up very was we were what when
+where which while who whom why will with would
+""".split())
+
+def _stem(word: str) -> str:
+    """Strip a common English suffix so that inflected forms share a term."""
+    if word.endswith("ies") and len(word) > 5:
+        return word[:-3] + "i"
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            if suffix == "s" and word.endswith(("ss", "is", "us")):
+                break
+            word = word[:-len(suffix)]
+            break
+    if len(word) > 4 and word[-1] in "ey":
+        word = word[:-1] + ("i" if word[-1] == "y" else "")
+    return word
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lower-case, stemmed index terms without stopwords.
+
+    Args:
+        text (str): Text to tokenize
+
+    Returns:
+        List[str]: Index terms in order
+    """
+    return [_stem(word) for word in _WORD.findall(text.lower()) if word not in _STOPWORDS]
+
+def split_passages(text: str, passage_words: int = 80) -> List[str]:
+    """
+    Split section text into passages of whole sentences of roughly passage_words words.
+
+    Args:
+        text (str): Section text
+        passage_words (int): Target passage length in words
+
+    Returns:
+        List[str]: Passages in order
+    """
+    passages = []
+    current = []
+    current_words = 0
+    for sentence in _SENTENCE_BREAK.split(text.strip()):
+        if not sentence:
+            continue
+        current.append(sentence)
+        current_words += len(sentence.split())
+        if current_words >= passage_words:
+            passages.append(" ".join(current))
+            current = []
+            current_words = 0
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+class PassageIndex:
+    """
+    An in-memory BM25 inverted index over manuscript passages.
+
+    Passages are sentence-aligned windows of each section. Term postings
+    and per-passage length normalization are computed once at build time,
+    so a query only touches the postings of its own terms.
+    """
+
+    def __init__(self, passages: List[Tuple[str, str]], k1: float = 1.5, b: float = 0.75):
+        """
+        Build the index.
+
+        Args:
+            passages (List[Tuple[str, str]]): (section name, passage text) pairs
+            k1 (float): BM25 term-frequency saturation
+            b (float): BM25 length normalization strength
+        """
+        self.passages = passages
+        self.k1 = k1
+        self.postings = defaultdict(list)
+        lengths = []
+
+        for passage_id, (section, text) in enumerate(passages):
+            counts = Counter(tokenize(f"{section} {text}"))
+            lengths.append(sum(counts.values()))
+            for term, frequency in counts.items():
+                self.postings[term].append((passage_id, frequency))
+
+        count = len(passages)
+        average_length = (sum(lengths) / count) if count else 0
+        self.length_norm = [k1 * (1 - b + b * length / average_length) if average_length else k1
+                            for length in lengths]
+        self.idf = {term: math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for term, postings in self.postings.items()}
+
+    @classmethod
+    def from_sections(cls, sections: Dict[str, List[str]], passage_words: int = 80) -> "PassageIndex":
+        """
+        Build an index from a parser's detect_sections() output.
+
+        Args:
+            sections (Dict[str, List[str]]): Section names and their content
+            passage_words (int): Target passage length in words
+
+        Returns:
+            PassageIndex: The index
+        """
+        passages = []
+        for section, content in sections.items():
+            for passage in split_passages(" ".join(content), passage_words):
+                passages.append((section, passage))
+        return cls(passages)
+
+    @classmethod
+    def from_structured_text(cls, structured_text: str, passage_words: int = 80) -> "PassageIndex":
+        """
+        Build an index from the structured text built by the checker.
+
+        Args:
+            structured_text (str): Text with "Name (N words):" section headers
+            passage_words (int): Target passage length in words
+
+        Returns:
+            PassageIndex: The index
+        """
+        _, blocks = split_sections(structured_text)
+        sections = {}
+        for block in blocks:
+            header, _, body = block.partition("\n")
+            match = _SECTION_TITLE.match(header)
+            name = match.group(1) if match else "Document"
+            sections.setdefault(name, []).append(body if match else block)
+        return cls.from_sections(sections, passage_words)
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[int, float]]:
+        """
+        Find the passages that best match a query.
+
+        Args:
+            query (str): Query text, e.g. a criterion and its description
+            k (int): Number of passages to return
+
+        Returns:
+            List[Tuple[int, float]]: (passage id, BM25 score) pairs, best first
+        """
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for passage_id, frequency in self.postings[term]:
+                scores[passage_id] += idf * frequency * (self.k1 + 1) / (frequency + self.length_norm[passage_id])
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+def build_evidence_text(structured_text: str, queries: Dict[str, str], k: int = 3) -> str:
+    """
+    Replace the manuscript body with the passages retrieved for each query.
+
+    Every retrieved passage is listed once with an id, followed by the ids
+    that are most relevant to each query. The document metadata preamble
+    is kept as is.
+
+    Args:
+        structured_text (str): Structured text built by the checker
+        queries (Dict[str, str]): Label (criterion or requirement) mapped to its query text
+        k (int): Passages to retrieve per query
+
+    Returns:
+        str: Compact evidence text to send instead of the full manuscript
+    """
+    preamble, _ = split_sections(structured_text)
+    index = PassageIndex.from_structured_text(structured_text)
+
+    passage_labels = {}
+    evidence = {}
+    for label, query in queries.items():
+        ids = []
+        for passage_id, _ in index.search(query, k):
+            passage_labels.setdefault(passage_id, f"P{len(passage_labels) + 1}")
+            ids.append(passage_labels[passage_id])
+        evidence[label] = ids
+
+    lines = [preamble.rstrip(), "", "Retrieved passages:"]
+    for passage_id, passage_label in passage_labels.items():
+        section, text = index.passages[passage_id]
+        lines.append(f"[{passage_label}] ({section}) {text}")
+    lines.append("")
+    lines.append("Most relevant passages per item:")
+    for label, ids in evidence.items():
+        lines.append(f"- {label}: {', '.join(ids) if ids else 'none found'}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,45 @@
+from typing import Dict, List
+
+# First message of every request, identical for every task and both tools
+SYSTEM_PROMPT = ("You are an expert reviewer of academic manuscripts. The manuscript comes first; the "
+                 "instructions after it say what to assess and how to format the answer. Be objective, "
+                 "strict and evidence-based, and always respond with valid JSON.")
+
+def layout_messages(manuscript_text: str, instructions: str) -> List[Dict[str, str]]:
+    """
+    Build the chat messages for a task on a manuscript.
+
+    Providers cache prompts by exact prefix, so the fixed system message
+    and the manuscript come first and only the task instructions differ
+    between requests on the same text. A requirements check and a review
+    of one manuscript, or checks against different requirement sets, then
+    pay for the long manuscript prefix once.
+
+    Args:
+        manuscript_text (str): The manuscript text, or one chunk of it
+        instructions (str): Task-specific instructions and response format
+
+    Returns:
+        List[Dict[str, str]]: Messages for chat.completions.create
+    """
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"Manuscript text:\n{manuscript_text}"},
+        {"role": "user", "content": instructions}
+    ]
+
+def replace_instructions(messages: List[Dict[str, str]], instructions: str) -> List[Dict[str, str]]:
+    """
+    Swap the task instructions of a request built with layout_messages.
+
+    Follow-up requests about the same manuscript text keep its cached
+    prefix this way.
+
+    Args:
+        messages (List[Dict[str, str]]): Messages from layout_messages
+        instructions (str): New task instructions
+
+    Returns:
+        List[Dict[str, str]]: Messages with the same system message and manuscript
+    """
+    return messages[:-1] + [{"role": "user", "content": instructions}]
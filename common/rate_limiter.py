@@ -0,0 +1,218 @@
+import asyncio
+import random
+import threading
+import time
+import weakref
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+class RateLimiter:
+    """
+    Token-bucket limiter for requests per minute (RPM) and tokens per minute (TPM).
+
+    Each bucket holds up to one minute of budget and refills continuously.
+    Callers await acquire() (or, from threads, call wait()) with the number
+    of tokens they expect to use; when either bucket is short the call
+    sleeps until enough budget has refilled. A 429 from the server can
+    pause every caller via pause_for().
+
+    One limiter may serve several event loops (e.g. one asyncio.run() per
+    batch) and threads at once: async waiters queue on a lock of their own
+    loop, blocking waiters on a thread lock, and the buckets themselves are
+    guarded by a thread lock.
+    """
+
+    def __init__(self, requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            requests_per_minute (int, optional): Request budget per minute; unlimited if not set
+            tokens_per_minute (int, optional): Token budget per minute; unlimited if not set
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._request_tokens = float(requests_per_minute or 0)
+        self._token_tokens = float(tokens_per_minute or 0)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        # An asyncio.Lock belongs to one event loop, so each loop gets its own
+        self._loop_locks = weakref.WeakKeyDictionary()
+        self._bucket_lock = threading.Lock()
+        self._thread_lock = threading.Lock()
+
+    def _refill(self) -> None:
+        """Add the budget accrued since the last refill, capped at one minute's worth."""
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        if self.requests_per_minute:
+            self._request_tokens = min(float(self.requests_per_minute),
+                                       self._request_tokens + elapsed * self.requests_per_minute / 60.0)
+        if self.tokens_per_minute:
+            self._token_tokens = min(float(self.tokens_per_minute),
+                                     self._token_tokens + elapsed * self.tokens_per_minute / 60.0)
+
+    def _wait_time(self, tokens: int) -> float:
+        """
+        Seconds until one request of the given size fits in both buckets.
+
+        Args:
+            tokens (int): Tokens the request will consume
+
+        Returns:
+            float: Seconds to wait, 0 if the request can proceed now
+        """
+        wait = max(0.0, self._paused_until - time.monotonic())
+        if self.requests_per_minute and self._request_tokens < 1:
+            wait = max(wait, (1 - self._request_tokens) * 60.0 / self.requests_per_minute)
+        if self.tokens_per_minute and self._token_tokens < tokens:
+            wait = max(wait, (tokens - self._token_tokens) * 60.0 / self.tokens_per_minute)
+        return wait
+
+    def _reserve(self, tokens: int) -> float:
+        """
+        Reserve one request of the given size if both buckets allow it.
+
+        Args:
+            tokens (int): Tokens the request will consume
+
+        Returns:
+            float: 0 if the request was reserved, otherwise seconds to wait before trying again
+        """
+        with self._bucket_lock:
+            self._refill()
+            wait = self._wait_time(tokens)
+            if wait <= 0:
+                if self.requests_per_minute:
+                    self._request_tokens -= 1
+                if self.tokens_per_minute:
+                    self._token_tokens -= tokens
+            return wait
+
+    def _clamp(self, tokens: int) -> int:
+        """A single request larger than the whole bucket could never proceed, so cap it at the bucket."""
+        return min(tokens, self.tokens_per_minute) if self.tokens_per_minute else tokens
+
+    async def acquire(self, tokens: int = 0) -> float:
+        """
+        Wait until a request of the given size is within budget and reserve it.
+
+        Args:
+            tokens (int): Estimated tokens (prompt plus completion) for the request
+
+        Returns:
+            float: Total seconds spent waiting
+        """
+        loop = asyncio.get_running_loop()
+        with self._bucket_lock:
+            lock = self._loop_locks.get(loop)
+            if lock is None:
+                lock = self._loop_locks[loop] = asyncio.Lock()
+        tokens = self._clamp(tokens)
+
+        waited = 0.0
+        async with lock:
+            while True:
+                wait = self._reserve(tokens)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+                waited += wait
+        return waited
+
+    def wait(self, tokens: int = 0) -> float:
+        """
+        Block the calling thread until a request of the given size is within budget and reserve it.
+
+        Args:
+            tokens (int): Estimated tokens (prompt plus completion) for the request
+
+        Returns:
+            float: Total seconds spent waiting
+        """
+        tokens = self._clamp(tokens)
+
+        waited = 0.0
+        with self._thread_lock:
+            while True:
+                wait = self._reserve(tokens)
+                if wait <= 0:
+                    break
+                time.sleep(wait)
+                waited += wait
+        return waited
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """
+        Correct the token bucket once the real usage of a request is known.
+
+        Args:
+            estimated_tokens (int): Tokens reserved in acquire()
+            actual_tokens (int): Tokens reported by the API
+        """
+        if self.tokens_per_minute:
+            with self._bucket_lock:
+                self._refill()
+                self._token_tokens -= actual_tokens - estimated_tokens
+
+    def pause_for(self, seconds: float) -> None:
+        """
+        Hold back every caller for the given number of seconds.
+
+        Args:
+            seconds (float): Pause length, typically taken from a Retry-After header
+        """
+        with self._bucket_lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+def parse_retry_after(headers) -> Optional[float]:
+    """
+    Read the server-requested retry delay from response headers.
+
+    Args:
+        headers: Response headers (any mapping with a case-insensitive get)
+
+    Returns:
+        Optional[float]: Delay in seconds, or None if the server did not send one
+    """
+    if not headers:
+        return None
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000.0
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        retry_date = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_date.timestamp() - time.time())
+
+def backoff_delay(attempt: int, base_delay: float = 1.0, max_delay: float = 60.0,
+                  retry_after: Optional[float] = None) -> float:
+    """
+    Compute the delay before the next retry using full-jitter exponential backoff.
+
+    Args:
+        attempt (int): Zero-based retry attempt
+        base_delay (float): Delay scale for the first retry in seconds
+        max_delay (float): Upper bound on the backoff window in seconds
+        retry_after (float, optional): Server-requested delay, honored as a lower bound
+
+    Returns:
+        float: Seconds to wait before retrying
+    """
+    delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+    if retry_after is not None:
+        # Spread callers that were all told the same Retry-After
+        delay = max(delay, retry_after + random.uniform(0, base_delay))
+    return delay
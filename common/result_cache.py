@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+def file_sha256(path: str) -> str:
+    """
+    Compute the SHA-256 of a file's bytes.
+
+    Args:
+        path (str): Path to the file
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def make_cache_key(content_hash: str, task_text: str, model: str, temperature: float, prompt_version: str) -> str:
+    """
+    Build a content-addressed cache key for one analysis.
+
+    Args:
+        content_hash (str): SHA-256 of the manuscript PDF
+        task_text (str): Requirements or review criteria text
+        model (str): Model name
+        temperature (float): Sampling temperature
+        prompt_version (str): Version of the prompt template
+
+    Returns:
+        str: Hex digest identifying the analysis
+    """
+    material = json.dumps([content_hash, task_text, model, temperature, prompt_version])
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+class ResultCache:
+    """
+    Persistent SQLite cache of analysis results keyed by content hash.
+
+    Entries are evicted when they are older than max_age_days, and the
+    least recently used entries are dropped once the stored results exceed
+    max_bytes. Hit/miss counters cover the lifetime of the instance.
+    """
+
+    def __init__(self, path: str, max_bytes: Optional[int] = None, max_age_days: Optional[float] = None):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path (str): Path to the SQLite file
+            max_bytes (int, optional): Maximum total size of stored results
+            max_age_days (float, optional): Maximum age of an entry in days
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS results (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created REAL NOT NULL,
+            accessed REAL NOT NULL
+        )""")
+        self._conn.commit()
+        self.evict()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result.
+
+        Args:
+            key (str): Cache key from make_cache_key
+
+        Returns:
+            Optional[Dict[str, Any]]: Cached result, or None on a miss
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM results WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            if row is None or self._expired(row[1], now):
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """
+        Store a result and apply the eviction policy.
+
+        Args:
+            key (str): Cache key from make_cache_key
+            result (Dict[str, Any]): JSON-serializable analysis result
+        """
+        value = json.dumps(result)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now))
+            self._conn.commit()
+        self.evict()
+
+    def evict(self) -> None:
+        """Drop expired entries, then least recently used entries until under max_bytes."""
+        with self._lock:
+            if self.max_age_days is not None:
+                cutoff = time.time() - self.max_age_days * 86400
+                self.evictions += self._conn.execute("DELETE FROM results WHERE created < ?", (cutoff,)).rowcount
+            if self.max_bytes is not None:
+                total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+                if total > self.max_bytes:
+                    for key, size in self._conn.execute(
+                            "SELECT key, size FROM results ORDER BY accessed").fetchall():
+                        self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                        self.evictions += 1
+                        total -= size
+                        if total <= self.max_bytes:
+                            break
+            self._conn.commit()
+
+    def _expired(self, created: float, now: float) -> bool:
+        """Whether an entry created at the given time is past max_age_days."""
+        return self.max_age_days is not None and now - created > self.max_age_days * 86400
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report cache counters and current size.
+
+        Returns:
+            Dict[str, int]: Hits, misses, evictions, entry count and total bytes
+        """
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': entries,
+            'bytes': size
+        }
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,219 @@
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from telemetry import Telemetry
+from token_budget import estimate_cost, estimate_tokens
+
+def estimate_requests(requests: List[Dict[str, Any]]) -> Tuple[int, int]:
+    """
+    Estimate the tokens a list of chat completion requests will use.
+
+    Args:
+        requests (List[Dict[str, Any]]): Keyword arguments for chat.completions.create
+
+    Returns:
+        Tuple[int, int]: Estimated prompt tokens, and the completion tokens the requests
+            may use at most (their max_tokens)
+    """
+    prompt_tokens = sum(estimate_tokens(message["content"]) for request in requests for message in request["messages"])
+    completion_tokens = sum(request.get("max_tokens", 0) for request in requests)
+    return prompt_tokens, completion_tokens
+
+def order_manuscripts(pdf_files: List[str], manifest_path: str = None, field: str = "priority",
+                      descending: bool = False) -> List[str]:
+    """
+    Order manuscripts by priority.
+
+    With a manifest, manuscripts are sorted by one of its fields (a
+    priority number, an ISO submission date, ...); manuscripts it does not
+    list come last. Without one, and among unlisted manuscripts, the oldest
+    file (earliest submission) comes first.
+
+    Args:
+        pdf_files (List[str]): PDF file paths
+        manifest_path (str, optional): JSON file mapping PDF file names to records, or a list of
+            records with a "file" member
+        field (str): Record field to sort by
+        descending (bool): Put the largest field values first
+
+    Returns:
+        List[str]: The PDF file paths in processing order
+    """
+    records = {}
+    if manifest_path:
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+        if isinstance(manifest, list):
+            manifest = {record["file"]: record for record in manifest}
+        records = {os.path.basename(name): record for name, record in manifest.items()}
+
+    listed = [path for path in pdf_files if field in records.get(os.path.basename(path), {})]
+    unlisted = [path for path in pdf_files if path not in listed]
+    listed.sort(key=lambda path: records[os.path.basename(path)][field], reverse=descending)
+    unlisted.sort(key=lambda path: (os.path.getmtime(path), path))
+    return listed + unlisted
+
+class BudgetScheduler:
+    """
+    Admits manuscripts against a run-wide token and cost budget.
+
+    Manuscripts are offered in priority order. Each is admitted if its
+    estimated usage fits what is left of the budget, downgraded to a
+    cheaper model if only that fits, or deferred to a later run. Admitted
+    manuscripts reserve their estimate (the full max_tokens for the
+    completion) until they finish and their actual usage is settled, so
+    the budget is never overcommitted by requests in flight.
+    """
+
+    def __init__(self, model: str, max_tokens: int = None, max_cost: float = None, downgrade_model: str = None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            model (str): Model manuscripts are normally analyzed with
+            max_tokens (int, optional): Run-wide limit on prompt plus completion tokens
+            max_cost (float, optional): Run-wide limit in USD at list prices
+            downgrade_model (str, optional): Cheaper model for manuscripts that no longer fit
+                the budget with the normal one
+        """
+        if max_cost is not None:
+            # Fail before any work is done if a price is missing
+            estimate_cost(model, 0, 0)
+            if downgrade_model:
+                estimate_cost(downgrade_model, 0, 0)
+        self.model = model
+        self.max_tokens = max_tokens
+        self.max_cost = max_cost
+        self.downgrade_model = downgrade_model
+        self.used_tokens = 0
+        self.used_cost = 0.0
+        self.reserved = {}
+        self.decisions = {}
+        self._lock = threading.Lock()
+
+    def _cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        return estimate_cost(model, prompt_tokens, completion_tokens) if self.max_cost is not None else 0.0
+
+    def _fits(self, tokens: int, cost: float) -> bool:
+        reserved_tokens = sum(reservation[0] for reservation in self.reserved.values())
+        reserved_cost = sum(reservation[1] for reservation in self.reserved.values())
+        if self.max_tokens is not None and self.used_tokens + reserved_tokens + tokens > self.max_tokens:
+            return False
+        if self.max_cost is not None and self.used_cost + reserved_cost + cost > self.max_cost:
+            return False
+        return True
+
+    def admit(self, manuscript: str, estimate: Callable[[str], Tuple[int, int]]) -> Optional[str]:
+        """
+        Decide whether and with which model a manuscript is analyzed.
+
+        Args:
+            manuscript (str): Manuscript path
+            estimate (Callable[[str], Tuple[int, int]]): Estimated (prompt, completion) tokens of the
+                manuscript's requests for a given model
+
+        Returns:
+            Optional[str]: Model to use, or None if the manuscript is deferred
+        """
+        models = [self.model] + ([self.downgrade_model] if self.downgrade_model else [])
+        with self._lock:
+            for model in models:
+                prompt_tokens, completion_tokens = estimate(model)
+                tokens = prompt_tokens + completion_tokens
+                cost = self._cost(model, prompt_tokens, completion_tokens)
+                if self._fits(tokens, cost):
+                    self.reserved[manuscript] = (tokens, cost)
+                    self.decisions[manuscript] = "admitted" if model == self.model else "downgraded"
+                    return model
+            self.decisions[manuscript] = "deferred"
+            return None
+
+    def model_for(self, manuscript: str) -> str:
+        """Model a manuscript was admitted with."""
+        return self.downgrade_model if self.decisions.get(manuscript) == "downgraded" else self.model
+
+    def settle(self, manuscript: str, prompt_tokens: int = None, completion_tokens: int = None) -> None:
+        """
+        Replace a manuscript's reservation with its actual usage.
+
+        Args:
+            manuscript (str): Manuscript path
+            prompt_tokens (int, optional): Prompt tokens the API reported; if the API did not
+                report usage, the reserved estimate is charged instead
+            completion_tokens (int, optional): Completion tokens the API reported
+        """
+        with self._lock:
+            reservation = self.reserved.pop(manuscript, None)
+            if reservation is None:
+                return
+            if prompt_tokens is None:
+                self.used_tokens += reservation[0]
+                self.used_cost += reservation[1]
+                return
+            self.used_tokens += prompt_tokens + (completion_tokens or 0)
+            self.used_cost += self._cost(self.model_for(manuscript), prompt_tokens, completion_tokens or 0)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Budget use of the run so far.
+
+        Returns:
+            Dict[str, Any]: Manuscript counts by decision, deferred manuscripts, and used and
+                still reserved tokens and cost
+        """
+        with self._lock:
+            counts = {decision: 0 for decision in ("admitted", "downgraded", "deferred")}
+            for decision in self.decisions.values():
+                counts[decision] += 1
+            return dict(
+                counts,
+                deferred_manuscripts=[path for path, decision in self.decisions.items() if decision == "deferred"],
+                used_tokens=self.used_tokens,
+                used_cost=round(self.used_cost, 4),
+                reserved_tokens=sum(reservation[0] for reservation in self.reserved.values()),
+                reserved_cost=round(sum(reservation[1] for reservation in self.reserved.values()), 4)
+            )
+
+def admit_manuscript(scheduler: BudgetScheduler, checkers: Dict[str, Any], pdf_path: str, prepared: Any, task: Any,
+                     telemetry: Telemetry) -> bool:
+    """
+    Admit a parsed manuscript against the run budget.
+
+    The estimate is based on the requests of a single (non fan-out) call.
+
+    Args:
+        scheduler (BudgetScheduler): The run budget
+        checkers (Dict[str, Any]): Checker for each model the scheduler may choose; its
+            batch_requests(prepared, task) returns the manuscript's requests first
+        pdf_path (str): Path to the PDF file
+        prepared (Any): Output of the checker's prepare_manuscript
+        task (Any): What the manuscript is checked against (requirements or review criteria)
+        telemetry (Telemetry): Records deferred manuscripts
+
+    Returns:
+        bool: Whether the manuscript is processed in this run
+    """
+    model = scheduler.admit(pdf_path, lambda model: estimate_requests(checkers[model].batch_requests(prepared, task)[0]))
+    if model is None:
+        print(f"Deferred {pdf_path}: it does not fit the remaining run budget\n")
+        telemetry.finish(pdf_path, "deferred")
+        return False
+    if model != scheduler.model:
+        print(f"Processing {pdf_path} with {model} to stay within the run budget")
+    return True
+
+def settle_manuscript(scheduler: BudgetScheduler, pdf_path: str, record: Dict[str, Any]) -> None:
+    """
+    Charge a processed manuscript's token usage to the run budget.
+
+    Args:
+        scheduler (BudgetScheduler): The run budget
+        pdf_path (str): Path to the PDF file
+        record (Dict[str, Any]): The manuscript's telemetry record
+    """
+    if record["api_calls"] and not record["prompt_tokens"]:
+        # The API did not report usage; charge the estimate
+        scheduler.settle(pdf_path)
+    else:
+        scheduler.settle(pdf_path, record["prompt_tokens"], record["completion_tokens"])
@@ -0,0 +1,175 @@
+import json
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List
+from result_cache import file_sha256
+
+# Manuscript states, in the order a manuscript normally goes through them
+PENDING = "pending"
+PARSED = "parsed"
+SUBMITTED = "submitted"
+DONE = "done"
+FAILED = "failed"
+DEFERRED = "deferred"
+
+# Telemetry outcome -> manuscript state; batch submissions are marked submitted once the job exists
+_OUTCOMES = {"ok": DONE, "cached": DONE, "error": FAILED, "deferred": DEFERRED, "submitted": PARSED}
+
+class RunManifest:
+    """
+    Append-only checkpoint of each manuscript's progress through a run.
+
+    Every state change is appended as one JSON line and flushed, so the
+    manifest survives the process being killed at any point; on loading,
+    the last line of each manuscript wins and a line cut off by a crash is
+    ignored. Entries carry the PDF's SHA-256, so a manuscript that changed
+    since it was done is processed again, and the number of attempts, so
+    manuscripts that keep failing can be given up on.
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        """
+        Open the manifest.
+
+        Args:
+            path (str): JSONL file of the manifest
+            resume (bool): Continue the run recorded in the file; otherwise a new run starts
+                and the file is overwritten
+        """
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._hashes: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        if resume and os.path.exists(path):
+            with open(path, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self.entries[entry["pdf_path"]] = entry
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, 'a' if resume else 'w')
+        if self._file.tell() > 0:
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    # End the line cut off by a crash so the next entry starts on its own line
+                    self._file.write("\n")
+
+    def _sha256(self, pdf_path: str) -> str:
+        """SHA-256 of a PDF, computed once per run; None if the file is gone."""
+        if pdf_path not in self._hashes:
+            try:
+                self._hashes[pdf_path] = file_sha256(pdf_path)
+            except OSError:
+                return None
+        return self._hashes[pdf_path]
+
+    def remaining(self, pdf_files: List[str], max_attempts: int = None) -> List[str]:
+        """
+        Select the manuscripts a resumed run still has to process.
+
+        Manuscripts that are done and unchanged, or submitted in a batch job
+        that has not been collected, are skipped, as are failed ones that
+        already used max_attempts. Everything else (never started,
+        interrupted, deferred, failed or changed) is processed.
+
+        Args:
+            pdf_files (List[str]): PDF file paths of the run, in processing order
+            max_attempts (int, optional): Attempts after which failed manuscripts are not retried
+
+        Returns:
+            List[str]: The PDF file paths to process, in the same order
+        """
+        remaining = []
+        for pdf_path in pdf_files:
+            entry = self.entries.get(pdf_path)
+            if entry is None:
+                remaining.append(pdf_path)
+            elif entry["state"] in (DONE, SUBMITTED) and entry.get("sha256") == self._sha256(pdf_path):
+                continue
+            elif entry["state"] == FAILED and max_attempts and entry.get("attempts", 0) >= max_attempts:
+                print(f"Skipping {pdf_path}: failed {entry['attempts']} times, last with: {entry.get('error')}")
+            else:
+                remaining.append(pdf_path)
+        return remaining
+
+    def mark(self, pdf_path: str, state: str, **fields) -> None:
+        """
+        Record a manuscript's new state.
+
+        An attempt is counted when a manuscript is parsed or submitted, or
+        when it fails or is done without either being recorded first.
+
+        Args:
+            pdf_path (str): Manuscript path
+            state (str): New state, one of pending, parsed, submitted, done, failed, deferred
+            **fields: Extra values such as the error message or the batch job directory
+        """
+        with self._lock:
+            previous = self.entries.get(pdf_path, {})
+            attempts = previous.get("attempts", 0)
+            if state in (PARSED, SUBMITTED) or \
+                    (state in (DONE, FAILED) and previous.get("state") not in (PARSED, SUBMITTED)):
+                attempts += 1
+            entry = dict(
+                fields,
+                pdf_path=pdf_path,
+                state=state,
+                sha256=self._sha256(pdf_path),
+                attempts=attempts,
+                timestamp=time.strftime("%Y-%m-%dT%H:%M:%S")
+            )
+            self.entries[pdf_path] = entry
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+
+    def start(self, pdf_files: List[str]) -> None:
+        """
+        Record the manuscripts a run is about to process as pending.
+
+        Args:
+            pdf_files (List[str]): PDF file paths
+        """
+        for pdf_path in pdf_files:
+            entry = self.entries.get(pdf_path)
+            if entry is not None and entry.get("sha256") != self._sha256(pdf_path):
+                # A changed manuscript starts over, attempts included
+                del self.entries[pdf_path]
+            self.mark(pdf_path, PENDING)
+
+    def record(self, record: Dict[str, Any]) -> None:
+        """
+        Record a manuscript's outcome from its telemetry record.
+
+        Pass this as Telemetry's on_finish callback.
+
+        Args:
+            record (Dict[str, Any]): Telemetry record with "manuscript", "status" and, for
+                failures, "error"
+        """
+        state = _OUTCOMES.get(record["status"])
+        if state is None:
+            return
+        if state == FAILED:
+            self.mark(record["manuscript"], state, error=record.get("error"))
+        else:
+            self.mark(record["manuscript"], state)
+
+    def summary(self) -> Dict[str, int]:
+        """
+        Count the manuscripts in each state.
+
+        Returns:
+            Dict[str, int]: Number of manuscripts per state
+        """
+        with self._lock:
+            return dict(Counter(entry["state"] for entry in self.entries.values()))
+
+    def close(self) -> None:
+        """Close the manifest file."""
+        self._file.close()
@@ -0,0 +1,443 @@
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from telemetry import count
+
+# Model name prefixes that accept response_format={"type": "json_schema", ...}
+JSON_SCHEMA_MODELS = ("gpt-4o", "gpt-4.1", "gpt-5", "o1", "o3", "o4")
+# Early snapshots of those families without it
+_NO_JSON_SCHEMA = ("gpt-4o-2024-05-13", "o1-preview", "o1-mini")
+
+RECOMMENDATIONS = ("accept", "revise", "reject")
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_TRAILING_STRING = re.compile(r'"(?:[^"\\]|\\.)*"$')
+_TRAILING_SCALAR = re.compile(r'[-+0-9.eE]+$|[A-Za-z]+$')
+
+def supports_json_schema(model: str) -> bool:
+    """
+    Decide whether a model supports schema-constrained structured outputs.
+
+    Args:
+        model (str): Model name
+
+    Returns:
+        bool: True if requests may set a json_schema response format
+    """
+    return model.startswith(JSON_SCHEMA_MODELS) and not model.startswith(_NO_JSON_SCHEMA)
+
+def response_format(name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the response_format request member for a strict JSON schema.
+
+    Args:
+        name (str): Schema name (letters, digits, underscores and dashes)
+        schema (Dict[str, Any]): JSON schema of the response
+
+    Returns:
+        Dict[str, Any]: Value for the response_format member
+    """
+    return {"type": "json_schema", "json_schema": {"name": name, "strict": True, "schema": schema}}
+
+def _object(properties: Dict[str, Any]) -> Dict[str, Any]:
+    # Strict mode needs every property required and no others allowed
+    return {"type": "object", "properties": properties, "required": list(properties), "additionalProperties": False}
+
+def requirements_schema(requirements: List[str]) -> Dict[str, Any]:
+    """
+    JSON schema of a requirements analysis.
+
+    Args:
+        requirements (List[str]): Requirements being checked
+
+    Returns:
+        Dict[str, Any]: Schema of {"requirements_analysis": [...], "desk_rejection_recommendation": {...}}
+    """
+    return _object({
+        "requirements_analysis": {
+            "type": "array",
+            "items": _object({
+                "requirement": {"type": "string", "enum": list(requirements)},
+                "is_met": {"type": "boolean"},
+                "evidence": {"type": "string"},
+                "explanation": {"type": "string"}
+            })
+        },
+        "desk_rejection_recommendation": _object({
+            "should_reject": {"type": "boolean"},
+            "justification": {"type": "string"}
+        })
+    })
+
+def review_schema(review_criteria: Dict[str, str]) -> Dict[str, Any]:
+    """
+    JSON schema of a peer review.
+
+    Args:
+        review_criteria (Dict[str, str]): Review criteria and their descriptions
+
+    Returns:
+        Dict[str, Any]: Schema with one required assessment per criterion
+    """
+    assessment = _object({
+        "score": {"type": "number"},
+        "feedback": {"type": "string"},
+        "examples": {"type": "array", "items": {"type": "string"}},
+        "suggestions": {"type": "array", "items": {"type": "string"}}
+    })
+    return _object({
+        "overall_assessment": _object({"score": {"type": "number"}, "summary": {"type": "string"}}),
+        "criteria_assessments": _object({criterion: assessment for criterion in review_criteria}),
+        "recommendation": {"type": "string", "enum": list(RECOMMENDATIONS)},
+        "confidence": {"type": "number"}
+    })
+
+def _drop_incomplete_tail(text: str, container: str) -> str:
+    """Remove a member or element that was cut off at the end of truncated JSON."""
+    while True:
+        text = text.rstrip()
+        if text.endswith(","):
+            text = text[:-1]
+            continue
+        if text.endswith(":"):
+            # A key without its value
+            text = _TRAILING_STRING.sub("", text[:-1].rstrip())
+            continue
+        scalar = _TRAILING_SCALAR.search(text)
+        if scalar and scalar.group() not in ("true", "false", "null"):
+            try:
+                json.loads(scalar.group())
+            except json.JSONDecodeError:
+                text = text[:scalar.start()]
+                continue
+        key = _TRAILING_STRING.search(text)
+        if container == "{" and key and text[:key.start()].rstrip()[-1:] in ("{", ","):
+            # A key that never got its colon
+            text = text[:key.start()]
+            continue
+        return text
+
+def repair_json(text: str) -> Any:
+    """
+    Parse a JSON object from a model response, repairing common defects.
+
+    Handles Markdown code fences and prose around the object, trailing
+    commas, Python literals (True/False/None), raw control characters in
+    strings and output that was cut off mid-object, whose incomplete last
+    member is dropped and whose open brackets are closed.
+
+    Args:
+        text (str): Response content
+
+    Returns:
+        Any: The parsed object
+
+    Raises:
+        ValueError: If no JSON object can be recovered
+    """
+    try:
+        return json.loads(text.strip(), strict=False)
+    except json.JSONDecodeError:
+        pass
+    start = text.find("{")
+    if start < 0:
+        raise ValueError("No JSON object in the response")
+
+    out, stack = [], []
+    in_string = escape = False
+    i = start
+    while i < len(text):
+        c = text[i]
+        if in_string:
+            out.append(c)
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+            i += 1
+            continue
+        if c == '"':
+            in_string = True
+        elif c in "{[":
+            stack.append(c)
+        elif c in "}]":
+            # Drop a trailing comma before the closing bracket
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            if not stack or {"{": "}", "[": "]"}[stack.pop()] != c:
+                raise ValueError("Mismatched brackets in the response")
+            out.append(c)
+            if not stack:
+                # Text after the top-level object, e.g. a closing code fence, is ignored
+                break
+            i += 1
+            continue
+        elif c.isalpha():
+            end = i
+            while end < len(text) and text[end].isalpha():
+                end += 1
+            word = text[i:end]
+            out.append(_LITERALS.get(word, word))
+            i = end
+            continue
+        out.append(c)
+        i += 1
+
+    repaired = "".join(out)
+    if stack:
+        # The response was cut off: close the open string and containers
+        if in_string:
+            repaired = (repaired[:-1] if escape else repaired) + '"'
+        repaired = _drop_incomplete_tail(repaired, stack[-1])
+        repaired += "".join({"{": "}", "[": "]"}[c] for c in reversed(stack))
+    try:
+        return json.loads(repaired, strict=False)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Unrepairable JSON in the response: {str(e)}")
+
+def parse_model_json(response: str, log_chars: int = 200) -> Any:
+    """
+    Parse a model response with repair_json, reporting a failure once.
+
+    Every unparseable response is counted as a json_parse_failure and
+    logged with the start of its text, whether or not the caller goes on
+    without it.
+
+    Args:
+        response (str): Response content
+        log_chars (int): Characters of an unparseable response shown in the warning
+
+    Returns:
+        Any: The parsed object
+
+    Raises:
+        ValueError: If no JSON object can be recovered
+    """
+    try:
+        return repair_json(response)
+    except ValueError as e:
+        count("json_parse_failures")
+        # A response can be as long as max_tokens; show only its start
+        snippet = response[:log_chars] if response else response
+        print(f"Warning: failed to parse the response as JSON: {str(e)} (response starts: {snippet!r})")
+        raise ValueError("Failed to parse OpenAI response as JSON") from e
+
+def _as_bool(value: Any) -> Optional[bool]:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        return {"true": True, "yes": True, "met": True,
+                "false": False, "no": False, "not met": False}.get(value.strip().lower())
+    return None
+
+def _as_text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return "; ".join(str(item) for item in value)
+    return str(value)
+
+def _as_list(value: Any) -> List[str]:
+    if value is None or value == "":
+        return []
+    if isinstance(value, list):
+        return [_as_text(item) for item in value]
+    return [_as_text(value)]
+
+def _as_number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        # e.g. "4", "4/5" or "85%"
+        match = re.match(r'\s*(-?\d+(?:\.\d+)?)', value)
+        if match:
+            number = float(match.group(1))
+            return number / 100 if value.strip().endswith("%") else number
+    return None
+
+def _requirement_entry(entry: Any, requirement: str) -> Optional[Dict[str, Any]]:
+    if not isinstance(entry, dict):
+        return None
+    is_met = _as_bool(entry.get("is_met"))
+    if is_met is None:
+        return None
+    return dict(entry, requirement=requirement, is_met=is_met, evidence=_as_text(entry.get("evidence")),
+                explanation=_as_text(entry.get("explanation")))
+
+def validate_requirements(result: Any, requirements: List[str]) -> Tuple[Dict[str, Any], List[int]]:
+    """
+    Normalize a requirements analysis and find the requirements it lacks.
+
+    Entries are matched to requirements by their text, falling back to
+    their position, and coerced to the expected types where the intent is
+    clear ("yes" for true, a list of quotes for the evidence string).
+
+    Args:
+        result (Any): Parsed response
+        requirements (List[str]): Requirements that were checked
+
+    Returns:
+        Tuple[Dict[str, Any], List[int]]: The analysis with one entry per requirement (None where
+            it is missing or invalid), and the indices of those requirements
+    """
+    result = result if isinstance(result, dict) else {}
+    entries = result.get("requirements_analysis")
+    entries = entries if isinstance(entries, list) else []
+    by_text = {}
+    for entry in entries:
+        if isinstance(entry, dict) and isinstance(entry.get("requirement"), str):
+            by_text.setdefault(entry["requirement"].strip(), entry)
+    asked = {requirement.strip() for requirement in requirements}
+
+    analysis = []
+    for i, requirement in enumerate(requirements):
+        entry = by_text.get(requirement.strip())
+        if entry is None and i < len(entries):
+            # Fall back to the position unless that entry answers another requirement
+            named = entries[i].get("requirement") if isinstance(entries[i], dict) else None
+            if not (isinstance(named, str) and named.strip() in asked):
+                entry = entries[i]
+        analysis.append(_requirement_entry(entry, requirement))
+
+    recommendation = result.get("desk_rejection_recommendation")
+    should_reject = _as_bool(recommendation.get("should_reject")) if isinstance(recommendation, dict) else None
+    return {
+        "requirements_analysis": analysis,
+        "desk_rejection_recommendation": None if should_reject is None else {
+            "should_reject": should_reject,
+            "justification": _as_text(recommendation.get("justification"))
+        }
+    }, [i for i, entry in enumerate(analysis) if entry is None]
+
+def fill_requirements(result: Dict[str, Any], requirements: List[str], missing: List[int],
+                      follow_up: Any = None) -> Tuple[Dict[str, Any], List[int]]:
+    """
+    Complete a validated requirements analysis.
+
+    Missing entries are taken from the answer to a follow-up request
+    about just those requirements; any still missing are marked as not
+    assessed, and a missing recommendation is derived from the entries.
+
+    Args:
+        result (Dict[str, Any]): First result of validate_requirements
+        requirements (List[str]): Requirements that were checked
+        missing (List[int]): Indices of the missing requirements
+        follow_up (Any, optional): Parsed answer to the follow-up request, in the order of missing
+
+    Returns:
+        Tuple[Dict[str, Any], List[int]]: The complete analysis, and the indices still not assessed
+    """
+    analysis = list(result["requirements_analysis"])
+    if follow_up is not None:
+        answered, _ = validate_requirements(follow_up, [requirements[i] for i in missing])
+        for i, entry in zip(missing, answered["requirements_analysis"]):
+            analysis[i] = entry
+    still_missing = [i for i in missing if analysis[i] is None]
+    for i in still_missing:
+        analysis[i] = {"requirement": requirements[i], "is_met": False, "evidence": "",
+                       "explanation": "Not assessed: the model gave no valid answer for this requirement."}
+
+    recommendation = result["desk_rejection_recommendation"]
+    if recommendation is None and follow_up is not None:
+        recommendation = validate_requirements(follow_up, [])[0]["desk_rejection_recommendation"]
+    if recommendation is None:
+        unmet = [entry["requirement"] for entry in analysis if not entry["is_met"]]
+        recommendation = {
+            "should_reject": bool(unmet),
+            "justification": ("Requirements not met: " + "; ".join(unmet)) if unmet else "Every requirement is met."
+        }
+    return {"requirements_analysis": analysis, "desk_rejection_recommendation": recommendation}, still_missing
+
+def _criterion_entry(entry: Any) -> Optional[Dict[str, Any]]:
+    if not isinstance(entry, dict):
+        return None
+    score = _as_number(entry.get("score"))
+    if score is None or not 1 <= score <= 5 or not isinstance(entry.get("feedback"), str):
+        return None
+    return dict(entry, score=score, examples=_as_list(entry.get("examples")),
+                suggestions=_as_list(entry.get("suggestions")))
+
+def validate_review(result: Any, review_criteria: Dict[str, str]) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Normalize a peer review and find the criteria it lacks.
+
+    Assessments are matched to criteria by name, ignoring case and
+    surrounding whitespace, and coerced to the expected types where the
+    intent is clear ("4/5" for a score, "85%" for a confidence).
+
+    Args:
+        result (Any): Parsed response
+        review_criteria (Dict[str, str]): Review criteria and their descriptions
+
+    Returns:
+        Tuple[Dict[str, Any], List[str]]: The review with one assessment per criterion (None where
+            it is missing or invalid) and None for invalid top-level members, and the names of the
+            missing criteria
+    """
+    result = result if isinstance(result, dict) else {}
+    assessments = result.get("criteria_assessments")
+    assessments = assessments if isinstance(assessments, dict) else {}
+    by_name = {name.strip().lower(): entry for name, entry in assessments.items()}
+    criteria = {criterion: _criterion_entry(assessments.get(criterion, by_name.get(criterion.strip().lower())))
+                for criterion in review_criteria}
+
+    overall = result.get("overall_assessment")
+    overall_score = _as_number(overall.get("score")) if isinstance(overall, dict) else None
+    recommendation = str(result.get("recommendation", "")).strip().lower()
+    confidence = _as_number(result.get("confidence"))
+    if confidence is not None and 1 < confidence <= 100:
+        confidence = confidence / 100
+    return {
+        "overall_assessment": None if overall_score is None else dict(
+            overall, score=overall_score, summary=_as_text(overall.get("summary"))),
+        "criteria_assessments": criteria,
+        "recommendation": recommendation if recommendation in RECOMMENDATIONS else None,
+        "confidence": confidence if confidence is not None and 0 <= confidence <= 1 else None
+    }, [criterion for criterion, entry in criteria.items() if entry is None]
+
+def fill_review(result: Dict[str, Any], review_criteria: Dict[str, str], missing: List[str],
+                follow_up: Any = None) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Complete a validated peer review.
+
+    Missing assessments are taken from the answer to a follow-up request
+    about just those criteria, as are missing top-level members; criteria
+    still missing are marked as not assessed (score None), and other
+    gaps get neutral defaults.
+
+    Args:
+        result (Dict[str, Any]): First result of validate_review
+        review_criteria (Dict[str, str]): Review criteria and their descriptions
+        missing (List[str]): Names of the missing criteria
+        follow_up (Any, optional): Parsed answer to the follow-up request
+
+    Returns:
+        Tuple[Dict[str, Any], List[str]]: The complete review, and the criteria still not assessed
+    """
+    review = dict(result, criteria_assessments=dict(result["criteria_assessments"]))
+    if follow_up is not None:
+        answered, _ = validate_review(follow_up, {criterion: review_criteria[criterion] for criterion in missing})
+        review["criteria_assessments"].update(answered["criteria_assessments"])
+        for member in ("overall_assessment", "recommendation", "confidence"):
+            if review[member] is None:
+                review[member] = answered[member]
+    still_missing = [criterion for criterion in missing if review["criteria_assessments"][criterion] is None]
+    for criterion in still_missing:
+        review["criteria_assessments"][criterion] = {
+            "score": None, "feedback": "Not assessed: the model gave no valid answer for this criterion.",
+            "examples": [], "suggestions": []}
+
+    if review["overall_assessment"] is None:
+        scores = [entry["score"] for entry in review["criteria_assessments"].values() if entry["score"] is not None]
+        review["overall_assessment"] = {"score": round(sum(scores) / len(scores), 1) if scores else None,
+                                        "summary": ""}
+    if review["recommendation"] is None:
+        review["recommendation"] = "revise"
+    if review["confidence"] is None:
+        review["confidence"] = 0
+    return review, still_missing
@@ -0,0 +1,393 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+# Trace of the manuscript being processed by the current thread or task
+_current = contextvars.ContextVar("telemetry_trace", default=None)
+# Upper bounds (seconds) of the stage duration histogram buckets
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+# Span fields summed into the per-manuscript totals and the Prometheus counters
+_TOTALS = ("prompt_tokens", "completion_tokens", "cached_tokens", "retries")
+# Help texts of the Prometheus counters; trace counters without one get a generic text
+_COUNTER_HELP = {
+    "api_calls": "Chat completion calls.",
+    "retries": "Retried chat completion attempts.",
+    "cache_hits": "Results served from the result cache.",
+    "cache_misses": "Result cache lookups that missed.",
+    "parse_cache_hits": "Parsed documents loaded from the parse cache.",
+    "parse_cache_misses": "Parse cache lookups that missed.",
+    "follow_up_requests": "Follow-up calls for entries a response lacked.",
+    "json_parse_failures": "Responses that could not be parsed as JSON, even after repair."
+}
+
+class Trace:
+    """
+    Timed stages and counters of one manuscript.
+
+    Spans are appended from whichever thread runs a stage, so access is
+    locked. Start times are wall-clock timestamps, which lets spans
+    recorded in a parser process be merged into the parent's trace.
+    """
+
+    def __init__(self, manuscript: str):
+        self.manuscript = manuscript
+        self.started = time.time()
+        self.spans = []
+        self.counters = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float, at: float = None, **fields) -> None:
+        """
+        Record a finished stage.
+
+        Args:
+            stage (str): Stage name, e.g. "extract" or "api_call"
+            seconds (float): Duration
+            at (float, optional): Wall-clock start time; now minus the duration if omitted
+            **fields: Extra values such as token counts
+        """
+        span = dict(fields, stage=stage, at=at if at is not None else time.time() - seconds, seconds=seconds)
+        with self._lock:
+            self.spans.append(span)
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += n
+
+    def merge(self, spans: List[Dict[str, Any]], counters: Dict[str, int]) -> None:
+        """Add spans and counters recorded elsewhere, e.g. in a worker process."""
+        with self._lock:
+            self.spans.extend(spans)
+            self.counters.update(counters)
+
+    def to_dict(self, status: str) -> Dict[str, Any]:
+        """
+        Summarize the trace as one JSON record.
+
+        Args:
+            status (str): Outcome, e.g. "ok", "cached" or "error"
+
+        Returns:
+            Dict[str, Any]: Totals per stage, token and retry totals, counters and the spans
+                with start times relative to the start of the trace
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span["at"])
+            counters = dict(self.counters)
+        started = min([self.started] + [span["at"] for span in spans])
+        stages = defaultdict(lambda: {"seconds": 0.0, "count": 0})
+        for span in spans:
+            stages[span["stage"]]["seconds"] += span["seconds"]
+            stages[span["stage"]]["count"] += 1
+        record = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(started)),
+            "manuscript": self.manuscript,
+            "status": status,
+            "seconds": round(time.time() - started, 6),
+            "stages": {stage: {"seconds": round(total["seconds"], 6), "count": total["count"]}
+                       for stage, total in stages.items()},
+            "api_calls": stages["api_call"]["count"] if "api_call" in stages else 0
+        }
+        for name in _TOTALS:
+            record[name] = sum(span.get(name, 0) for span in spans)
+        record.update(counters)
+        record["spans"] = [
+            dict(span, at=round(span["at"] - started, 6), seconds=round(span["seconds"], 6)) for span in spans
+        ]
+        return record
+
+@contextmanager
+def span(stage: str, **fields) -> Iterator[Dict[str, Any]]:
+    """
+    Time a stage of the current manuscript.
+
+    Does nothing beyond timing when no trace is active. The yielded dict
+    can be filled with values known only at the end (token counts); an
+    exception marks the span with its type.
+
+    Args:
+        stage (str): Stage name
+        **fields: Initial span values
+
+    Yields:
+        Dict[str, Any]: Span values recorded when the block exits
+    """
+    at = time.time()
+    start = time.perf_counter()
+    try:
+        yield fields
+    except BaseException as e:
+        fields["error"] = type(e).__name__
+        raise
+    finally:
+        record(stage, time.perf_counter() - start, at=at, **fields)
+
+def usage_fields(usage: Any) -> Dict[str, int]:
+    """
+    Token counts of a chat completion's usage for an api_call span.
+
+    Args:
+        usage (Any): The response's usage object
+
+    Returns:
+        Dict[str, int]: Prompt and completion tokens, and the prompt tokens served from the
+            provider's prompt cache (0 where it does not report them)
+    """
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+        "cached_tokens": getattr(details, "cached_tokens", None) or 0
+    }
+
+def record(stage: str, seconds: float, at: float = None, **fields) -> None:
+    """Record a stage timed by the caller on the current trace, if any."""
+    trace = _current.get()
+    if trace is not None:
+        trace.add(stage, seconds, at, **fields)
+
+def count(name: str, n: int = 1) -> None:
+    """Add to a counter (e.g. cache_hits) of the current trace, if any."""
+    trace = _current.get()
+    if trace is not None:
+        trace.count(name, n)
+
+@contextmanager
+def activate(trace: Trace) -> Iterator[Trace]:
+    """Make a trace current for the code in the block."""
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+
+def in_context(function: Callable) -> Callable:
+    """
+    Bind a function to the caller's trace so it can run in a pool thread.
+
+    Args:
+        function (Callable): Function submitted to a ThreadPoolExecutor
+
+    Returns:
+        Callable: Wrapper that runs the function in a copy of the current context
+    """
+    context = contextvars.copy_context()
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        return context.copy().run(function, *args, **kwargs)
+    return wrapper
+
+def call_traced(function: Callable, *args) -> Tuple[Any, List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Call a function under a fresh trace and return what it recorded.
+
+    Module-level so that process pools can pickle it.
+
+    Args:
+        function (Callable): Picklable callable, e.g. a manuscript preparation function
+        *args: Its arguments
+
+    Returns:
+        Tuple[Any, List[Dict[str, Any]], Dict[str, int]]: The result, the spans and the counters
+    """
+    trace = Trace("")
+    with activate(trace):
+        result = function(*args)
+    return result, trace.spans, dict(trace.counters)
+
+class Telemetry:
+    """
+    Collects the traces of a run and exports them.
+
+    Each finished manuscript is appended as one JSON line to the trace
+    file and folded into run-wide aggregates, which are exposed in the
+    Prometheus text format as a file (rewritten after every manuscript,
+    e.g. for a node exporter textfile collector) and/or over HTTP.
+    """
+
+    def __init__(self, tool: str, jsonl_path: str = None, metrics_path: str = None,
+                 on_finish: Callable[[Dict[str, Any]], None] = None):
+        """
+        Initialize the collector.
+
+        Args:
+            tool (str): Value of the "tool" label on every metric
+            jsonl_path (str, optional): File the per-manuscript records are appended to
+            metrics_path (str, optional): File the Prometheus metrics are written to
+            on_finish (Callable[[Dict[str, Any]], None], optional): Called with each finished
+                manuscript's record, e.g. to checkpoint the run
+        """
+        self.tool = tool
+        self.jsonl_path = jsonl_path
+        self.metrics_path = metrics_path
+        self.on_finish = on_finish
+        self._traces = {}
+        self._lock = threading.Lock()
+        self._buckets = defaultdict(lambda: [0] * len(STAGE_BUCKETS))
+        self._stage_sum = Counter()
+        self._stage_count = Counter()
+        self._totals = Counter()
+        self._manuscripts = Counter()
+        self._server = None
+
+    def trace(self, manuscript: str) -> Trace:
+        """Trace of a manuscript, created on first use."""
+        with self._lock:
+            if manuscript not in self._traces:
+                self._traces[manuscript] = Trace(manuscript)
+            return self._traces[manuscript]
+
+    @contextmanager
+    def manuscript(self, manuscript: str) -> Iterator[Trace]:
+        """
+        Make a manuscript's trace current for the code in the block.
+
+        Args:
+            manuscript (str): Manuscript path
+
+        Yields:
+            Trace: The manuscript's trace
+        """
+        with activate(self.trace(manuscript)) as trace:
+            yield trace
+
+    def finish(self, manuscript: str, status: str = "ok", error: str = None) -> Dict[str, Any]:
+        """
+        Close a manuscript's trace, write its record and update the metrics.
+
+        Args:
+            manuscript (str): Manuscript path
+            status (str): Outcome, e.g. "ok", "cached" or "error"
+            error (str, optional): Error message of a failed manuscript
+
+        Returns:
+            Dict[str, Any]: The record; an empty trace is recorded if none was open
+        """
+        with self._lock:
+            trace = self._traces.pop(manuscript, None) or Trace(manuscript)
+        record = dict(trace.to_dict(status), tool=self.tool)
+        if error is not None:
+            record["error"] = error
+
+        with self._lock:
+            for span in record["spans"]:
+                stage = span["stage"]
+                self._stage_sum[stage] += span["seconds"]
+                self._stage_count[stage] += 1
+                buckets = self._buckets[stage]
+                for i, bound in enumerate(STAGE_BUCKETS):
+                    if span["seconds"] <= bound:
+                        buckets[i] += 1
+            for name in _TOTALS + ("api_calls",):
+                self._totals[name] += record[name]
+            for name in trace.counters:
+                self._totals[name] += record[name]
+            self._manuscripts[status] += 1
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a") as f:
+                    f.write(json.dumps(record) + "\n")
+
+        if self.metrics_path:
+            self.write_metrics(self.metrics_path)
+        if self.on_finish is not None:
+            self.on_finish(record)
+        return record
+
+    def prometheus(self) -> str:
+        """
+        Render the run-wide metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: Stage duration histograms, token, API call, retry and cache counters,
+                and finished manuscripts by status
+        """
+        tool = f'tool="{self.tool}"'
+        lines = [
+            "# HELP rigorous_stage_duration_seconds Duration of manuscript processing stages.",
+            "# TYPE rigorous_stage_duration_seconds histogram"
+        ]
+        with self._lock:
+            for stage in sorted(self._stage_count):
+                labels = f'{tool},stage="{stage}"'
+                for bound, n in zip(STAGE_BUCKETS, self._buckets[stage]):
+                    lines.append(f'rigorous_stage_duration_seconds_bucket{{{labels},le="{bound:g}"}} {n}')
+                lines.append(f'rigorous_stage_duration_seconds_bucket{{{labels},le="+Inf"}} {self._stage_count[stage]}')
+                lines.append(f'rigorous_stage_duration_seconds_sum{{{labels}}} {self._stage_sum[stage]:.6f}')
+                lines.append(f'rigorous_stage_duration_seconds_count{{{labels}}} {self._stage_count[stage]}')
+
+            lines += [
+                "# HELP rigorous_tokens_total Tokens reported by the API; cached prompt tokens are part of prompt.",
+                "# TYPE rigorous_tokens_total counter",
+                f'rigorous_tokens_total{{{tool},kind="prompt"}} {self._totals["prompt_tokens"]}',
+                f'rigorous_tokens_total{{{tool},kind="completion"}} {self._totals["completion_tokens"]}',
+                f'rigorous_tokens_total{{{tool},kind="cached"}} {self._totals["cached_tokens"]}'
+            ]
+            counters = ["api_calls", "retries", "cache_hits", "cache_misses"]
+            counters += sorted(name for name in self._totals if name not in counters and name not in _TOTALS)
+            for name in counters:
+                help_text = _COUNTER_HELP.get(name, f"Count of {name.replace('_', ' ')}.")
+                lines += [
+                    f"# HELP rigorous_{name}_total {help_text}",
+                    f"# TYPE rigorous_{name}_total counter",
+                    f"rigorous_{name}_total{{{tool}}} {self._totals[name]}"
+                ]
+            lines += [
+                "# HELP rigorous_manuscripts_total Finished manuscripts by outcome.",
+                "# TYPE rigorous_manuscripts_total counter"
+            ]
+            lines.extend(f'rigorous_manuscripts_total{{{tool},status="{status}"}} {n}'
+                         for status, n in sorted(self._manuscripts.items()))
+        return "\n".join(lines) + "\n"
+
+    def write_metrics(self, path: str) -> None:
+        """Write the Prometheus metrics to a file, replacing it atomically."""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as f:
+            f.write(self.prometheus())
+        os.replace(temp_path, path)
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> None:
+        """
+        Serve the Prometheus metrics at /metrics from a background thread.
+
+        Args:
+            port (int): Port to listen on
+            host (str): Interface to bind
+        """
+        telemetry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                payload = telemetry.prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        """Write the final metrics file and stop the metrics server."""
+        if self.metrics_path:
+            self.write_metrics(self.metrics_path)
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
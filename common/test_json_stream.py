@@ -0,0 +1,53 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from json_stream import JSONStreamParser
+
+ANALYSIS = {
+    "requirements_analysis": [
+        {"requirement": "Word limit", "is_met": True, "evidence": "3,000 words", "explanation": "Under the limit"},
+        {"requirement": "Data \"availability\"", "is_met": False, "evidence": "{none} [found], here",
+         "explanation": "Missing"}
+    ],
+    "desk_rejection_recommendation": {"should_reject": False, "justification": "Fine."}
+}
+
+def feed_all(parser, text, size):
+    completed = []
+    for i in range(0, len(text), size):
+        completed.extend(parser.feed(text[i:i + size]))
+    return completed
+
+def test_array_entries_are_reported_in_order_for_any_piece_size():
+    text = json.dumps(ANALYSIS, indent=2)
+    for size in (1, 3, 7, len(text)):
+        completed = feed_all(JSONStreamParser("requirements_analysis"), text, size)
+        assert completed == list(enumerate(ANALYSIS["requirements_analysis"]))
+
+def test_entry_is_reported_before_the_document_ends():
+    text = json.dumps(ANALYSIS)
+    first_end = text.index("}") + 1
+    parser = JSONStreamParser("requirements_analysis")
+    # The first entry is complete once the comma after it arrives
+    assert parser.feed(text[:first_end + 1]) == [(0, ANALYSIS["requirements_analysis"][0])]
+    assert parser.feed(text[first_end + 1:]) == [(1, ANALYSIS["requirements_analysis"][1])]
+
+def test_object_members_are_reported_by_name():
+    review = {
+        "overall_assessment": {"score": 4, "summary": "Good"},
+        "criteria_assessments": {"clarity": {"score": 4, "feedback": "Clear"}, "novelty": {"score": 2, "feedback": "Thin"}},
+        "recommendation": "revise"
+    }
+    completed = feed_all(JSONStreamParser("criteria_assessments"), json.dumps(review), 5)
+    assert completed == list(review["criteria_assessments"].items())
+
+def test_code_fence_and_other_members_are_ignored():
+    text = "```json\n" + json.dumps({"summary": {"requirements_analysis": [1]}, "requirements_analysis": [2, 3]}) + "\n```"
+    assert feed_all(JSONStreamParser("requirements_analysis"), text, 4) == [(0, 2), (1, 3)]
+
+def test_malformed_entry_is_skipped():
+    text = '{"requirements_analysis": [{"is_met": tru}, {"is_met": true}]}'
+    assert JSONStreamParser("requirements_analysis").feed(text) == [(1, {"is_met": True})]
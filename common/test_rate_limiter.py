@@ -0,0 +1,53 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from rate_limiter import RateLimiter, backoff_delay
+
+def test_limiter_serves_several_event_loops():
+    limiter = RateLimiter(tokens_per_minute=600)
+    asyncio.run(limiter.acquire(600))
+
+    async def acquire_concurrently():
+        # The bucket is empty, so each waiter holds the loop's lock while the next one queues on it
+        return await asyncio.gather(*(limiter.acquire(1) for _ in range(3)))
+
+    # Each asyncio.run() has a new event loop; a lock bound to the first must not be reused
+    assert sum(asyncio.run(acquire_concurrently())) > 0
+    assert sum(asyncio.run(acquire_concurrently())) > 0
+
+def test_pause_holds_back_callers():
+    limiter = RateLimiter()
+    limiter.pause_for(0.2)
+    waited = asyncio.run(limiter.acquire())
+    assert 0.1 < waited < 0.5
+
+def test_backoff_grows_within_its_window():
+    for attempt in range(4):
+        assert 0 <= backoff_delay(attempt, base_delay=1.0) <= 2 ** attempt
+    assert backoff_delay(10, base_delay=1.0, max_delay=5.0) <= 5.0
+
+def test_backoff_honors_retry_after_as_a_lower_bound():
+    for attempt in range(6):
+        delay = backoff_delay(attempt, base_delay=1.0, retry_after=3.0)
+        assert delay >= 3.0
+        assert delay <= max(3.0 + 1.0, 2 ** attempt)
+
+def test_blocking_wait_shares_the_budget_with_threads():
+    limiter = RateLimiter(requests_per_minute=6000, tokens_per_minute=600)
+    limiter.wait(600)
+
+    # 5 tokens refill at 10 tokens/second, so each of the two threads waits ~0.5s in turn
+    waits = []
+    threads = [threading.Thread(target=lambda: waits.append(limiter.wait(5))) for _ in range(2)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(0.3 < wait < 1.0 for wait in waits)
+    assert time.monotonic() - started > 0.8
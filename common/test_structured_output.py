@@ -0,0 +1,121 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from structured_output import (fill_requirements, fill_review, parse_model_json, repair_json, supports_json_schema,
+                               validate_requirements, validate_review)
+
+REQUIREMENTS = ["Manuscript must be under 5000 words", "Abstract must be structured"]
+CRITERIA = {"clarity": "Is the writing clear?", "novelty": "Is the work new?"}
+
+@pytest.mark.parametrize("model, supported", [
+    ("gpt-4o", True), ("gpt-4o-mini", True), ("gpt-4o-2024-05-13", False),
+    ("o1-mini", False), ("gpt-4", False), ("gpt-3.5-turbo", False),
+])
+def test_supports_json_schema(model, supported):
+    assert supports_json_schema(model) is supported
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": 1}', {"a": 1}),
+    ('```json\n{"a": [1, 2,],}\n```', {"a": [1, 2]}),
+    ('Here you go: {"ok": True, "none": None} Hope this helps.', {"ok": True, "none": None}),
+    ('{"a": "line\nbreak"}', {"a": "line\nbreak"}),
+    ('{"a": 1, "b": [1, 2', {"a": 1, "b": [1, 2]}),
+    ('{"a": 1, "b": "cut of', {"a": 1, "b": "cut of"}),
+    ('{"a": 1, "b":', {"a": 1}),
+    ('{"a": 1, "b', {"a": 1}),
+    ('{"a": 1, "b": 1.', {"a": 1}),
+])
+def test_repair_json(text, expected):
+    assert repair_json(text) == expected
+
+@pytest.mark.parametrize("text", ["no object here", '{"a": [1}'])
+def test_unrepairable_json_raises(text):
+    with pytest.raises(ValueError):
+        repair_json(text)
+
+def test_parse_failures_are_reported_once_with_the_start_of_the_response(capsys):
+    assert parse_model_json('{"a": 1') == {"a": 1}
+    assert capsys.readouterr().out == ""
+
+    with pytest.raises(ValueError, match="Failed to parse OpenAI response as JSON"):
+        parse_model_json("Sorry, I cannot help with that. " * 20, log_chars=10)
+    output = capsys.readouterr().out
+    assert output.count("Warning: failed to parse the response as JSON") == 1
+    assert "'Sorry, I c'" in output
+
+def test_requirements_are_matched_by_text_then_position():
+    result = {
+        "requirements_analysis": [
+            {"requirement": "Something else", "is_met": "not met", "explanation": "Too long"},
+            {"requirement": REQUIREMENTS[1], "is_met": "yes", "evidence": ["Background:", "Methods:"]},
+        ],
+        "desk_rejection_recommendation": {"should_reject": "no", "justification": "Minor."}
+    }
+
+    analysis, missing = validate_requirements(result, REQUIREMENTS)
+
+    first, second = analysis["requirements_analysis"]
+    assert missing == []
+    assert first["requirement"] == REQUIREMENTS[0] and first["is_met"] is False
+    assert second["is_met"] is True and second["evidence"] == "Background:; Methods:"
+    assert analysis["desk_rejection_recommendation"] == {"should_reject": False, "justification": "Minor."}
+
+def test_position_fallback_does_not_take_another_requirements_answer():
+    result = {"requirements_analysis": [{"requirement": REQUIREMENTS[1], "is_met": True}]}
+    analysis, missing = validate_requirements(result, REQUIREMENTS)
+    assert missing == [0]
+    assert analysis["desk_rejection_recommendation"] is None
+
+def test_missing_requirements_are_filled_from_the_follow_up_or_not_assessed():
+    analysis, missing = validate_requirements(
+        {"requirements_analysis": [None, {"requirement": REQUIREMENTS[1], "is_met": True}]}, REQUIREMENTS)
+    assert missing == [0]
+
+    filled, still_missing = fill_requirements(
+        analysis, REQUIREMENTS, missing,
+        {"requirements_analysis": [{"requirement": REQUIREMENTS[0], "is_met": False}],
+         "desk_rejection_recommendation": {"should_reject": True, "justification": "Too long."}})
+    assert still_missing == []
+    assert filled["requirements_analysis"][0]["is_met"] is False
+    assert filled["desk_rejection_recommendation"]["should_reject"] is True
+
+    unanswered, still_missing = fill_requirements(analysis, REQUIREMENTS, missing)
+    assert still_missing == [0]
+    assert unanswered["requirements_analysis"][0]["explanation"].startswith("Not assessed")
+    # Without a recommendation from the model, one is derived from the entries
+    assert unanswered["desk_rejection_recommendation"]["should_reject"] is True
+
+def test_review_scores_and_confidence_are_coerced():
+    result = {
+        "overall_assessment": {"score": "4/5", "summary": "Good"},
+        "criteria_assessments": {
+            " Clarity ": {"score": "4", "feedback": "Clear", "examples": "p. 2"},
+            "novelty": {"score": 7, "feedback": "Out of range"}
+        },
+        "recommendation": "Accept",
+        "confidence": "85%"
+    }
+
+    review, missing = validate_review(result, CRITERIA)
+
+    assert missing == ["novelty"]
+    assert review["criteria_assessments"]["clarity"]["score"] == 4.0
+    assert review["criteria_assessments"]["clarity"]["examples"] == ["p. 2"]
+    assert review["overall_assessment"]["score"] == 4.0
+    assert review["recommendation"] == "accept"
+    assert review["confidence"] == 0.85
+
+def test_unassessed_criteria_get_a_none_score_and_neutral_defaults():
+    review, missing = validate_review({"criteria_assessments": {"clarity": {"score": 3, "feedback": "OK"}}}, CRITERIA)
+
+    filled, still_missing = fill_review(review, CRITERIA, missing)
+
+    assert still_missing == ["novelty"]
+    assert filled["criteria_assessments"]["novelty"]["score"] is None
+    # The overall score is averaged over the assessed criteria only
+    assert filled["overall_assessment"]["score"] == 3.0
+    assert filled["recommendation"] == "revise"
+    assert filled["confidence"] == 0
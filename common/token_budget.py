@@ -0,0 +1,201 @@
+import re
+from typing import List, Tuple
+
+# Context window sizes in tokens for the models these tools use
+MODEL_CONTEXT_TOKENS = {
+    "gpt-3.5-turbo": 4096,
+    "gpt-3.5-turbo-16k": 16385,
+    "gpt-4": 8192,
+    "gpt-4-32k": 32768,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000
+}
+DEFAULT_CONTEXT_TOKENS = 4096
+# List prices in USD per million (prompt, completion) tokens
+MODEL_PRICES = {
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "gpt-3.5-turbo-16k": (3.00, 4.00),
+    "gpt-4": (30.00, 60.00),
+    "gpt-4-32k": (60.00, 120.00),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60)
+}
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+# Section headers written by the checkers, e.g. "Methods (1234 words):"
+_SECTION_HEADER = re.compile(r"^.+ \(\d+ words\):$", re.MULTILINE)
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of a text without a tokenizer.
+
+    Every punctuation mark counts as one token and every word as one token
+    plus one more per six further characters, which tracks BPE counts for
+    English academic prose closely enough for budgeting.
+
+    Args:
+        text (str): Text to estimate
+
+    Returns:
+        int: Estimated token count
+    """
+    tokens = 0
+    for match in _TOKEN_PATTERN.finditer(text):
+        tokens += 1 + (match.end() - match.start() - 1) // 6
+    return tokens
+
+def context_budget(model: str, completion_tokens: int, prompt_overhead: int, margin: float = 0.1) -> int:
+    """
+    Tokens available for manuscript text in a single request.
+
+    Args:
+        model (str): Model name
+        completion_tokens (int): Tokens reserved for the completion (max_tokens)
+        prompt_overhead (int): Estimated tokens of the prompt without the manuscript
+        margin (float): Fraction of the remaining budget held back for estimation error
+
+    Returns:
+        int: Manuscript token budget
+    """
+    context = MODEL_CONTEXT_TOKENS.get(model, DEFAULT_CONTEXT_TOKENS)
+    return max(1, int((context - completion_tokens - prompt_overhead) * (1 - margin)))
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """
+    Price of a number of tokens at the model's list price.
+
+    Args:
+        model (str): Model name
+        prompt_tokens (int): Prompt tokens
+        completion_tokens (int): Completion tokens
+
+    Returns:
+        float: Cost in USD
+    """
+    if model not in MODEL_PRICES:
+        raise Exception(f"No price known for model {model}")
+    prompt_price, completion_price = MODEL_PRICES[model]
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1e6
+
+def split_sections(text: str) -> Tuple[str, List[str]]:
+    """
+    Split structured manuscript text into its preamble and section blocks.
+
+    Args:
+        text (str): Structured text built by the checker
+
+    Returns:
+        Tuple[str, List[str]]: Text before the first section header, and one block per section
+    """
+    starts = [match.start() for match in _SECTION_HEADER.finditer(text)]
+    if not starts:
+        return "", [text]
+    blocks = [text[start:end] for start, end in zip(starts, starts[1:] + [len(text)])]
+    return text[:starts[0]], blocks
+
+def _split_oversized(block: str, budget: int) -> List[str]:
+    """
+    Split one section that does not fit the budget at sentence, then word, boundaries.
+
+    Args:
+        block (str): Section block, starting with its header line when it has one
+        budget (int): Token budget per piece
+
+    Returns:
+        List[str]: Pieces of the section, each repeating the header as "(continued)"
+    """
+    header, _, body = block.partition("\n")
+    if not _SECTION_HEADER.match(header):
+        header, body = "", block
+    continued = f"{header[:-1]} (continued):\n" if header else ""
+
+    sentences = []
+    for sentence in _SENTENCE_BREAK.split(body):
+        if estimate_tokens(sentence) <= budget:
+            sentences.append(sentence)
+            continue
+        # A single run-on "sentence" (tables, reference lists) is split by words
+        words = sentence.split()
+        step = max(1, budget // 2)
+        sentences.extend(" ".join(words[i:i + step]) for i in range(0, len(words), step))
+
+    pieces = []
+    current = []
+    current_tokens = estimate_tokens(header)
+    for sentence in sentences:
+        sentence_tokens = estimate_tokens(sentence)
+        if current and current_tokens + sentence_tokens > budget:
+            pieces.append(" ".join(current))
+            current = []
+            current_tokens = estimate_tokens(continued)
+        current.append(sentence)
+        current_tokens += sentence_tokens
+    if current:
+        pieces.append(" ".join(current))
+
+    return [(f"{header}\n" if i == 0 and header else continued) + piece + "\n" for i, piece in enumerate(pieces)]
+
+def chunk_text(text: str, budget: int) -> List[str]:
+    """
+    Pack structured manuscript text into chunks that each fit the token budget.
+
+    Whole sections are kept together where possible; a section that is
+    larger than the budget is split at sentence boundaries. The preamble
+    (document metadata) is repeated at the top of every chunk.
+
+    Args:
+        text (str): Structured text built by the checker
+        budget (int): Token budget per chunk, including the preamble
+
+    Returns:
+        List[str]: Chunks in document order
+    """
+    if estimate_tokens(text) <= budget:
+        return [text]
+
+    preamble, blocks = split_sections(text)
+    available = max(1, budget - estimate_tokens(preamble))
+
+    units = []
+    for block in blocks:
+        if estimate_tokens(block) <= available:
+            units.append(block)
+        else:
+            units.extend(_split_oversized(block, available))
+
+    chunks = []
+    current = []
+    current_tokens = 0
+    for unit in units:
+        unit_tokens = estimate_tokens(unit)
+        if current and current_tokens + unit_tokens > available:
+            chunks.append(preamble + "".join(current))
+            current = []
+            current_tokens = 0
+        current.append(unit)
+        current_tokens += unit_tokens
+    if current:
+        chunks.append(preamble + "".join(current))
+
+    return chunks
+
+def label_chunks(chunks: List[str]) -> List[str]:
+    """
+    Prefix each chunk with its position when a manuscript was split.
+
+    Args:
+        chunks (List[str]): Chunks from chunk_text
+
+    Returns:
+        List[str]: Chunks with a part note, unchanged if there is only one
+    """
+    if len(chunks) == 1:
+        return chunks
+    return [
+        f"[Part {i + 1} of {len(chunks)} of the manuscript. The other parts are analyzed separately, "
+        f"so judge only what this part shows.]\n{chunk}"
+        for i, chunk in enumerate(chunks)
+    ]
@@ -0,0 +1,140 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import time
+from typing import Dict, List, Tuple
+
+# inotify event mask: a file was written and closed, moved in or out, created or deleted
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+
+def _inotify(directory: str) -> int:
+    """
+    Open an inotify descriptor watching a directory.
+
+    Args:
+        directory (str): Directory to watch
+
+    Returns:
+        int: Non-blocking file descriptor, or None where inotify is not available
+    """
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    if libc.inotify_add_watch(fd, os.fsencode(directory), _WATCH_MASK) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+class FolderWatcher:
+    """
+    Reports new and changed files in a directory.
+
+    Uses inotify on Linux and falls back to polling elsewhere. Either way
+    inotify only wakes the watcher up: the directory is then rescanned and
+    files are compared by size and modification time, so nothing is missed
+    if events are dropped. A file is reported once it has not been written
+    to for settle_seconds, so half-copied PDFs are not picked up.
+    """
+
+    def __init__(self, directory: str, suffix: str = ".pdf", poll_interval: float = 2.0,
+                 settle_seconds: float = 2.0, use_inotify: bool = True):
+        """
+        Initialize the watcher.
+
+        Args:
+            directory (str): Directory to watch
+            suffix (str): Only files whose name ends with this (case-insensitive) are reported
+            poll_interval (float): Seconds between rescans when polling
+            settle_seconds (float): Seconds a file must stay unmodified before it is reported
+            use_inotify (bool): Use inotify where available
+        """
+        self.directory = directory
+        self.suffix = suffix.lower()
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+        self._fd = _inotify(directory) if use_inotify else None
+        self.backend = "inotify" if self._fd is not None else "polling"
+        # Fingerprint of each file as last reported
+        self._reported: Dict[str, Tuple[int, int]] = {}
+
+    def _scan(self) -> Tuple[List[str], float]:
+        """
+        Compare the directory with what was reported before.
+
+        Returns:
+            Tuple[List[str], float]: Settled new or changed files, and the seconds until the next
+                unsettled one settles (None if there is none)
+        """
+        now = time.time()
+        ready, settle_in, present = [], None, set()
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.name.lower().endswith(self.suffix) or not entry.is_file():
+                    continue
+                present.add(entry.path)
+                stat = entry.stat()
+                fingerprint = (stat.st_size, stat.st_mtime_ns)
+                if self._reported.get(entry.path) == fingerprint:
+                    continue
+                age = now - stat.st_mtime
+                if age < self.settle_seconds:
+                    wait = self.settle_seconds - age
+                    settle_in = wait if settle_in is None else min(settle_in, wait)
+                    continue
+                self._reported[entry.path] = fingerprint
+                ready.append(entry.path)
+        for path in list(self._reported):
+            if path not in present:
+                del self._reported[path]
+        return sorted(ready), settle_in
+
+    def _wait(self, seconds: float) -> None:
+        if self._fd is None:
+            time.sleep(seconds)
+            return
+        if select.select([self._fd], [], [], seconds)[0]:
+            # The events themselves are not needed; the directory is rescanned
+            try:
+                while os.read(self._fd, 65536):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def changes(self, timeout: float) -> List[str]:
+        """
+        Wait for new or changed files.
+
+        The first call reports every file already in the directory.
+
+        Args:
+            timeout (float): Maximum seconds to wait
+
+        Returns:
+            List[str]: Paths of the new or changed files, empty if there were none before the timeout
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            ready, settle_in = self._scan()
+            remaining = deadline - time.monotonic()
+            if ready or remaining <= 0:
+                return ready
+            wait = remaining if self._fd is not None else min(remaining, self.poll_interval)
+            if settle_in is not None:
+                wait = min(wait, settle_in + 0.05)
+            self._wait(wait)
+
+    def close(self) -> None:
+        """Release the inotify descriptor."""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None